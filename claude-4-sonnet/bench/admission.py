@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+LIGHT_INPUT = "Pay invoices tomorrow at 09:00"
+HEAVY_INPUT = ("Review the quarterly report with the client team and prepare the notes tomorrow at 10:00. " * 44)[:4000]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run_mode(admission: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    from services.admission_controller import AdmissionController, OverloadedError
+    from services.llm_backend import estimate_tokens
+    from services.llm_service import llm_service
+    from services.task_parser import task_parser
+
+    llm_service._models_ready = False
+    llm_service._startup_future = None
+    await llm_service.start()
+    controller = AdmissionController(
+        max_concurrent=args.cap if admission else 0,
+        max_queue=args.queue,
+        wait_slo_seconds=args.slo,
+        quantum_tokens=args.quantum,
+        initial_service_seconds=args.service_guess
+    )
+    latencies: Dict[str, List[float]] = {"light": [], "heavy": []}
+    shed_latencies: List[float] = []
+    shed = {"light": 0, "heavy": 0}
+    end = time.perf_counter() + args.seconds
+
+    async def session(kind: str, user_key: Any, text: str, think: float):
+        while time.perf_counter() < end:
+            started = time.perf_counter()
+            try:
+                async with controller.admit(user_key, estimate_tokens(text)):
+                    await task_parser.parse_tasks(text)
+                latencies[kind].append(time.perf_counter() - started)
+            except OverloadedError:
+                shed[kind] += 1
+                shed_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.retry_after)
+            await asyncio.sleep(think)
+
+    sessions = [session("light", user, LIGHT_INPUT, args.think) for user in range(args.light_users)]
+    sessions += [session("heavy", "heavy", HEAVY_INPUT, 0.0) for _ in range(args.heavy_sessions)]
+    await asyncio.gather(*sessions)
+    return {
+        "admission": "on" if admission else "off",
+        "light_served": len(latencies["light"]),
+        "light_p50_ms": round(_percentile(latencies["light"], 0.5) * 1000),
+        "light_p99_ms": round(_percentile(latencies["light"], 0.99) * 1000),
+        "light_shed": shed["light"],
+        "heavy_served": len(latencies["heavy"]),
+        "heavy_p50_ms": round(_percentile(latencies["heavy"], 0.5) * 1000),
+        "heavy_shed": shed["heavy"],
+        "shed_p50_ms": round(_percentile(shed_latencies, 0.5) * 1000),
+        "shed_p99_ms": round(_percentile(shed_latencies, 0.99) * 1000)
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    return [await run_mode(False, args), await run_mode(True, args)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Light users next to one user flooding long messages, with and without the admission controller"
+    )
+    parser.add_argument("--light-users", type=int, default=20)
+    parser.add_argument("--heavy-sessions", type=int, default=40, help="concurrent loops of the single heavy user")
+    parser.add_argument("--think", type=float, default=0.5, help="pause between a light user's requests, seconds")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="pause after a busy reply, seconds")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--provider-limit", type=int, default=16, help="LLM_MAX_CONCURRENCY, stands in for provider capacity")
+    parser.add_argument("--latency", default="lognormal:0.5,0.3")
+    parser.add_argument("--cap", type=int, default=16)
+    parser.add_argument("--queue", type=int, default=128)
+    parser.add_argument("--slo", type=float, default=2.0)
+    parser.add_argument("--quantum", type=int, default=500)
+    parser.add_argument("--service-guess", type=float, default=0.5)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": args.latency,
+        "LLM_SYNTHETIC_ERROR_RATE": "0",
+        "LLM_HEDGE_QUANTILE": "0",
+        "LLM_ROUTES": "",
+        "LLM_MAX_CONCURRENCY": str(args.provider_limit),
+        "LLM_DEADLINE_SECONDS": "120"
+    })
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:admission-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-admission-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"{'admission':<10} {'light':>6} {'p50ms':>7} {'p99ms':>7} {'shed':>5} {'heavy':>6} {'p50ms':>7} {'shed':>5} {'shed p50ms':>11} {'shed p99ms':>11}")
+    for row in rows:
+        print(
+            f"{row['admission']:<10} {row['light_served']:>6} {row['light_p50_ms']:>7} {row['light_p99_ms']:>7} "
+            f"{row['light_shed']:>5} {row['heavy_served']:>6} {row['heavy_p50_ms']:>7} {row['heavy_shed']:>5} {row['shed_p50_ms']:>11} {row['shed_p99_ms']:>11}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
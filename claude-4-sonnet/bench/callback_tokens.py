@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+BOT_TOKEN = "123456:callback-bench"
+TTL_SECONDS = 172800.0
+DESCRIPTIONS = [
+    "Pay invoices", "Gym", "Call mom", "Send client report", "Water plants", "Review code", "Dentist appointment",
+    "Sprint planning", "Laundry", "Deploy release", "Renew the car insurance policy", "Standup"
+]
+RECURRENCES = [("none", 40), ("daily", 20), ("weekly", 10), ("weekly_0_2_4", 8), ("monthly", 6),
+               ("FREQ=WEEKLY;INTERVAL=2;BYDAY=TU", 4)]
+# Fixed part of the tightest hand-packed task: classification, time, date and recurrence code, description length
+PACKED_TASK_BYTES = 7
+BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def build_task_lists(count: int, seed: int) -> List[List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    task_lists = []
+    for _ in range(count):
+        tasks = []
+        for _ in range(rng.choice([1, 1, 2, 2, 3, 3, 4, 5, 8])):
+            recurrence = rng.choices([r for r, _ in RECURRENCES], [w for _, w in RECURRENCES])[0]
+            tasks.append({
+                "description": rng.choice(DESCRIPTIONS), "classification": rng.choice(["work", "personal"]),
+                "time": rng.choice(["09:00", "08:30", "18:00", None]),
+                "date": "2026-11-02" if recurrence == "none" else None, "recurrence": recurrence
+            })
+        task_lists.append(tasks)
+    return task_lists
+
+
+def _us_per_call(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def _service(directory: str, name: str):
+    from services.callback_tokens import CallbackTokenService
+
+    service = CallbackTokenService()
+    service.configure("", BOT_TOKEN, os.path.join(directory, name), TTL_SECONDS)
+    return service
+
+
+def measure_tokens(directory: str, calls: int) -> Dict[str, Any]:
+    service = _service(directory, "tokens.db")
+    digest = os.urandom(12)
+    user_id = 7_000_000_000
+    now = int(time.time())
+    approve = service.sign(user_id, "approve", digest, now, 1)
+    forged = approve[:-1] + ("A" if approve[-1] != "A" else "B")
+    result = {
+        "token_bytes": len(approve.encode("utf-8")),
+        "sign_us": _us_per_call(lambda: service.sign(user_id, "approve", digest, now, 1), calls),
+        "verify_us": _us_per_call(lambda: service.verify(user_id, approve, now), calls),
+        "verify_forged_us": _us_per_call(lambda: service.verify(user_id, forged, now), calls)
+    }
+    service.close()
+    return result
+
+
+def measure_rejections(directory: str, samples: int, seed: int) -> Dict[str, Any]:
+    """Every single-character change, another user, another key and an expired token must all be refused"""
+    from services.callback_tokens import TOKEN_PREFIX, CallbackTokenService
+
+    rng = random.Random(seed)
+    service = _service(directory, "rejections.db")
+    other_key = CallbackTokenService()
+    other_key.configure("another-secret", BOT_TOKEN, ":memory:", TTL_SECONDS)
+    results: Counter = Counter()
+    tampered = 0
+    now = time.time()
+    for _ in range(samples):
+        user_id = rng.randint(1, 1 << 40)
+        token = service.sign(user_id, "approve", os.urandom(12), int(now), rng.getrandbits(32))
+        encoded = token[len(TOKEN_PREFIX):]
+        for position in range(len(encoded)):
+            changed = encoded[:position] + rng.choice(BASE64_ALPHABET.replace(encoded[position], "")) + encoded[position + 1:]
+            raw = base64.urlsafe_b64decode(changed + "=" * (-len(changed) % 4))
+            if base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii") != changed:
+                # Only the unused low bits of the last character changed, so the bytes are the same
+                continue
+            tampered += 1
+            results[service.verify(user_id, TOKEN_PREFIX + changed, now)[0]] += 1
+        results["other user: " + service.verify(user_id + 1, token, now)[0]] += 1
+        results["other key: " + other_key.verify(user_id, token, now)[0]] += 1
+        results["after ttl: " + service.verify(user_id, token, now + TTL_SECONDS + 1)[0]] += 1
+    service.close()
+    other_key.close()
+    accepted = sum(count for result, count in results.items() if result.endswith("ok"))
+    return {"tampered": tampered, "results": dict(results), "accepted": accepted}
+
+
+def measure_store(directory: str, task_lists: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    from services.callback_tokens import CallbackClaim, snapshot_blob
+
+    service = _service(directory, "store.db")
+    store = service.store
+    now = time.time()
+    started = time.perf_counter()
+    digests = [store.save(tasks, now) for tasks in task_lists]
+    save_us = (time.perf_counter() - started) / len(task_lists) * 1e6
+    started = time.perf_counter()
+    for digest in digests:
+        store.load(digest)
+    load_us = (time.perf_counter() - started) / len(digests) * 1e6
+    started = time.perf_counter()
+    for index, digest in enumerate(digests):
+        store.mark_answered(index, CallbackClaim("approve", 1, index, digest))
+    answer_us = (time.perf_counter() - started) / len(digests) * 1e6
+    rows, answered = store.count()
+    service.close()
+    return {
+        "save_us": round(save_us, 1),
+        "load_us": round(load_us, 1),
+        "answer_us": round(answer_us, 1),
+        "rows": rows,
+        "answered": answered,
+        "body_bytes_mean": round(statistics.mean(len(snapshot_blob(tasks)[1]) for tasks in task_lists), 1)
+    }
+
+
+def measure_inline(task_lists: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Could the task list ride in the token instead of the digest? 62 base64 characters leave 46 raw bytes"""
+    from services.callback_tokens import MAC_BYTES, TOKEN_HEADER, TOKEN_PREFIX
+
+    budget = (64 - len(TOKEN_PREFIX)) * 3 // 4 - TOKEN_HEADER.size - MAC_BYTES
+    packed = []
+    deflated = []
+    for tasks in task_lists:
+        packed.append(sum(PACKED_TASK_BYTES + len(task["description"].encode("utf-8")) for task in tasks))
+        compact = [[t["description"], t["classification"], t["time"], t["date"], t["recurrence"]] for t in tasks]
+        deflated.append(len(zlib.compress(json.dumps(compact, separators=(",", ":")).encode("utf-8"), 9)))
+    return {
+        "budget_bytes": budget,
+        "fit_packed": round(sum(size <= budget for size in packed) / len(packed), 3),
+        "fit_deflated": round(sum(size <= budget for size in deflated) / len(deflated), 3),
+        "packed_median": statistics.median(packed),
+        "deflated_median": statistics.median(deflated)
+    }
+
+
+def _press_buttons(path: str, presses: List[Tuple[int, int, str]], seed: int) -> Tuple[List[Tuple[int, str, int]], float]:
+    """Another bot instance: its own process, key derivation and database connection"""
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", BOT_TOKEN)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-callback-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+    from handlers.messages import _generate_final_output
+    from services.callback_tokens import CallbackTokenService
+    from services.message_paginator import message_paginator
+
+    service = CallbackTokenService()
+    service.configure("", BOT_TOKEN, path, TTL_SECONDS)
+    order = presses[:]
+    random.Random(seed).shuffle(order)
+
+    async def press_all() -> List[Tuple[int, str, int]]:
+        outcomes = []
+        for proposal, user_id, token in order:
+            result, claim, tasks = await service.redeem(user_id, token)
+            rendered = 0
+            if result == "ok" and claim.action == "approve":
+                page = await message_paginator.render_page(_generate_final_output(tasks), 0)
+                rendered = len(tasks) if page["text"] else 0
+            outcomes.append((proposal, result, rendered))
+        return outcomes
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(press_all())
+    elapsed = time.perf_counter() - started
+    service.close()
+    return outcomes, elapsed
+
+
+def measure_instances(directory: str, task_lists: List[List[Dict[str, Any]]], instances: int) -> Dict[str, Any]:
+    """One instance shows the proposals and exits; then every button is pressed on every other instance at once"""
+    path = os.path.join(directory, "shared.db")
+    issuer = _service(directory, "shared.db")
+
+    async def show_all() -> List[Tuple[int, int, str]]:
+        presses = []
+        for proposal, tasks in enumerate(task_lists):
+            user_id = 100000 + proposal
+            approve, reject = await issuer.create_tokens(user_id, tasks)
+            presses += [(proposal, user_id, approve), (proposal, user_id, reject)]
+        return presses
+
+    presses = asyncio.run(show_all())
+    issuer.close()
+
+    with ProcessPoolExecutor(instances) as pool:
+        parts = list(pool.map(_press_buttons, [path] * instances, [presses] * instances, range(instances)))
+    results: Counter = Counter()
+    wins: Counter = Counter()
+    rendered = 0
+    for outcomes, _ in parts:
+        for proposal, result, tasks in outcomes:
+            results[result] += 1
+            rendered += tasks
+            if result == "ok":
+                wins[proposal] += 1
+    return {
+        "instances": instances,
+        "proposals": len(task_lists),
+        "presses": len(presses) * instances,
+        "results": dict(results),
+        "answered_once": sum(1 for proposal in range(len(task_lists)) if wins[proposal] == 1),
+        "answered_more": sum(1 for count in wins.values() if count > 1),
+        "tasks_rendered": rendered,
+        # Time inside each instance, approvals rendered, while the others contend for the same file
+        "us_per_press": round(sum(elapsed for _, elapsed in parts) / (len(presses) * instances) * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signed approval callbacks: size, cost, rejections and cross-instance use")
+    parser.add_argument("--snapshots", type=int, default=20000)
+    parser.add_argument("--proposals", type=int, default=2000)
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--tamper-samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", BOT_TOKEN)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-callback-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    task_lists = build_task_lists(args.snapshots, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        result = {
+            "tokens": measure_tokens(directory, args.calls),
+            "rejections": measure_rejections(directory, args.tamper_samples, args.seed),
+            "store": measure_store(directory, task_lists),
+            "inline": measure_inline(task_lists),
+            "instances": measure_instances(directory, task_lists[:args.proposals], args.instances)
+        }
+
+    tokens, rejections, store = result["tokens"], result["rejections"], result["store"]
+    inline, instances = result["inline"], result["instances"]
+    print(
+        f"token: {tokens['token_bytes']} bytes of callback_data, sign {tokens['sign_us']} us, "
+        f"verify {tokens['verify_us']} us (forged {tokens['verify_forged_us']} us)"
+    )
+    print(
+        f"rejections: {rejections['tampered']} tampered tokens plus other user/key/expired, "
+        f"{rejections['accepted']} accepted {rejections['results']}"
+    )
+    print(
+        f"store: save {store['save_us']} us, load {store['load_us']} us, mark answered {store['answer_us']} us, "
+        f"{store['body_bytes_mean']} bytes per snapshot, {store['rows']} rows for {args.snapshots} lists"
+    )
+    print(
+        f"inline: {inline['budget_bytes']} bytes free; {inline['fit_packed']:.1%} of lists fit hand-packed, "
+        f"{inline['fit_deflated']:.1%} deflated (medians {inline['packed_median']} / {inline['deflated_median']})"
+    )
+    print(
+        f"instances: {instances['instances']} processes, {instances['presses']} presses on "
+        f"{instances['proposals']} proposals -> {instances['answered_once']} answered once, "
+        f"{instances['answered_more']} more than once, {instances['tasks_rendered']} tasks rendered, "
+        f"{instances['us_per_press']} us/press {instances['results']}"
+    )
+    print(json.dumps(result))
+    if rejections["accepted"] or instances["answered_more"] or instances["answered_once"] != instances["proposals"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
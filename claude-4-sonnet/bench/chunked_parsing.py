@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+VERBS = ["Call", "Email", "Pay", "Review", "Book", "Buy", "Clean", "Fix", "Plan", "Visit"]
+SUBJECTS = [
+    "plumber", "landlord", "insurance", "quarterly report", "dentist", "groceries", "garage", "bike", "trip",
+    "grandma", "client deck", "tax forms"
+]
+DETAILS = [
+    "about the leaking pipe under the sink, ask for a quote for the replacement parts",
+    "to go over the open points from last week, bring the notes from the previous meeting",
+    "before the deadline, check the numbers twice so nothing bounces back",
+    "with the new schedule in mind, keep it short because the afternoon is packed"
+]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def build_message(task_count: int) -> str:
+    """A pasted weekly plan: every third task is a list item, the rest run on as sentences"""
+    lines: List[str] = []
+    paragraph: List[str] = []
+    for index in range(task_count):
+        task = (
+            f"{VERBS[index % len(VERBS)]} the {SUBJECTS[(index // len(VERBS)) % len(SUBJECTS)]} "
+            f"{DETAILS[index % len(DETAILS)]} tomorrow at {8 + index % 12:02d}:{(index * 7) % 60:02d}"
+        )
+        if index % 3 == 0:
+            if paragraph:
+                lines.append(" ".join(paragraph))
+                paragraph = []
+            lines.append(f"- {task}")
+        else:
+            paragraph.append(f"{task}.")
+    if paragraph:
+        lines.append(" ".join(paragraph))
+    return "\n".join(lines)
+
+
+async def measure(text: str, repeats: int) -> Dict[str, Any]:
+    from services.task_parser import task_parser
+
+    latencies = []
+    parsed_count = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = await task_parser.parse_tasks(text)
+        latencies.append(time.perf_counter() - started)
+        parsed_count = -1 if result["error"] else len(result["tasks"])
+    chunks = task_parser.splitter.split(text)
+    return {
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+        "tasks": parsed_count,
+        "chunks": len(chunks) if chunks else 1
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from services.input_splitter import InputSplitter
+    from services.llm_service import llm_service
+    from services.task_parser import task_parser
+
+    await llm_service.start()
+    rows = []
+    for task_count in [int(value) for value in args.tasks.split(",")]:
+        text = build_message(task_count)
+        task_parser._splitter = InputSplitter(min_chars=0)
+        single = await measure(text, args.repeats)
+        task_parser._splitter = InputSplitter(args.min_chars, args.target_chars, args.max_chunks)
+        chunked = await measure(text, args.repeats)
+        rows.append({"tasks": task_count, "chars": len(text), "single": single, "chunked": chunked})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="parse_tasks latency against task count, one call versus parallel chunks, on the synthetic model"
+    )
+    parser.add_argument("--tasks", default="1,5,10,20,30")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", default="lognormal:0.4,0.2", help="per-call overhead")
+    parser.add_argument("--token-seconds", type=float, default=0.005, help="decode time per output token")
+    parser.add_argument("--min-chars", type=int, default=800)
+    parser.add_argument("--target-chars", type=int, default=600)
+    parser.add_argument("--max-chunks", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": args.latency,
+        "LLM_SYNTHETIC_TOKEN_SECONDS": str(args.token_seconds),
+        "LLM_SYNTHETIC_ERROR_RATE": "0",
+        "LLM_HEDGE_QUANTILE": "0",
+        "LLM_ROUTES": "",
+        "LLM_DEADLINE_SECONDS": "300"
+    })
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:chunked-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-chunked-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"{'tasks':>5} {'chars':>6} {'single p50ms':>13} {'chunked p50ms':>14} {'chunks':>7} {'speedup':>8} {'parsed s/c':>11}")
+    for row in rows:
+        single, chunked = row["single"], row["chunked"]
+        parsed = f"{single['tasks']}/{chunked['tasks']}"
+        print(
+            f"{row['tasks']:>5} {row['chars']:>6} {single['p50_ms']:>13} {chunked['p50_ms']:>14} {chunked['chunks']:>7} "
+            f"{single['p50_ms'] / max(1, chunked['p50_ms']):>8.2f} {parsed:>11}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+TASK_INPUT = "Pay invoices tomorrow at 09:00, gym every Monday and Wednesday at 18:00"
+# (phase, primary error rate, primary latency); the fallback stays healthy throughout
+PHASES: List[Tuple[str, float, str]] = [
+    ("healthy", 0.0, "lognormal:0.2,0.2"),
+    ("outage", 1.0, "lognormal:0.2,0.2"),
+    ("recovered", 0.0, "lognormal:0.2,0.2"),
+    ("slow", 0.0, "fixed:3"),
+    ("recovered", 0.0, "lognormal:0.2,0.2")
+]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _call_counts(llm_service) -> Dict[str, int]:
+    stats = llm_service.get_circuit_stats()
+    return {name: model_stats["successes"] + model_stats["errors"] for name, model_stats in stats.items()}
+
+
+async def run_mode(enabled: bool, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from services.llm_backend import parse_latency_distribution
+    from services.llm_service import FALLBACK_MODEL_NAME, PRIMARY_MODEL_NAME, llm_service
+    from services.task_parser import task_parser
+
+    os.environ["LLM_CIRCUIT_ENABLED"] = "true" if enabled else "false"
+    llm_service._models_ready = False
+    llm_service._startup_future = None
+    await llm_service.start()
+    primary_breaker = llm_service._get_breaker(PRIMARY_MODEL_NAME)
+
+    rows = []
+    for phase_name, error_rate, latency_spec in PHASES:
+        llm_service._primary_model.error_rate = error_rate
+        llm_service._primary_model.latency = parse_latency_distribution(latency_spec)
+        before = _call_counts(llm_service)
+        transitions: List[str] = []
+        latencies: List[float] = []
+        failures = 0
+        phase_end = time.perf_counter() + args.phase_seconds
+
+        async def user_loop():
+            nonlocal failures
+            while time.perf_counter() < phase_end:
+                started = time.perf_counter()
+                result = await task_parser.parse_tasks(TASK_INPUT)
+                latencies.append(time.perf_counter() - started)
+                failures += bool(result.get("error"))
+                if not transitions or transitions[-1] != primary_breaker.state:
+                    transitions.append(primary_breaker.state)
+                await asyncio.sleep(args.think)
+
+        await asyncio.gather(*[user_loop() for _ in range(args.users)])
+        after = _call_counts(llm_service)
+        primary_calls = after.get(PRIMARY_MODEL_NAME, 0) - before.get(PRIMARY_MODEL_NAME, 0)
+        fallback_calls = after.get(FALLBACK_MODEL_NAME, 0) - before.get(FALLBACK_MODEL_NAME, 0)
+        rows.append({
+            "breaker": "on" if enabled else "off",
+            "phase": phase_name,
+            "requests": len(latencies),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+            "failures": failures,
+            "primary_calls": primary_calls,
+            "fallback_calls": fallback_calls,
+            "primary_states": "->".join(transitions)
+        })
+    return rows
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    return await run_mode(False, args) + await run_mode(True, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Primary outage and slowdown against the circuit breaker, using the synthetic model's failure modes"
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--think", type=float, default=0.1, help="pause between a user's requests, seconds")
+    parser.add_argument("--phase-seconds", type=float, default=6.0)
+    parser.add_argument("--window", type=float, default=5.0, help="LLM_CIRCUIT_WINDOW_SECONDS")
+    parser.add_argument("--min-calls", type=int, default=5)
+    parser.add_argument("--open-seconds", type=float, default=2.0)
+    parser.add_argument("--slow-call", type=float, default=2.0)
+    parser.add_argument("--deadline", type=float, default=20.0)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": "lognormal:0.2,0.2",
+        "LLM_SYNTHETIC_ERROR_RATE": "0",
+        "LLM_HEDGE_QUANTILE": "0",
+        "LLM_ROUTES": "",
+        "LLM_DEADLINE_SECONDS": str(args.deadline),
+        "LLM_CIRCUIT_WINDOW_SECONDS": str(args.window),
+        "LLM_CIRCUIT_MIN_CALLS": str(args.min_calls),
+        "LLM_CIRCUIT_OPEN_SECONDS": str(args.open_seconds),
+        "LLM_CIRCUIT_SLOW_CALL_SECONDS": str(args.slow_call)
+    })
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:circuit-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-circuit-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"{'breaker':<8} {'phase':<10} {'reqs':>5} {'p50ms':>7} {'p99ms':>7} {'fail':>5} {'primary':>8} {'fallback':>9}  primary state")
+    for row in rows:
+        print(
+            f"{row['breaker']:<8} {row['phase']:<10} {row['requests']:>5} {row['p50_ms']:>7} {row['p99_ms']:>7} "
+            f"{row['failures']:>5} {row['primary_calls']:>8} {row['fallback_calls']:>9}  {row['primary_states']}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
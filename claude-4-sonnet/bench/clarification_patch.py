@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+REPLY = "at 18:30"
+# Whole-list round trip this replaced: every task goes out and comes back, whatever is open
+FULL_LIST_SYSTEM_PROMPT = """You are updating tasks with clarification responses.
+
+The user message is a JSON object: "questions" were asked, "response" is the user's answer,
+"tasks" are the original tasks. Fill in the missing information from the response and return
+the updated tasks as a JSON array in the same format as the original tasks, nothing else."""
+
+
+def _token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        from services.llm_backend import estimate_tokens
+        return estimate_tokens
+
+
+def make_batch(size: int, open_tasks: int) -> List[Dict[str, Any]]:
+    tasks = []
+    for index in range(size):
+        is_open = index >= size - open_tasks
+        description = f"Task number {index + 1} for the weekly plan"
+        tasks.append({
+            "description": description,
+            "classification": "work" if index % 2 else "personal",
+            "time": None if is_open else f"{8 + index % 10:02d}:00",
+            "date": f"2025-01-{1 + index % 28:02d}",
+            "recurrence": "weekly_0_2_4" if index % 3 == 0 else "none",
+            "needs_clarification": [f"What time should \"{description}\" be scheduled?"] if is_open else [],
+            "confidence": "medium" if is_open else "high"
+        })
+    return tasks
+
+
+def full_list_tokens(tasks: List[Dict[str, Any]], count_tokens: Callable[[str], int]) -> Dict[str, int]:
+    from services.prompts import compact_json
+    from services.synthetic_llm import _extract_time
+
+    questions = [question for task in tasks for question in task["needs_clarification"]]
+    updated_tasks = [
+        dict(task, time=task["time"] or _extract_time(REPLY), needs_clarification=[]) for task in tasks
+    ]
+    request = compact_json({"questions": questions, "response": REPLY, "tasks": tasks})
+    return {
+        "input": count_tokens(FULL_LIST_SYSTEM_PROMPT) + count_tokens(request),
+        "output": count_tokens(compact_json(updated_tasks))
+    }
+
+
+def patch_tokens(tasks: List[Dict[str, Any]], count_tokens: Callable[[str], int]) -> Dict[str, int]:
+    from services.clarification_service import clarification_service
+    from services.prompts import CLARIFICATION_SYSTEM_PROMPT, compact_json, render_clarification_message
+    from services.synthetic_llm import clarification_patch
+
+    open_questions = clarification_service.collect_open_questions(tasks)
+    return {
+        "input": count_tokens(CLARIFICATION_SYSTEM_PROMPT) + count_tokens(render_clarification_message(REPLY, open_questions)),
+        "output": count_tokens(compact_json(clarification_patch(open_questions, REPLY)))
+    }
+
+
+async def measure_local(tasks: List[Dict[str, Any]], rounds: int) -> float:
+    """Time spent in the service around a zero-latency model: prompt building, patch application, revalidation"""
+    from services.clarification_service import clarification_service
+
+    _, clarifications = clarification_service.extract_clarifications(tasks)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = await clarification_service.process_clarification_response(REPLY, clarifications, tasks)
+        assert result["success"] and not result["still_needs_clarification"], result
+    return (time.perf_counter() - started) / rounds
+
+
+def model_seconds(tokens: Dict[str, int], args: argparse.Namespace) -> float:
+    return args.first_token + tokens["input"] / args.prefill_rate + tokens["output"] / args.decode_rate
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from services.llm_service import llm_service
+
+    await llm_service.start()
+    count_tokens = _token_counter()
+    rows = []
+    for size in [int(value) for value in args.sizes.split(",")]:
+        open_tasks = max(1, round(size * args.open_share))
+        tasks = make_batch(size, open_tasks)
+        full_list = full_list_tokens(tasks, count_tokens)
+        patch = patch_tokens(tasks, count_tokens)
+        local_seconds = await measure_local(tasks, args.rounds)
+        rows.append({
+            "tasks": size,
+            "open": open_tasks,
+            "full_in": full_list["input"],
+            "full_out": full_list["output"],
+            "patch_in": patch["input"],
+            "patch_out": patch["output"],
+            "full_ms": round(model_seconds(full_list, args) * 1000),
+            "patch_ms": round((model_seconds(patch, args) + local_seconds) * 1000),
+            "local_ms": round(local_seconds * 1000, 2)
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Clarification request size and latency, whole-list rewrite versus patch over the open questions"
+    )
+    parser.add_argument("--sizes", default="1,2,5,10,20,30,50")
+    parser.add_argument("--open-share", type=float, default=0.1, help="share of tasks with an open question, at least one")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--first-token", type=float, default=0.4, help="modelled time to first token, seconds")
+    parser.add_argument("--prefill-rate", type=float, default=20000.0, help="modelled input tokens per second")
+    parser.add_argument("--decode-rate", type=float, default=60.0, help="modelled output tokens per second")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": "none",
+        "LLM_SYNTHETIC_ERROR_RATE": "0",
+        "LLM_ROUTES": ""
+    })
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:clarification-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-clarification-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"{'tasks':>5} {'open':>5} {'full in':>8} {'full out':>9} {'patch in':>9} {'patch out':>10} {'full ms':>8} {'patch ms':>9} {'local ms':>9}")
+    for row in rows:
+        print(
+            f"{row['tasks']:>5} {row['open']:>5} {row['full_in']:>8} {row['full_out']:>9} {row['patch_in']:>9} "
+            f"{row['patch_out']:>10} {row['full_ms']:>8} {row['patch_ms']:>9} {row['local_ms']:>9}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+COMPARED_FIELDS = ("description", "classification", "time", "date", "recurrence")
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "golden.jsonl"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _resolve_expected(value: Any, today: datetime) -> Any:
+    """Expands 'today+N' placeholders so relative-date cases stay valid on any run date"""
+    if isinstance(value, str) and value.startswith("today"):
+        offset = int(value[5:] or 0)
+        return (today + timedelta(days=offset)).strftime("%Y-%m-%d")
+    return value
+
+
+def _field_matches(field: str, expected: Any, actual: Any) -> bool:
+    if field == "description":
+        return str(expected).strip().lower() == str(actual or "").strip().lower()
+    if field == "recurrence":
+        return (expected or "none") == (actual or "none")
+    return expected == actual
+
+
+def _load_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as jsonl_file:
+        return [json.loads(line) for line in jsonl_file if line.strip()]
+
+
+async def evaluate(corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from services.llm_backend import usage_tracker
+    from services.llm_service import llm_service
+    from services.task_parser import task_parser
+
+    await llm_service.start()
+    usage_tracker.reset()
+
+    field_hits = {field: 0 for field in COMPARED_FIELDS}
+    expected_task_total = 0
+    exact_batches = 0
+    count_matches = 0
+    latencies: List[float] = []
+    case_results: List[Dict[str, Any]] = []
+    today = datetime.utcnow()
+
+    for case in corpus:
+        before = usage_tracker.get_stats()
+        started = time.perf_counter()
+        result = await task_parser.parse_tasks(case["input"])
+        latencies.append(time.perf_counter() - started)
+        after = usage_tracker.get_stats()
+
+        actual_tasks = result.get("tasks", [])
+        expected_tasks = case["expected"]
+        expected_task_total += len(expected_tasks)
+        is_exact = len(actual_tasks) == len(expected_tasks)
+        count_matches += is_exact
+
+        mismatches = []
+        for index, expected_task in enumerate(expected_tasks):
+            actual_task = actual_tasks[index] if index < len(actual_tasks) else {}
+            for field in COMPARED_FIELDS:
+                if field not in expected_task:
+                    continue
+                expected_value = _resolve_expected(expected_task[field], today)
+                if _field_matches(field, expected_value, actual_task.get(field)):
+                    field_hits[field] += 1
+                else:
+                    is_exact = False
+                    mismatches.append({"task": index + 1, "field": field, "expected": expected_value, "actual": actual_task.get(field)})
+
+        exact_batches += is_exact
+        case_results.append({
+            "id": case.get("id"),
+            "exact": is_exact,
+            "error": result.get("error"),
+            "latency_ms": round(latencies[-1] * 1000, 1),
+            "input_tokens": after["input_tokens"] - before["input_tokens"],
+            "output_tokens": after["output_tokens"] - before["output_tokens"],
+            "mismatches": mismatches[:5]
+        })
+
+    usage = usage_tracker.get_stats()
+    case_count = len(corpus)
+    return {
+        "prompt_version": llm_service.prompts.version,
+        "backend": llm_service.settings.llm_backend,
+        "inputs": case_count,
+        "exact_batch_rate": round(exact_batches / case_count, 3),
+        "task_count_rate": round(count_matches / case_count, 3),
+        "field_accuracy": {field: round(field_hits[field] / expected_task_total, 3) for field in COMPARED_FIELDS},
+        "latency_ms": {
+            "mean": round(sum(latencies) / case_count * 1000, 1),
+            "p50": round(_percentile(latencies, 0.5) * 1000, 1),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 1)
+        },
+        "tokens": {
+            "input": usage["input_tokens"],
+            "output": usage["output_tokens"],
+            "per_input": round((usage["input_tokens"] + usage["output_tokens"]) / case_count, 1)
+        },
+        "llm_calls": usage["calls"],
+        "llm_errors": usage["errors"],
+        "routes": llm_service.router.get_stats() if llm_service.router else None,
+        "cases": case_results
+    }
+
+
+def _format_history_table(history: List[Dict[str, Any]]) -> str:
+    latest_runs: Dict[tuple, Dict[str, Any]] = {}
+    for run in history:
+        latest_runs[(run["prompt_version"], run["backend"])] = run
+    lines = [f"{'version':<10} {'backend':<10} {'exact':>6} {'count':>6} {'p50ms':>8} {'p95ms':>8} {'tok/in':>8}"]
+    for (version, backend), run in sorted(latest_runs.items()):
+        lines.append(
+            f"{version:<10} {backend:<10} {run['exact_batch_rate']:>6} {run['task_count_rate']:>6} "
+            f"{run['latency_ms']['p50']:>8} {run['latency_ms']['p95']:>8} {run['tokens']['per_input']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline accuracy, latency and token evaluation of the task parser")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--backend", choices=["synthetic", "replay", "record", "openai"], default=os.getenv("LLM_BACKEND", "synthetic"))
+    parser.add_argument("--cassette", default=os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.jsonl"))
+    parser.add_argument("--latency", default=os.getenv("LLM_SYNTHETIC_LATENCY", "none"))
+    parser.add_argument("--error-rate", default=os.getenv("LLM_SYNTHETIC_ERROR_RATE", "0"))
+    parser.add_argument("--history", default="", help="append the summary to this JSONL file and print a per-version table")
+    parser.add_argument("--cases", action="store_true", help="include per-case results")
+    parser.add_argument("--routes", default=os.getenv("LLM_ROUTES", ""), help="route spec, e.g. fast=gpt-4o:3,strong=gpt-5:20")
+    parser.add_argument("--prompt-version", default=os.getenv("LLM_PROMPT_VERSION", "v2"))
+    parser.add_argument("--route-log", default="", help="write routing decisions as JSON lines for bench/route_report.py")
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_ERROR_RATE"] = args.error_rate
+    os.environ["LLM_ROUTES"] = args.routes
+    os.environ["LLM_PROMPT_VERSION"] = args.prompt_version
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:offline-eval")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-eval")
+
+    if args.route_log:
+        from utils.logger import JsonLineFormatter
+        route_handler = logging.FileHandler(args.route_log, encoding="utf-8")
+        route_handler.setFormatter(JsonLineFormatter())
+        route_logger = logging.getLogger("services.model_router")
+        route_logger.setLevel(logging.INFO)
+        route_logger.addHandler(route_handler)
+
+    report = asyncio.run(evaluate(_load_jsonl(args.corpus)))
+    case_results = report.pop("cases")
+    if args.cases:
+        report["cases"] = case_results
+    print(json.dumps(report, indent=2))
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as history_file:
+            history_file.write(json.dumps(report) + "\n")
+        print(_format_history_table(_load_jsonl(args.history)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
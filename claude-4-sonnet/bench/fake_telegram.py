@@ -0,0 +1,149 @@
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+from aiohttp import web
+
+BOT_USER = {"id": 42, "is_bot": True, "first_name": "LoadTestBot", "username": "load_test_bot"}
+
+
+class FakeTelegram:
+    def __init__(self, chat_limit: int = 3, global_limit: int = 30, window: float = 1.0, error_rate: float = 0.0, retry_after: int = 1, seed: int = 0) -> None:
+        self.chat_limit = chat_limit
+        self.global_limit = global_limit
+        self.window = window
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._rnd = random.Random(seed)
+        self._chat_hits: Dict[str, Deque[float]] = defaultdict(deque)
+        self._global_hits: Deque[float] = deque()
+        self._message_id = 0
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.rejected = 0
+        self.accepted = 0
+        self.observer: Optional[Callable[[str, int, Dict[str, Any]], None]] = None
+        self.polling = asyncio.Event()
+        self._updates: Deque[Dict[str, Any]] = deque()
+        self._update_id = 0
+        self._has_updates = asyncio.Event()
+        self._files: Dict[str, bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.app = web.Application(client_max_size=64 * 1024 * 1024)
+        self.app.router.add_post("/bot{token}/{method}", self._handle)
+        self.app.router.add_get("/file/bot{token}/{path:.+}", self._download)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sock = site._server.sockets[0]
+        return f"http://{host}:{sock.getsockname()[1]}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"accepted": self.accepted, "rejected_429": self.rejected, "pending_updates": len(self._updates), "calls": dict(self.calls)}
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def push_update(self, update: Dict[str, Any]) -> int:
+        self._update_id += 1
+        update["update_id"] = self._update_id
+        self._updates.append(update)
+        self._has_updates.set()
+        return self._update_id
+
+    def add_file(self, file_id: str, data: bytes) -> None:
+        self._files[file_id] = data
+
+    async def _get_updates(self, form: Any) -> List[Dict[str, Any]]:
+        self.polling.set()
+        offset = int(form.get("offset", "0") or 0)
+        limit = int(form.get("limit", "100") or 100)
+        timeout = float(form.get("timeout", "0") or 0)
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout > 0:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return [self._updates[i] for i in range(min(limit, len(self._updates)))]
+
+    async def _download(self, request: web.Request) -> web.Response:
+        self.calls["download"] += 1
+        data = self._files.get(request.match_info["path"].rsplit("/", 1)[-1])
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(body=data, content_type="application/octet-stream")
+
+    def _limited(self, chat_id: str, now: float) -> bool:
+        hits = self._chat_hits[chat_id]
+        while hits and now - hits[0] > self.window:
+            hits.popleft()
+        while self._global_hits and now - self._global_hits[0] > self.window:
+            self._global_hits.popleft()
+        if len(hits) >= self.chat_limit or len(self._global_hits) >= self.global_limit:
+            return True
+        if self.error_rate and self._rnd.random() < self.error_rate:
+            return True
+        hits.append(now)
+        self._global_hits.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        self.calls[method] += 1
+        form = await request.post()
+        if method == "getupdates":
+            return self._ok(await self._get_updates(form))
+        chat_id = str(form.get("chat_id", "0"))
+        if method in ("sendmessage", "editmessagetext") and self._limited(chat_id, time.monotonic()):
+            self.rejected += 1
+            body = {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+            return web.Response(status=429, text=json.dumps(body), content_type="application/json")
+        self.accepted += 1
+        result = self._result(method, form, chat_id)
+        if self.observer is not None and method in ("sendmessage", "editmessagetext"):
+            self.observer(method, int(chat_id), result)
+        return self._ok(result)
+
+    def _result(self, method: str, form: Any, chat_id: str) -> Any:
+        if method in ("sendmessage", "editmessagetext"):
+            message_id = self.next_message_id() if method == "sendmessage" else int(form.get("message_id", "0"))
+            result = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private"},
+                "from": BOT_USER,
+                "text": form.get("text", ""),
+            }
+            if form.get("reply_markup"):
+                result["reply_markup"] = json.loads(form["reply_markup"])
+            return result
+        if method == "getme":
+            return BOT_USER
+        if method == "deletewebhook":
+            if str(form.get("drop_pending_updates", "")).lower() == "true":
+                self._updates.clear()
+            return True
+        if method == "getfile":
+            file_id = str(form.get("file_id", ""))
+            return {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self._files.get(file_id, b"")), "file_path": f"documents/{file_id}"}
+        return True
+
+    def _ok(self, result: Any) -> web.Response:
+        return web.Response(text=json.dumps({"ok": True, "result": result}), content_type="application/json")
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+TASK_INPUT = "Pay invoices tomorrow at 09:00, gym every Monday and Wednesday at 18:00"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run_scenario(name: str, env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    from services.llm_service import llm_service
+    from services.task_parser import task_parser
+
+    os.environ.update(env)
+    llm_service._models_ready = False
+    llm_service._startup_future = None
+    await llm_service.start()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def parse_once():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            result = await task_parser.parse_tasks(TASK_INPUT)
+            failures += bool(result.get("error"))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[parse_once() for _ in range(args.warmup)])
+    latencies.clear()
+    failures = 0
+    hedger = llm_service._hedgers["primary"]
+    hedger.hedge_count = hedger.hedge_win_count = hedger.deadline_count = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*[parse_once() for _ in range(args.requests)])
+    wall_seconds = time.perf_counter() - started
+    stats = llm_service.get_hedge_stats()["primary"]
+    return {
+        "scenario": name,
+        "requests": args.requests,
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+        "p999_ms": round(_percentile(latencies, 0.999) * 1000),
+        "max_ms": round(max(latencies) * 1000),
+        "failures": failures,
+        "hedges": stats["hedges"],
+        "hedge_wins": stats["hedge_wins"],
+        "extra_load": round(stats["hedges"] / args.requests, 3),
+        "deadlines": stats["deadlines"],
+        "wall_seconds": round(wall_seconds, 1)
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    base_env = {
+        "LLM_DEADLINE_SECONDS": str(args.deadline),
+        "LLM_HEDGE_MIN_DELAY_SECONDS": str(args.min_delay),
+        "LLM_HEDGE_TO_FALLBACK": "false"
+    }
+    scenarios: List[Tuple[str, Dict[str, str]]] = [("no-hedge", {**base_env, "LLM_HEDGE_QUANTILE": "0"})]
+    quantiles = [value.strip() for value in args.quantiles.split(",")]
+    for quantile in quantiles:
+        scenarios.append((f"hedge-p{round(float(quantile) * 100)}", {**base_env, "LLM_HEDGE_QUANTILE": quantile}))
+    scenarios.append((
+        f"hedge-p{round(float(quantiles[0]) * 100)}-fallback",
+        {**base_env, "LLM_HEDGE_QUANTILE": quantiles[0], "LLM_HEDGE_TO_FALLBACK": "true"}
+    ))
+    return [await run_scenario(name, env, args) for name, env in scenarios]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tail latency of task parsing with and without hedged LLM requests under a heavy-tailed synthetic latency model"
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests that fill the latency window first")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", default="tail:0.8,0.3,0.01,30", help="median,sigma,tail share,tail floor in seconds")
+    parser.add_argument("--quantiles", default="0.9,0.95,0.99")
+    parser.add_argument("--min-delay", type=float, default=0.5)
+    parser.add_argument("--deadline", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "synthetic"
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LLM_SYNTHETIC_SEED"] = str(args.seed)
+    os.environ["LLM_ROUTES"] = ""
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:hedging-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-hedging-bench")
+
+    logging.basicConfig(level=logging.CRITICAL)
+    rows = asyncio.run(run(args))
+    print(f"{'scenario':<20} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'p999ms':>7} {'maxms':>7} {'fail':>5} {'hedges':>7} {'wins':>6} {'extra':>6} {'deadl':>6}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<20} {row['p50_ms']:>7} {row['p95_ms']:>7} {row['p99_ms']:>7} {row['p999_ms']:>7} "
+            f"{row['max_ms']:>7} {row['failures']:>5} {row['hedges']:>7} {row['hedge_wins']:>6} {row['extra_load']:>6} {row['deadlines']:>6}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+TASK_INPUT = "Pay invoices tomorrow at 09:00, gym every Monday and Wednesday at 18:00"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _executor_call(messages: list, parser) -> Any:
+    """The previous call path: the synchronous invoke on the default thread pool"""
+    from services.llm_service import llm_service
+
+    structured_model = llm_service._primary_model.with_structured_output(parser.pydantic_object)
+    return await asyncio.get_running_loop().run_in_executor(None, lambda: structured_model.invoke(messages))
+
+
+async def run_scenario(mode: str, users: int, args: argparse.Namespace) -> Dict[str, Any]:
+    from langchain.schema import HumanMessage, SystemMessage
+    from services.llm_service import llm_service
+    from services.task_parser import task_parser
+
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.limit)
+    llm_service._models_ready = False
+    llm_service._startup_future = None
+    await llm_service.start()
+
+    parser = task_parser.parser
+    messages = [SystemMessage(content="Parse tasks from user input. Return JSON only."), HumanMessage(content=TASK_INPUT)]
+    latencies: List[float] = []
+
+    async def user_session():
+        for _ in range(args.calls_per_user):
+            started = time.perf_counter()
+            if mode == "executor":
+                await _executor_call(messages, parser)
+            else:
+                await llm_service.process_tasks_structured(TASK_INPUT, parser)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[user_session() for _ in range(users)])
+    wall_seconds = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "users": users,
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+        "wall_seconds": round(wall_seconds, 2)
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rows = []
+    for users in [int(value) for value in args.users.split(",")]:
+        for mode in ("executor", "native"):
+            rows.append(await run_scenario(mode, users, args))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput of concurrent LLM calls on the thread-pool path versus native ainvoke, with a stubbed model"
+    )
+    parser.add_argument("--users", default="8,32,64,128,256")
+    parser.add_argument("--calls-per-user", type=int, default=2)
+    parser.add_argument("--latency", default="fixed:0.2", help="synthetic per-call model latency")
+    parser.add_argument("--limit", type=int, default=256, help="LLM_MAX_CONCURRENCY for the native path")
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "synthetic"
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_ERROR_RATE"] = "0"
+    os.environ["LLM_HEDGE_QUANTILE"] = "0"
+    os.environ["LLM_ROUTES"] = ""
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:concurrency-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-concurrency-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"default thread pool size: {min(32, (os.cpu_count() or 1) + 4)}")
+    print(f"{'mode':<9} {'users':>6} {'calls':>6} {'req/s':>8} {'p50ms':>7} {'p99ms':>7}")
+    for row in rows:
+        print(f"{row['mode']:<9} {row['users']:>6} {row['calls']:>6} {row['throughput_per_s']:>8} {row['p50_ms']:>7} {row['p99_ms']:>7}")
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from .fake_telegram import FakeTelegram
+
+PLAN_MESSAGES = [
+    "Pay invoices every weekday at 09:00",
+    "Gym every Monday and Wednesday at 19:00, call mom daily at 20:30",
+    "Dentist tomorrow at 14:00 and send client report tomorrow at 10:00",
+    "Water plants every day at 07:30",
+    "Standup every weekday at 09:30, review code every Friday at 16:00, run every Sunday at 08:00"
+]
+VAGUE_MESSAGES = ["Call the dentist tomorrow", "Buy groceries every Saturday", "Sprint planning every Monday"]
+HOLIDAYS_DOCUMENT = json.dumps({"version": 1, "dates": [{"date": "2030-12-25", "name": "Christmas"}]}).encode()
+STAGES = ("document", "task_input", "clarification", "approve", "reject", "clear")
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))] if sorted_samples else 0.0
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight)
+    return weights
+
+
+def _find_button(message: Dict[str, Any], label: str) -> Optional[str]:
+    for row in (message.get("reply_markup") or {}).get("inline_keyboard", []):
+        for button in row:
+            if label in button.get("text", "") and button.get("callback_data"):
+                return button["callback_data"]
+    return None
+
+
+def _is_error_reply(message: Dict[str, Any]) -> bool:
+    return message.get("text", "").startswith("❌")
+
+
+def _peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class ConversationDriver:
+    """Plays scripted users against the bot and times every update until the bot's reply"""
+
+    def __init__(self, fake_telegram: FakeTelegram, step_timeout: float, rng: random.Random):
+        self.fake_telegram = fake_telegram
+        self.step_timeout = step_timeout
+        self.rng = rng
+        self.inboxes: Dict[int, asyncio.Queue] = {}
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.updates_sent = 0
+        self.replies_received = 0
+        fake_telegram.observer = self._on_bot_output
+
+    def _on_bot_output(self, method: str, chat_id: int, message: Dict[str, Any]):
+        self.replies_received += 1
+        inbox = self.inboxes.get(chat_id)
+        if inbox is not None:
+            inbox.put_nowait((time.perf_counter(), method, message))
+
+    def _user(self, user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def _message(self, user_id: int, **fields: Any) -> Dict[str, Any]:
+        return {
+            "message_id": self.fake_telegram.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            **fields
+        }
+
+    def text_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        return {"message": self._message(user_id, text=text)}
+
+    def document_update(self, user_id: int) -> Dict[str, Any]:
+        file_id = f"holidays-{user_id}"
+        self.fake_telegram.add_file(file_id, HOLIDAYS_DOCUMENT)
+        document = {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_name": "holidays.json",
+            "mime_type": "application/json",
+            "file_size": len(HOLIDAYS_DOCUMENT)
+        }
+        return {"message": self._message(user_id, document=document)}
+
+    def callback_update(self, user_id: int, data: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "callback_query": {
+                "id": str(self.fake_telegram.next_message_id()),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": message
+            }
+        }
+
+    async def step(self, user_id: int, stage: str, update: Dict[str, Any], check_error: bool = True) -> Optional[Dict[str, Any]]:
+        inbox = self.inboxes[user_id]
+        while not inbox.empty():
+            inbox.get_nowait()
+
+        started = time.perf_counter()
+        self.fake_telegram.push_update(update)
+        self.updates_sent += 1
+
+        try:
+            received_at, _, message = await asyncio.wait_for(inbox.get(), self.step_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[stage] += 1
+            return None
+
+        self.latencies[stage].append(received_at - started)
+        if check_error and _is_error_reply(message):
+            self.errors[stage] += 1
+            return None
+        return message
+
+    async def run_conversation(self, user_id: int, kind: str) -> str:
+        if kind == "holidays":
+            # The bot answers uploads with an unsupported-content notice, so the reply is timed but not treated as a failure
+            await self.step(user_id, "document", self.document_update(user_id), check_error=False)
+
+        text = self.rng.choice(VAGUE_MESSAGES if kind == "clarify" else PLAN_MESSAGES)
+        reply = await self.step(user_id, "task_input", self.text_update(user_id, text))
+        if reply is not None and kind == "clarify" and _find_button(reply, "Approve") is None:
+            reply = await self.step(user_id, "clarification", self.text_update(user_id, "at 18:30"))
+
+        if reply is None or _find_button(reply, "Approve") is None:
+            await self.step(user_id, "clear", self.text_update(user_id, "/clear"))
+            return "failed" if reply is None else "unresolved"
+
+        if kind == "reject":
+            callback_data = _find_button(reply, "Reject")
+            result = await self.step(user_id, "reject", self.callback_update(user_id, callback_data, reply), check_error=False)
+        else:
+            callback_data = _find_button(reply, "Approve")
+            result = await self.step(user_id, "approve", self.callback_update(user_id, callback_data, reply))
+        return "completed" if result is not None else "failed"
+
+    async def run_user(self, user_id: int, conversations: int, ramp_seconds: float, think_seconds: float, mix: Dict[str, float]):
+        self.inboxes[user_id] = asyncio.Queue()
+        await asyncio.sleep(self.rng.uniform(0, ramp_seconds))
+        kinds, weights = list(mix), list(mix.values())
+        for _ in range(conversations):
+            outcome = await self.run_conversation(user_id, self.rng.choices(kinds, weights)[0])
+            self.outcomes[outcome] += 1
+            if think_seconds > 0:
+                await asyncio.sleep(self.rng.expovariate(1.0 / think_seconds))
+
+    def get_stage_stats(self) -> Dict[str, Any]:
+        stage_stats = {}
+        for stage in STAGES:
+            samples = sorted(self.latencies[stage])
+            total = len(samples) + self.timeouts[stage]
+            if not total:
+                continue
+            stage_stats[stage] = {
+                "count": total,
+                "p50_ms": round(_percentile(samples, 0.5) * 1000, 1),
+                "p90_ms": round(_percentile(samples, 0.9) * 1000, 1),
+                "p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+                "max_ms": round(samples[-1] * 1000, 1) if samples else 0.0,
+                "errors": self.errors[stage],
+                "timeouts": self.timeouts[stage],
+                "error_rate": round((self.errors[stage] + self.timeouts[stage]) / total, 4)
+            }
+        return stage_stats
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fake_telegram = FakeTelegram(
+        chat_limit=args.chat_limit, global_limit=args.global_limit, error_rate=args.error_rate, seed=args.seed
+    )
+    base_url = await fake_telegram.start()
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "123456:LOADTEST",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-load-test"),
+        "TELEGRAM_API_BASE": base_url,
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": args.llm_latency,
+        "LLM_SYNTHETIC_ERROR_RATE": str(args.llm_error_rate),
+        "LLM_SYNTHETIC_SEED": str(args.seed),
+        "SEND_GLOBAL_RATE": str(args.send_global_rate),
+        "SEND_CHAT_RATE": str(args.send_chat_rate),
+        "SEND_CHAT_BURST": str(args.send_chat_burst),
+        "METRICS_PORT": "0",
+        "CALLBACK_DB_PATH": os.getenv("CALLBACK_DB_PATH", ":memory:")
+    })
+
+    import handlers
+    from bot.telegram_bot import TelegramBot
+    from config.settings import get_settings
+    from services.llm_backend import usage_tracker
+    from services.llm_service import llm_service
+
+    bot_instance = TelegramBot(get_settings(), logging.getLogger("telegram_bot"))
+    bot_instance.register_handlers(handlers)
+    await llm_service.start()
+    usage_tracker.reset()
+
+    polling_task = asyncio.create_task(bot_instance.start_polling())
+    await fake_telegram.polling.wait()
+    rss_before = _peak_rss_mb()
+
+    driver = ConversationDriver(fake_telegram, args.timeout, random.Random(args.seed))
+    mix = _parse_mix(args.mix)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            driver.run_user(100000 + index, args.conversations, args.ramp, args.think, mix)
+            for index in range(args.users)
+        ])
+    finally:
+        elapsed = time.perf_counter() - started
+        await bot_instance.dp.stop_polling()
+        await polling_task
+        await bot_instance.stop()
+        await fake_telegram.stop()
+
+    finished = sum(driver.outcomes.values())
+    failures = sum(driver.errors.values()) + sum(driver.timeouts.values())
+    return {
+        "bot": "claude-4-sonnet",
+        "users": args.users,
+        "conversations": dict(driver.outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "conversations_per_s": round(finished / elapsed, 2),
+            "updates_per_s": round(driver.updates_sent / elapsed, 2),
+            "replies_per_s": round(driver.replies_received / elapsed, 2)
+        },
+        "stages": driver.get_stage_stats(),
+        "error_rate": round(failures / driver.updates_sent, 4) if driver.updates_sent else 0.0,
+        "rss_mb": {"before": rss_before, "peak": _peak_rss_mb()},
+        "llm": usage_tracker.get_stats(),
+        "scheduler": bot_instance.send_scheduler.get_stats(),
+        "server": fake_telegram.stats(),
+        "config": {key: value for key, value in vars(args).items() if key != "out"}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end load test: scripted users against the real Dispatcher through a fake Telegram Bot API"
+    )
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--conversations", type=int, default=2, help="conversations per user")
+    parser.add_argument("--ramp", type=float, default=30.0, help="users start uniformly within this many seconds")
+    parser.add_argument("--think", type=float, default=2.0, help="mean pause between a user's conversations")
+    parser.add_argument("--mix", default="plan=0.5,clarify=0.2,holidays=0.15,reject=0.15")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-step reply timeout")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--send-global-rate", type=float, default=30.0)
+    parser.add_argument("--send-chat-rate", type=float, default=1.0)
+    parser.add_argument("--send-chat-burst", type=int, default=3)
+    parser.add_argument("--chat-limit", type=int, default=3, help="fake server per-chat sends per second before 429")
+    parser.add_argument("--global-limit", type=int, default=30, help="fake server global sends per second before 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake server random 429 rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+    report_text = json.dumps(report, indent=2)
+    print(report_text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as report_file:
+            report_file.write(report_text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from utils.logger import setup_logger, shutdown_logging
+
+SAMPLE_TEXT = "Team standup every Monday at 9am, dentist tomorrow at 14:30 and groceries on Saturday " * 4
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summarize(samples):
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 2),
+        "p50_us": round(_percentile(samples, 0.5) * 1e6, 2),
+        "p99_us": round(_percentile(samples, 0.99) * 1e6, 2),
+    }
+
+
+def _run_before(updates: int):
+    """Replicates the previous synchronous console + FileHandler setup and INFO call sites"""
+    logger = logging.getLogger("bench_before")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler("before.log")]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+    samples = []
+    for user_id in range(updates):
+        kwargs = {"state": "processing", "original_message": SAMPLE_TEXT}
+        started = time.perf_counter()
+        logger.info(f"Message from user {user_id} (user{user_id}): {SAMPLE_TEXT}")
+        logger.info(f"Processing text message from user {user_id}")
+        logger.info(f"Updated state for user {user_id}: {kwargs}")
+        samples.append(time.perf_counter() - started)
+
+    for handler in handlers:
+        handler.close()
+        logger.removeHandler(handler)
+    return samples
+
+
+def _run_after(updates: int, sample_rates: str, rate_limits: str):
+    logger = setup_logger("telegram_bot", "INFO", "after.log", sample_rates=sample_rates, rate_limits=rate_limits)
+    handler_logger = logging.getLogger("handlers.messages")
+    state_logger = logging.getLogger("services.state_manager")
+
+    samples = []
+    for user_id in range(updates):
+        kwargs = {"state": "processing", "original_message": SAMPLE_TEXT}
+        started = time.perf_counter()
+        logger.debug("Message from user %s (%s), %d chars", user_id, f"user{user_id}", len(SAMPLE_TEXT))
+        handler_logger.info("Processing text message from user %s", user_id)
+        state_logger.debug("Updated state for user %s: %s", user_id, list(kwargs))
+        samples.append(time.perf_counter() - started)
+
+    shutdown_logging()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-update logging overhead, old vs queued pipeline")
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--sample-rates", default="handlers=0.1")
+    parser.add_argument("--rate-limits", default="handlers=1000")
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    original_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull:
+        os.chdir(workdir)
+        os.makedirs("logs", exist_ok=True)
+        sys.stdout = devnull
+        try:
+            before = _run_before(args.updates)
+            after = _run_after(args.updates, args.sample_rates, args.rate_limits)
+            before_bytes = os.path.getsize("before.log")
+            after_bytes = os.path.getsize(os.path.join("logs", "after.log"))
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(original_cwd)
+
+    print(json.dumps({
+        "updates": args.updates,
+        "before": {**_summarize(before), "file_bytes": before_bytes},
+        "after": {
+            **_summarize(after),
+            "file_bytes": after_bytes,
+            "sample_rates": args.sample_rates,
+            "rate_limits": args.rate_limits
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
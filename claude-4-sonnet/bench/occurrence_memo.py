@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+# Rough shape of what users schedule: most tasks are one-off or daily/weekly at a handful of round times
+RECURRENCES = [
+    ("none", 40), ("daily", 18), ("weekly", 8), ("weekly_0_2_4", 6), ("weekly_1_3", 5), ("weekly_0", 4),
+    ("weekly_5_6", 3), ("monthly", 5), ("yearly", 2), ("FREQ=WEEKLY;INTERVAL=2", 4),
+    ("FREQ=MONTHLY;BYMONTHDAY=-1", 2), ("FREQ=DAILY;COUNT=10", 1)
+]
+ROUND_TIMES = ["09:00", "08:00", "10:00", "18:00", "12:00", "07:00", "19:00", "14:00", "17:30", "20:00"]
+
+
+def _zipf_index(rng: random.Random, size: int, skew: float = 1.1) -> int:
+    weights = [1 / (rank + 1) ** skew for rank in range(size)]
+    return rng.choices(range(size), weights)[0]
+
+
+def build_task(rng: random.Random, today: datetime) -> Dict[str, Any]:
+    recurrence = rng.choices([r for r, _ in RECURRENCES], [w for _, w in RECURRENCES])[0]
+    if rng.random() < 0.8:
+        time_str = ROUND_TIMES[_zipf_index(rng, len(ROUND_TIMES))]
+    elif rng.random() < 0.5:
+        time_str = None
+    else:
+        time_str = f"{rng.randint(6, 22):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+    date_str = None
+    if recurrence == "none" or rng.random() < 0.3:
+        date_str = (today + timedelta(days=_zipf_index(rng, 60, 0.9))).strftime("%Y-%m-%d")
+    return {
+        "description": "task", "classification": rng.choice(["work", "personal"]),
+        "time": time_str, "date": date_str, "recurrence": recurrence
+    }
+
+
+def build_approvals(count: int, seed: int) -> List[List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc)
+    return [[build_task(rng, today) for _ in range(rng.choice([1, 1, 2, 2, 3, 3, 4, 5, 8]))] for _ in range(count)]
+
+
+async def render_all(approvals: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    from handlers.messages import _generate_final_output
+    from services.message_paginator import message_paginator
+
+    texts = []
+    started = time.perf_counter()
+    for tasks in approvals:
+        page = await message_paginator.render_page(_generate_final_output(tasks), 0)
+        texts.append(page["text"])
+    elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "texts": texts}
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from services.datetime_processor import datetime_processor
+
+    approvals = build_approvals(args.approvals, args.seed)
+    tasks = sum(len(a) for a in approvals)
+    distinct = len({(t["recurrence"], t["date"], t["time"]) for a in approvals for t in a})
+    rows = []
+    baseline_texts = None
+    for size in [0] + [int(value) for value in args.sizes.split(",")]:
+        datetime_processor.configure_cache(size)
+        timings = []
+        for _ in range(args.repeats):
+            datetime_processor.configure_cache(size)
+            result = await render_all(approvals)
+            timings.append(result["seconds"])
+        texts = result["texts"]
+        if baseline_texts is None:
+            baseline_texts = texts
+        memo = datetime_processor.occurrence_memo
+        stats = memo.get_stats() if memo else {"hit_rate": 0.0, "entries": 0}
+        best = min(timings)
+        rows.append({
+            "cache_size": size,
+            "approvals": len(approvals),
+            "tasks": tasks,
+            "distinct_keys": distinct,
+            "total_ms": round(best * 1000, 1),
+            "us_per_approval": round(best / len(approvals) * 1e6, 1),
+            "hit_rate": stats["hit_rate"],
+            "entries": stats["entries"],
+            "differing_outputs": sum(a != b for a, b in zip(baseline_texts, texts))
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Final-output rendering for many approvals with and without the memo")
+    parser.add_argument("--approvals", type=int, default=10000)
+    parser.add_argument("--sizes", default="100,1000,10000", help="memo sizes to compare against no memo")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:occurrence-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-occurrence-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rows = asyncio.run(run(args))
+    print(f"{'memo':>6} {'approvals':>9} {'tasks':>6} {'keys':>5} {'total ms':>9} {'us/approval':>12} {'hit rate':>9} {'diff':>5}")
+    for row in rows:
+        print(
+            f"{row['cache_size']:>6} {row['approvals']:>9} {row['tasks']:>6} {row['distinct_keys']:>5} "
+            f"{row['total_ms']:>9} {row['us_per_approval']:>12} {row['hit_rate']:>9} {row['differing_outputs']:>5}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
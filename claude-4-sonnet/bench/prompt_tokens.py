@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "golden.jsonl"
+CLARIFICATION_RESPONSE = "at 10am tomorrow"
+
+
+def _token_counter() -> Callable[[str], int]:
+    """tiktoken's o200k encoding when available, otherwise the backend's len/4 estimate"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        from services.llm_backend import estimate_tokens
+        return estimate_tokens
+
+
+def _mean(values: List[int]) -> float:
+    return round(sum(values) / len(values), 1) if values else 0.0
+
+
+def measure(version: str, inputs: List[str], count_tokens: Callable[[str], int]) -> Dict[str, Any]:
+    from services.prompts import build_prompt_set
+    from services.synthetic_llm import parse_tasks
+    from services.task_parser import TaskParsingResult
+
+    prompts = build_prompt_set(version, TaskParsingResult)
+    parse_system = count_tokens(prompts.task_parsing_system)
+    clarification_system = count_tokens(prompts.clarification_system)
+    parse_totals, clarification_totals, clarification_payloads = [], [], []
+
+    for text in inputs:
+        parse_totals.append(parse_system + count_tokens(text))
+        tasks = parse_tasks(text, datetime(2025, 1, 1))["tasks"]
+        open_questions = [
+            {"id": index + 1, "task": task["description"], "questions": [f"What time should '{task['description']}' happen?"]}
+            for index, task in enumerate(tasks)
+        ]
+        payload = prompts.render_clarification(CLARIFICATION_RESPONSE, open_questions)
+        clarification_payloads.append(count_tokens(payload))
+        clarification_totals.append(clarification_system + clarification_payloads[-1])
+
+    return {
+        "version": version,
+        "parse_system": parse_system,
+        "parse_per_request": _mean(parse_totals),
+        "clarification_system": clarification_system,
+        "clarification_payload": _mean(clarification_payloads),
+        "clarification_per_request": _mean(clarification_totals)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per request for each prompt version over the golden corpus")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--versions", default="v1,v2")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:prompt-tokens")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-prompt-tokens")
+    with open(args.corpus, encoding="utf-8") as corpus_file:
+        inputs = [json.loads(line)["input"] for line in corpus_file if line.strip()]
+
+    count_tokens = _token_counter()
+    rows = [measure(version, inputs, count_tokens) for version in args.versions.split(",")]
+    print(f"{'version':<8} {'parse sys':>10} {'parse/req':>10} {'clar sys':>9} {'clar data':>10} {'clar/req':>9}")
+    for row in rows:
+        print(
+            f"{row['version']:<8} {row['parse_system']:>10} {row['parse_per_request']:>10} {row['clarification_system']:>9} "
+            f"{row['clarification_payload']:>10} {row['clarification_per_request']:>9}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
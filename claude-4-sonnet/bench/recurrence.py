@@ -0,0 +1,254 @@
+import argparse
+import calendar
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+UTC = timezone.utc
+SHORTHANDS = ["daily", "weekly", "monthly", "yearly", "weekly_0_2_4", "weekly_1_3", "weekly_5_6"]
+WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class LegacyRecurrence:
+    """The stepping this replaced: one step past a start in the past, then re-interpreting the string per step"""
+
+    def occurrences(self, start: datetime, recurrence: str, now: datetime, limit: int) -> List[datetime]:
+        current = start
+        result = []
+        try:
+            if current <= now:
+                current = self._next(current, recurrence)
+            while len(result) < limit:
+                result.append(current)
+                current = self._next(current, recurrence)
+        except ValueError:
+            pass
+        return result
+
+    def _next(self, current: datetime, recurrence: str) -> datetime:
+        if recurrence == "daily":
+            return current + timedelta(days=1)
+        if recurrence == "weekly":
+            return current + timedelta(weeks=1)
+        if recurrence.startswith("weekly_"):
+            weekdays = [int(d) for d in recurrence.replace("weekly_", "").split("_")]
+            current_weekday = current.weekday()
+            days_ahead = None
+            for weekday in sorted(weekdays):
+                if weekday > current_weekday:
+                    days_ahead = weekday - current_weekday
+                    break
+            if days_ahead is None:
+                days_ahead = (7 - current_weekday) + min(weekdays)
+            return current + timedelta(days=days_ahead)
+        if recurrence == "monthly":
+            if current.month == 12:
+                return current.replace(year=current.year + 1, month=1)
+            return current.replace(month=current.month + 1)
+        if recurrence == "yearly":
+            return current.replace(year=current.year + 1)
+        return current + timedelta(days=1)
+
+
+def reference(rule, start: datetime, after: datetime, limit: int, horizon_days: int) -> List[datetime]:
+    """Day-by-day expansion straight from the rule's definition, counting COUNT from the start"""
+    start_day = start.date()
+    week_start = start_day - timedelta(days=start_day.weekday())
+    weekdays = set(rule.by_weekday or (start_day.weekday(),))
+    monthdays = rule.by_monthday or (start_day.day,)
+    result = []
+    index = 0
+    for offset in range(horizon_days):
+        day = start_day + timedelta(days=offset)
+        if rule.freq == "DAILY":
+            match = offset % rule.interval == 0
+        elif rule.freq == "WEEKLY":
+            match = day.weekday() in weekdays and ((day - week_start).days // 7) % rule.interval == 0
+        else:
+            month_days = calendar.monthrange(day.year, day.month)[1]
+            if rule.freq == "MONTHLY":
+                in_period = ((day.year - start_day.year) * 12 + day.month - start_day.month) % rule.interval == 0
+            else:
+                in_period = day.month == start_day.month and (day.year - start_day.year) % rule.interval == 0
+            resolved = set()
+            for monthday in monthdays:
+                value = monthday if monthday > 0 else month_days + monthday + 1
+                resolved.add(min(value, month_days) if rule.clamp_monthday else value)
+            match = in_period and day.day in resolved
+        if not match:
+            continue
+        if rule.count is not None and index >= rule.count:
+            break
+        index += 1
+        occurrence = datetime.combine(day, start.timetz())
+        if rule.until is not None and occurrence > rule.until:
+            break
+        if occurrence > after:
+            result.append(occurrence)
+            if len(result) == limit:
+                break
+    return result
+
+
+def with_dateutil(rule, start: datetime, after: datetime, limit: int) -> Optional[List[datetime]]:
+    try:
+        from dateutil import rrule as du
+    except ImportError:
+        return None
+    if rule.clamp_monthday:
+        return None
+    expansion = du.rrule(
+        {"DAILY": du.DAILY, "WEEKLY": du.WEEKLY, "MONTHLY": du.MONTHLY, "YEARLY": du.YEARLY}[rule.freq],
+        dtstart=start, interval=rule.interval, byweekday=rule.by_weekday or None,
+        bymonthday=rule.by_monthday or None, count=rule.count, until=rule.until, cache=False
+    )
+    result = []
+    occurrence = expansion.after(after)
+    while occurrence is not None and len(result) < limit:
+        result.append(occurrence)
+        occurrence = expansion.after(occurrence)
+    return result
+
+
+def random_rule(rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        return rng.choice(SHORTHANDS)
+    freq = rng.choice(["DAILY", "WEEKLY", "MONTHLY", "YEARLY"])
+    parts = [f"FREQ={freq}"]
+    if rng.random() < 0.6:
+        parts.append(f"INTERVAL={rng.randint(1, 5)}")
+    if freq == "WEEKLY" and rng.random() < 0.7:
+        parts.append("BYDAY=" + ",".join(rng.sample(WEEKDAY_CODES, rng.randint(1, 4))))
+    if freq == "MONTHLY" and rng.random() < 0.7:
+        days = rng.sample([1, 5, 15, 28, 29, 30, 31, -1, -2, -15], rng.randint(1, 3))
+        parts.append("BYMONTHDAY=" + ",".join(map(str, days)))
+    ending = rng.random()
+    if ending < 0.25:
+        parts.append(f"COUNT={rng.randint(1, 40)}")
+    elif ending < 0.4:
+        until = date(2024, 1, 1) + timedelta(days=rng.randint(0, 4000))
+        parts.append(f"UNTIL={until.strftime('%Y%m%d')}T120000Z")
+    return ";".join(parts)
+
+
+def run_differential(cases: int, limit: int, seed: int) -> Dict[str, Any]:
+    from services.recurrence import compile_recurrence
+
+    rng = random.Random(seed)
+    mismatches: List[Dict[str, str]] = []
+    dateutil_checked = 0
+    for _ in range(cases):
+        text = random_rule(rng)
+        rule = compile_recurrence(text)
+        start = datetime(2024, 1, 1, rng.randint(0, 23), rng.choice([0, 15, 30, 45]), tzinfo=UTC) + timedelta(
+            days=rng.randint(0, 1500)
+        )
+        after = start + timedelta(days=rng.randint(-40, 3000), minutes=rng.randint(-720, 720))
+        horizon = (after - start).days + 366 * rule.interval * (limit + 2)
+        got = list(islice(rule.iter_after(start, after), limit))
+        expected = reference(rule, start, after, limit, horizon)
+        checks = [("reference", expected)]
+        external = with_dateutil(rule, start, after, limit)
+        if external is not None:
+            dateutil_checked += 1
+            checks.append(("dateutil", external))
+        for name, other in checks:
+            if got != other and len(mismatches) < 10:
+                mismatches.append({
+                    "rule": text, "start": start.isoformat(), "after": after.isoformat(), "against": name,
+                    "got": [d.isoformat() for d in got], "expected": [d.isoformat() for d in other]
+                })
+    return {"cases": cases, "dateutil_checked": dateutil_checked, "mismatches": mismatches}
+
+
+def run_legacy_accuracy(cases: int, limit: int, seed: int) -> Dict[str, Any]:
+    """How often the old stepping disagrees with the definition, start dates up to two years back"""
+    from services.recurrence import compile_recurrence
+
+    rng = random.Random(seed)
+    legacy = LegacyRecurrence()
+    wrong = 0
+    for _ in range(cases):
+        text = rng.choice(SHORTHANDS)
+        now = datetime(2026, 6, 1, 12, 0, tzinfo=UTC)
+        start = now - timedelta(days=rng.randint(-60, 730), hours=rng.randint(0, 23))
+        start = start.replace(minute=0, second=0, microsecond=0)
+        after = max(now, start - timedelta(microseconds=1))
+        expected = reference(compile_recurrence(text), start, after, limit, (after - start).days + 1200)
+        wrong += legacy.occurrences(start, text, now, limit) != expected
+    return {"cases": cases, "wrong": wrong}
+
+
+def _us_per_call(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def run_timings(calls: int, limit: int) -> List[Dict[str, Any]]:
+    from services.recurrence import compile_recurrence, parse_rrule
+
+    legacy = LegacyRecurrence()
+    now = datetime(2026, 6, 1, 12, 0, tzinfo=UTC)
+    start = datetime(2025, 3, 31, 9, 0, tzinfo=UTC)
+    rows = []
+    for text in ["daily", "weekly_0_2_4", "monthly", "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH",
+                 "FREQ=MONTHLY;BYMONTHDAY=31;COUNT=500"]:
+        rule = compile_recurrence(text)
+        far = datetime(2300, 1, 1, tzinfo=UTC)
+        row = {
+            "rule": text,
+            "compiled_us": _us_per_call(lambda: list(islice(rule.iter_after(start, now), limit)), calls),
+            "cached_compile_us": _us_per_call(lambda: compile_recurrence(text), calls),
+            "far_seek_us": _us_per_call(lambda: rule.next_after(start, far), calls),
+            "legacy_us": None
+        }
+        if text in SHORTHANDS:
+            row["legacy_us"] = _us_per_call(lambda: legacy.occurrences(start, text, now, limit), calls)
+        if text.startswith("FREQ"):
+            row["uncached_compile_us"] = _us_per_call(lambda: parse_rrule(text), calls)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled recurrence rules: differential check and timings")
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:recurrence-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-recurrence-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    differential = run_differential(args.cases, args.limit, args.seed)
+    legacy = run_legacy_accuracy(min(args.cases, 5000), 3, args.seed)
+    timings = run_timings(args.calls, 3)
+
+    print(
+        f"differential: {args.cases} random rules, {differential['dateutil_checked']} also against dateutil, "
+        f"{len(differential['mismatches'])} mismatching"
+    )
+    for mismatch in differential["mismatches"]:
+        print(f"  {mismatch}")
+    print(f"legacy stepping: {legacy['wrong']} of {legacy['cases']} shorthand cases wrong")
+    print(f"\n{'rule':<38} {'next 3 us':>10} {'legacy us':>10} {'far seek us':>12} {'compile us':>11}")
+    for row in timings:
+        legacy_us = "-" if row["legacy_us"] is None else row["legacy_us"]
+        compile_us = f"{row['cached_compile_us']}/{row.get('uncached_compile_us', '-')}"
+        print(f"{row['rule']:<38} {row['compiled_us']:>10} {legacy_us:>10} {row['far_seek_us']:>12} {compile_us:>11}")
+    print(json.dumps({"differential": differential, "legacy": legacy, "timings": timings}))
+    if differential["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+CHAR_THRESHOLDS = (200, 400, 600, 1000, 2000, 4000)
+CLAUSE_THRESHOLDS = (1, 2, 3, 4, 6, 8)
+
+
+def load_decisions(paths: List[str], operation: str) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("logger") != "services.model_router":
+                    continue
+                if operation and record.get("operation") != operation:
+                    continue
+                yield record
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def summarize_routes(decisions: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for decision in decisions:
+        grouped[decision["route"]].append(decision)
+
+    summary = {}
+    for route_name, route_decisions in grouped.items():
+        latencies = [decision["latency_ms"] for decision in route_decisions]
+        summary[route_name] = {
+            "count": len(route_decisions),
+            "share": round(len(route_decisions) / len(decisions), 3),
+            "ok": sum(1 for decision in route_decisions if decision["outcome"] == "ok"),
+            "repaired": sum(1 for decision in route_decisions if decision["outcome"] == "repaired"),
+            "failed": sum(1 for decision in route_decisions if decision["outcome"] == "failed"),
+            "escalated": sum(1 for decision in route_decisions if decision["escalated"]),
+            "explored": sum(1 for decision in route_decisions if decision.get("explored")),
+            "p50_ms": _percentile(latencies, 0.5),
+            "p95_ms": _percentile(latencies, 0.95)
+        }
+    return summary
+
+
+def sweep_thresholds(decisions: List[Dict[str, Any]], cheap_route: str) -> List[Dict[str, Any]]:
+    """Replays the easy/hard split for each threshold pair against what the cheap route actually did"""
+    served_by_cheap = [decision for decision in decisions if decision["route"] == cheap_route]
+    grid = []
+    for max_chars in CHAR_THRESHOLDS:
+        for max_clauses in CLAUSE_THRESHOLDS:
+            def is_easy(decision: Dict[str, Any]) -> bool:
+                return decision["chars"] <= max_chars and decision["clauses"] <= max_clauses
+
+            kept = [decision for decision in served_by_cheap if is_easy(decision)]
+            repair_rate: Optional[float] = None
+            if kept:
+                repair_rate = round(sum(1 for decision in kept if decision["outcome"] != "ok") / len(kept), 3)
+            grid.append({
+                "max_chars": max_chars,
+                "max_clauses": max_clauses,
+                "cheap_share": round(sum(1 for decision in decisions if is_easy(decision)) / len(decisions), 3),
+                "cheap_samples": len(kept),
+                "cheap_repair_rate": repair_rate
+            })
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize logged routing decisions and sweep the routing thresholds offline")
+    parser.add_argument("paths", nargs="+", help="JSON-lines logs (logs/bot.log or eval_parse --route-log)")
+    parser.add_argument("--operation", default="parse", help="parse, clarification, or empty for both")
+    parser.add_argument("--cheap", default="", help="cheapest route name, defaults to the tier-0 route")
+    parser.add_argument("--max-repair", type=float, default=0.2, help="acceptable repair rate on the cheap route")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    decisions = list(load_decisions(args.paths, args.operation))
+    if not decisions:
+        raise SystemExit("No routing decisions found")
+
+    routes = summarize_routes(decisions)
+    cheap_route = args.cheap or next(
+        (decision["route"] for decision in decisions if decision.get("tier") == 0), decisions[0]["route"]
+    )
+    grid = sweep_thresholds(decisions, cheap_route)
+    acceptable = [
+        row for row in grid
+        if row["cheap_repair_rate"] is not None and row["cheap_repair_rate"] <= args.max_repair
+    ]
+    suggested = max(
+        acceptable,
+        key=lambda row: (row["cheap_share"], -row["cheap_repair_rate"], row["max_chars"], row["max_clauses"]),
+        default=None
+    )
+
+    if args.json:
+        print(json.dumps({
+            "decisions": len(decisions), "routes": routes, "cheap_route": cheap_route,
+            "sweep": grid, "suggested": suggested
+        }, indent=2))
+        return
+
+    print(f"{len(decisions)} decisions")
+    print(f"{'route':<12} {'count':>7} {'share':>6} {'ok':>6} {'repair':>7} {'failed':>7} {'escal':>6} {'p50ms':>8} {'p95ms':>8}")
+    for route_name, stats in sorted(routes.items()):
+        print(
+            f"{route_name:<12} {stats['count']:>7} {stats['share']:>6} {stats['ok']:>6} {stats['repaired']:>7} "
+            f"{stats['failed']:>7} {stats['escalated']:>6} {stats['p50_ms']:>8} {stats['p95_ms']:>8}"
+        )
+    print(f"\nThreshold sweep on '{cheap_route}' (samples it served)")
+    print(f"{'max_chars':>9} {'max_clauses':>11} {'cheap_share':>11} {'samples':>8} {'repair_rate':>11}")
+    for row in grid:
+        print(
+            f"{row['max_chars']:>9} {row['max_clauses']:>11} {row['cheap_share']:>11} "
+            f"{row['cheap_samples']:>8} {str(row['cheap_repair_rate']):>11}"
+        )
+    if suggested:
+        print(
+            f"\nSuggested: LLM_ROUTE_MAX_CHARS={suggested['max_chars']} LLM_ROUTE_MAX_CLAUSES={suggested['max_clauses']} "
+            f"(cheap share {suggested['cheap_share']}, repair rate {suggested['cheap_repair_rate']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
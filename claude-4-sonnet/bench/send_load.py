@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import json
+import time
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from bot.send_scheduler import SendScheduler
+from .fake_telegram import FakeTelegram
+
+
+async def _chat_burst(bot: Bot, chat_id: int, messages: int, edits: int) -> int:
+    ok = 0
+    sent = await asyncio.gather(*[bot.send_message(chat_id, f"message {i}") for i in range(messages)], return_exceptions=True)
+    ok += sum(1 for r in sent if not isinstance(r, BaseException))
+    first = next((r for r in sent if not isinstance(r, BaseException)), None)
+    if first is not None and edits:
+        edited = await asyncio.gather(*[bot.edit_message_text(f"edit {i}", chat_id=chat_id, message_id=first.message_id) for i in range(edits)], return_exceptions=True)
+        ok += sum(1 for r in edited if not isinstance(r, BaseException))
+    return ok
+
+
+async def run(args: argparse.Namespace) -> dict:
+    fake = FakeTelegram(chat_limit=args.chat_limit, global_limit=args.global_limit, error_rate=args.error_rate, retry_after=args.retry_after)
+    base = await fake.start()
+    bot = Bot("123456:LOADTEST", session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
+    scheduler = None
+    if not args.no_scheduler:
+        scheduler = SendScheduler(args.global_rate, args.chat_rate, args.chat_burst)
+        bot.session.middleware(scheduler)
+    t0 = time.perf_counter()
+    try:
+        results = await asyncio.gather(*[_chat_burst(bot, 1000 + c, args.messages, args.edits) for c in range(args.chats)])
+    finally:
+        elapsed = time.perf_counter() - t0
+        await bot.session.close()
+        await fake.stop()
+    requested = args.chats * (args.messages + args.edits)
+    report = {
+        "mode": "direct" if scheduler is None else "scheduled",
+        "chats": args.chats,
+        "requested": requested,
+        "succeeded": sum(results),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(sum(results) / elapsed, 2) if elapsed else 0.0,
+        "server": fake.stats(),
+    }
+    if scheduler is not None:
+        report["scheduler"] = scheduler.get_stats()
+    return report
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--chats", type=int, default=100)
+    p.add_argument("--messages", type=int, default=4)
+    p.add_argument("--edits", type=int, default=5)
+    p.add_argument("--global-rate", type=float, default=30.0)
+    p.add_argument("--chat-rate", type=float, default=1.0)
+    p.add_argument("--chat-burst", type=int, default=3)
+    p.add_argument("--chat-limit", type=int, default=3)
+    p.add_argument("--global-limit", type=int, default=30)
+    p.add_argument("--error-rate", type=float, default=0.02)
+    p.add_argument("--retry-after", type=int, default=1)
+    p.add_argument("--no-scheduler", action="store_true")
+    args = p.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
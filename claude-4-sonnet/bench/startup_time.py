@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _parse_importtime(stderr: str):
+    """Returns (module, self_us, cumulative_us, depth) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((raw_name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def _measure(entry_module: str):
+    env = {**os.environ, "TELEGRAM_BOT_TOKEN": "1:startup", "OPENAI_API_KEY": "sk-startup", "PYTHONWARNINGS": "ignore"}
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry_module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+    return wall_seconds, _parse_importtime(completed.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time of the bot entry point, measured with -X importtime")
+    parser.add_argument("--entry", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="fail when the median import time exceeds this")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    wall_times, import_times, last_rows = [], [], []
+    for _ in range(args.runs):
+        wall_seconds, rows = _measure(args.entry)
+        wall_times.append(wall_seconds)
+        import_times.append(next(cumulative for name, _, cumulative, depth in rows if name == args.entry and depth == 0))
+        last_rows = rows
+
+    top_level = sorted((row for row in last_rows if row[3] <= 1), key=lambda row: row[2], reverse=True)
+    median_import_ms = statistics.median(import_times) / 1000
+    report = {
+        "entry": args.entry,
+        "runs": args.runs,
+        "import_ms_median": round(median_import_ms, 1),
+        "process_wall_ms_median": round(statistics.median(wall_times) * 1000, 1),
+        "langchain_imported": any(name.startswith(("langchain", "openai")) for name, _, _, _ in last_rows),
+        "slowest_imports": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)} for name, _, cumulative, _ in top_level[:args.top]
+        ],
+        "budget_ms": args.budget_ms or None,
+        "within_budget": median_import_ms <= args.budget_ms if args.budget_ms else None
+    }
+    print(json.dumps(report, indent=2))
+    if args.budget_ms and median_import_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import logging
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+SAMPLE_TASKS = [
+    {"description": "Pay invoices", "classification": "work", "time": "09:00", "date": "2025-01-06",
+     "recurrence": "weekly_0", "needs_clarification": [], "confidence": "high"},
+    {"description": "Gym", "classification": "personal", "time": "18:30", "date": None,
+     "recurrence": "weekly_1_3", "needs_clarification": [], "confidence": "high"},
+    {"description": "Call mom", "classification": "personal", "time": None, "date": "2025-01-07",
+     "recurrence": "none", "needs_clarification": ["What time should \"Call mom\" be scheduled?"], "confidence": "medium"}
+]
+
+
+class LegacyStateManager:
+    """The create path this replaced: past 1000 states every create scans all of them for ones older than an hour"""
+
+    def __init__(self):
+        from services.state_manager import UserState
+        self._state_type = UserState
+        self._states: Dict[int, Any] = {}
+        self._max_states = 1000
+
+    def create_state(self, user_id: int):
+        if len(self._states) >= self._max_states:
+            current_time = datetime.utcnow()
+            old_states = [
+                key for key, state in self._states.items() if (current_time - state.created_at).total_seconds() > 3600
+            ]
+            for key in old_states:
+                del self._states[key]
+        state = self._state_type(user_id=user_id)
+        self._states[user_id] = state
+        return state
+
+    def get_state(self, user_id: int):
+        return self._states.get(user_id)
+
+    def update_state(self, user_id: int, **kwargs) -> bool:
+        state = self._states.get(user_id)
+        if state is None:
+            return False
+        for key, value in kwargs.items():
+            setattr(state, key, value)
+        return True
+
+
+def _ns_per_op(started: float, operations: int) -> int:
+    return round((time.perf_counter() - started) / operations * 1e9)
+
+
+def time_operations(manager: Any, users: int, rng: random.Random) -> Dict[str, int]:
+    from services.state_manager import ConversationState
+
+    started = time.perf_counter()
+    for user_id in range(users):
+        manager.create_state(user_id)
+    create_ns = _ns_per_op(started, users)
+
+    lookups = [rng.randrange(users) for _ in range(users)]
+    started = time.perf_counter()
+    for user_id in lookups:
+        manager.get_state(user_id)
+    get_ns = _ns_per_op(started, users)
+
+    started = time.perf_counter()
+    for user_id in lookups:
+        manager.update_state(user_id, state=ConversationState.DISPLAY, parsed_tasks=SAMPLE_TASKS)
+    update_ns = _ns_per_op(started, users)
+    return {"create_ns": create_ns, "get_ns": get_ns, "update_ns": update_ns}
+
+
+def measure_memory(users: int, with_tasks: bool) -> Dict[str, Any]:
+    from services.state_manager import ConversationState, StateManager
+
+    manager = StateManager(max_states=users, max_bytes=1 << 40)
+    tasks_json = json.dumps(SAMPLE_TASKS)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for user_id in range(users):
+        manager.create_state(user_id)
+        if with_tasks:
+            # Decoded per user, as the parser's JSON output would be, so the strings are not shared
+            manager.update_state(user_id, state=ConversationState.DISPLAY, parsed_tasks=json.loads(tasks_json))
+    traced = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {
+        "users": users,
+        "tasks_per_state": len(SAMPLE_TASKS) if with_tasks else 0,
+        "traced_mb": round(traced / 2**20, 1),
+        "estimated_mb": round(manager.get_memory_bytes() / 2**20, 1),
+        "bytes_per_state": round(traced / users)
+    }
+
+
+def run_expiry(users: int) -> Dict[str, Any]:
+    from services.state_manager import StateManager
+
+    now = [0.0]
+    manager = StateManager(ttl_seconds=60.0, max_states=users, max_bytes=1 << 40, clock=lambda: now[0])
+    for user_id in range(users):
+        now[0] = user_id * 1e-6
+        manager.create_state(user_id)
+    now[0] = 60.0 + users * 1e-6 / 2
+    started = time.perf_counter()
+    removed = manager.expire_idle()
+    return {
+        "users": users,
+        "expired": removed,
+        "left": manager.get_state_count(),
+        "expire_ns_per_state": _ns_per_op(started, max(1, removed))
+    }
+
+
+def run_eviction(users: int, cap: int) -> Dict[str, Any]:
+    from services.state_manager import StateManager
+
+    manager = StateManager(max_states=cap, max_bytes=1 << 40)
+    started = time.perf_counter()
+    for user_id in range(users):
+        manager.create_state(user_id)
+    return {
+        "users": users,
+        "cap": cap,
+        "states": manager.get_state_count(),
+        "evicted": manager.evicted,
+        "create_ns": _ns_per_op(started, users)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StateManager create/get/update cost, expiry, eviction and memory")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument(
+        "--task-users", type=int, default=250_000,
+        help="states with parsed tasks for the memory run; tracing a million of them does not fit in 6GB"
+    )
+    parser.add_argument("--legacy-users", default="1000,5000,20000", help="sizes for the previous implementation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:state-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-state-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+    from services.state_manager import StateManager
+
+    rng = random.Random(args.seed)
+    rows: List[Dict[str, Any]] = []
+    for users in [int(value) for value in args.legacy_users.split(",")]:
+        rows.append({"impl": "legacy", "users": users, **time_operations(LegacyStateManager(), users, rng)})
+        rows.append({
+            "impl": "ordered", "users": users,
+            **time_operations(StateManager(max_states=users, max_bytes=1 << 40), users, rng)
+        })
+    rows.append({
+        "impl": "ordered", "users": args.users,
+        **time_operations(StateManager(max_states=args.users, max_bytes=1 << 40), args.users, rng)
+    })
+
+    print(f"{'impl':<8} {'users':>9} {'create ns':>10} {'get ns':>8} {'update ns':>10}")
+    for row in rows:
+        print(f"{row['impl']:<8} {row['users']:>9} {row['create_ns']:>10} {row['get_ns']:>8} {row['update_ns']:>10}")
+
+    memory = [measure_memory(args.users, False), measure_memory(min(args.users, args.task_users), True)]
+    print(f"\n{'users':>9} {'tasks':>6} {'traced MB':>10} {'estimate MB':>12} {'bytes/state':>12} {'MB at users':>12}")
+    for row in memory:
+        row["projected_mb"] = round(row["bytes_per_state"] * args.users / 2**20, 1)
+        print(
+            f"{row['users']:>9} {row['tasks_per_state']:>6} {row['traced_mb']:>10} {row['estimated_mb']:>12} "
+            f"{row['bytes_per_state']:>12} {row['projected_mb']:>12}"
+        )
+
+    expiry = run_expiry(args.users)
+    eviction = run_eviction(args.users, args.users // 10)
+    print(
+        f"\nexpiry: {expiry['expired']} of {expiry['users']} idle states dropped, {expiry['left']} left, "
+        f"{expiry['expire_ns_per_state']} ns each"
+    )
+    print(
+        f"eviction: cap {eviction['cap']}, {eviction['states']} kept, {eviction['evicted']} evicted, "
+        f"{eviction['create_ns']} ns per create"
+    )
+    print(json.dumps({"operations": rows, "memory": memory, "expiry": expiry, "eviction": eviction}))
+
+
+if __name__ == "__main__":
+    main()
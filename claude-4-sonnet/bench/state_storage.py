@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict
+
+from bench.state_manager import SAMPLE_TASKS
+
+BOT_ID = 42
+
+
+def _key(user_id: int):
+    from aiogram.fsm.storage.base import StorageKey
+
+    return StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+
+
+async def message_update(storage, manager, user_id: int, message_id: int):
+    """What one task message costs in state operations: the FSM lookup, then the handler's reads and writes"""
+    from services.state_manager import ConversationState
+
+    await storage.get_state(_key(user_id))
+    if manager.get_state(user_id) is None:
+        manager.create_state(user_id)
+    manager.update_state(user_id, state=ConversationState.PROCESSING, original_message="Pay invoices every Monday")
+    manager.update_state(user_id, parsed_tasks=[dict(task) for task in SAMPLE_TASKS])
+    manager.update_state(user_id, state=ConversationState.DISPLAY)
+    manager.update_state(user_id, message_id_for_approval=message_id)
+
+
+async def approve_update(storage, manager, user_id: int) -> bool:
+    await storage.get_state(_key(user_id))
+    if not manager.is_awaiting_approval(user_id):
+        return False
+    state = manager.get_state(user_id)
+    if not state or not state.parsed_tasks:
+        return False
+    manager.flush_state(user_id)
+    return True
+
+
+async def run_conversations(storage, manager, users: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    for user_id in range(users):
+        await message_update(storage, manager, user_id, user_id + 1)
+    message_us = (time.perf_counter() - started) / users * 1e6
+    flush_started = time.perf_counter()
+    manager.flush_writes()
+    tail_flush_ms = (time.perf_counter() - flush_started) * 1000
+
+    started = time.perf_counter()
+    approved = 0
+    for user_id in range(users):
+        approved += await approve_update(storage, manager, user_id)
+    manager.flush_writes()
+    approve_us = (time.perf_counter() - started) / users * 1e6
+    return {
+        "message_us": round(message_us, 1),
+        "approve_us": round(approve_us, 1),
+        "tail_flush_ms": round(tail_flush_ms, 1),
+        "approved": approved
+    }
+
+
+async def run_backend(backend: str, users: int, directory: str, flush_batch: int) -> Dict[str, Any]:
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from services.state_manager import StateManager
+    from services.state_store import ConversationStorage, create_state_store
+
+    manager = StateManager(max_states=users, max_bytes=1 << 40)
+    if backend == "legacy":
+        storage = MemoryStorage()
+    else:
+        path = os.path.join(directory, f"{backend}.db")
+        manager.attach_store(create_state_store(backend, path), flush_batch)
+        storage = ConversationStorage(manager)
+    result = await run_conversations(storage, manager, users)
+    await manager.close()
+    return {"backend": backend, "users": users, **result}
+
+
+async def run_restart(users: int, directory: str, flush_batch: int) -> Dict[str, Any]:
+    """Leaves every user waiting for approval, restarts on the same file and approves through lazy loads"""
+    from services.state_manager import StateManager
+    from services.state_store import ConversationStorage, SqliteStateStore
+
+    path = os.path.join(directory, "restart.db")
+    before = StateManager(max_states=users, max_bytes=1 << 40)
+    before.attach_store(SqliteStateStore(path), flush_batch)
+    storage = ConversationStorage(before)
+    for user_id in range(users):
+        await message_update(storage, before, user_id, user_id + 1)
+    await before.close()
+    file_bytes = os.path.getsize(path) + (os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0)
+
+    after = StateManager(max_states=users, max_bytes=1 << 40)
+    store = SqliteStateStore(path)
+    after.attach_store(store, flush_batch)
+    storage = ConversationStorage(after)
+    started = time.perf_counter()
+    approved = 0
+    for user_id in range(users):
+        approved += await approve_update(storage, after, user_id)
+    after.flush_writes()
+    approve_us = (time.perf_counter() - started) / users * 1e6
+    left = store.count()
+    await after.close()
+    return {
+        "users": users,
+        "resumed": approved,
+        "approve_us": round(approve_us, 1),
+        "bytes_per_user": round(file_bytes / users),
+        "rows_left": left
+    }
+
+
+def measure_codec(samples: int) -> Dict[str, Any]:
+    from services.state_manager import ConversationState, UserState
+    from services.state_store import decode_state, encode_state
+
+    state = UserState(
+        user_id=123456789, state=ConversationState.DISPLAY, original_message="Pay invoices every Monday",
+        parsed_tasks=[dict(task) for task in SAMPLE_TASKS], message_id_for_approval=4242
+    )
+    blob = encode_state(state, time.time())
+    started = time.perf_counter()
+    for _ in range(samples):
+        encode_state(state, 0.0)
+    encode_us = (time.perf_counter() - started) / samples * 1e6
+    started = time.perf_counter()
+    for _ in range(samples):
+        decode_state(blob)
+    decode_us = (time.perf_counter() - started) / samples * 1e6
+    decoded, _ = decode_state(blob)
+    return {
+        "binary_bytes": len(blob),
+        "json_bytes": len(json.dumps(state.to_dict()).encode("utf-8")),
+        "pickle_bytes": len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)),
+        "encode_us": round(encode_us, 1),
+        "decode_us": round(decode_us, 1),
+        "round_trip": decoded.to_dict() == state.to_dict()
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [
+            await run_backend(backend, args.users, directory, args.flush_batch)
+            for backend in ("legacy", "memory", "sqlite")
+        ]
+        restart = await run_restart(args.users, directory, args.flush_batch)
+    return {"backends": backends, "restart": restart, "codec": measure_codec(args.codec_samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-update conversation state overhead for each storage backend")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--flush-batch", type=int, default=512)
+    parser.add_argument("--codec-samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:storage-bench")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-storage-bench")
+    logging.basicConfig(level=logging.CRITICAL)
+
+    result = asyncio.run(run(args))
+    print(f"{'backend':<8} {'users':>7} {'message us':>11} {'approve us':>11} {'tail flush ms':>14} {'approved':>9}")
+    for row in result["backends"]:
+        print(
+            f"{row['backend']:<8} {row['users']:>7} {row['message_us']:>11} {row['approve_us']:>11} "
+            f"{row['tail_flush_ms']:>14} {row['approved']:>9}"
+        )
+    restart = result["restart"]
+    print(
+        f"\nrestart: {restart['resumed']} of {restart['users']} conversations resumed, {restart['approve_us']} us per "
+        f"approval with lazy load, {restart['bytes_per_user']} bytes per user on disk, {restart['rows_left']} rows left"
+    )
+    codec = result["codec"]
+    print(
+        f"codec: {codec['binary_bytes']} bytes (json {codec['json_bytes']}, pickle {codec['pickle_bytes']}), "
+        f"encode {codec['encode_us']} us, decode {codec['decode_us']} us, round trip {codec['round_trip']}"
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import math
+import sqlite3
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# USD per 1M input / output tokens; override with --prices
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-5": (1.25, 10.0),
+    "gpt-5-mini": (0.25, 2.0)
+}
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    prices = dict(MODEL_PRICES)
+    for entry in spec.split(","):
+        if "=" not in entry:
+            continue
+        model_name, _, price_pair = entry.partition("=")
+        input_price, _, output_price = price_pair.partition("/")
+        prices[model_name.strip()] = (float(input_price), float(output_price or input_price))
+    return prices
+
+
+def load_usage(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Reads what UsageFlusher wrote, from JSON lines or from the SQLite rollups/calls tables"""
+    for path in paths:
+        if path.endswith((".db", ".sqlite")):
+            connection = sqlite3.connect(path)
+            connection.row_factory = sqlite3.Row
+            try:
+                for row in connection.execute("SELECT * FROM rollups"):
+                    yield {
+                        "kind": "rollup", "model": row["model"], "op": row["op"], "user": row["user"],
+                        "calls": row["calls"], "errors": row["errors"], "in": row["input_tokens"],
+                        "out": row["output_tokens"], "s": row["seconds"]
+                    }
+                for row in connection.execute("SELECT * FROM calls"):
+                    yield {
+                        "kind": "call", "model": row["model"], "op": row["op"], "user": row["user"],
+                        "prompt": row["prompt"], "in": row["input_tokens"], "out": row["output_tokens"],
+                        "s": row["seconds"], "ok": bool(row["ok"]), "weight": row["weight"]
+                    }
+            finally:
+                connection.close()
+            continue
+        with open(path, encoding="utf-8") as usage_file:
+            for line in usage_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def call_cost(model_name: str, input_tokens: float, output_tokens: float,
+              prices: Dict[str, Tuple[float, float]]) -> float:
+    input_price, output_price = prices.get(model_name, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+
+def rank_rollups(rollups: List[Dict[str, Any]], group_key: Callable[[Dict[str, Any]], str],
+                 prices: Dict[str, Tuple[float, float]], top: int) -> List[Dict[str, Any]]:
+    totals: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: {"calls": 0, "errors": 0, "in": 0, "out": 0, "s": 0.0, "usd": 0.0}
+    )
+    for rollup in rollups:
+        total = totals[group_key(rollup)]
+        total["calls"] += rollup["calls"]
+        total["errors"] += rollup["errors"]
+        total["in"] += rollup["in"]
+        total["out"] += rollup["out"]
+        total["s"] += rollup["s"]
+        total["usd"] += call_cost(rollup["model"], rollup["in"], rollup["out"], prices)
+    ranked = [
+        {
+            "key": key, "calls": total["calls"], "errors": total["errors"], "in": total["in"], "out": total["out"],
+            "usd": round(total["usd"], 6), "mean_s": round(total["s"] / total["calls"], 3) if total["calls"] else 0.0
+        }
+        for key, total in totals.items()
+    ]
+    return sorted(ranked, key=lambda row: (row["usd"], row["in"] + row["out"]), reverse=True)[:top]
+
+
+def rank_prompts(calls: List[Dict[str, Any]], prices: Dict[str, Tuple[float, float]], top: int) -> List[Dict[str, Any]]:
+    """Prompt keys hash the full message list, so repeats only group when the same text was sent again"""
+    grouped: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for call in calls:
+        grouped[(call["op"], call["model"], call["prompt"])].append(call)
+    ranked = []
+    for (call_site, model_name, prompt_key), prompt_calls in grouped.items():
+        input_tokens = sum(call["in"] for call in prompt_calls)
+        output_tokens = sum(call["out"] for call in prompt_calls)
+        ranked.append({
+            "op": call_site, "model": model_name, "prompt": prompt_key, "calls": len(prompt_calls),
+            "in": input_tokens // len(prompt_calls), "out": output_tokens // len(prompt_calls),
+            "usd": round(call_cost(model_name, input_tokens, output_tokens, prices), 6),
+            "mean_s": round(sum(call["s"] for call in prompt_calls) / len(prompt_calls), 3)
+        })
+    return sorted(ranked, key=lambda row: row["usd"], reverse=True)[:top]
+
+
+def _pearson(xs: List[float], ys: List[float]) -> float:
+    if len(xs) < 3:
+        return float("nan")
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance_x = sum((x - mean_x) ** 2 for x in xs)
+    variance_y = sum((y - mean_y) ** 2 for y in ys)
+    return covariance / math.sqrt(variance_x * variance_y) if variance_x > 0 and variance_y > 0 else float("nan")
+
+
+def token_latency_correlation(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per model and call site: how latency tracks input and output tokens, and the fitted cost of one output token"""
+    grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for call in calls:
+        if call.get("ok", True):
+            grouped[(call["model"], call["op"])].append(call)
+    rows = []
+    for (model_name, call_site), site_calls in sorted(grouped.items()):
+        latencies = [call["s"] for call in site_calls]
+        output_tokens = [call["out"] for call in site_calls]
+        mean_out = sum(output_tokens) / len(site_calls)
+        mean_latency = sum(latencies) / len(site_calls)
+        variance_out = sum((tokens - mean_out) ** 2 for tokens in output_tokens)
+        slope = float("nan")
+        if variance_out > 0:
+            slope = sum(
+                (tokens - mean_out) * (latency - mean_latency) for tokens, latency in zip(output_tokens, latencies)
+            ) / variance_out
+        rows.append({
+            "model": model_name, "op": call_site, "calls": len(site_calls),
+            "r_in": round(_pearson([call["in"] for call in site_calls], latencies), 3),
+            "r_out": round(_pearson(output_tokens, latencies), 3),
+            "ms_per_out_token": round(slope * 1000, 2)
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank LLM spend by call site, user and prompt from USAGE_FILE output")
+    parser.add_argument("paths", nargs="+", help="JSON-lines or .db/.sqlite usage files")
+    parser.add_argument("--prices", default="", help="model=in/out USD per 1M tokens, comma separated")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    prices = parse_prices(args.prices)
+    rollups: List[Dict[str, Any]] = []
+    calls: List[Dict[str, Any]] = []
+    for record in load_usage(args.paths):
+        (rollups if record.get("kind") == "rollup" else calls).append(record)
+    if not rollups:
+        raise SystemExit("No usage rollups found")
+
+    report = {
+        "sites": rank_rollups(rollups, lambda rollup: f"{rollup['model']}/{rollup['op']}", prices, args.top),
+        "users": rank_rollups(rollups, lambda rollup: rollup["user"], prices, args.top),
+        "prompts": rank_prompts(calls, prices, args.top),
+        "correlation": token_latency_correlation(calls)
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for title in ("sites", "users"):
+        print(f"Top {title}")
+        print(f"{'key':<36} {'calls':>7} {'err':>5} {'in tok':>10} {'out tok':>9} {'usd':>10} {'mean s':>7}")
+        for row in report[title]:
+            print(
+                f"{str(row['key']):<36} {row['calls']:>7} {row['errors']:>5} {row['in']:>10} {row['out']:>9} "
+                f"{row['usd']:>10.4f} {row['mean_s']:>7}"
+            )
+        print()
+    print("Most expensive prompts (sampled calls)")
+    print(f"{'op':<14} {'model':<14} {'prompt':<17} {'calls':>5} {'in':>6} {'out':>6} {'usd':>9} {'mean s':>7}")
+    for row in report["prompts"]:
+        print(
+            f"{row['op']:<14} {row['model']:<14} {row['prompt']:<17} {row['calls']:>5} {row['in']:>6} "
+            f"{row['out']:>6} {row['usd']:>9.5f} {row['mean_s']:>7}"
+        )
+    print("\nTokens vs latency (sampled calls)")
+    print(f"{'model':<14} {'op':<14} {'calls':>6} {'r(in,s)':>8} {'r(out,s)':>9} {'ms/out tok':>11}")
+    for row in report["correlation"]:
+        print(
+            f"{row['model']:<14} {row['op']:<14} {row['calls']:>6} {row['r_in']:>8} {row['r_out']:>9} "
+            f"{row['ms_per_out_token']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
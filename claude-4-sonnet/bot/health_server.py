@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+
+from utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag = 0.0
+        self.last_beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def current_lag(self) -> float:
+        return max(self.lag, time.monotonic() - self.last_beat - self.interval)
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - started - self.interval)
+            self.last_beat = now
+
+
+class HealthServer:
+    """Serves /healthz and Prometheus /metrics from the bot's event loop"""
+
+    def __init__(self, llm_probe: Callable[[], Awaitable[bool]], max_loop_lag: float = 1.0,
+                 probe_ttl: float = 30.0):
+        self.llm_probe = llm_probe
+        self.max_loop_lag = max_loop_lag
+        self.probe_ttl = probe_ttl
+        self.loop_monitor = EventLoopMonitor()
+        self._llm_reachable: Optional[bool] = None
+        self._llm_checked_at = 0.0
+        self._runner: Optional[web.AppRunner] = None
+
+        metrics_registry.gauge(
+            "event_loop_lag_seconds", "Event loop scheduling lag", self.loop_monitor.current_lag
+        )
+
+        self.app = web.Application()
+        self.app.router.add_get("/healthz", self._handle_healthz)
+        self.app.router.add_get("/metrics", self._handle_metrics)
+
+    async def start(self, host: str, port: int):
+        self.loop_monitor.start()
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Health server listening on {host}:{port}")
+
+    async def stop(self):
+        self.loop_monitor.stop()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _check_llm(self) -> bool:
+        now = time.monotonic()
+        if self._llm_reachable is None or now - self._llm_checked_at > self.probe_ttl:
+            self._llm_reachable = await self.llm_probe()
+            self._llm_checked_at = time.monotonic()
+        return self._llm_reachable
+
+    async def _handle_healthz(self, request: web.Request) -> web.Response:
+        loop_lag = self.loop_monitor.current_lag()
+        llm_reachable = await self._check_llm()
+        healthy = loop_lag <= self.max_loop_lag and llm_reachable
+        body = {
+            "status": "ok" if healthy else "unhealthy",
+            "loop_lag_ms": round(loop_lag * 1000, 2),
+            "llm_reachable": llm_reachable
+        }
+        return web.Response(
+            status=200 if healthy else 503, text=json.dumps(body), content_type="application/json"
+        )
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics_registry.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
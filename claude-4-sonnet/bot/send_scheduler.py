@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, TelegramMethod
+
+from utils.metrics import TELEGRAM_RETRY_AFTER, TELEGRAM_SEND_SECONDS, TELEGRAM_SEND_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ChatId = Union[int, str]
+
+_send_wait_histogram = TELEGRAM_SEND_WAIT_SECONDS.get()
+_retry_after_counter = TELEGRAM_RETRY_AFTER.get()
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self, now: float) -> float:
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def until_full(self, now: float) -> float:
+        self.refill(now)
+        return (self.capacity - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class _PendingSend:
+    __slots__ = ("make_request", "bot", "method", "future", "enqueued_at", "edit_key", "attempts")
+
+    def __init__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod,
+                 future: asyncio.Future, edit_key: Optional[int]):
+        self.make_request = make_request
+        self.bot = bot
+        self.method = method
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.edit_key = edit_key
+        self.attempts = 0
+
+
+class _ChatLane:
+    __slots__ = ("bucket", "queue", "pending_edits", "blocked_until", "worker", "wakeup")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.queue: Deque[_PendingSend] = deque()
+        self.pending_edits: Dict[int, _PendingSend] = {}
+        self.blocked_until = 0.0
+        self.worker: Optional[asyncio.Task] = None
+        self.wakeup = asyncio.Event()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Request middleware that queues outgoing chat methods behind global and per-chat token buckets"""
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3,
+                 group_rate: float = 20 / 60, max_retries: int = 5):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self._lanes: Dict[ChatId, _ChatLane] = {}
+        self.queue_depth = 0
+        self.sent_count = 0
+        self.failed_count = 0
+        self.retry_count = 0
+        self.coalesced_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            started = time.monotonic()
+            try:
+                return await make_request(bot, method)
+            finally:
+                TELEGRAM_SEND_SECONDS.get(method.__api_method__).observe(time.monotonic() - started)
+
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._create_lane(chat_id)
+
+        edit_key = method.message_id if isinstance(method, EditMessageText) else None
+        if edit_key is not None:
+            queued = lane.pending_edits.get(edit_key)
+            if queued is not None:
+                queued.method = method
+                self.coalesced_count += 1
+                return await asyncio.shield(queued.future)
+
+        pending = _PendingSend(make_request, bot, method, asyncio.get_running_loop().create_future(), edit_key)
+        lane.queue.append(pending)
+        if edit_key is not None:
+            lane.pending_edits[edit_key] = pending
+        self.queue_depth += 1
+
+        if lane.worker is None:
+            lane.worker = asyncio.create_task(self._drain_lane(chat_id, lane))
+        else:
+            lane.wakeup.set()
+        return await asyncio.shield(pending.future)
+
+    def get_stats(self) -> Dict[str, float]:
+        dispatched = self.sent_count + self.failed_count
+        return {
+            "queue_depth": self.queue_depth,
+            "active_chats": len(self._lanes),
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+            "retried": self.retry_count,
+            "coalesced": self.coalesced_count,
+            "wait_avg_seconds": self.wait_total / dispatched if dispatched else 0.0,
+            "wait_max_seconds": self.wait_max,
+        }
+
+    def _create_lane(self, chat_id: ChatId) -> _ChatLane:
+        if isinstance(chat_id, int) and chat_id > 0:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        else:
+            bucket = TokenBucket(self.group_rate, 1)
+        lane = _ChatLane(bucket)
+        self._lanes[chat_id] = lane
+        return lane
+
+    async def _take_global_token(self):
+        while True:
+            delay = self._global_bucket.delay(time.monotonic())
+            if delay <= 0:
+                self._global_bucket.consume()
+                return
+            await asyncio.sleep(delay)
+
+    async def _drain_lane(self, chat_id: ChatId, lane: _ChatLane):
+        try:
+            while True:
+                now = time.monotonic()
+                if not lane.queue:
+                    idle = max(lane.blocked_until - now, lane.bucket.until_full(now))
+                    if idle <= 0:
+                        return
+                    # The lane outlives its queue until the bucket refills, but new sends must not wait that out
+                    lane.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(lane.wakeup.wait(), idle)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                wait = max(lane.blocked_until - now, lane.bucket.delay(now))
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                await self._take_global_token()
+                lane.bucket.consume()
+                pending = lane.queue.popleft()
+                if pending.edit_key is not None and lane.pending_edits.get(pending.edit_key) is pending:
+                    del lane.pending_edits[pending.edit_key]
+
+                started = time.monotonic()
+                error: Optional[Exception] = None
+                try:
+                    result = await pending.make_request(pending.bot, pending.method)
+                except Exception as e:
+                    result, error = None, e
+                TELEGRAM_SEND_SECONDS.get(pending.method.__api_method__).observe(time.monotonic() - started)
+
+                if isinstance(error, TelegramRetryAfter):
+                    logger.warning(f"Rate limited in chat {chat_id}, retrying after {error.retry_after} seconds")
+                    lane.blocked_until = time.monotonic() + error.retry_after
+                    self.retry_count += 1
+                    _retry_after_counter.inc()
+                    pending.attempts += 1
+                    if pending.attempts > self.max_retries:
+                        self._complete(pending, error=error)
+                    else:
+                        self._requeue(lane, pending)
+                else:
+                    self._complete(pending, result=result, error=error)
+        except asyncio.CancelledError:
+            while lane.queue:
+                lane.queue.popleft().future.cancel()
+                self.queue_depth -= 1
+            lane.pending_edits.clear()
+            raise
+        finally:
+            lane.worker = None
+            if not lane.queue and self._lanes.get(chat_id) is lane:
+                del self._lanes[chat_id]
+
+    def _requeue(self, lane: _ChatLane, pending: _PendingSend):
+        if pending.edit_key is not None:
+            newer = lane.pending_edits.get(pending.edit_key)
+            if newer is not None:
+                self.queue_depth -= 1
+                self.coalesced_count += 1
+                newer.future.add_done_callback(lambda f, target=pending.future: _copy_outcome(f, target))
+                return
+            lane.pending_edits[pending.edit_key] = pending
+        lane.queue.appendleft(pending)
+
+    def _complete(self, pending: _PendingSend, result: Any = None, error: Optional[BaseException] = None):
+        self.queue_depth -= 1
+        waited = time.monotonic() - pending.enqueued_at
+        self.wait_total += waited
+        _send_wait_histogram.observe(waited)
+        if waited > self.wait_max:
+            self.wait_max = waited
+        if pending.future.done():
+            return
+        if error is not None:
+            self.failed_count += 1
+            pending.future.set_exception(error)
+        else:
+            self.sent_count += 1
+            pending.future.set_result(result)
+
+
+def _copy_outcome(source: asyncio.Future, target: asyncio.Future):
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
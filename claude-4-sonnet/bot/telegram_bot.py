@@ -2,61 +2,156 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramRetryAfter, TelegramServerError
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from config.settings import Settings
+from bot.send_scheduler import SendScheduler
+from bot.health_server import HealthServer
+from services.admission_controller import get_admission_controller
+from services.callback_tokens import callback_tokens
+from services.datetime_processor import datetime_processor
+from services.llm_service import llm_service
+from services.usage_ledger import usage_accounting
+from services.state_manager import state_manager
+from services.state_store import ConversationStorage, create_state_store
+from utils.metrics import metrics_registry
 
 
 class TelegramBot:
     def __init__(self, settings: Settings, logger: logging.Logger):
         self.settings = settings
         self.logger = logger
+        session = None
+        if settings.telegram_api_base:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_base))
         self.bot = Bot(
             token=settings.telegram_bot_token,
+            session=session,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML)
         )
-        self.dp = Dispatcher(storage=MemoryStorage())
+        self.send_scheduler = SendScheduler(
+            global_rate=settings.send_global_rate,
+            chat_rate=settings.send_chat_rate,
+            chat_burst=settings.send_chat_burst
+        )
+        self.bot.session.middleware(self.send_scheduler)
+        state_manager.configure(settings.state_ttl_seconds, settings.state_max_count, settings.state_max_bytes)
+        state_manager.attach_store(
+            create_state_store(settings.state_backend, settings.state_db_path), settings.state_flush_batch
+        )
+        self.dp = Dispatcher(storage=ConversationStorage(state_manager))
+        datetime_processor.configure_cache(settings.occurrence_cache_size)
+        callback_tokens.configure(
+            settings.callback_secret, settings.telegram_bot_token, settings.callback_db_path,
+            settings.callback_token_ttl_seconds
+        )
+        self.health_server = HealthServer(llm_service.check_reachability) if settings.metrics_port else None
+        self._warmup_task = None
         self._setup_middleware()
+        self._setup_metrics()
 
     def _setup_middleware(self):
         @self.dp.message.middleware()
         async def logging_middleware(handler, event, data):
             user_id = event.from_user.id if event.from_user else "unknown"
             username = event.from_user.username if event.from_user else "unknown"
-            self.logger.info(f"Message from user {user_id} ({username}): {event.text}")
+            text_length = len(event.text) if event.text else 0
+            self.logger.debug("Message from user %s (%s), %d chars", user_id, username, text_length)
             return await handler(event, data)
 
         @self.dp.callback_query.middleware()
         async def callback_logging_middleware(handler, event, data):
             user_id = event.from_user.id if event.from_user else "unknown"
             username = event.from_user.username if event.from_user else "unknown"
-            self.logger.info(f"Callback from user {user_id} ({username}): {event.data}")
+            self.logger.debug("Callback from user %s (%s): %s", user_id, username, event.data)
             return await handler(event, data)
 
+    def _setup_metrics(self):
+        metrics_registry.gauge(
+            "bot_user_states", "Live conversation states by phase", state_manager.get_states_summary, label="state"
+        )
+        metrics_registry.gauge(
+            "bot_user_states_total", "Live conversation states", state_manager.get_state_count
+        )
+        metrics_registry.gauge(
+            "bot_user_state_bytes", "Estimated memory held by conversation states", state_manager.get_memory_bytes
+        )
+        metrics_registry.gauge(
+            "occurrence_cache_entries", "Formatted occurrence lists memoized for the current minute",
+            lambda: len(datetime_processor.occurrence_memo) if datetime_processor.occurrence_memo else 0
+        )
+        metrics_registry.gauge(
+            "telegram_send_queue_depth", "Outgoing requests waiting in the send queue",
+            lambda: self.send_scheduler.queue_depth
+        )
+        metrics_registry.gauge(
+            "llm_requests_in_flight", "LLM requests currently awaiting a response", lambda: llm_service.requests_in_flight
+        )
+        metrics_registry.gauge(
+            "llm_requests_waiting", "LLM requests waiting for a concurrency slot",
+            lambda: llm_service.requests_pending - llm_service.requests_in_flight
+        )
+        metrics_registry.gauge(
+            "llm_admission_queue_depth", "LLM jobs waiting for admission",
+            lambda: get_admission_controller().queued
+        )
+        metrics_registry.gauge(
+            "llm_admission_active", "LLM jobs holding an admission slot",
+            lambda: get_admission_controller().active
+        )
+        metrics_registry.gauge(
+            "llm_circuit_state", "Circuit breaker state per model (0 closed, 1 half-open, 2 open)",
+            llm_service.get_circuit_states, label="model"
+        )
+
     async def start_polling(self):
+        if self.health_server:
+            await self.health_server.start(self.settings.metrics_host, self.settings.metrics_port)
+        usage_accounting.configure(
+            self.settings.usage_file, self.settings.usage_flush_seconds, self.settings.usage_salt
+        )
+        self._warmup_task = asyncio.create_task(self._warm_up_llm())
+        state_manager.start_sweeper(self.settings.state_sweep_interval_seconds)
+        state_manager.start_flusher(self.settings.state_flush_seconds)
         self.logger.info("Starting bot polling...")
+        while True:
+            try:
+                await self.dp.start_polling(
+                    self.bot,
+                    skip_updates=True,
+                    allowed_updates=["message", "callback_query"]
+                )
+                return
+            except TelegramRetryAfter as e:
+                self.logger.warning(f"Rate limited. Waiting {e.retry_after} seconds")
+                await asyncio.sleep(e.retry_after)
+            except TelegramServerError as e:
+                self.logger.error(f"Telegram server error: {e}")
+                await asyncio.sleep(5)
+            except Exception as e:
+                self.logger.error(f"Unexpected error in polling: {e}")
+                raise
+
+    async def _warm_up_llm(self):
         try:
-            await self.dp.start_polling(
-                self.bot,
-                skip_updates=True,
-                allowed_updates=["message", "callback_query"]
-            )
-        except TelegramRetryAfter as e:
-            self.logger.warning(f"Rate limited. Waiting {e.retry_after} seconds")
-            await asyncio.sleep(e.retry_after)
-            await self.start_polling()
-        except TelegramServerError as e:
-            self.logger.error(f"Telegram server error: {e}")
-            await asyncio.sleep(5)
-            await self.start_polling()
+            await llm_service.start()
+            self.logger.info("LLM clients initialized")
         except Exception as e:
-            self.logger.error(f"Unexpected error in polling: {e}")
-            raise
+            self.logger.warning(f"LLM warm-up failed, will retry on first request: {e}")
 
     async def stop(self):
         self.logger.info("Stopping bot...")
+        if self._warmup_task:
+            self._warmup_task.cancel()
+        await state_manager.stop_sweeper()
+        await state_manager.close()
+        callback_tokens.close()
+        if self.health_server:
+            await self.health_server.stop()
+        usage_accounting.shutdown()
         await self.bot.session.close()
 
     def register_handlers(self, handlers_module):
@@ -7,7 +7,68 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     telegram_bot_token: str
     openai_api_key: str
+    telegram_api_base: str = ""
     log_level: str = "INFO"
+    log_sample_rates: str = ""
+    log_rate_limits: str = ""
+    log_file_max_bytes: int = 10 * 1024 * 1024
+    log_file_backup_count: int = 5
+    send_global_rate: float = 30.0
+    send_chat_rate: float = 1.0
+    send_chat_burst: int = 3
+    metrics_host: str = "0.0.0.0"
+    metrics_port: int = 8080
+    llm_backend: str = "openai"
+    llm_cassette_path: str = "cassettes/llm.jsonl"
+    llm_replay_latency: bool = False
+    llm_synthetic_latency: str = "none"
+    llm_synthetic_error_rate: float = 0.0
+    llm_synthetic_seed: int = 0
+    llm_synthetic_token_seconds: float = 0.0
+    llm_prompt_version: str = "v2"
+    llm_routes: str = ""
+    llm_route_slo_seconds: float = 0.0
+    llm_route_max_chars: int = 600
+    llm_route_max_clauses: int = 4
+    llm_route_max_repair_rate: float = 0.2
+    llm_route_explore_rate: float = 0.05
+    llm_max_concurrency: int = 256
+    admission_max_concurrent: int = 32
+    admission_max_queue: int = 256
+    admission_wait_slo_seconds: float = 10.0
+    admission_quantum_tokens: int = 500
+    state_ttl_seconds: float = 3600.0
+    state_max_count: int = 100000
+    state_max_bytes: int = 268435456
+    state_sweep_interval_seconds: float = 30.0
+    state_backend: str = "memory"
+    state_db_path: str = "data/states.db"
+    state_flush_seconds: float = 1.0
+    state_flush_batch: int = 512
+    occurrence_cache_size: int = 10000
+    callback_secret: str = ""
+    callback_db_path: str = "data/callbacks.db"
+    callback_token_ttl_seconds: float = 172800.0
+    parse_chunk_min_chars: int = 800
+    parse_chunk_target_chars: int = 600
+    parse_max_chunks: int = 8
+    usage_file: str = ""
+    usage_flush_seconds: float = 60.0
+    usage_salt: str = ""
+    llm_hedge_quantile: float = 0.95
+    llm_hedge_min_delay_seconds: float = 1.0
+    llm_hedge_to_fallback: bool = False
+    llm_deadline_seconds: float = 60.0
+    llm_max_attempts: int = 2
+    llm_retry_backoff_seconds: float = 0.5
+    llm_circuit_enabled: bool = True
+    llm_circuit_window_seconds: float = 60.0
+    llm_circuit_window_calls: int = 20
+    llm_circuit_min_calls: int = 10
+    llm_circuit_error_rate: float = 0.5
+    llm_circuit_slow_call_seconds: float = 30.0
+    llm_circuit_slow_rate: float = 0.5
+    llm_circuit_open_seconds: float = 30.0
     
     model_config = SettingsConfigDict(
         env_file='.env',
@@ -4,6 +4,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 
 from services.state_manager import state_manager
+from services.message_paginator import message_paginator
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +92,7 @@ async def clear_command(message: Message):
     logger.info(f"User {user_id} executed /clear command")
     
     was_flushed = state_manager.flush_state(user_id)
+    message_paginator.drop_user_views(user_id)
     
     if was_flushed:
         clear_text = """🧹 <b>Context Cleared</b>
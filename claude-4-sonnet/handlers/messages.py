@@ -5,10 +5,15 @@ from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 
 from utils.error_handler import handle_message_error, ErrorType
+from services.admission_controller import OverloadedError, get_admission_controller
+from services.llm_backend import estimate_tokens
 from services.state_manager import state_manager, ConversationState
+from services.usage_ledger import usage_accounting
 from services.task_parser import task_parser
 from services.clarification_service import clarification_service
 from services.keyboard_service import keyboard_service
+from services.callback_tokens import callback_tokens
+from services.message_paginator import message_paginator, PagedView
 from services.datetime_processor import datetime_processor
 from services.task_validator import task_validator
 
@@ -16,8 +21,43 @@ logger = logging.getLogger(__name__)
 
 message_router = Router()
 
+TOKEN_ERRORS = {
+    "malformed": "This button is no longer valid",
+    "bad_signature": "This button is no longer valid",
+    "expired": "These tasks have expired. Please send them again",
+    "missing": "These tasks have expired. Please send them again",
+    "replayed": "These tasks were already answered"
+}
 
-@message_router.message(StateFilter(None))
+
+@message_router.message(StateFilter(ConversationState.CLARIFICATION.value))
+async def handle_clarification_message(message: Message, state: FSMContext):
+    """Handle answers to open clarification questions"""
+    user_id = message.from_user.id if message.from_user else None
+    if not user_id:
+        await handle_message_error(message, ErrorType.PROCESSING_ERROR)
+        return
+        
+    logger.info(f"Processing clarification response from user {user_id}")
+    usage_accounting.set_user(user_id)
+    
+    try:
+        await _handle_clarification_response(message, user_id)
+    except Exception as e:
+        logger.error(f"Error processing clarification from user {user_id}: {e}")
+        state_manager.flush_state(user_id)
+        await handle_message_error(message, ErrorType.PROCESSING_ERROR)
+
+
+@message_router.message(StateFilter(
+    ConversationState.PROCESSING.value, ConversationState.DISPLAY.value, ConversationState.FINAL_OUTPUT.value
+))
+async def handle_message_during_conversation(message: Message):
+    """Handle new input while earlier tasks are still being parsed or awaiting approval"""
+    await handle_message_error(message, ErrorType.CONTEXT_CONFLICT)
+
+
+@message_router.message(StateFilter(None, ConversationState.AWAITING_INPUT.value))
 async def handle_text_message(message: Message, state: FSMContext):
     """Handle incoming text messages for task processing"""
     user_id = message.from_user.id if message.from_user else None
@@ -26,16 +66,9 @@ async def handle_text_message(message: Message, state: FSMContext):
         return
         
     logger.info(f"Processing text message from user {user_id}")
+    usage_accounting.set_user(user_id)
     
     try:
-        if state_manager.is_in_clarification(user_id):
-            await _handle_clarification_response(message, user_id)
-            return
-        
-        if not state_manager.can_accept_new_tasks(user_id):
-            await handle_message_error(message, ErrorType.CONTEXT_CONFLICT)
-            return
-        
         input_validation_error = task_validator.validate_input_message(message.text)
         if input_validation_error:
             await message.answer(f"❌ {input_validation_error}")
@@ -59,7 +92,14 @@ async def handle_text_message(message: Message, state: FSMContext):
             original_message=text_content
         )
         
-        parsing_result = await task_parser.parse_tasks(text_content)
+        try:
+            async with get_admission_controller().admit(user_id, estimate_tokens(text_content)):
+                parsing_result = await task_parser.parse_tasks(text_content)
+        except OverloadedError as e:
+            logger.warning(f"Shedding task parsing for user {user_id}: {e}")
+            state_manager.flush_state(user_id)
+            await handle_message_error(message, ErrorType.BUSY, str(e))
+            return
         
         if parsing_result.get("error"):
             await message.answer(f"❌ {parsing_result['error']}")
@@ -130,27 +170,17 @@ async def handle_callback_query(callback: CallbackQuery, state: FSMContext):
             return
         
         action = parsed_callback["action"]
-        callback_user_id = parsed_callback["user_id"]
-        
-        if callback_user_id != user_id:
-            await callback.answer("Error: Invalid user for this action", show_alert=True)
-            return
         
-        if not state_manager.is_awaiting_approval(user_id):
-            await callback.answer("No active task approval found", show_alert=True)
+        if action == "decision":
+            await _handle_decision(callback, user_id, parsed_callback["token"])
             return
         
-        user_state = state_manager.get_state(user_id)
-        if not user_state or not user_state.parsed_tasks:
-            await callback.answer("No tasks found for approval", show_alert=True)
+        if parsed_callback["user_id"] != user_id:
+            await callback.answer("Error: Invalid user for this action", show_alert=True)
             return
         
-        await callback.answer()
-        
-        if action == "approve":
-            await _handle_task_approval(callback, user_id, user_state.parsed_tasks)
-        elif action == "reject":
-            await _handle_task_rejection(callback, user_id)
+        if action == "page":
+            await _handle_page_navigation(callback, user_id, parsed_callback["page"])
         else:
             await callback.message.answer("❌ Unknown action received")
             
@@ -180,11 +210,17 @@ async def _handle_clarification_response(message: Message, user_id: int):
         await message.answer("❌ Please provide a valid response to the clarification question.")
         return
     
-    result = await clarification_service.process_clarification_response(
-        message.text,
-        user_state.clarifications_needed,
-        user_state.parsed_tasks
-    )
+    try:
+        async with get_admission_controller().admit(user_id, estimate_tokens(message.text)):
+            result = await clarification_service.process_clarification_response(
+                message.text,
+                user_state.clarifications_needed,
+                user_state.parsed_tasks
+            )
+    except OverloadedError as e:
+        logger.warning(f"Shedding clarification for user {user_id}: {e}")
+        await handle_message_error(message, ErrorType.BUSY, str(e))
+        return
     
     if not result["success"]:
         await message.answer(f"❌ {result['error']}")
@@ -208,33 +244,71 @@ async def _handle_clarification_response(message: Message, user_id: int):
 async def _show_tasks_for_approval(message: Message, user_id: int, tasks: list):
     state_manager.update_state(user_id, state=ConversationState.DISPLAY)
     
-    display_text = keyboard_service.format_parsed_tasks_display(tasks)
+    view = keyboard_service.format_parsed_tasks_display(tasks)
+    first_page = await message_paginator.render_page(view, 0)
     
-    keyboard = keyboard_service.create_approval_keyboard(user_id)
+    approve_token, reject_token = await callback_tokens.create_tokens(user_id, tasks)
+    keyboard = keyboard_service.create_approval_keyboard(
+        user_id, approve_token, reject_token, 0, first_page["has_next"]
+    )
     
     if not keyboard_service.validate_keyboard_limits(keyboard):
         await message.answer("❌ Error creating approval buttons. Please try again.")
         state_manager.flush_state(user_id)
         return
     
-    sent_message = await message.answer(display_text, reply_markup=keyboard)
+    sent_message = await message.answer(first_page["text"], reply_markup=keyboard)
+    
+    if first_page["has_next"]:
+        message_paginator.register_view(user_id, sent_message.message_id, view)
     
     state_manager.update_state(user_id, message_id_for_approval=sent_message.message_id)
 
 
+async def _handle_decision(callback: CallbackQuery, user_id: int, token: str):
+    """Approve/Reject work from the signed token and its snapshot alone, so they survive restarts and can land on
+    any instance; the conversation state is not needed"""
+    result, claim, tasks = await callback_tokens.redeem(user_id, token)
+    if result != "ok":
+        await callback.answer(TOKEN_ERRORS[result], show_alert=True)
+        return
+    
+    await callback.answer()
+    
+    if claim.action == "approve":
+        await _handle_task_approval(callback, user_id, tasks)
+    else:
+        await _handle_task_rejection(callback, user_id)
+
+
+def _end_conversation(user_id: int, message_id: int):
+    # Only close the conversation this proposal belongs to; the user may have started another since
+    user_state = state_manager.get_state(user_id)
+    if user_state and user_state.message_id_for_approval == message_id:
+        state_manager.flush_state(user_id)
+
+
 async def _handle_task_approval(callback: CallbackQuery, user_id: int, tasks: list):
     try:
-        final_output = await _generate_final_output(tasks)
+        view = _generate_final_output(tasks)
+        first_page = await message_paginator.render_page(view, 0)
+        
+        sent_message = await callback.message.answer(
+            first_page["text"],
+            reply_markup=keyboard_service.create_page_keyboard(user_id, 0, first_page["has_next"])
+        )
         
-        await callback.message.answer(final_output)
+        message_paginator.drop_view(user_id, callback.message.message_id)
+        if first_page["has_next"]:
+            message_paginator.register_view(user_id, sent_message.message_id, view)
         
-        state_manager.flush_state(user_id)
+        _end_conversation(user_id, callback.message.message_id)
         logger.info(f"Task approval completed for user {user_id}")
         
     except Exception as e:
         logger.error(f"Error handling task approval for user {user_id}: {e}")
         await callback.message.answer("❌ Error processing your approved tasks. Please try again.")
-        state_manager.flush_state(user_id)
+        _end_conversation(user_id, callback.message.message_id)
 
 
 async def _handle_task_rejection(callback: CallbackQuery, user_id: int):
@@ -243,56 +317,61 @@ async def _handle_task_rejection(callback: CallbackQuery, user_id: int):
         "Your tasks have been rejected. Please send new tasks if needed."
     )
     
-    state_manager.flush_state(user_id)
+    message_paginator.drop_view(user_id, callback.message.message_id)
+    _end_conversation(user_id, callback.message.message_id)
     logger.info(f"Task rejection completed for user {user_id}")
 
 
-async def _generate_final_output(tasks: list) -> str:
-    if not tasks:
-        return "❌ No tasks to process."
+async def _handle_page_navigation(callback: CallbackQuery, user_id: int, page: int):
+    view = message_paginator.get_view(user_id, callback.message.message_id)
+    if not view:
+        await callback.answer("This list has expired", show_alert=True)
+        return
     
-    header = "📅 <b>Next Occurrences:</b>\n\n"
+    await callback.answer()
     
-    task_outputs = []
-    for i, task in enumerate(tasks, 1):
-        classification = task.get("classification", "unknown")
-        description = task.get("description", "No description")
-        
-        try:
-            occurrences = await datetime_processor.get_next_occurrences(task, limit=3)
-            
-            task_output = f"{i}. [{classification}] {description}"
-            
-            if occurrences:
-                for occurrence in occurrences:
-                    task_output += f"\n   - Next: {occurrence}"
-            else:
-                task_output += "\n   - No future occurrences calculated"
-            
-            task_outputs.append(task_output)
-            
-        except Exception as e:
-            logger.error(f"Error generating occurrences for task {i}: {e}")
-            task_output = f"{i}. [{classification}] {description}"
-            task_output += "\n   - Error calculating occurrences"
-            task_outputs.append(task_output)
+    rendered = await message_paginator.render_page(view, page)
     
-    final_message = header + "\n\n".join(task_outputs)
+    tokens = keyboard_service.get_approval_tokens(callback.message.reply_markup) if view.with_approval else None
+    if tokens:
+        keyboard = keyboard_service.create_approval_keyboard(user_id, *tokens, rendered["page"], rendered["has_next"])
+    else:
+        keyboard = keyboard_service.create_page_keyboard(user_id, rendered["page"], rendered["has_next"])
+    
+    try:
+        await callback.message.edit_text(rendered["text"], reply_markup=keyboard)
+    except Exception as e:
+        logger.debug("Page edit skipped for user %s: %s", user_id, e)
+
+
+def _generate_final_output(tasks: list) -> PagedView:
+    return PagedView(
+        header="📅 <b>Next Occurrences:</b>\n\n",
+        tasks=tasks,
+        render_block=_format_occurrence_entry,
+        empty_text="❌ No tasks to process."
+    )
+
+
+async def _format_occurrence_entry(index: int, task: dict) -> str:
+    classification = task.get("classification", "unknown")
+    description = task.get("description", "No description")
+    task_output = f"{index}. [{classification}] {description}"
     
-    if len(final_message) > 4000:
-        logger.warning(f"Final output is {len(final_message)} chars, truncating")
-        truncated_outputs = []
-        for output in task_outputs:
-            lines = output.split('\n')
-            if len(lines[0]) > 100:
-                description_line = lines[0]
-                if len(description_line) > 97:
-                    lines[0] = description_line[:94] + "..."
-            truncated_outputs.append('\n'.join(lines))
+    try:
+        occurrences = await datetime_processor.get_next_occurrences(task, limit=3)
         
-        final_message = header + "\n\n".join(truncated_outputs)
+        if occurrences:
+            for occurrence in occurrences:
+                task_output += f"\n   - Next: {occurrence}"
+        else:
+            task_output += "\n   - No future occurrences calculated"
+            
+    except Exception as e:
+        logger.error(f"Error generating occurrences for task {index}: {e}")
+        task_output += "\n   - Error calculating occurrences"
     
-    return final_message
+    return task_output
 
 
 def _is_unrelated_input(text: str) -> bool:
@@ -15,7 +15,15 @@ async def main():
     bot_instance = None
     try:
         settings = get_settings()
-        logger = setup_logger("telegram_bot", settings.log_level, "bot.log")
+        logger = setup_logger(
+            "telegram_bot",
+            settings.log_level,
+            "bot.log",
+            sample_rates=settings.log_sample_rates,
+            rate_limits=settings.log_rate_limits,
+            max_bytes=settings.log_file_max_bytes,
+            backup_count=settings.log_file_backup_count
+        )
         
         logger.info("Starting Telegram Task Scheduler Bot")
         logger.info("Environment validation successful")
@@ -0,0 +1,189 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from config.settings import get_settings
+from utils.metrics import LLM_ADMISSION_SHED, LLM_ADMISSION_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Raised instead of queueing when the request would wait longer than the admission SLO"""
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: int, future: asyncio.Future):
+        self.cost = cost
+        self.future = future
+
+
+class AdmissionController:
+    """Global cap on concurrent LLM jobs; queued jobs are granted per user by deficit round robin over estimated tokens"""
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 256, wait_slo_seconds: float = 10.0,
+                 quantum_tokens: int = 500, initial_service_seconds: float = 5.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.wait_slo_seconds = wait_slo_seconds
+        self.quantum_tokens = max(1, quantum_tokens)
+        self.service_seconds = initial_service_seconds
+        self.active = 0
+        self.queued = 0
+        self._queues: Dict[Any, Deque[_Waiter]] = {}
+        self._deficits: Dict[Any, int] = {}
+        self._grant_intervals: Dict[Any, Tuple[float, float]] = {}
+        self._round: Deque[Any] = deque()
+        self._head_credited = False
+        self.admitted = 0
+        self.shed = 0
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        settings = get_settings()
+        return cls(
+            max_concurrent=settings.admission_max_concurrent,
+            max_queue=settings.admission_max_queue,
+            wait_slo_seconds=settings.admission_wait_slo_seconds,
+            quantum_tokens=settings.admission_quantum_tokens
+        )
+
+    def estimate_wait(self, user_key: Any, cost: int) -> float:
+        """Fair-share estimate: each other user gets ahead in proportion to its queued tokens against this user's"""
+        own_queue = self._queues.get(user_key, ())
+        own_tokens = sum(waiter.cost for waiter in own_queue) + cost
+        jobs_ahead = len(own_queue) + 1
+        for key, queue in self._queues.items():
+            if key != user_key and queue:
+                jobs_ahead += len(queue) * min(1.0, own_tokens / sum(waiter.cost for waiter in queue))
+        estimate = self.service_seconds * jobs_ahead / max(1, self.max_concurrent)
+        # A backlogged user is served at the rate its grants have actually been coming, which also covers later arrivals
+        # from lighter users that fair queueing lets overtake it
+        last_grant = self._grant_intervals.get(user_key)
+        if last_grant and last_grant[1] > 0:
+            estimate = max(estimate, (len(own_queue) + 1) * last_grant[1])
+        return estimate
+
+    def _reject(self, reason: str, message: str):
+        self.shed += 1
+        LLM_ADMISSION_SHED.get(reason).inc()
+        raise OverloadedError(message)
+
+    async def _acquire(self, user_key: Any, cost: int):
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            LLM_ADMISSION_WAIT_SECONDS.get().observe(0.0)
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full", f"admission queue is full ({self.queued} waiting)")
+        estimated_wait = self.estimate_wait(user_key, cost)
+        if estimated_wait > self.wait_slo_seconds:
+            self._reject("slo", f"estimated wait {estimated_wait:.1f}s exceeds {self.wait_slo_seconds}s")
+
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        queue = self._queues.get(user_key)
+        if queue is None:
+            queue = self._queues[user_key] = deque()
+            self._deficits[user_key] = 0
+            self._round.append(user_key)
+        queue.append(waiter)
+        self.queued += 1
+        self._dispatch()
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.wait_slo_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted at the same moment the wait gave up; hand the slot on
+                self._release()
+            else:
+                waiter.future.cancel()
+                self.queued -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout", f"waited {self.wait_slo_seconds}s for an admission slot")
+        LLM_ADMISSION_WAIT_SECONDS.get().observe(time.perf_counter() - queued_at)
+
+    def _dispatch(self):
+        while self.active < self.max_concurrent and self._round:
+            user_key = self._round[0]
+            queue = self._queues[user_key]
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if not queue:
+                self._drop_head()
+                continue
+            if not self._head_credited:
+                self._deficits[user_key] += self.quantum_tokens
+                self._head_credited = True
+            if queue[0].cost > self._deficits[user_key]:
+                self._round.rotate(-1)
+                self._head_credited = False
+                continue
+            waiter = queue.popleft()
+            self._deficits[user_key] -= waiter.cost
+            self.queued -= 1
+            self.active += 1
+            waiter.future.set_result(None)
+            self._record_grant(user_key)
+            if not queue:
+                self._drop_head()
+
+    def _record_grant(self, user_key: Any):
+        now = time.perf_counter()
+        last_grant = self._grant_intervals.get(user_key)
+        if last_grant is None:
+            self._grant_intervals[user_key] = (now, 0.0)
+            return
+        interval = now - last_grant[0]
+        self._grant_intervals[user_key] = (now, interval if last_grant[1] <= 0 else last_grant[1] + 0.2 * (interval - last_grant[1]))
+
+    def _drop_head(self):
+        user_key = self._round.popleft()
+        del self._queues[user_key]
+        del self._deficits[user_key]
+        self._grant_intervals.pop(user_key, None)
+        self._head_credited = False
+
+    def _release(self):
+        self.active -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, user_key: Any, estimated_tokens: int) -> AsyncIterator[None]:
+        """Holds one slot for the duration of the block; raises OverloadedError rather than queueing past the SLO"""
+        if self.max_concurrent <= 0:
+            yield
+            return
+        await self._acquire(user_key, max(1, estimated_tokens))
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_seconds += 0.1 * (time.perf_counter() - started - self.service_seconds)
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "users_waiting": len(self._queues),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "service_seconds": round(self.service_seconds, 3)
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController.from_settings()
+    return _admission_controller
@@ -0,0 +1,225 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.metrics import CALLBACK_TOKENS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PREFIX = "t:"
+TOKEN_VERSION = 1
+ACTIONS = ("approve", "reject")
+INLINE_FLAG = 0x08
+DIGEST_BYTES = 12
+MAC_BYTES = 10
+CLOCK_SKEW_SECONDS = 300
+EXPIRE_INTERVAL_SECONDS = 3600.0
+TOKEN_HEADER = struct.Struct(">BII")
+USER_ID = struct.Struct(">q")
+TOKEN_BYTES = TOKEN_HEADER.size + DIGEST_BYTES + MAC_BYTES
+
+
+@dataclass(frozen=True)
+class CallbackClaim:
+    action: str
+    issued_at: int
+    nonce: int
+    digest: bytes
+
+
+def snapshot_blob(tasks: List[Dict[str, Any]]) -> Tuple[bytes, bytes]:
+    """Content digest of the canonical JSON and the deflated body stored under it"""
+    raw = json.dumps(tasks, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).digest()[:DIGEST_BYTES], zlib.compress(raw, 6)
+
+
+class SqliteSnapshotStore:
+    """Task lists shown for approval and the proposals already answered, in one SQLite file that every instance
+    on the host opens. Calls block on the file lock, so the token service runs them off the event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5.0)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS approval_snapshots "
+            "(digest BLOB PRIMARY KEY, created_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS answered_proposals "
+            "(user_id INTEGER NOT NULL, issued_at INTEGER NOT NULL, nonce INTEGER NOT NULL, "
+            "PRIMARY KEY (user_id, issued_at, nonce))"
+        )
+
+    def save(self, tasks: List[Dict[str, Any]], created_at: float) -> bytes:
+        digest, body = snapshot_blob(tasks)
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO approval_snapshots VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET created_at = excluded.created_at",
+                (digest, created_at, body)
+            )
+        return digest
+
+    def load(self, digest: bytes) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body FROM approval_snapshots WHERE digest = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Unreadable approval snapshot {digest.hex()}: {e}")
+            return None
+
+    def mark_answered(self, user_id: int, claim: CallbackClaim) -> bool:
+        """False when any instance has already answered this proposal"""
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO answered_proposals VALUES (?, ?, ?)", (user_id, claim.issued_at, claim.nonce)
+            )
+        return cursor.rowcount == 1
+
+    def expire(self, deadline: float) -> int:
+        with self._lock:
+            removed = self._connection.execute(
+                "DELETE FROM approval_snapshots WHERE created_at < ?", (deadline,)
+            ).rowcount
+            removed += self._connection.execute(
+                "DELETE FROM answered_proposals WHERE issued_at < ?", (int(deadline),)
+            ).rowcount
+        return removed
+
+    def count(self) -> Tuple[int, int]:
+        with self._lock:
+            snapshots = self._connection.execute("SELECT COUNT(*) FROM approval_snapshots").fetchone()[0]
+            answered = self._connection.execute("SELECT COUNT(*) FROM answered_proposals").fetchone()[0]
+        return snapshots, answered
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CallbackTokenService:
+    """Approve/Reject callback data as HMAC-signed tokens bound to the pressing user.
+
+    A token is the prefix and 31 base64url bytes: a header with the version, flags and action, the issue time and
+    a nonce both buttons share; the digest of the task list snapshot; and a truncated MAC. The inline flag is
+    kept for task lists carried in the token itself, which none fit (see bench/callback_tokens.py)."""
+
+    def __init__(self):
+        self.ttl_seconds = 172800.0
+        self._key = secrets.token_bytes(32)
+        self._store: Optional[SqliteSnapshotStore] = None
+        self._last_expiry = 0.0
+
+    def configure(self, secret: str, bot_token: str, db_path: str, ttl_seconds: float):
+        # Instances of the same bot share its token, so without a secret they still agree on the key
+        self._key = secret.encode("utf-8") if secret else hashlib.sha256(
+            b"callback-token:" + bot_token.encode("utf-8")
+        ).digest()
+        self.ttl_seconds = ttl_seconds
+        if self._store is not None:
+            self._store.close()
+        self._store = SqliteSnapshotStore(db_path)
+
+    @property
+    def store(self) -> SqliteSnapshotStore:
+        if self._store is None:
+            self._store = SqliteSnapshotStore(":memory:")
+        return self._store
+
+    def _mac(self, user_id: int, body: bytes) -> bytes:
+        return hmac.new(self._key, USER_ID.pack(user_id) + body, hashlib.sha256).digest()[:MAC_BYTES]
+
+    def sign(self, user_id: int, action: str, digest: bytes, issued_at: int, nonce: int) -> str:
+        body = TOKEN_HEADER.pack(TOKEN_VERSION << 4 | ACTIONS.index(action), issued_at, nonce) + digest
+        token = base64.urlsafe_b64encode(body + self._mac(user_id, body)).rstrip(b"=").decode("ascii")
+        return TOKEN_PREFIX + token
+
+    def verify(self, user_id: int, data: str, now: Optional[float] = None) -> Tuple[str, Optional[CallbackClaim]]:
+        now = time.time() if now is None else now
+        if not data.startswith(TOKEN_PREFIX):
+            return "malformed", None
+        text = data[len(TOKEN_PREFIX):]
+        try:
+            raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except (ValueError, binascii.Error):
+            return "malformed", None
+        if len(raw) != TOKEN_BYTES:
+            return "malformed", None
+        body = raw[:-MAC_BYTES]
+        if not hmac.compare_digest(raw[-MAC_BYTES:], self._mac(user_id, body)):
+            return "bad_signature", None
+        head, issued_at, nonce = TOKEN_HEADER.unpack_from(body)
+        action = head & 0x07
+        if head >> 4 != TOKEN_VERSION or head & INLINE_FLAG or action >= len(ACTIONS):
+            return "malformed", None
+        if now - issued_at > self.ttl_seconds or issued_at - now > CLOCK_SKEW_SECONDS:
+            return "expired", None
+        return "ok", CallbackClaim(ACTIONS[action], issued_at, nonce, body[TOKEN_HEADER.size:])
+
+    def _save_snapshot(self, tasks: List[Dict[str, Any]], now: float) -> bytes:
+        digest = self.store.save(tasks, now)
+        if now - self._last_expiry > EXPIRE_INTERVAL_SECONDS:
+            self._last_expiry = now
+            self.store.expire(now - self.ttl_seconds - CLOCK_SKEW_SECONDS)
+        return digest
+
+    def _claim_snapshot(self, user_id: int, claim: CallbackClaim) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        tasks = self.store.load(claim.digest)
+        if tasks is None:
+            return "missing", None
+        if not self.store.mark_answered(user_id, claim):
+            return "replayed", None
+        return "ok", tasks
+
+    async def create_tokens(self, user_id: int, tasks: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """Snapshots the tasks and returns the approve and reject callback data for them"""
+        now = time.time()
+        digest = await asyncio.to_thread(self._save_snapshot, tasks, now)
+        nonce = secrets.randbits(32)
+        return (
+            self.sign(user_id, "approve", digest, int(now), nonce),
+            self.sign(user_id, "reject", digest, int(now), nonce)
+        )
+
+    async def redeem(self, user_id: int, data: str) -> Tuple[str, Optional[CallbackClaim], Optional[List[Dict[str, Any]]]]:
+        """Verifies a token and claims its proposal; the tasks come back only for the first valid answer"""
+        result, claim = self.verify(user_id, data)
+        tasks = None
+        if claim is not None:
+            result, tasks = await asyncio.to_thread(self._claim_snapshot, user_id, claim)
+        CALLBACK_TOKENS.get(result).inc()
+        if result != "ok":
+            logger.info(f"Rejected callback token from user {user_id}: {result}")
+            return result, None, None
+        return result, claim, tasks
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+callback_tokens = CallbackTokenService()
@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Tuple
+from utils.metrics import LLM_CIRCUIT_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Per-model breaker over the last window_calls outcomes within window_seconds; slow calls count like errors"""
+
+    def __init__(self, name: str, window_seconds: float = 60.0, window_calls: int = 20, min_calls: int = 10,
+                 error_rate_threshold: float = 0.5,
+                 slow_call_seconds: float = 30.0, slow_rate_threshold: float = 0.5, open_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.window_calls = max(1, window_calls)
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._failures = 0
+        self._slow_calls = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self.successes = 0
+        self.errors = 0
+        self.rejections = 0
+
+    def _transition(self, new_state: str, reason: str):
+        previous_state, self.state = self.state, new_state
+        LLM_CIRCUIT_TRANSITIONS.get(f"{previous_state}->{new_state}").inc()
+        log = logger.warning if new_state == OPEN else logger.info
+        log(f"Circuit for {self.name} {previous_state} -> {new_state}: {reason}", extra={
+            "model": self.name, "from_state": previous_state, "to_state": new_state, "reason": reason
+        })
+        if new_state == OPEN:
+            self._opened_at = self.clock()
+        if new_state != HALF_OPEN:
+            self._probe_started_at = None
+        if new_state == CLOSED:
+            self._outcomes.clear()
+            self._failures = self._slow_calls = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and (
+            len(self._outcomes) > self.window_calls or self._outcomes[0][0] < now - self.window_seconds
+        ):
+            _, failed, slow = self._outcomes.popleft()
+            self._failures -= failed
+            self._slow_calls -= slow
+
+    def allow_request(self) -> bool:
+        """True when a call may go to this model; in half-open state only a single probe is let through"""
+        now = self.clock()
+        if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN, f"open for {self.open_seconds}s")
+        if self.state == HALF_OPEN:
+            if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                self._probe_started_at = now
+                return True
+        if self.state == CLOSED:
+            return True
+        self.rejections += 1
+        return False
+
+    def _record(self, failed: bool, latency: float):
+        now = self.clock()
+        slow = latency >= self.slow_call_seconds
+        if failed:
+            self.errors += 1
+        else:
+            self.successes += 1
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._transition(OPEN, "probe failed" if failed else f"probe took {latency:.1f}s")
+            else:
+                self._transition(CLOSED, "probe succeeded")
+            return
+        if self.state == OPEN:
+            return
+
+        self._outcomes.append((now, failed, slow))
+        self._failures += failed
+        self._slow_calls += slow
+        self._trim(now)
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        if self._failures / calls >= self.error_rate_threshold:
+            self._transition(OPEN, f"error rate {self._failures / calls:.0%} over {calls} calls")
+        elif self._slow_calls / calls >= self.slow_rate_threshold:
+            self._transition(OPEN, f"slow call rate {self._slow_calls / calls:.0%} over {calls} calls")
+
+    def record_success(self, latency: float):
+        self._record(False, latency)
+
+    def record_failure(self, latency: float):
+        self._record(True, latency)
+
+    def record_cancelled(self, latency: float):
+        """Calls abandoned at a deadline still count as slow; hedge losers cancelled early are ignored"""
+        if latency >= self.slow_call_seconds:
+            self._record(False, latency)
+
+    def get_stats(self) -> Dict[str, object]:
+        self._trim(self.clock())
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "error_rate": round(self._failures / calls, 3) if calls else 0.0,
+            "slow_rate": round(self._slow_calls / calls, 3) if calls else 0.0,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rejections": self.rejections
+        }
@@ -1,10 +1,27 @@
+import copy
 import logging
 from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, Field
 from services.llm_service import llm_service
 from services.task_validator import task_validator
+from utils.metrics import CLARIFICATION_PATCH_OPERATIONS
 
 logger = logging.getLogger(__name__)
 
+PATCHABLE_FIELDS = ("description", "classification", "time", "date", "recurrence")
+# Fields the validator reads as strings; null may clear time, date or recurrence but not these
+NON_NULL_FIELDS = ("description", "classification")
+
+
+class TaskPatchOperation(BaseModel):
+    op: str = Field(description="replace or remove")
+    path: str = Field(description="/<task id>/<field> or /<task id>/needs_clarification/<index>")
+    value: Optional[str] = Field(default=None, description="New field value for replace, null for remove")
+
+
+class ClarificationPatch(BaseModel):
+    operations: List[TaskPatchOperation] = Field(description="Changes to the listed tasks, applied in order")
+
 
 class ClarificationService:
     def __init__(self):
@@ -41,6 +58,58 @@ class ClarificationService:
         
         return header + clarification_text + footer
     
+    def collect_open_questions(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Only the tasks that still have questions; ids are 1-based like the "Task N:" prefixes"""
+        return [
+            {"id": index + 1, "task": task.get("description", ""), "questions": task["needs_clarification"]}
+            for index, task in enumerate(tasks) if task.get("needs_clarification")
+        ]
+    
+    def apply_patch(
+        self,
+        tasks: List[Dict[str, Any]],
+        operations: List[TaskPatchOperation],
+        open_ids: set
+    ) -> Tuple[Dict[int, Dict[str, Any]], int]:
+        """Applies replaces in order, then question removals from the highest index down; returns patched copies by id"""
+        patched: Dict[int, Dict[str, Any]] = {}
+        removals: Dict[int, set] = {}
+        rejected = 0
+        
+        for operation in operations:
+            parts = operation.path.strip("/").split("/")
+            task_id = int(parts[0]) if parts[0].isdigit() else 0
+            if task_id not in open_ids:
+                rejected += 1
+                continue
+            if operation.op in ("replace", "add") and len(parts) == 2 and parts[1] in PATCHABLE_FIELDS:
+                if operation.value is None and parts[1] in NON_NULL_FIELDS:
+                    rejected += 1
+                    continue
+                task = patched.setdefault(task_id, copy.deepcopy(tasks[task_id - 1]))
+                task[parts[1]] = operation.value
+            elif operation.op == "remove" and parts[1:2] == ["needs_clarification"]:
+                questions = tasks[task_id - 1]["needs_clarification"]
+                if len(parts) == 2:
+                    removals.setdefault(task_id, set()).update(range(len(questions)))
+                elif len(parts) == 3 and parts[2].isdigit() and int(parts[2]) < len(questions):
+                    removals.setdefault(task_id, set()).add(int(parts[2]))
+                else:
+                    rejected += 1
+                    continue
+                patched.setdefault(task_id, copy.deepcopy(tasks[task_id - 1]))
+            else:
+                rejected += 1
+        
+        for task_id, indexes in removals.items():
+            questions = patched[task_id]["needs_clarification"]
+            for index in sorted(indexes, reverse=True):
+                del questions[index]
+        
+        CLARIFICATION_PATCH_OPERATIONS.get("applied").inc(len(operations) - rejected)
+        CLARIFICATION_PATCH_OPERATIONS.get("rejected").inc(rejected)
+        return patched, rejected
+    
     async def process_clarification_response(
         self, 
         response: str, 
@@ -48,28 +117,45 @@ class ClarificationService:
         original_tasks: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         try:
-            updated_tasks = []
-            
-            for task in original_tasks:
-                updated_task = task.copy()
-                updated_task["needs_clarification"] = []
-                updated_tasks.append(updated_task)
+            open_questions = self.collect_open_questions(original_tasks)
+            updated_tasks = list(original_tasks)
+            errors = []
             
-            validation_result = task_validator.validate_parsed_tasks(updated_tasks)
+            if open_questions:
+                patch = await llm_service.request_clarification_patch(response, open_questions, ClarificationPatch)
+                if patch is None:
+                    return {
+                        "success": False,
+                        "error": "Failed to process clarification. Please try again or use /clear to start over.",
+                        "updated_tasks": []
+                    }
+                
+                patched, _ = self.apply_patch(
+                    original_tasks, patch.operations, {item["id"] for item in open_questions}
+                )
+                # Only the patched tasks are revalidated, the rest were validated when they were parsed
+                for task_id, task in patched.items():
+                    task_validation = task_validator.validate_task(task, task_id)
+                    if task_validation["valid"]:
+                        updated_tasks[task_id - 1] = task_validation["task"]
+                    else:
+                        CLARIFICATION_PATCH_OPERATIONS.get("invalid_task").inc()
+                        errors.extend(task_validation["errors"])
             
-            if not validation_result["valid"]:
+            if errors:
                 return {
                     "success": False,
-                    "error": "Invalid information provided. " + "; ".join(validation_result["errors"]),
+                    "error": "Invalid information provided. " + "; ".join(errors),
                     "updated_tasks": []
                 }
             
+            still_needs_clarification, remaining_clarifications = self.extract_clarifications(updated_tasks)
             return {
                 "success": True,
                 "error": None,
-                "updated_tasks": validation_result["validated_tasks"],
-                "still_needs_clarification": False,
-                "remaining_clarifications": []
+                "updated_tasks": updated_tasks,
+                "still_needs_clarification": still_needs_clarification,
+                "remaining_clarifications": remaining_clarifications
             }
             
         except Exception as e:
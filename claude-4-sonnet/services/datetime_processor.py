@@ -1,7 +1,13 @@
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass
+from itertools import islice
+
+from services.recurrence import compile_recurrence
+from utils.metrics import OCCURRENCE_CACHE_LOOKUPS
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +21,58 @@ class TaskOccurrence:
     datetime_obj: datetime
 
 
+class OccurrenceMemo:
+    """Bounded LRU of formatted occurrence lists for one UTC minute; occurrences fall on whole minutes, so every
+    call within the minute gets the same answer, and the entries are dropped when the minute rolls over"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[str, ...]]" = OrderedDict()
+        self._minute: Optional[int] = None
+        self._hits = OCCURRENCE_CACHE_LOOKUPS.get("hit")
+        self._misses = OCCURRENCE_CACHE_LOOKUPS.get("miss")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, minute: int, key: Tuple) -> Optional[Tuple[str, ...]]:
+        if minute != self._minute:
+            self._entries.clear()
+            self._minute = minute
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            self._misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._hits.inc()
+        return value
+
+    def put(self, key: Tuple, value: Tuple[str, ...]):
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
 class DateTimeProcessor:
     def __init__(self):
         self.gmt_timezone = GMT_TIMEZONE
+        self.occurrence_memo: Optional[OccurrenceMemo] = OccurrenceMemo()
+
+    def configure_cache(self, max_entries: int):
+        self.occurrence_memo = OccurrenceMemo(max_entries) if max_entries > 0 else None
     
     def validate_date_time(self, date_str: Optional[str], time_str: Optional[str]) -> Dict[str, Any]:
         validation_result = {
@@ -89,13 +144,26 @@ class DateTimeProcessor:
         time_str = task.get("time")
         recurrence = task.get("recurrence")
         
-        occurrences = self.get_next_occurrences_objects(date_str, time_str, recurrence, limit)
+        minute = int(time.time()) // 60
+        memo = self.occurrence_memo
+        if memo is not None:
+            key = (recurrence, date_str, time_str, limit)
+            cached = memo.get(minute, key)
+            if cached is not None:
+                return list(cached)
+        
+        now = datetime.fromtimestamp(minute * 60, self.gmt_timezone)
+        occurrences = self.get_next_occurrences_objects(date_str, time_str, recurrence, limit, now)
+        formatted = [f"{occ.date} at {occ.time}" for occ in occurrences]
         
-        return [f"{occ.date} at {occ.time}" for occ in occurrences]
+        if memo is not None:
+            memo.put(key, tuple(formatted))
+        return formatted
     
     def get_next_occurrences_objects(self, date_str: Optional[str], time_str: Optional[str], 
-                           recurrence: Optional[str], limit: int = 3) -> List[TaskOccurrence]:
-        now = datetime.now(self.gmt_timezone)
+                           recurrence: Optional[str], limit: int = 3,
+                           now: Optional[datetime] = None) -> List[TaskOccurrence]:
+        now = now or datetime.now(self.gmt_timezone)
         occurrences = []
         
         default_time = time_str or "09:00"
@@ -142,6 +210,7 @@ class DateTimeProcessor:
         occurrences = []
         
         try:
+            rule = compile_recurrence(recurrence)
             time_parts = time_str.split(":")
             hour, minute = int(time_parts[0]), int(time_parts[1])
             
@@ -152,71 +221,19 @@ class DateTimeProcessor:
             else:
                 start_date = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
             
-            if start_date <= now:
-                start_date = self._get_next_occurrence_date(start_date, recurrence, now)
-            
-            current_date = start_date
-            count = 0
-            
-            while count < limit:
+            # A start still ahead is itself the first occurrence when the rule matches it
+            after = max(now, start_date - timedelta(microseconds=1))
+            for current_date in islice(rule.iter_after(start_date, after), limit):
                 occurrences.append(TaskOccurrence(
                     date=current_date.strftime("%b %d, %Y"),
                     time=f"{current_date.strftime('%H:%M')} GMT",
                     datetime_obj=current_date
                 ))
                 
-                current_date = self._get_next_occurrence_date(current_date, recurrence, current_date)
-                count += 1
-                
         except Exception as e:
             logger.error(f"Error calculating recurring occurrences: {e}")
             
         return occurrences
-    
-    def _get_next_occurrence_date(self, current_date: datetime, recurrence: str, reference_date: datetime) -> datetime:
-        if recurrence == "daily":
-            return current_date + timedelta(days=1)
-        elif recurrence == "weekly":
-            return current_date + timedelta(weeks=1)
-        elif recurrence.startswith("weekly_"):
-            return self._get_next_weekday_occurrence(current_date, recurrence)
-        elif recurrence == "monthly":
-            if current_date.month == 12:
-                next_month = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                next_month = current_date.replace(month=current_date.month + 1)
-            
-            try:
-                return next_month
-            except ValueError:
-                return next_month.replace(day=28)
-        elif recurrence == "yearly":
-            try:
-                return current_date.replace(year=current_date.year + 1)
-            except ValueError:
-                return current_date.replace(year=current_date.year + 1, month=2, day=28)
-        else:
-            return current_date + timedelta(days=1)
-    
-    def _get_next_weekday_occurrence(self, current_date: datetime, recurrence: str) -> datetime:
-        try:
-            weekdays_str = recurrence.replace("weekly_", "")
-            weekdays = [int(d) for d in weekdays_str.split("_")]
-            
-            current_weekday = current_date.weekday()
-            days_ahead = None
-            
-            for weekday in sorted(weekdays):
-                if weekday > current_weekday:
-                    days_ahead = weekday - current_weekday
-                    break
-            
-            if days_ahead is None:
-                days_ahead = (7 - current_weekday) + min(weekdays)
-            
-            return current_date + timedelta(days=days_ahead)
-        except:
-            return current_date + timedelta(days=1)
 
 
 datetime_processor = DateTimeProcessor()
\ No newline at end of file
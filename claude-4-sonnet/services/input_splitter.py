@@ -0,0 +1,95 @@
+import re
+from typing import List, Optional
+from config.settings import get_settings
+
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*•–]|\d{1,3}[.)])\s+")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+LAST_WORD_PATTERN = re.compile(r"(\S+)[.!?]$")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "st", "jr", "sr", "prof", "vs", "etc", "e.g", "i.e", "a.m", "p.m", "no", "approx"}
+# A unit opening like this leans on the one before it, so the two stay in the same chunk
+CONTINUATION_PATTERN = re.compile(
+    r"^(?:it|its|that|this|these|those|them|they|then|also|and|but|or|same|again|both|instead|after that|before that)\b",
+    re.IGNORECASE
+)
+# References that can reach any earlier unit; with these there is no safe place to cut
+CROSS_REFERENCE_PATTERN = re.compile(
+    r"\b(?:the (?:above|previous|former|latter|first|last|same) (?:one|ones|task|tasks|item|items)|"
+    r"(?:all|each|both|any|either) of (?:these|them|those|the above)|as above|same as (?:before|above))\b",
+    re.IGNORECASE
+)
+
+
+class InputSplitter:
+    """Cuts long multi-task messages at list item, line and sentence boundaries so the chunks can be parsed in parallel"""
+
+    def __init__(self, min_chars: int = 800, target_chars: int = 600, max_chunks: int = 8):
+        self.min_chars = min_chars
+        self.target_chars = target_chars
+        self.max_chunks = max_chunks
+
+    @classmethod
+    def from_settings(cls) -> "InputSplitter":
+        settings = get_settings()
+        return cls(settings.parse_chunk_min_chars, settings.parse_chunk_target_chars, settings.parse_max_chunks)
+
+    @staticmethod
+    def _sentences(line: str) -> List[str]:
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_PATTERN.finditer(line):
+            last_word = LAST_WORD_PATTERN.search(line[start:match.start()])
+            if last_word:
+                word = last_word.group(1).lower()
+                if len(word) == 1 or word in ABBREVIATIONS:
+                    continue
+            sentences.append(line[start:match.start()])
+            start = match.end()
+        sentences.append(line[start:])
+        return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+    def split_units(self, text: str) -> List[str]:
+        """Smallest independent pieces: list items, then sentences; continuations and wrapped lines are glued back"""
+        units: List[str] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            is_list_item = bool(LIST_ITEM_PATTERN.match(line))
+            pieces = [line.strip()] if is_list_item else self._sentences(line)
+            for index, piece in enumerate(pieces):
+                body = LIST_ITEM_PATTERN.sub("", piece)
+                wrapped_line = index == 0 and not is_list_item and body[:1].islower()
+                if units and (wrapped_line or CONTINUATION_PATTERN.match(body)):
+                    units[-1] = f"{units[-1]} {piece}"
+                else:
+                    units.append(piece)
+        return units
+
+    def _pack(self, units: List[str], chunk_chars: int) -> List[str]:
+        chunks: List[str] = []
+        current: List[str] = []
+        size = 0
+        for unit in units:
+            if current and size + len(unit) > chunk_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(unit)
+            size += len(unit) + 1
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    def split(self, text: str) -> Optional[List[str]]:
+        """Chunks in input order, or None when the text is short or cannot be cut without losing context"""
+        if self.min_chars <= 0 or self.max_chunks < 2 or len(text) < self.min_chars:
+            return None
+        if CROSS_REFERENCE_PATTERN.search(text):
+            return None
+        units = self.split_units(text)
+        if len(units) < 2:
+            return None
+        chunk_chars = max(self.target_chars, -(-len(text) // self.max_chunks))
+        chunks = self._pack(units, chunk_chars)
+        while len(chunks) > self.max_chunks:
+            chunk_chars += chunk_chars // 4 + 1
+            chunks = self._pack(units, chunk_chars)
+        return chunks if len(chunks) > 1 else None
@@ -1,8 +1,12 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 import json
 
+from services.callback_tokens import TOKEN_PREFIX
+from services.message_paginator import PagedView
+from services.recurrence import compile_recurrence
+
 logger = logging.getLogger(__name__)
 
 
@@ -10,41 +14,53 @@ class KeyboardService:
     def __init__(self):
         self._max_callback_data_length = 64
     
-    def create_approval_keyboard(self, user_id: int) -> InlineKeyboardMarkup:
-        approve_data = self._create_callback_data("approve", user_id)
-        reject_data = self._create_callback_data("reject", user_id)
-        
-        if len(approve_data.encode('utf-8')) > self._max_callback_data_length:
-            logger.error(f"Approve callback data too long: {len(approve_data.encode('utf-8'))} bytes")
-            approve_data = f"app_{user_id}"[:self._max_callback_data_length-5]
-        
-        if len(reject_data.encode('utf-8')) > self._max_callback_data_length:
-            logger.error(f"Reject callback data too long: {len(reject_data.encode('utf-8'))} bytes")
-            reject_data = f"rej_{user_id}"[:self._max_callback_data_length-5]
-        
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(text="Approve ✅", callback_data=approve_data),
-                    InlineKeyboardButton(text="Reject ❌", callback_data=reject_data)
-                ]
+    def create_approval_keyboard(
+        self, user_id: int, approve_token: str, reject_token: str, page: int = 0, has_next: bool = False
+    ) -> InlineKeyboardMarkup:
+        rows = [
+            [
+                InlineKeyboardButton(text="Approve ✅", callback_data=approve_token),
+                InlineKeyboardButton(text="Reject ❌", callback_data=reject_token)
             ]
-        )
+        ]
+        navigation_row = self._create_navigation_row(user_id, page, has_next)
+        if navigation_row:
+            rows.append(navigation_row)
+        
+        keyboard = InlineKeyboardMarkup(inline_keyboard=rows)
         
         logger.info(f"Created approval keyboard for user {user_id}")
         return keyboard
     
-    def _create_callback_data(self, action: str, user_id: int) -> str:
-        data = f"{action}_{user_id}"
-        
-        if len(data.encode('utf-8')) <= self._max_callback_data_length:
-            return data
-        
-        short_action = action[:3]
-        return f"{short_action}_{user_id}"
+    def get_approval_tokens(self, keyboard: Optional[InlineKeyboardMarkup]) -> Optional[Tuple[str, str]]:
+        """The signed tokens already on a message, so paging keeps the buttons the user was shown"""
+        if not keyboard or not keyboard.inline_keyboard:
+            return None
+        row = keyboard.inline_keyboard[0]
+        if len(row) != 2 or not all((button.callback_data or "").startswith(TOKEN_PREFIX) for button in row):
+            return None
+        return row[0].callback_data, row[1].callback_data
+    
+    def create_page_keyboard(self, user_id: int, page: int, has_next: bool) -> Optional[InlineKeyboardMarkup]:
+        navigation_row = self._create_navigation_row(user_id, page, has_next)
+        if not navigation_row:
+            return None
+        return InlineKeyboardMarkup(inline_keyboard=[navigation_row])
+    
+    def _create_navigation_row(self, user_id: int, page: int, has_next: bool) -> List[InlineKeyboardButton]:
+        row = []
+        if page > 0:
+            row.append(InlineKeyboardButton(text="◀ Prev", callback_data=f"page_{user_id}_{page - 1}"))
+        if has_next:
+            row.append(InlineKeyboardButton(text="Next ▶", callback_data=f"page_{user_id}_{page + 1}"))
+        return row
     
     def parse_callback_data(self, callback_data: str) -> Dict[str, Any]:
         try:
+            if callback_data.startswith(TOKEN_PREFIX):
+                # Signed approve/reject token, verified against the pressing user by callback_tokens
+                return {"valid": True, "action": "decision", "token": callback_data}
+            
             parts = callback_data.split('_')
             
             if len(parts) < 2:
@@ -54,10 +70,7 @@ class KeyboardService:
             user_id_part = parts[1]
             
             action_mapping = {
-                "approve": "approve",
-                "reject": "reject",
-                "app": "approve",
-                "rej": "reject"
+                "page": "page"
             }
             
             action = action_mapping.get(action_part)
@@ -69,6 +82,16 @@ class KeyboardService:
             except ValueError:
                 return {"valid": False, "error": "Invalid user ID"}
             
+            if action == "page":
+                if len(parts) < 3 or not parts[2].isdigit():
+                    return {"valid": False, "error": "Invalid page number"}
+                return {
+                    "valid": True,
+                    "action": action,
+                    "user_id": user_id,
+                    "page": int(parts[2])
+                }
+            
             return {
                 "valid": True,
                 "action": action,
@@ -79,54 +102,40 @@ class KeyboardService:
             logger.error(f"Error parsing callback data '{callback_data}': {e}")
             return {"valid": False, "error": "Callback parsing error"}
     
-    def format_parsed_tasks_display(self, tasks: List[Dict[str, Any]]) -> str:
-        if not tasks:
-            return "❌ No tasks found to display."
-        
-        header = "📋 <b>Parsed Tasks:</b>\n\n"
-        
-        task_lines = []
-        for i, task in enumerate(tasks, 1):
-            classification = task.get("classification", "unknown")
-            description = task.get("description", "No description")
-            time_str = task.get("time", "not specified")
-            date_str = task.get("date", "not specified")
-            recurrence = task.get("recurrence", "none")
-            
-            task_line = f"{i}. [{classification}] {description}"
-            
-            if time_str and time_str != "not specified":
-                task_line += f"\n   - Time: {time_str} GMT"
-            
-            if date_str and date_str != "not specified":
-                task_line += f"\n   - Date: {date_str}"
-                
-            if recurrence and recurrence != "none":
-                recurrence_display = recurrence.title() if recurrence != "none" else "One-time"
-                task_line += f"\n   - Recurrence: {recurrence_display}"
-            
-            task_lines.append(task_line)
+    def format_parsed_tasks_display(self, tasks: List[Dict[str, Any]]) -> PagedView:
+        """Builds a paged view; pages are rendered on demand by the message paginator"""
+        return PagedView(
+            header="📋 <b>Parsed Tasks:</b>\n\n",
+            tasks=tasks,
+            render_block=self.format_task_entry,
+            footer="\n\nPlease review the tasks above and choose an action:",
+            empty_text="❌ No tasks found to display.",
+            with_approval=True
+        )
+    
+    def format_task_entry(self, index: int, task: Dict[str, Any]) -> str:
+        classification = task.get("classification", "unknown")
+        description = task.get("description", "No description")
+        time_str = task.get("time", "not specified")
+        date_str = task.get("date", "not specified")
+        recurrence = task.get("recurrence", "none")
         
-        footer = "\n\nPlease review the tasks above and choose an action:"
+        task_line = f"{index}. [{classification}] {description}"
         
-        full_message = header + "\n\n".join(task_lines) + footer
+        if time_str and time_str != "not specified":
+            task_line += f"\n   - Time: {time_str} GMT"
         
-        if len(full_message) > 4000:
-            logger.warning(f"Parsed tasks display is {len(full_message)} chars, truncating")
-            truncated_lines = []
-            for line in task_lines:
-                if len(line) > 200:
-                    parts = line.split('\n')
-                    description_part = parts[0]
-                    if len(description_part) > 150:
-                        truncated_desc = description_part[:147] + "..."
-                        parts[0] = truncated_desc
-                    line = '\n'.join(parts)
-                truncated_lines.append(line)
+        if date_str and date_str != "not specified":
+            task_line += f"\n   - Date: {date_str}"
             
-            full_message = header + "\n\n".join(truncated_lines) + footer
+        if recurrence and recurrence != "none":
+            try:
+                recurrence_text = compile_recurrence(recurrence).describe()
+            except ValueError:
+                recurrence_text = recurrence.title()
+            task_line += f"\n   - Recurrence: {recurrence_text}"
         
-        return full_message
+        return task_line
     
     def validate_keyboard_limits(self, keyboard: InlineKeyboardMarkup) -> bool:
         for row in keyboard.inline_keyboard:
@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Responder = Callable[[List[Any], Optional[type]], str]
+
+
+class SyntheticLLMError(RuntimeError):
+    pass
+
+
+class ReplayMissError(LookupError):
+    pass
+
+
+class BackendReply:
+    """Minimal stand-in for an AIMessage: content plus usage metadata"""
+
+    def __init__(self, content: str, usage_metadata: Dict[str, int]):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class UsageTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.call_count = 0
+            self.error_count = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+
+    def record_call(self, usage_metadata: Optional[Dict[str, int]]):
+        with self._lock:
+            self.call_count += 1
+            if usage_metadata:
+                self.input_tokens += int(usage_metadata.get("input_tokens", 0))
+                self.output_tokens += int(usage_metadata.get("output_tokens", 0))
+
+    def record_error(self):
+        with self._lock:
+            self.error_count += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.call_count,
+                "errors": self.error_count,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens
+            }
+
+
+usage_tracker = UsageTracker()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _message_role(message: Any) -> str:
+    return getattr(message, "type", type(message).__name__)
+
+
+def compute_prompt_key(model_name: str, messages: List[Any], schema: Optional[type] = None) -> str:
+    digest = hashlib.sha256()
+    digest.update(model_name.encode())
+    digest.update(b"\0")
+    digest.update((schema.__name__ if schema is not None else "").encode())
+    for message in messages:
+        digest.update(b"\0")
+        digest.update(_message_role(message).encode())
+        digest.update(b"\0")
+        digest.update(str(message.content).encode())
+    return digest.hexdigest()
+
+
+def parse_latency_distribution(spec: str) -> Callable[[random.Random], float]:
+    """Parses 'fixed:0.2', 'uniform:0.1,0.5', 'exp:0.3', 'lognormal:median,sigma', 'pareto:scale,alpha'
+    or 'tail:median,sigma,tail_share,tail_floor' (lognormal body with a Pareto tail above tail_floor)"""
+    kind, _, raw_args = spec.partition(":")
+    args = [float(value) for value in raw_args.split(",") if value.strip()]
+    kind = kind.strip().lower()
+
+    if kind in ("", "none"):
+        return lambda rng: 0.0
+    if kind == "fixed":
+        return lambda rng: args[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / args[0])
+    if kind == "lognormal":
+        return lambda rng: args[0] * math.exp(rng.gauss(0.0, args[1]))
+    if kind == "pareto":
+        return lambda rng: args[0] * rng.paretovariate(args[1])
+    if kind == "tail":
+        return lambda rng: (
+            args[3] * rng.paretovariate(2.0) if rng.random() < args[2]
+            else args[0] * math.exp(rng.gauss(0.0, args[1]))
+        )
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class Cassette:
+    """Request/response pairs keyed by prompt hash, persisted as JSON lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as cassette_file:
+                for line in cassette_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as cassette_file:
+                cassette_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _structured_result(schema: type, content: str, usage_metadata: Dict[str, int], include_raw: bool) -> Any:
+    """Mirrors langchain's with_structured_output(include_raw=True) shape so callers can read usage metadata"""
+    if not include_raw:
+        return schema.model_validate_json(content)
+    try:
+        return {"raw": BackendReply(content, usage_metadata), "parsed": schema.model_validate_json(content), "parsing_error": None}
+    except ValueError as e:
+        return {"raw": BackendReply(content, usage_metadata), "parsed": None, "parsing_error": e}
+
+
+class RecordingChatModel:
+    def __init__(self, inner_model: Any, cassette: Cassette, model_name: str, prompt_version: str,
+                 schema: Optional[type] = None, include_raw: bool = False):
+        self.inner_model = inner_model
+        self.cassette = cassette
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.schema = schema
+        self.include_raw = include_raw
+
+    @property
+    def root_async_client(self):
+        return getattr(self.inner_model, "root_async_client", None)
+
+    def with_structured_output(self, schema: type, include_raw: bool = False) -> "RecordingChatModel":
+        return RecordingChatModel(
+            self.inner_model.with_structured_output(schema, include_raw=True),
+            self.cassette, self.model_name, self.prompt_version, schema, include_raw
+        )
+
+    def _unpack(self, result: Any):
+        if self.schema is None:
+            return result, str(result.content), getattr(result, "usage_metadata", None)
+        if result.get("parsing_error") is not None:
+            raise result["parsing_error"]
+        parsed = result["parsed"]
+        return parsed, parsed.model_dump_json(), getattr(result["raw"], "usage_metadata", None)
+
+    def _store(self, messages: List[Any], result: Any, latency_seconds: float) -> Any:
+        output, content, usage_metadata = self._unpack(result)
+        if not usage_metadata:
+            usage_metadata = {
+                "input_tokens": estimate_tokens("".join(str(message.content) for message in messages)),
+                "output_tokens": estimate_tokens(content)
+            }
+        self.cassette.put({
+            "key": compute_prompt_key(self.model_name, messages, self.schema),
+            "model": self.model_name,
+            "prompt_version": self.prompt_version,
+            "messages": [{"role": _message_role(message), "content": str(message.content)} for message in messages],
+            "content": content,
+            "usage": {
+                "input_tokens": usage_metadata.get("input_tokens", 0),
+                "output_tokens": usage_metadata.get("output_tokens", 0)
+            },
+            "latency": round(latency_seconds, 4)
+        })
+        usage_tracker.record_call(usage_metadata)
+        if self.include_raw:
+            return {"raw": BackendReply(content, usage_metadata), "parsed": output, "parsing_error": None}
+        return output
+
+    def invoke(self, messages: List[Any]) -> Any:
+        started = time.perf_counter()
+        result = self.inner_model.invoke(messages)
+        return self._store(messages, result, time.perf_counter() - started)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        started = time.perf_counter()
+        result = await self.inner_model.ainvoke(messages)
+        return self._store(messages, result, time.perf_counter() - started)
+
+
+class ReplayChatModel:
+    def __init__(self, cassette: Cassette, model_name: str, replay_latency: bool = False,
+                 schema: Optional[type] = None, include_raw: bool = False):
+        self.cassette = cassette
+        self.model_name = model_name
+        self.replay_latency = replay_latency
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def with_structured_output(self, schema: type, include_raw: bool = False) -> "ReplayChatModel":
+        return ReplayChatModel(self.cassette, self.model_name, self.replay_latency, schema, include_raw)
+
+    def _lookup(self, messages: List[Any]) -> Dict[str, Any]:
+        key = compute_prompt_key(self.model_name, messages, self.schema)
+        entry = self.cassette.get(key)
+        if entry is None:
+            usage_tracker.record_error()
+            raise ReplayMissError(f"No recording for prompt {key[:12]}")
+        return entry
+
+    def _build_result(self, entry: Dict[str, Any]) -> Any:
+        usage_tracker.record_call(entry.get("usage"))
+        if self.schema is not None:
+            return _structured_result(self.schema, entry["content"], entry.get("usage") or {}, self.include_raw)
+        return BackendReply(entry["content"], entry.get("usage") or {})
+
+    def invoke(self, messages: List[Any]) -> Any:
+        entry = self._lookup(messages)
+        if self.replay_latency:
+            time.sleep(entry.get("latency", 0.0))
+        return self._build_result(entry)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        entry = self._lookup(messages)
+        if self.replay_latency:
+            await asyncio.sleep(entry.get("latency", 0.0))
+        return self._build_result(entry)
+
+
+class SyntheticChatModel:
+    """Deterministic offline model: responses come from a rule-based responder, latency and errors from a seeded RNG"""
+
+    def __init__(self, responder: Responder, model_name: str, latency: Callable[[random.Random], float],
+                 error_rate: float = 0.0, seed: int = 0, schema: Optional[type] = None,
+                 rng: Optional[random.Random] = None, include_raw: bool = False, token_seconds: float = 0.0):
+        self.responder = responder
+        self.model_name = model_name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.token_seconds = token_seconds
+        self.schema = schema
+        self.include_raw = include_raw
+        self._rng = rng or random.Random(seed)
+
+    def with_structured_output(self, schema: type, include_raw: bool = False) -> "SyntheticChatModel":
+        return SyntheticChatModel(
+            self.responder, self.model_name, self.latency, self.error_rate, self.seed, schema, self._rng, include_raw,
+            self.token_seconds
+        )
+
+    def _draw(self, messages: List[Any]):
+        """Returns (delay, content); content is None for an injected error. Decoding adds token_seconds per output token"""
+        delay, should_fail = self.latency(self._rng), self._rng.random() < self.error_rate
+        if should_fail:
+            return delay, None
+        content = self.responder(messages, self.schema)
+        return delay + self.token_seconds * estimate_tokens(content), content
+
+    def _build_result(self, messages: List[Any], content: Optional[str]) -> Any:
+        if content is None:
+            usage_tracker.record_error()
+            raise SyntheticLLMError("Synthetic upstream error")
+        usage_metadata = {
+            "input_tokens": estimate_tokens("".join(str(message.content) for message in messages)),
+            "output_tokens": estimate_tokens(content)
+        }
+        usage_tracker.record_call(usage_metadata)
+        if self.schema is not None:
+            return _structured_result(self.schema, content, usage_metadata, self.include_raw)
+        return BackendReply(content, usage_metadata)
+
+    def invoke(self, messages: List[Any]) -> Any:
+        delay, content = self._draw(messages)
+        if delay > 0:
+            time.sleep(delay)
+        return self._build_result(messages, content)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        delay, content = self._draw(messages)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._build_result(messages, content)
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def get_cassette(path: str) -> Cassette:
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        cassette = _cassettes[path] = Cassette(path)
+    return cassette
+
+
+def create_chat_model(settings: Any, model_name: str, build_real_model: Callable[[], Any],
+                      responder: Responder, prompt_version: str) -> Any:
+    backend = settings.llm_backend.lower()
+
+    if backend == "openai":
+        return build_real_model()
+
+    if backend == "record":
+        return RecordingChatModel(build_real_model(), get_cassette(settings.llm_cassette_path), model_name, prompt_version)
+
+    if backend == "replay":
+        return ReplayChatModel(get_cassette(settings.llm_cassette_path), model_name, settings.llm_replay_latency)
+
+    if backend == "synthetic":
+        return SyntheticChatModel(
+            responder,
+            model_name,
+            parse_latency_distribution(settings.llm_synthetic_latency),
+            settings.llm_synthetic_error_rate,
+            settings.llm_synthetic_seed,
+            token_seconds=settings.llm_synthetic_token_seconds
+        )
+
+    raise ValueError(f"Unknown LLM backend: {settings.llm_backend}")
@@ -1,99 +1,324 @@
 import logging
 import asyncio
-from typing import Dict, Any, Optional
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.output_parsers import PydanticOutputParser
+import contextlib
+import time
+from typing import Dict, Any, Callable, Optional, TYPE_CHECKING
 from config.settings import get_settings
+from services.llm_backend import compute_prompt_key, create_chat_model
+from services.circuit_breaker import STATE_VALUES, CircuitBreaker
+from services.model_router import ModelRouter, RouteDecision, parse_routes
+from services.prompts import PromptSet, build_prompt_set
+from services.request_hedger import DeadlineExceededError, RequestHedger
+from services.synthetic_llm import respond as synthetic_respond
+from services.usage_ledger import usage_accounting
+from utils.metrics import LLM_CALL_SECONDS, LLM_CIRCUIT_SHORT_CIRCUITS, LLM_CONCURRENCY_WAIT_SECONDS
+
+if TYPE_CHECKING:
+    from langchain.output_parsers import PydanticOutputParser
 
 logger = logging.getLogger(__name__)
 
+PRIMARY_MODEL_NAME = "gpt-5"
+FALLBACK_MODEL_NAME = "gpt-4o"
+
 
 class LLMService:
     def __init__(self):
-        self.settings = get_settings()
+        self.settings = None
         self._primary_model = None
         self._fallback_model = None
-        self._initialize_models()
+        self._route_models: Dict[str, Any] = {}
+        self.router: Optional[ModelRouter] = None
+        self.prompts: Optional[PromptSet] = None
+        self._task_parsing_system_message = None
+        self._clarification_system_message = None
+        self._hedgers: Dict[str, RequestHedger] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._concurrency: Optional[asyncio.Semaphore] = None
+        self.requests_pending = 0
+        self.requests_in_flight = 0
+        self._models_ready = False
+        self._startup_future: Optional[asyncio.Future] = None
     
-    def _initialize_models(self):
-        try:
-            self._primary_model = ChatOpenAI(
-                model="gpt-5",
+    async def start(self):
+        """Imports langchain and builds the model clients on a worker thread, once"""
+        if self._models_ready:
+            return
+        if self._startup_future is None or (self._startup_future.done() and self._startup_future.exception()):
+            self._startup_future = asyncio.get_running_loop().run_in_executor(None, self._initialize_models)
+        await asyncio.shield(self._startup_future)
+    
+    def _build_openai_model(self, model_name: str):
+        from langchain_openai import ChatOpenAI
+        
+        if model_name.startswith("gpt-5"):
+            return ChatOpenAI(
+                model=model_name,
                 api_key=self.settings.openai_api_key,
                 max_completion_tokens=2000,
                 timeout=90,
+                max_retries=0,
                 temperature=1.0
             )
+        return ChatOpenAI(
+            model=model_name,
+            api_key=self.settings.openai_api_key,
+            max_tokens=2000,
+            timeout=90,
+            max_retries=0,
+            temperature=0.1
+        )
+    
+    def _create_model(self, model_name: str):
+        return create_chat_model(
+            self.settings, model_name, lambda: self._build_openai_model(model_name),
+            synthetic_respond, self.prompts.version
+        )
+    
+    def _create_hedger(self, model_role: str) -> RequestHedger:
+        return RequestHedger(
+            model_role,
+            hedge_quantile=self.settings.llm_hedge_quantile,
+            min_hedge_delay=self.settings.llm_hedge_min_delay_seconds,
+            deadline_seconds=self.settings.llm_deadline_seconds,
+            max_attempts=self.settings.llm_max_attempts,
+            retry_backoff=self.settings.llm_retry_backoff_seconds
+        )
+    
+    def _get_breaker(self, model_name: str) -> CircuitBreaker:
+        """Health is always tracked; llm_circuit_enabled only decides whether an open circuit diverts traffic"""
+        breaker = self._breakers.get(model_name)
+        if breaker is None:
+            breaker = self._breakers[model_name] = CircuitBreaker(
+                model_name,
+                window_seconds=self.settings.llm_circuit_window_seconds,
+                window_calls=self.settings.llm_circuit_window_calls,
+                min_calls=self.settings.llm_circuit_min_calls,
+                error_rate_threshold=self.settings.llm_circuit_error_rate,
+                slow_call_seconds=self.settings.llm_circuit_slow_call_seconds,
+                slow_rate_threshold=self.settings.llm_circuit_slow_rate,
+                open_seconds=self.settings.llm_circuit_open_seconds
+            )
+        return breaker
+    
+    def get_circuit_states(self) -> Dict[str, int]:
+        return {name: STATE_VALUES[breaker.state] for name, breaker in self._breakers.items()}
+    
+    def get_circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+    
+    def _build_prompts(self):
+        """Renders the system prompts once so every request shares the same leading bytes"""
+        from langchain.schema import SystemMessage
+        from services.task_parser import TaskParsingResult
+        
+        self.prompts = build_prompt_set(self.settings.llm_prompt_version, TaskParsingResult)
+        self._task_parsing_system_message = SystemMessage(content=self.prompts.task_parsing_system)
+        self._clarification_system_message = SystemMessage(content=self.prompts.clarification_system)
+    
+    def _initialize_models(self):
+        self.settings = get_settings()
+        self._build_prompts()
+        
+        try:
+            self._primary_model = self._create_model(PRIMARY_MODEL_NAME)
         except Exception as e:
             logger.warning(f"GPT-5 initialization failed: {e}")
         
         try:
-            self._fallback_model = ChatOpenAI(
-                model="gpt-4o",
-                api_key=self.settings.openai_api_key,
-                max_tokens=2000,
-                timeout=90,
-                temperature=0.1
-            )
+            self._fallback_model = self._create_model(FALLBACK_MODEL_NAME)
         except Exception as e:
             logger.error(f"GPT-4o fallback initialization failed: {e}")
             raise
+        
+        if self.settings.llm_max_concurrency > 0:
+            self._concurrency = asyncio.Semaphore(self.settings.llm_max_concurrency)
+        
+        self._breakers = {}
+        self._hedgers = {role: self._create_hedger(role) for role in ("primary", "fallback", "clarification")}
+        
+        routes = parse_routes(self.settings.llm_routes)
+        if routes:
+            for route in routes:
+                # Each route gets its own metric labels, apart from the primary and from each other
+                self._hedgers[f"route:{route.name}"] = self._create_hedger(f"route:{route.name}")
+            self._route_models = {route.name: self._create_model(route.model_name) for route in routes}
+            self.router = ModelRouter(
+                routes,
+                latency_slo=self.settings.llm_route_slo_seconds,
+                max_chars=self.settings.llm_route_max_chars,
+                max_clauses=self.settings.llm_route_max_clauses,
+                max_repair_rate=self.settings.llm_route_max_repair_rate,
+                explore_rate=self.settings.llm_route_explore_rate
+            )
+        
+        self._models_ready = True
+    
+    def get_hedge_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: hedger.get_stats() for name, hedger in self._hedgers.items()}
     
-    async def _call_llm_structured(self, messages: list, parser: PydanticOutputParser, use_fallback: bool = False):
+    async def check_reachability(self, timeout: float = 5.0) -> bool:
         try:
-            model = self._fallback_model if use_fallback else self._primary_model
+            await self.start()
+        except Exception as e:
+            logger.warning(f"LLM client initialization failed: {e}")
+            return False
+        model = self._primary_model or self._fallback_model
+        if not model:
+            return False
+        if getattr(model, "root_async_client", None) is None:
+            return True
+        try:
+            await asyncio.wait_for(model.root_async_client.models.retrieve(model.model_name), timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"LLM reachability check failed: {e}")
+            return False
+    
+    def _timed_invoker(self, messages: list, model_role: str):
+        """Native async call, capped at llm_max_concurrency in-flight requests per process"""
+        latency_histogram = LLM_CALL_SECONDS.get(model_role)
+        slot = self._concurrency or contextlib.nullcontext()
+        prompt_keys: Dict[str, str] = {}
+        
+        async def invoke(target):
+            model_name, model = target
+            if model_name not in prompt_keys:
+                prompt_keys[model_name] = compute_prompt_key(model_name, messages)[:16]
+            breaker = self._get_breaker(model_name)
+            queued = time.perf_counter()
+            self.requests_pending += 1
+            try:
+                async with slot:
+                    LLM_CONCURRENCY_WAIT_SECONDS.get().observe(time.perf_counter() - queued)
+                    self.requests_in_flight += 1
+                    started = time.perf_counter()
+                    usage_metadata = None
+                    try:
+                        response = await model.ainvoke(messages)
+                        response, usage_metadata = self._unpack_response(response)
+                    except ValueError:
+                        # A malformed answer still means the model is up
+                        breaker.record_success(time.perf_counter() - started)
+                        usage_accounting.record(model_role, model_name, prompt_keys[model_name], usage_metadata,
+                                                time.perf_counter() - started, False)
+                        raise
+                    except asyncio.CancelledError:
+                        breaker.record_cancelled(time.perf_counter() - started)
+                        raise
+                    except Exception:
+                        breaker.record_failure(time.perf_counter() - started)
+                        usage_accounting.record(model_role, model_name, prompt_keys[model_name], None,
+                                                time.perf_counter() - started, False)
+                        raise
+                    finally:
+                        self.requests_in_flight -= 1
+                    elapsed = time.perf_counter() - started
+                    latency_histogram.observe(elapsed)
+                    breaker.record_success(elapsed)
+                    usage_accounting.record(model_role, model_name, prompt_keys[model_name], usage_metadata, elapsed, True)
+                    return response
+            finally:
+                self.requests_pending -= 1
+        
+        return invoke
+    
+    @staticmethod
+    def _unpack_response(response: Any):
+        """Structured calls use include_raw=True so the usage metadata of the raw message is not lost"""
+        if isinstance(response, dict) and "raw" in response:
+            usage_metadata = getattr(response["raw"], "usage_metadata", None)
+            if response.get("parsing_error") is not None or response.get("parsed") is None:
+                raise ValueError(f"Structured output could not be parsed: {response.get('parsing_error')}")
+            return response["parsed"], usage_metadata
+        return response, getattr(response, "usage_metadata", None)
+    
+    async def _call_llm_structured(self, messages: list, parser: "PydanticOutputParser", use_fallback: bool = False):
+        """Hedged primary call, then fallback, all within one llm_deadline_seconds budget"""
+        try:
+            await self.start()
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.settings.llm_deadline_seconds
             
-            if not model:
-                if not use_fallback:
-                    return await self._call_llm_structured(messages, parser, use_fallback=True)
+            candidates = [("fallback", FALLBACK_MODEL_NAME, self._fallback_model)]
+            if not use_fallback:
+                candidates.insert(0, ("primary", PRIMARY_MODEL_NAME, self._primary_model))
+            candidates = [candidate for candidate in candidates if candidate[2]]
+            if not candidates:
                 raise Exception("No available LLM models")
             
-            structured_model = model.with_structured_output(parser.pydantic_object)
-            
-            max_retries = 3
-            for attempt in range(max_retries):
+            for index, (model_role, model_name, model) in enumerate(candidates):
+                breaker = self._get_breaker(model_name)
+                is_allowed = breaker.allow_request()
+                if self.settings.llm_circuit_enabled and index < len(candidates) - 1 and not is_allowed:
+                    LLM_CIRCUIT_SHORT_CIRCUITS.get().inc()
+                    continue
+                target = (model_name, model.with_structured_output(parser.pydantic_object, include_raw=True))
+                hedge_target = target
+                if model_role == "primary" and self.settings.llm_hedge_to_fallback and self._fallback_model:
+                    hedge_target = (FALLBACK_MODEL_NAME, self._fallback_model.with_structured_output(parser.pydantic_object, include_raw=True))
                 try:
-                    response = await asyncio.get_event_loop().run_in_executor(
-                        None, lambda: structured_model.invoke(messages)
+                    return await self._hedgers[model_role].call(
+                        self._timed_invoker(messages, model_role), target, hedge_target,
+                        budget=deadline - loop.time()
                     )
-                    return response
                 except Exception as e:
-                    logger.warning(f"Structured LLM call attempt {attempt + 1} failed: {e}")
-                    if attempt == max_retries - 1:
-                        if not use_fallback and self._fallback_model:
-                            logger.info("Switching to fallback model for structured output")
-                            return await self._call_llm_structured(messages, parser, use_fallback=True)
+                    if index == len(candidates) - 1 or isinstance(e, DeadlineExceededError):
                         raise
-                    await asyncio.sleep(2 ** attempt)
+                    logger.warning(f"Structured LLM call on {model_role} failed: {e}")
+                    logger.info("Switching to fallback model for structured output")
         except Exception as e:
             logger.error(f"Structured LLM processing error: {e}")
             raise
     
-    async def process_tasks_structured(self, user_input: str, parser: PydanticOutputParser):
-        system_prompt = f"""Parse tasks from user input. Return JSON only.
-
-{parser.get_format_instructions()}
-
-Key rules:
-- "daily" = every day
-- "weekly" = same day each week  
-- "every Monday Wednesday Friday" = weekly_0_2_4
-- "every Tuesday Thursday" = weekly_1_3
-- Monday=0, Tuesday=1, Wednesday=2, Thursday=3, Friday=4, Saturday=5, Sunday=6
-
-Examples:
-- "brush teeth daily at 2pm" → recurrence: "daily"
-- "gym every Monday Wednesday Friday at 5pm" → recurrence: "weekly_0_2_4"
-
-Current input needs parsing:"""
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_input)
-        ]
+    async def _invoke_route(self, structured_model, messages: list, decision: RouteDecision, deadline: float):
+        route = self.router.get_route(decision)
+        model_role = "primary" if decision.served_tier == decision.tier else "fallback"
+        started = time.perf_counter()
+        response = await self._hedgers[f"route:{route.name}"].call(
+            self._timed_invoker(messages, model_role), (route.model_name, structured_model),
+            budget=deadline - asyncio.get_running_loop().time()
+        )
+        self.router.observe_latency(route, time.perf_counter() - started)
+        return response
+    
+    async def _call_routed_structured(self, messages: list, parser: "PydanticOutputParser", user_input: str,
+                                      validate: Optional[Callable[[Any], bool]] = None):
+        """Starts on the route chosen for the input and moves one tier up only when validation fails"""
+        deadline = asyncio.get_running_loop().time() + self.settings.llm_deadline_seconds
+        decision = self.router.choose(user_input)
+        prompt_key = compute_prompt_key(self.router.get_route(decision).model_name, messages, parser.pydantic_object)
+        outcome = "failed"
+        try:
+            while True:
+                route = self.router.get_route(decision)
+                structured_model = self._route_models[route.name].with_structured_output(parser.pydantic_object, include_raw=True)
+                response = None
+                try:
+                    response = await self._invoke_route(structured_model, messages, decision, deadline)
+                except ValueError as e:
+                    logger.warning(f"Route {route.name} returned an invalid structure: {e}")
+                
+                if response is not None and (validate is None or validate(response)):
+                    outcome = "ok" if decision.served_tier == decision.tier else "repaired"
+                    return response
+                if self.router.escalate(decision) is None:
+                    if response is None:
+                        raise ValueError(f"Route {route.name} returned no valid structure")
+                    return response
+                logger.info(f"Escalating from route {route.name} to {self.router.get_route(decision).name}")
+        finally:
+            self.router.record_outcome(decision, outcome, "parse", prompt_key, self.prompts.version)
+    
+    async def process_tasks_structured(self, user_input: str, parser: "PydanticOutputParser",
+                                       validate: Optional[Callable[[Any], bool]] = None):
+        from langchain.schema import HumanMessage
         
         try:
+            await self.start()
+            messages = [self._task_parsing_system_message, HumanMessage(content=user_input)]
+            if self.router:
+                return await self._call_routed_structured(messages, parser, user_input, validate)
             result = await self._call_llm_structured(messages, parser)
             return result
         except Exception as e:
@@ -106,7 +331,7 @@ Current input needs parsing:"""
                 classification: str = Field(description="Either 'work' or 'personal'")
                 time: Optional[str] = Field(default=None, description="Time in HH:MM format or null")
                 date: Optional[str] = Field(default=None, description="Date in YYYY-MM-DD format or null")
-                recurrence: Optional[str] = Field(default=None, description="Recurrence pattern: none, daily, weekly, monthly, yearly, or weekly_X_Y_Z for specific weekdays")
+                recurrence: Optional[str] = Field(default=None, description="Recurrence pattern: none, daily, weekly, monthly, yearly, weekly_X_Y_Z for specific weekdays, or an RRULE such as FREQ=WEEKLY;INTERVAL=2")
                 needs_clarification: List[str] = Field(default_factory=list, description="List of clarification questions")
                 confidence: str = Field(default="high", description="Confidence level: high, medium, low")
             
@@ -121,82 +346,65 @@ Current input needs parsing:"""
                 error="Failed to process tasks. Please try rephrasing your request."
             )
     
-    async def update_tasks_with_clarifications(
-        self, 
-        clarification_response: str, 
-        clarifications: list, 
-        original_tasks: list
-    ):
-        system_prompt = """You are updating tasks with clarification responses. 
-        
-        The user was asked for clarifications and has provided responses. 
-        Update the original tasks with the new information provided.
-        
-        Return the updated tasks in the same format as the original tasks, 
-        but with the missing information filled in based on the clarification response.
-        
-        Rules:
-        1. Keep all original task information unless specifically updated by clarifications
-        2. Remove items from needs_clarification array once they are resolved
-        3. Use GMT+0 timezone for all time processing
-        4. Maintain original task classification unless clarification suggests otherwise
-        5. For dates: use YYYY-MM-DD format, for times: use HH:MM format (24-hour)
-        """
-        
-        user_message = f"""
-        Original clarification questions:
-        {chr(10).join(clarifications)}
-        
-        User's clarification response:
-        {clarification_response}
-        
-        Original tasks to update:
-        {original_tasks}
-        
-        Please update the tasks with the provided clarifications.
-        """
-        
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_message)
-        ]
+    def _pick_clarification_model(self):
+        """Fallback first, as before, unless its circuit is open and the primary can take the call"""
+        if not self._fallback_model:
+            return PRIMARY_MODEL_NAME, self._primary_model
+        is_allowed = self._get_breaker(FALLBACK_MODEL_NAME).allow_request()
+        if self._primary_model and self.settings.llm_circuit_enabled and not is_allowed:
+            LLM_CIRCUIT_SHORT_CIRCUITS.get().inc()
+            return PRIMARY_MODEL_NAME, self._primary_model
+        return FALLBACK_MODEL_NAME, self._fallback_model
+    
+    async def request_clarification_patch(self, clarification_response: str, open_questions: list,
+                                          patch_schema: type):
+        """Asks for a structured patch that covers only the open questions; None when no model could answer"""
+        from langchain.schema import HumanMessage
         
         try:
-            model = self._fallback_model or self._primary_model
+            await self.start()
+            messages = [
+                self._clarification_system_message,
+                HumanMessage(content=self.prompts.render_clarification(clarification_response, open_questions))
+            ]
+            decision = self.router.choose(clarification_response, is_clarification=True) if self.router else None
+            if decision:
+                model_name = self.router.get_route(decision).model_name
+                model = self._route_models[self.router.get_route(decision).name]
+            else:
+                model_name, model = self._pick_clarification_model()
             if not model:
                 raise Exception("No available LLM models")
             
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = await asyncio.get_event_loop().run_in_executor(
-                        None, lambda: model.invoke(messages)
-                    )
-                    
-                    content = response.content.strip()
-                    
-                    import json
-                    import re
-                    
-                    json_match = re.search(r'\[.*\]', content, re.DOTALL)
-                    if json_match:
-                        try:
-                            updated_tasks = json.loads(json_match.group())
-                            return updated_tasks
-                        except json.JSONDecodeError:
-                            pass
-                    
-                    return original_tasks
-                    
-                except Exception as e:
-                    logger.warning(f"Clarification update attempt {attempt + 1} failed: {e}")
-                    if attempt == max_retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.settings.llm_deadline_seconds
+            invoke = self._timed_invoker(messages, "clarification")
+            outcome = "failed"
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        patch = await self._hedgers["clarification"].call(
+                            invoke, (model_name, model.with_structured_output(patch_schema, include_raw=True)),
+                            budget=deadline - loop.time()
+                        )
+                    except ValueError as e:
+                        if not (decision and self.router.escalate(decision)):
+                            raise
+                        logger.warning(f"Clarification patch from {model_name} was malformed: {e}")
+                        model_name = self.router.get_route(decision).model_name
+                        model = self._route_models[self.router.get_route(decision).name]
+                        continue
+                    if decision:
+                        self.router.observe_latency(self.router.get_route(decision), time.perf_counter() - started)
+                        outcome = "ok" if decision.served_tier == decision.tier else "repaired"
+                    return patch
+            finally:
+                if decision:
+                    self.router.record_outcome(decision, outcome, "clarification")
                     
         except Exception as e:
-            logger.error(f"Failed to update tasks with clarifications: {e}")
+            logger.error(f"Failed to get a clarification patch: {e}")
             return None
 
-
 llm_service = LLMService()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import inspect
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+BlockRenderer = Callable[[int, Dict[str, Any]], Union[str, Awaitable[str]]]
+
+HTML_TOKEN = re.compile(r"<(/?)([a-zA-Z-]+)[^>]*>|&#?\w+;")
+ELLIPSIS = "..."
+
+
+def truncate_html(text: str, limit: int) -> str:
+    """Shortens rendered HTML to at most limit characters, cutting only between tags and entities and closing any
+    tag left open, so Telegram can still parse the page"""
+    if len(text) <= limit:
+        return text
+    room = limit - len(ELLIPSIS)
+    parts: List[str] = []
+    open_tags: List[str] = []
+    position = 0
+    for match in HTML_TOKEN.finditer(text):
+        run = text[position:match.start()]
+        if len(run) > room:
+            parts.append(run[:max(0, room)])
+            break
+        parts.append(run)
+        room -= len(run)
+        token = match.group(0)
+        closing, name = match.group(1), match.group(2)
+        if name and closing:
+            if open_tags and open_tags[-1] == name:
+                open_tags.pop()
+                room += len(name) + 3
+            parts.append(token)
+            room -= len(token)
+        else:
+            cost = len(token) + (len(name) + 3 if name else 0)
+            if cost > room:
+                break
+            parts.append(token)
+            room -= cost
+            if name:
+                open_tags.append(name)
+        position = match.end()
+    else:
+        parts.append(text[position:][:max(0, room)])
+    return "".join(parts) + ELLIPSIS + "".join(f"</{name}>" for name in reversed(open_tags))
+
+
+@dataclass
+class PagedView:
+    """Task list rendered page by page from the stored tasks"""
+    header: str
+    tasks: List[Dict[str, Any]]
+    render_block: BlockRenderer
+    footer: str = ""
+    empty_text: str = ""
+    with_approval: bool = False
+    page_starts: List[int] = field(default_factory=lambda: [0])
+
+
+class MessagePaginator:
+    def __init__(self, message_limit: int = 4000, max_views: int = 5000):
+        self._message_limit = message_limit
+        self._max_views = max_views
+        self._views: "OrderedDict[Tuple[int, int], PagedView]" = OrderedDict()
+
+    async def render_page(self, view: PagedView, page: int) -> Dict[str, Any]:
+        """Renders one page, appending blocks until the next would overflow the message limit"""
+        if not view.tasks:
+            return {"page": 0, "text": view.empty_text, "has_next": False}
+
+        page = max(0, min(page, len(view.page_starts) - 1))
+        page_marker_reserve = 32
+        budget = self._message_limit - len(view.header) - len(view.footer) - page_marker_reserve
+
+        blocks = []
+        used = 0
+        index = view.page_starts[page]
+        while index < len(view.tasks):
+            block = view.render_block(index + 1, view.tasks[index])
+            if inspect.isawaitable(block):
+                block = await block
+
+            cost = len(block) + (2 if blocks else 0)
+            if used + cost > budget:
+                if not blocks:
+                    blocks.append(truncate_html(block, max(0, budget)))
+                    index += 1
+                break
+
+            blocks.append(block)
+            used += cost
+            index += 1
+
+        has_next = index < len(view.tasks)
+        if has_next and len(view.page_starts) == page + 1:
+            view.page_starts.append(index)
+
+        text = view.header + "\n\n".join(blocks) + view.footer
+        if has_next or page > 0:
+            text += f"\n\n<i>Page {page + 1}</i>"
+
+        return {"page": page, "text": text, "has_next": has_next}
+
+    def register_view(self, user_id: int, message_id: int, view: PagedView):
+        key = (user_id, message_id)
+        self._views[key] = view
+        self._views.move_to_end(key)
+        while len(self._views) > self._max_views:
+            self._views.popitem(last=False)
+
+    def get_view(self, user_id: int, message_id: int) -> Optional[PagedView]:
+        key = (user_id, message_id)
+        view = self._views.get(key)
+        if view is not None:
+            self._views.move_to_end(key)
+        return view
+
+    def drop_view(self, user_id: int, message_id: Optional[int]):
+        if message_id is not None:
+            self._views.pop((user_id, message_id), None)
+
+    def drop_user_views(self, user_id: int):
+        for key in [key for key in self._views if key[0] == user_id]:
+            del self._views[key]
+
+    def get_view_count(self) -> int:
+        return len(self._views)
+
+
+message_paginator = MessagePaginator()
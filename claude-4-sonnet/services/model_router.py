@@ -0,0 +1,146 @@
+import logging
+import math
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CLAUSE_SPLIT_PATTERN = re.compile(r"\n+|;|,|\.\s|\band\b|\bthen\b", re.IGNORECASE)
+
+
+@dataclass
+class ModelRoute:
+    name: str
+    model_name: str
+    expected_latency: float
+
+
+@dataclass
+class RouteDecision:
+    tier: int
+    served_tier: int
+    features: Dict[str, Any]
+    bucket: str
+    repair_rate: float
+    explored: bool
+    started: float = field(default_factory=time.perf_counter)
+
+
+def parse_routes(spec: str) -> List[ModelRoute]:
+    """Parses 'fast=gpt-4o:3,strong=gpt-5:20' (weakest first, expected latency in seconds)"""
+    routes = []
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, definition = part.split("=", 1)
+        model_name, _, latency = definition.partition(":")
+        routes.append(ModelRoute(name.strip(), model_name.strip(), float(latency or 0)))
+    return routes
+
+
+def extract_features(text: str, is_clarification: bool) -> Dict[str, Any]:
+    return {
+        "chars": len(text),
+        "clauses": sum(1 for part in CLAUSE_SPLIT_PATTERN.split(text) if part.strip()),
+        "clarification": is_clarification
+    }
+
+
+def feature_bucket(features: Dict[str, Any]) -> str:
+    length_bucket = min(int(math.log2(features["chars"] + 1)), 14)
+    return f"{length_bucket}:{min(features['clauses'], 8)}:{int(features['clarification'])}"
+
+
+class ModelRouter:
+    """Picks the cheapest route for simple inputs and the strongest in-SLO route for hard ones"""
+
+    def __init__(self, routes: List[ModelRoute], latency_slo: float = 0.0, max_chars: int = 600,
+                 max_clauses: int = 4, max_repair_rate: float = 0.2, explore_rate: float = 0.0,
+                 smoothing: float = 0.1, seed: Optional[int] = None):
+        self.routes = routes
+        self.latency_slo = latency_slo
+        self.max_chars = max_chars
+        self.max_clauses = max_clauses
+        self.max_repair_rate = max_repair_rate
+        self.explore_rate = explore_rate
+        self.smoothing = smoothing
+        self._repair_rates: Dict[str, float] = {}
+        self._random = random.Random(seed)
+        self._decision_counts: Dict[str, int] = {route.name: 0 for route in routes}
+        self._escalation_count = 0
+
+    def _eligible_tiers(self) -> List[int]:
+        eligible = [
+            index for index, route in enumerate(self.routes)
+            if self.latency_slo <= 0 or route.expected_latency <= self.latency_slo
+        ]
+        return eligible or [0]
+
+    def choose(self, text: str, is_clarification: bool = False) -> RouteDecision:
+        features = extract_features(text, is_clarification)
+        bucket = feature_bucket(features)
+        repair_rate = self._repair_rates.get(bucket, 0.0)
+        eligible = self._eligible_tiers()
+
+        is_hard = (
+            features["chars"] > self.max_chars
+            or features["clauses"] > self.max_clauses
+            or repair_rate > self.max_repair_rate
+        )
+        explored = is_hard and len(eligible) > 1 and self._random.random() < self.explore_rate
+        tier = eligible[-1] if is_hard and not explored else eligible[0]
+
+        self._decision_counts[self.routes[tier].name] += 1
+        return RouteDecision(tier, tier, features, bucket, repair_rate, explored)
+
+    def get_route(self, decision: RouteDecision) -> ModelRoute:
+        return self.routes[decision.served_tier]
+
+    def escalate(self, decision: RouteDecision) -> Optional[ModelRoute]:
+        """Moves the decision one tier up; None when it is already on the strongest route"""
+        if decision.served_tier >= len(self.routes) - 1:
+            return None
+        decision.served_tier += 1
+        self._escalation_count += 1
+        return self.routes[decision.served_tier]
+
+    def observe_latency(self, route: ModelRoute, seconds: float):
+        if route.expected_latency <= 0:
+            route.expected_latency = seconds
+        else:
+            route.expected_latency += self.smoothing * (seconds - route.expected_latency)
+
+    def record_outcome(self, decision: RouteDecision, outcome: str, operation: str, prompt_key: str = "",
+                       prompt_version: str = ""):
+        if decision.tier == 0 and len(self.routes) > 1:
+            previous = self._repair_rates.get(decision.bucket, 0.0)
+            self._repair_rates[decision.bucket] = previous + self.smoothing * ((outcome != "ok") - previous)
+
+        logger.info("Routing decision", extra={
+            "operation": operation,
+            "route": self.routes[decision.tier].name,
+            "tier": decision.tier,
+            "model": self.routes[decision.tier].model_name,
+            "served_by": self.routes[decision.served_tier].name,
+            "escalated": decision.served_tier != decision.tier,
+            "outcome": outcome,
+            "latency_ms": round((time.perf_counter() - decision.started) * 1000, 1),
+            "chars": decision.features["chars"],
+            "clauses": decision.features["clauses"],
+            "clarification": decision.features["clarification"],
+            "bucket": decision.bucket,
+            "repair_rate": round(decision.repair_rate, 3),
+            "explored": decision.explored,
+            "prompt_key": prompt_key,
+            "prompt_version": prompt_version
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "decisions": dict(self._decision_counts),
+            "escalations": self._escalation_count,
+            "expected_latency": {route.name: round(route.expected_latency, 3) for route in self.routes}
+        }
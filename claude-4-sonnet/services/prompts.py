@@ -0,0 +1,93 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+PROMPT_VERSION = "v2"
+
+# v2 keeps every system prompt free of per-request data so it is a byte-identical prefix across calls;
+# the output schema is enforced by with_structured_output and no longer repeated in the prompt text
+TASK_PARSING_SYSTEM_PROMPT = """Parse tasks from user input.
+
+Key rules:
+- "daily" = every day
+- "weekly" = same day each week
+- "every Monday Wednesday Friday" = weekly_0_2_4
+- "every Tuesday Thursday" = weekly_1_3
+- Monday=0, Tuesday=1, Wednesday=2, Thursday=3, Friday=4, Saturday=5, Sunday=6
+- other repeats use an RRULE: "every 2 weeks" = FREQ=WEEKLY;INTERVAL=2,
+  "every other Tuesday" = FREQ=WEEKLY;INTERVAL=2;BYDAY=TU, "on the 15th of each month" = FREQ=MONTHLY;BYMONTHDAY=15,
+  "last day of the month" = FREQ=MONTHLY;BYMONTHDAY=-1, "daily for 5 days" = FREQ=DAILY;COUNT=5
+- time is HH:MM (24-hour, GMT+0), date is YYYY-MM-DD, classification is work or personal
+
+Examples:
+- "brush teeth daily at 2pm" → recurrence: "daily"
+- "gym every Monday Wednesday Friday at 5pm" → recurrence: "weekly_0_2_4"
+
+The next message is the user input to parse."""
+
+CLARIFICATION_SYSTEM_PROMPT = """You resolve open questions about already parsed tasks.
+
+The user message is a JSON object: "reply" is the user's answer and "open" lists the tasks that still
+have questions, each with its "id", a short "task" description and its "questions". Answer with
+JSON-patch operations against those tasks only:
+- {"op": "replace", "path": "/<id>/<field>", "value": "..."} where field is one of
+  description, classification, time, date, recurrence
+- {"op": "remove", "path": "/<id>/needs_clarification/<index>"} for every question the reply resolves
+
+Rules:
+1. Only change what the reply states; never touch tasks that are not listed
+2. Leave a question in place when the reply does not answer it
+3. Use GMT+0 timezone for all time processing
+4. For dates: use YYYY-MM-DD format, for times: use HH:MM format (24-hour)
+5. Recurrence is none, daily, weekly, monthly, yearly, weekly_X_Y_Z with Monday=0 ... Sunday=6, or an RRULE
+   such as FREQ=WEEKLY;INTERVAL=2;BYDAY=TU (FREQ, INTERVAL, BYDAY, BYMONTHDAY, COUNT, UNTIL)"""
+
+LEGACY_TASK_PARSING_SYSTEM_PROMPT = """Parse tasks from user input. Return JSON only.
+
+{format_instructions}
+
+Key rules:
+- "daily" = every day
+- "weekly" = same day each week
+- "every Monday Wednesday Friday" = weekly_0_2_4
+- "every Tuesday Thursday" = weekly_1_3
+- Monday=0, Tuesday=1, Wednesday=2, Thursday=3, Friday=4, Saturday=5, Sunday=6
+
+Examples:
+- "brush teeth daily at 2pm" → recurrence: "daily"
+- "gym every Monday Wednesday Friday at 5pm" → recurrence: "weekly_0_2_4"
+
+Current input needs parsing:"""
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def render_clarification_message(clarification_response: str, open_questions: List[Dict[str, Any]]) -> str:
+    return compact_json({"reply": clarification_response, "open": open_questions})
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    version: str
+    task_parsing_system: str
+    clarification_system: str
+    render_clarification: Callable[[str, List[Dict[str, Any]]], str]
+
+
+def build_prompt_set(version: str, output_schema: type) -> PromptSet:
+    """Renders the templates of one prompt version once; v1 is the pre-v2 parsing layout, kept for comparison"""
+    if version == "v1":
+        from langchain.output_parsers import PydanticOutputParser
+
+        format_instructions = PydanticOutputParser(pydantic_object=output_schema).get_format_instructions()
+        return PromptSet(
+            "v1",
+            LEGACY_TASK_PARSING_SYSTEM_PROMPT.format(format_instructions=format_instructions),
+            CLARIFICATION_SYSTEM_PROMPT,
+            render_clarification_message
+        )
+    if version != PROMPT_VERSION:
+        raise ValueError(f"Unknown prompt version: {version}")
+    return PromptSet(PROMPT_VERSION, TASK_PARSING_SYSTEM_PROMPT, CLARIFICATION_SYSTEM_PROMPT, render_clarification_message)
@@ -0,0 +1,248 @@
+import calendar
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+UNITS = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month", "YEARLY": "year"}
+ADVERBS = {"DAILY": "Daily", "WEEKLY": "Weekly", "MONTHLY": "Monthly", "YEARLY": "Yearly"}
+MONTH_DAYS = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# Month lengths repeat every 400 years, so a period that matches nothing in that span never will
+MAX_EMPTY_PERIODS = 4800
+
+
+@dataclass(frozen=True, slots=True)
+class RecurrenceRule:
+    """A compiled subset of RFC 5545 RRULE: FREQ, INTERVAL, BYDAY (weekly), BYMONTHDAY (monthly),
+    COUNT and UNTIL. Rules do not carry a start; occurrences are anchored on the start passed in, which also
+    supplies the time of day and the default weekday or month day."""
+
+    freq: str
+    interval: int = 1
+    by_weekday: Tuple[int, ...] = ()
+    by_monthday: Tuple[int, ...] = ()
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    # The monthly/yearly shorthands fall back to the last day of shorter months instead of skipping them
+    clamp_monthday: bool = False
+
+    def next_after(self, start: datetime, instant: datetime) -> Optional[datetime]:
+        return next(self.iter_after(start, instant), None)
+
+    def iter_after(self, start: datetime, instant: datetime) -> Iterator[datetime]:
+        """Occurrences strictly after instant, in order; the first one is found without walking from start"""
+        start_day = start.toordinal()
+        day = instant.toordinal()
+        if datetime.combine(instant.date(), start.timetz()) <= instant:
+            day += 1
+        found = self._seek(start, max(day, start_day), self.count is not None)
+        if found is None:
+            return
+        day, index = found
+        time_of_day = start.timetz()
+        while True:
+            if self.count is not None and index >= self.count:
+                return
+            occurrence = datetime.combine(date.fromordinal(day), time_of_day)
+            if self.until is not None and occurrence > self.until:
+                return
+            yield occurrence
+            found = self._seek(start, day + 1, False)
+            if found is None:
+                return
+            day = found[0]
+            index += 1
+
+    def _seek(self, start: datetime, day: int, with_index: bool) -> Optional[Tuple[int, int]]:
+        """First occurrence on or after ordinal day (never before start) and its 0-based position in the series"""
+        start_day = start.toordinal()
+        interval = self.interval
+        if self.freq == "DAILY":
+            step = -(-(day - start_day) // interval)
+            return start_day + step * interval, step
+
+        if self.freq == "WEEKLY":
+            weekdays = self.by_weekday or (start.weekday(),)
+            week_start = start_day - start.weekday()
+            week, weekday = divmod(day - week_start, 7)
+            if week % interval:
+                week += interval - week % interval
+                weekday = 0
+            position = bisect_left(weekdays, weekday)
+            if position == len(weekdays):
+                week += interval
+                position = 0
+            skipped = bisect_left(weekdays, start.weekday())
+            return (
+                week_start + week * 7 + weekdays[position],
+                (week // interval) * len(weekdays) + position - skipped
+            )
+
+        target = date.fromordinal(day)
+        if self.freq == "MONTHLY":
+            period = (target.year - start.year) * 12 + target.month - start.month
+        else:
+            period = target.year - start.year
+        if period % interval:
+            period += interval - period % interval
+        for _ in range(MAX_EMPTY_PERIODS if self.freq == "MONTHLY" else MAX_EMPTY_PERIODS // 12):
+            days = self._period_days(start, period)
+            position = bisect_left(days, day)
+            if position < len(days):
+                if not with_index:
+                    return days[position], 0
+                return days[position], self._index(start, period, position)
+            period += interval
+        return None
+
+    def _period_days(self, start: datetime, period: int) -> List[int]:
+        """Ordinals of the matching days in one month, or for yearly rules the start's day in one year"""
+        if self.freq == "MONTHLY":
+            year, month = divmod(start.year * 12 + start.month - 1 + period, 12)
+            month += 1
+        else:
+            year, month = start.year + period, start.month
+        month_days = MONTH_DAYS[month] + (month == 2 and calendar.isleap(year))
+        first = date(year, month, 1).toordinal() - 1
+        days = set()
+        for monthday in self.by_monthday or (start.day,):
+            resolved = monthday if monthday > 0 else month_days + monthday + 1
+            if self.clamp_monthday:
+                resolved = min(resolved, month_days)
+            if 1 <= resolved <= month_days:
+                days.add(first + resolved)
+        start_day = start.toordinal()
+        return sorted(d for d in days if d >= start_day) if period == 0 else sorted(days)
+
+    def _index(self, start: datetime, period: int, position: int) -> int:
+        monthdays = self.by_monthday or (start.day,)
+        uniform = (
+            (self.clamp_monthday and len(monthdays) == 1)
+            or all(1 <= d <= 28 for d in monthdays) or all(-28 <= d <= -1 for d in monthdays)
+        )
+        if uniform:
+            # Every period has the same days, so only the first (cut at start) differs
+            per_period = len(set(monthdays))
+            first = len(self._period_days(start, 0))
+            if period == 0:
+                return position
+            return first + (period // self.interval - 1) * per_period + position
+        # Day 29-31 rules skip short months, so count the periods one by one, stopping once COUNT is used up
+        index = position
+        for earlier in range(0, period, self.interval):
+            index += len(self._period_days(start, earlier))
+            if self.count is not None and index >= self.count:
+                break
+        return index
+
+    def describe(self) -> str:
+        if self.interval == 1:
+            text = ADVERBS[self.freq]
+        else:
+            text = f"Every {self.interval} {UNITS[self.freq]}s"
+        if self.by_weekday:
+            text += " on " + ", ".join(WEEKDAY_NAMES[d] for d in self.by_weekday)
+        if self.by_monthday:
+            days = [str(d) for d in self.by_monthday if d > 0]
+            days += ["last" if d == -1 else f"{-d} from last" for d in reversed(self.by_monthday) if d < 0]
+            text += " on day " + ", ".join(days)
+        if self.count is not None:
+            text += f", {self.count} times"
+        if self.until is not None:
+            text += f", until {self.until.strftime('%b %d, %Y')}"
+        return text
+
+
+SHORTHANDS = {
+    "daily": RecurrenceRule("DAILY"),
+    "weekly": RecurrenceRule("WEEKLY"),
+    "monthly": RecurrenceRule("MONTHLY", clamp_monthday=True),
+    "yearly": RecurrenceRule("YEARLY", clamp_monthday=True)
+}
+
+
+def _parse_until(value: str) -> datetime:
+    try:
+        if "T" in value:
+            return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        # A date-only UNTIL includes that whole day
+        return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"Invalid UNTIL: {value}")
+
+
+def _parse_int(name: str, value: str, low: int, high: int) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    if not low <= abs(number) <= high:
+        raise ValueError(f"{name} out of range: {value}")
+    return number
+
+
+def parse_rrule(text: str) -> RecurrenceRule:
+    body = text.strip()
+    if body.upper().startswith("RRULE:"):
+        body = body[6:]
+    parts = {}
+    for part in filter(None, body.split(";")):
+        name, separator, value = part.partition("=")
+        if not separator or not value:
+            raise ValueError(f"Invalid rule part: {part}")
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported FREQ: {freq}")
+    interval = 1
+    if "INTERVAL" in parts:
+        interval = _parse_int("INTERVAL", parts.pop("INTERVAL"), 1, 1000)
+        if interval < 1:
+            raise ValueError(f"INTERVAL must be positive: {interval}")
+    by_weekday: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        codes = parts.pop("BYDAY").split(",")
+        if any(code not in WEEKDAY_CODES for code in codes):
+            raise ValueError(f"Unsupported BYDAY: {','.join(codes)}")
+        by_weekday = tuple(sorted({WEEKDAY_CODES.index(code) for code in codes}))
+    by_monthday: Tuple[int, ...] = ()
+    if "BYMONTHDAY" in parts:
+        if freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY is only supported with FREQ=MONTHLY")
+        by_monthday = tuple(sorted({
+            _parse_int("BYMONTHDAY", value, 1, 31) for value in parts.pop("BYMONTHDAY").split(",")
+        }))
+    count = _parse_int("COUNT", parts.pop("COUNT"), 1, 100000) if "COUNT" in parts else None
+    if count is not None and count < 1:
+        raise ValueError(f"COUNT must be positive: {count}")
+    until = _parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot be combined")
+    if parts:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return RecurrenceRule(freq, interval, by_weekday, by_monthday, count, until)
+
+
+@lru_cache(maxsize=1024)
+def compile_recurrence(text: str) -> RecurrenceRule:
+    """Compiles a recurrence string once: the daily/weekly/monthly/yearly shorthands, weekly_X_Y_Z (Monday=0)
+    or an RRULE such as FREQ=WEEKLY;INTERVAL=2;BYDAY=TU. Raises ValueError for anything else."""
+    lowered = text.strip().lower()
+    if lowered in SHORTHANDS:
+        return SHORTHANDS[lowered]
+    if lowered.startswith("weekly_"):
+        try:
+            weekdays = {int(value) for value in lowered[7:].split("_")}
+        except ValueError:
+            raise ValueError(f"Invalid weekday list: {text}")
+        if not weekdays or not weekdays <= set(range(7)):
+            raise ValueError(f"Invalid weekday list: {text}")
+        return RecurrenceRule("WEEKLY", by_weekday=tuple(sorted(weekdays)))
+    return parse_rrule(text)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from utils.metrics import LLM_DEADLINE_EXCEEDED, LLM_HEDGE_WINS, LLM_HEDGED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+class LatencyWindow:
+    """Bounded window of recent successful latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float, default: float = 0.0) -> float:
+        if not self._samples:
+            return default
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RequestHedger:
+    """Sends a duplicate request once the first one is slower than a recent-latency quantile; first answer wins"""
+
+    def __init__(self, model_role: str, hedge_quantile: float = 0.95, min_hedge_delay: float = 1.0,
+                 deadline_seconds: float = 60.0, max_attempts: int = 2, retry_backoff: float = 0.5,
+                 min_samples: int = 20, window_size: int = 200):
+        self.model_role = model_role
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow(window_size)
+        self.hedge_count = 0
+        self.hedge_win_count = 0
+        self.deadline_count = 0
+        self._hedged_counter = LLM_HEDGED_REQUESTS.get(model_role)
+        self._win_counter = LLM_HEDGE_WINS.get(model_role)
+        self._deadline_counter = LLM_DEADLINE_EXCEEDED.get(model_role)
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_quantile <= 0 or len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_hedge_delay, self.latencies.quantile(self.hedge_quantile))
+
+    async def call(self, invoke: Callable[[Any], Awaitable[Any]], target: Any, hedge_target: Any = None,
+                   budget: Optional[float] = None) -> Any:
+        """Retries transient failures while they still fit into the budget; ValueError is never retried"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.deadline_seconds if budget is None else budget)
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(self.max_attempts):
+            try:
+                return await self._race(invoke, target, target if hedge_target is None else hedge_target, deadline)
+            except ValueError:
+                raise
+            except DeadlineExceededError as e:
+                last_error = e
+                break
+            except Exception as e:
+                last_error = e
+                logger.warning(f"LLM {self.model_role} attempt {attempt + 1} failed: {e}")
+
+            pause = self.retry_backoff * 2 ** attempt
+            if attempt == self.max_attempts - 1 or deadline - loop.time() < pause + self.latencies.quantile(0.5):
+                break
+            await asyncio.sleep(pause)
+
+        if last_error is None or isinstance(last_error, DeadlineExceededError):
+            self.deadline_count += 1
+            self._deadline_counter.inc()
+        raise last_error or DeadlineExceededError(f"LLM {self.model_role} call exceeded its deadline")
+
+    async def _race(self, invoke: Callable[[Any], Awaitable[Any]], target: Any, hedge_target: Any,
+                    deadline: float) -> Any:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        in_flight: Dict[asyncio.Future, Tuple[float, bool]] = {
+            asyncio.ensure_future(invoke(target)): (started, False)
+        }
+        hedge_delay = self.hedge_delay()
+        hedged = False
+        error: Optional[BaseException] = None
+
+        try:
+            while in_flight:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise DeadlineExceededError(f"LLM {self.model_role} call exceeded its deadline")
+                timeout = remaining
+                if not hedged and hedge_delay is not None:
+                    timeout = min(remaining, max(0.0, started + hedge_delay - loop.time()))
+
+                done, _ = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    request_started, is_hedge = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.latencies.add(loop.time() - request_started)
+                        if is_hedge:
+                            self.hedge_win_count += 1
+                            self._win_counter.inc()
+                        return future.result()
+                    if isinstance(error, ValueError):
+                        raise error
+
+                if done:
+                    if not in_flight:
+                        raise error
+                    continue
+
+                if not hedged and hedge_delay is not None:
+                    hedged = True
+                    self.hedge_count += 1
+                    self._hedged_counter.inc()
+                    in_flight[asyncio.ensure_future(invoke(hedge_target))] = (loop.time(), True)
+
+            raise error or DeadlineExceededError(f"LLM {self.model_role} call exceeded its deadline")
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedge_count,
+            "hedge_wins": self.hedge_win_count,
+            "deadlines": self.deadline_count,
+            "hedge_delay": self.hedge_delay(),
+            "samples": len(self.latencies)
+        }
@@ -1,11 +1,23 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+from utils.metrics import USER_STATES_REMOVED, USER_STATE_LOADS, USER_STATE_WRITES
 
 logger = logging.getLogger(__name__)
 
+# Per-entry cost of the OrderedDict slot and its linked-list node, on top of the state itself
+ENTRY_OVERHEAD_BYTES = 120
+EMPTY_STR_BYTES = sys.getsizeof("")
+SWEEP_BATCH = 10000
+SIZED_FIELDS = frozenset(("original_message", "parsed_tasks", "clarifications_needed", "clarification_responses"))
+INTERNAL_FIELDS = frozenset(("last_active", "size_bytes"))
+
 
 class ConversationState(Enum):
     AWAITING_INPUT = "awaiting_input"
@@ -15,7 +27,7 @@ class ConversationState(Enum):
     FINAL_OUTPUT = "final_output"
 
 
-@dataclass
+@dataclass(slots=True)
 class UserState:
     user_id: int
     state: ConversationState = ConversationState.AWAITING_INPUT
@@ -25,7 +37,9 @@ class UserState:
     clarification_responses: Dict[str, str] = field(default_factory=dict)
     message_id_for_approval: Optional[int] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
-    
+    last_active: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "user_id": self.user_id,
@@ -39,82 +53,327 @@ class UserState:
         }
 
 
+def estimate_size(value: Any) -> int:
+    """Strings by length, containers by their own size plus their values; dict keys are field names shared by every
+    task, so they are left out"""
+    if value.__class__ is str:
+        return EMPTY_STR_BYTES + len(value)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        return size
+    for item in items:
+        if item.__class__ is str:
+            size += EMPTY_STR_BYTES + len(item)
+        elif item is not None:
+            size += estimate_size(item)
+    return size
+
+
+def estimate_state_bytes(state: UserState) -> int:
+    """Shallow size of the state plus everything it owns; shared objects (enums, small ints) are not counted"""
+    return (
+        ENTRY_OVERHEAD_BYTES + sys.getsizeof(state) + sys.getsizeof(state.created_at)
+        + (estimate_size(state.original_message) if state.original_message is not None else 0)
+        + estimate_size(state.parsed_tasks) + estimate_size(state.clarifications_needed)
+        + estimate_size(state.clarification_responses)
+    )
+
+
+EMPTY_STATE_BYTES = estimate_state_bytes(UserState(user_id=0))
+
+
 class StateManager:
-    def __init__(self):
-        self._states: Dict[int, UserState] = {}
-        self._max_states = 1000
-        
+    """Conversation states kept in last-activity order, so touch, idle expiry and LRU eviction are O(1) per state"""
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_states: int = 100000, max_bytes: int = 256 * 1024 * 1024,
+                 clock=time.monotonic, wall_clock=time.time):
+        self._states: "OrderedDict[int, UserState]" = OrderedDict()
+        self._phase_counts: Dict[ConversationState, int] = {phase: 0 for phase in ConversationState}
+        self._total_bytes = 0
+        self.ttl_seconds = ttl_seconds
+        self._max_states = max_states
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sweeper: Optional[asyncio.Task] = None
+        self.expired = 0
+        self.evicted = 0
+        # Write-behind to a persistent store: the latest state per user (None to delete) until the next batch
+        self._store = None
+        self._dirty: Dict[int, Optional[UserState]] = {}
+        self._missing: Set[int] = set()
+        self.flush_batch = 512
+        self._flusher: Optional[asyncio.Task] = None
+
+    def configure(self, ttl_seconds: float, max_states: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self._max_states = max_states
+        self.max_bytes = max_bytes
+        self._enforce_limits()
+
+    def attach_store(self, store, flush_batch: int = 512):
+        """States missing from memory are loaded from the store on first access; changes go back in batches"""
+        self._store = store if store.persistent else None
+        self.flush_batch = flush_batch
+        self._dirty.clear()
+        self._missing.clear()
+
+    def _mark(self, user_id: int, state: Optional[UserState]):
+        if self._store is None:
+            return
+        self._dirty[user_id] = state
+        if len(self._dirty) >= self.flush_batch:
+            self.flush_writes()
+
+    def _wall_time(self, state: UserState) -> float:
+        return self._wall_clock() - (self._clock() - state.last_active)
+
+    def _insert(self, state: UserState):
+        state.size_bytes = estimate_state_bytes(state)
+        self._states[state.user_id] = state
+        self._phase_counts[state.state] += 1
+        self._total_bytes += state.size_bytes
+        self._enforce_limits()
+
+    def _load(self, user_id: int) -> Optional[UserState]:
+        # A state evicted before its batch went out is still pending here and newer than the stored row
+        if user_id in self._dirty:
+            state = self._dirty[user_id]
+            if state is None:
+                return None
+        else:
+            if user_id in self._missing:
+                return None
+            loaded = self._store.load(user_id)
+            if loaded is None:
+                if len(self._missing) >= self._max_states:
+                    self._missing.clear()
+                self._missing.add(user_id)
+                USER_STATE_LOADS.get("miss").inc()
+                return None
+            state, last_active = loaded
+            idle = self._wall_clock() - last_active
+            if idle > self.ttl_seconds:
+                self._mark(user_id, None)
+                USER_STATE_LOADS.get("expired").inc()
+                return None
+            state.last_active = self._clock() - idle
+            if state.state == ConversationState.PROCESSING:
+                # The parse that set it died with the process that stored it; let the user send the tasks again
+                state.state = ConversationState.AWAITING_INPUT
+            USER_STATE_LOADS.get("hit").inc()
+        self._insert(state)
+        return state
+
+    def flush_writes(self) -> int:
+        """Writes every state changed since the last batch in one transaction"""
+        if self._store is None or not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        puts = [(state, self._wall_time(state)) for state in dirty.values() if state is not None]
+        deletes = [user_id for user_id, state in dirty.items() if state is None]
+        try:
+            self._store.write(puts, deletes)
+        except Exception as e:
+            logger.error(f"Failed to write {len(dirty)} conversation states: {e}")
+            for user_id, state in dirty.items():
+                self._dirty.setdefault(user_id, state)
+            return 0
+        USER_STATE_WRITES.get("put").inc(len(puts))
+        USER_STATE_WRITES.get("delete").inc(len(deletes))
+        return len(dirty)
+
+    def _remove(self, user_id: int) -> Optional[UserState]:
+        state = self._states.pop(user_id, None)
+        if state is not None:
+            self._phase_counts[state.state] -= 1
+            self._total_bytes -= state.size_bytes
+        return state
+
+    def _resize(self, state: UserState):
+        size = estimate_state_bytes(state)
+        self._total_bytes += size - state.size_bytes
+        state.size_bytes = size
+
+    def _enforce_limits(self):
+        # Oldest activity goes first; the most recently touched state is never evicted
+        while len(self._states) > 1 and (
+            len(self._states) > self._max_states or self._total_bytes > self.max_bytes
+        ):
+            # With a persistent store this only drops the cached copy; the next access loads it again
+            user_id = next(iter(self._states))
+            self._remove(user_id)
+            self.evicted += 1
+            USER_STATES_REMOVED.get("evicted").inc()
+
     def create_state(self, user_id: int) -> UserState:
-        if len(self._states) >= self._max_states:
-            self._cleanup_old_states()
-        
-        state = UserState(user_id=user_id)
+        self._remove(user_id)
+        self._missing.discard(user_id)
+
+        state = UserState(user_id=user_id, last_active=self._clock(), size_bytes=EMPTY_STATE_BYTES)
         self._states[user_id] = state
-        logger.info(f"Created new state for user {user_id}")
+        self._phase_counts[state.state] += 1
+        self._total_bytes += EMPTY_STATE_BYTES
+        self._mark(user_id, state)
+        self._enforce_limits()
+        logger.debug("Created new state for user %s", user_id)
         return state
-    
+
     def get_state(self, user_id: int) -> Optional[UserState]:
-        return self._states.get(user_id)
-    
+        state = self._states.get(user_id)
+        if state is None:
+            if self._store is None:
+                return None
+            state = self._load(user_id)
+            if state is None:
+                return None
+        now = self._clock()
+        if now - state.last_active > self.ttl_seconds:
+            self._remove(user_id)
+            self._mark(user_id, None)
+            self.expired += 1
+            USER_STATES_REMOVED.get("expired").inc()
+            return None
+        state.last_active = now
+        self._states.move_to_end(user_id)
+        return state
+
     def update_state(self, user_id: int, **kwargs) -> bool:
-        if user_id not in self._states:
+        state = self.get_state(user_id)
+        if state is None:
             logger.warning(f"Attempted to update non-existent state for user {user_id}")
             return False
-        
-        state = self._states[user_id]
+
         for key, value in kwargs.items():
-            if hasattr(state, key):
-                setattr(state, key, value)
-            else:
+            if key in INTERNAL_FIELDS or not hasattr(state, key):
                 logger.warning(f"Attempted to set invalid state attribute: {key}")
-        
-        logger.info(f"Updated state for user {user_id}: {kwargs}")
+                continue
+            if key == "state":
+                self._phase_counts[state.state] -= 1
+                self._phase_counts[value] += 1
+            setattr(state, key, value)
+
+        if not SIZED_FIELDS.isdisjoint(kwargs):
+            self._resize(state)
+            self._enforce_limits()
+        self._mark(user_id, state)
+        logger.debug("Updated state for user %s: %s", user_id, list(kwargs))
         return True
-    
+
     def flush_state(self, user_id: int) -> bool:
-        if user_id in self._states:
-            del self._states[user_id]
-            logger.info(f"Flushed state for user {user_id}")
+        if self._store is not None and user_id not in self._states:
+            self.get_state(user_id)
+        if self._remove(user_id) is not None:
+            self._mark(user_id, None)
+            logger.debug("Flushed state for user %s", user_id)
             return True
         return False
-    
+
     def has_active_state(self, user_id: int) -> bool:
-        return user_id in self._states
-    
+        return self.get_state(user_id) is not None
+
     def is_in_clarification(self, user_id: int) -> bool:
         state = self.get_state(user_id)
         return state and state.state == ConversationState.CLARIFICATION
-    
+
     def is_awaiting_approval(self, user_id: int) -> bool:
         state = self.get_state(user_id)
         return state and state.state == ConversationState.DISPLAY
-    
+
     def can_accept_new_tasks(self, user_id: int) -> bool:
         state = self.get_state(user_id)
         return not state or state.state == ConversationState.AWAITING_INPUT
-    
-    def _cleanup_old_states(self):
-        current_time = datetime.utcnow()
-        old_states = []
-        
-        for user_id, state in self._states.items():
-            time_diff = (current_time - state.created_at).total_seconds()
-            if time_diff > 3600:
-                old_states.append(user_id)
-        
-        for user_id in old_states:
-            del self._states[user_id]
-            logger.info(f"Cleaned up old state for user {user_id}")
-    
+
+    def expire_idle(self, limit: Optional[int] = None) -> int:
+        """Drops states idle past the TTL from the cold end; stops at the first live one"""
+        deadline = self._clock() - self.ttl_seconds
+        removed = 0
+        while self._states and (limit is None or removed < limit):
+            user_id, state = next(iter(self._states.items()))
+            if state.last_active >= deadline:
+                break
+            self._remove(user_id)
+            self._mark(user_id, None)
+            removed += 1
+        if removed:
+            self.expired += removed
+            USER_STATES_REMOVED.get("expired").inc(removed)
+        return removed
+
+    async def _sweep_forever(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            removed = 0
+            # Batches keep a large expiry wave from holding the event loop
+            while True:
+                batch_removed = self.expire_idle(limit=SWEEP_BATCH)
+                removed += batch_removed
+                if batch_removed < SWEEP_BATCH:
+                    break
+                await asyncio.sleep(0)
+            if self._store is not None:
+                removed += self._store.expire(self._wall_clock() - self.ttl_seconds)
+                self._missing.clear()
+            if removed:
+                logger.info(f"Expired {removed} idle conversation states")
+
+    def start_sweeper(self, interval_seconds: float = 30.0):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_forever(interval_seconds))
+
+    async def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _flush_forever(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            self.flush_writes()
+
+    def start_flusher(self, interval_seconds: float = 1.0):
+        if self._store is not None and (self._flusher is None or self._flusher.done()):
+            self._flusher = asyncio.create_task(self._flush_forever(interval_seconds))
+
+    async def close(self):
+        """Stops the flusher, writes what is pending and closes the store; safe to call more than once"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._store is not None:
+            self.flush_writes()
+            self._store.close()
+            self._store = None
+
     def get_state_count(self) -> int:
         return len(self._states)
-    
+
     def get_states_summary(self) -> Dict[str, int]:
-        summary = {}
-        for state in self._states.values():
-            state_name = state.state.value
-            summary[state_name] = summary.get(state_name, 0) + 1
-        return summary
+        return {phase.value: count for phase, count in self._phase_counts.items() if count}
+
+    def get_memory_bytes(self) -> int:
+        return self._total_bytes
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "states": len(self._states),
+            "bytes": self._total_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "pending_writes": len(self._dirty)
+        }
 
 
-state_manager = StateManager()
\ No newline at end of file
+state_manager = StateManager()
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import sqlite3
+import struct
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+from services.state_manager import ConversationState, StateManager, UserState, state_manager
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+COMPRESSED = 0x80
+COMPRESS_MIN_BYTES = 512
+NO_MESSAGE_ID = -1
+NO_TEXT = 0xFFFFFFFF
+# version/flags, phase, user id, approval message id, created_at and last activity as epoch seconds
+HEADER = struct.Struct("<BBqqdd")
+TEXT_LENGTH = struct.Struct("<I")
+PHASES = list(ConversationState)
+PHASE_INDEX = {phase: index for index, phase in enumerate(PHASES)}
+DATA_FIELDS = ("original_message", "parsed_tasks", "clarifications_needed", "clarification_responses",
+               "message_id_for_approval")
+
+
+def encode_state(state: UserState, last_active: float) -> bytes:
+    """Fixed header, length-prefixed message, then tasks and clarifications as compact JSON, deflated when large"""
+    body = json.dumps(
+        [state.parsed_tasks, state.clarifications_needed, state.clarification_responses],
+        separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+    flags = FORMAT_VERSION
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body = zlib.compress(body, 6)
+        flags |= COMPRESSED
+    message = state.original_message.encode("utf-8") if state.original_message is not None else b""
+    return b"".join((
+        HEADER.pack(
+            flags, PHASE_INDEX[state.state], state.user_id,
+            NO_MESSAGE_ID if state.message_id_for_approval is None else state.message_id_for_approval,
+            state.created_at.replace(tzinfo=timezone.utc).timestamp(), last_active
+        ),
+        TEXT_LENGTH.pack(NO_TEXT if state.original_message is None else len(message)),
+        message,
+        body
+    ))
+
+
+def decode_state(blob: bytes) -> Tuple[UserState, float]:
+    flags, phase, user_id, message_id, created_at, last_active = HEADER.unpack_from(blob)
+    if flags & ~COMPRESSED != FORMAT_VERSION:
+        raise ValueError(f"Unsupported state format {flags & ~COMPRESSED}")
+    offset = HEADER.size
+    (text_length,) = TEXT_LENGTH.unpack_from(blob, offset)
+    offset += TEXT_LENGTH.size
+    message = None
+    if text_length != NO_TEXT:
+        message = blob[offset:offset + text_length].decode("utf-8")
+        offset += text_length
+    body = blob[offset:]
+    if flags & COMPRESSED:
+        body = zlib.decompress(body)
+    parsed_tasks, clarifications_needed, clarification_responses = json.loads(body)
+    state = UserState(
+        user_id=user_id,
+        state=PHASES[phase],
+        original_message=message,
+        parsed_tasks=parsed_tasks,
+        clarifications_needed=clarifications_needed,
+        clarification_responses=clarification_responses,
+        message_id_for_approval=None if message_id == NO_MESSAGE_ID else message_id,
+        created_at=datetime.fromtimestamp(created_at, timezone.utc).replace(tzinfo=None)
+    )
+    return state, last_active
+
+
+class MemoryStateStore:
+    """No persistence: states live only in the StateManager and are lost on restart"""
+
+    persistent = False
+
+    def load(self, user_id: int) -> Optional[Tuple[UserState, float]]:
+        return None
+
+    def write(self, puts: List[Tuple[UserState, float]], deletes: List[int]):
+        pass
+
+    def expire(self, deadline: float) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+
+class SqliteStateStore:
+    """One row per user with the encoded state; written in batches by the StateManager, read one user at a time"""
+
+    persistent = True
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection: Optional[sqlite3.Connection] = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS user_states "
+            "(user_id INTEGER PRIMARY KEY, last_active REAL NOT NULL, state BLOB NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS user_states_last_active ON user_states (last_active)")
+        self.loads = 0
+        self.rows_written = 0
+        self.batches = 0
+
+    def load(self, user_id: int) -> Optional[Tuple[UserState, float]]:
+        self.loads += 1
+        row = self._connection.execute("SELECT state FROM user_states WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return decode_state(row[0])
+        except (ValueError, struct.error, zlib.error) as e:
+            logger.warning(f"Dropping unreadable state for user {user_id}: {e}")
+            self._connection.execute("DELETE FROM user_states WHERE user_id = ?", (user_id,))
+            return None
+
+    def write(self, puts: List[Tuple[UserState, float]], deletes: List[int]):
+        rows = [(state.user_id, last_active, encode_state(state, last_active)) for state, last_active in puts]
+        with self._connection:
+            self._connection.execute("BEGIN")
+            if rows:
+                self._connection.executemany("INSERT OR REPLACE INTO user_states VALUES (?, ?, ?)", rows)
+            if deletes:
+                self._connection.executemany("DELETE FROM user_states WHERE user_id = ?", [(uid,) for uid in deletes])
+        self.rows_written += len(rows) + len(deletes)
+        self.batches += 1
+
+    def expire(self, deadline: float) -> int:
+        return self._connection.execute("DELETE FROM user_states WHERE last_active < ?", (deadline,)).rowcount
+
+    def count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM user_states").fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def create_state_store(backend: str, path: str):
+    if backend == "sqlite":
+        return SqliteStateStore(path)
+    if backend != "memory":
+        raise ValueError(f"Unknown state backend: {backend}")
+    return MemoryStateStore()
+
+
+class ConversationStorage(BaseStorage):
+    """aiogram FSM storage over the StateManager: the FSM state is the conversation phase, so the lookup the
+    dispatcher does for StateFilter routing also loads the state the handlers work on"""
+
+    def __init__(self, manager: StateManager = state_manager):
+        self.manager = manager
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        if state is None:
+            self.manager.flush_state(key.user_id)
+            return
+        phase = ConversationState(state)
+        if self.manager.get_state(key.user_id) is None:
+            self.manager.create_state(key.user_id)
+        self.manager.update_state(key.user_id, state=phase)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state = self.manager.get_state(key.user_id)
+        return state.state.value if state is not None else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if self.manager.get_state(key.user_id) is None:
+            if not data:
+                return
+            self.manager.create_state(key.user_id)
+        defaults = UserState(user_id=key.user_id)
+        self.manager.update_state(
+            key.user_id, **{name: data.get(name, getattr(defaults, name)) for name in DATA_FIELDS}
+        )
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        state = self.manager.get_state(key.user_id)
+        if state is None:
+            return {}
+        return {name: getattr(state, name) for name in DATA_FIELDS}
+
+    async def close(self) -> None:
+        await self.manager.close()
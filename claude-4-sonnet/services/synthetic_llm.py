@@ -0,0 +1,125 @@
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+WEEKDAY_INDEX = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+WEEKDAY_PATTERN = re.compile(r"\b(mon|tue|wed|thu|fri|sat|sun)[a-z]*\b", re.IGNORECASE)
+TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b", re.IGNORECASE)
+DATE_PATTERN = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+CLAUSE_SPLIT_PATTERN = re.compile(r"(\n+|;\s*|\.\s+|,\s+|\s+and\s+)", re.IGNORECASE)
+NOISE_PATTERN = re.compile(
+    r"\b(and|every|each|on|at|from|starting|daily|weekly|monthly|yearly|weekdays?|tomorrow|today|day|week|month|year)\b|"
+    r"\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}(:\d{2})?\s*(am|pm)?\b|" + WEEKDAY_PATTERN.pattern,
+    re.IGNORECASE
+)
+WORK_KEYWORDS = ("invoice", "meeting", "standup", "report", "email", "client", "deploy", "review", "payroll", "office", "code", "sprint")
+
+
+def _extract_time(text: str) -> Optional[str]:
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+    if match.group(3):
+        hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+        if match.group(3).lower() == "pm":
+            hour += 12
+    else:
+        hour, minute = int(match.group(4)), int(match.group(5))
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _split_clauses(text: str) -> List[str]:
+    clauses = []
+    current = ""
+    parts = CLAUSE_SPLIT_PATTERN.split(text)
+    for index in range(0, len(parts), 2):
+        part = parts[index].strip()
+        if not part:
+            continue
+        current = current + parts[index - 1] + part if current else part
+        if TIME_PATTERN.search(part):
+            clauses.append(current.strip())
+            current = ""
+    if current:
+        clauses.append(current.strip())
+    return clauses
+
+
+def _describe(clause: str) -> str:
+    words = [word.strip(",.;") for word in NOISE_PATTERN.sub(" ", clause).split()]
+    description = " ".join(word for word in words if word) or clause.strip()
+    return description[:1].upper() + description[1:]
+
+
+def _recurrence(clause: str) -> str:
+    lowered = clause.lower()
+    if "daily" in lowered or "every day" in lowered:
+        return "daily"
+    if "monthly" in lowered or "every month" in lowered:
+        return "monthly"
+    if "yearly" in lowered or "every year" in lowered:
+        return "yearly"
+    if "weekday" in lowered:
+        return "weekly_0_1_2_3_4"
+    weekdays = sorted({WEEKDAY_INDEX[match.group(1).lower()] for match in WEEKDAY_PATTERN.finditer(clause)})
+    if weekdays and ("every" in lowered or "each" in lowered):
+        return "weekly_" + "_".join(str(day) for day in weekdays)
+    if "weekly" in lowered or "every week" in lowered:
+        return "weekly"
+    return "none"
+
+
+def parse_tasks(text: str, today: datetime) -> Dict[str, Any]:
+    tasks = []
+    for clause in _split_clauses(text):
+        lowered = clause.lower()
+        description = _describe(clause)
+        recurrence = _recurrence(clause)
+        date_match = DATE_PATTERN.search(clause)
+        task_date = date_match.group(1) if date_match else None
+        if task_date is None and "tomorrow" in lowered:
+            task_date = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+        task_time = _extract_time(clause)
+        questions = [] if task_time else [f"What time should \"{description}\" be scheduled?"]
+        tasks.append({
+            "description": description,
+            "classification": "work" if any(word in lowered for word in WORK_KEYWORDS) else "personal",
+            "time": task_time,
+            "date": task_date,
+            "recurrence": recurrence,
+            "needs_clarification": questions,
+            "confidence": "high" if task_time else "medium"
+        })
+    return {"tasks": tasks, "needs_clarification": any(task["needs_clarification"] for task in tasks), "error": None}
+
+
+def clarification_patch(open_questions: List[Dict[str, Any]], reply: str) -> Dict[str, Any]:
+    """One answered time per open task in order; a single time answers every open task"""
+    answered_times = [_extract_time(match.group(0)) for match in TIME_PATTERN.finditer(reply)]
+    answered_times = [answered_time for answered_time in answered_times if answered_time]
+    operations = []
+    for position, item in enumerate(open_questions):
+        if not answered_times:
+            break
+        answered_time = answered_times[min(position, len(answered_times) - 1)]
+        operations.append({"op": "replace", "path": f"/{item['id']}/time", "value": answered_time})
+        operations.extend(
+            {"op": "remove", "path": f"/{item['id']}/needs_clarification/{index}"}
+            for index in reversed(range(len(item["questions"])))
+        )
+    return {"operations": operations}
+
+
+def respond(messages: List[Any], schema: Optional[type] = None) -> str:
+    """Rule-based stand-in for the task parsing and clarification prompts"""
+    user_content = str(messages[-1].content)
+
+    if schema is not None and schema.__name__ == "ClarificationPatch":
+        payload = json.loads(user_content)
+        return json.dumps(clarification_patch(payload.get("open", []), payload.get("reply", "")))
+    if schema is not None:
+        return json.dumps(parse_tasks(user_content, datetime.utcnow()))
+    return "[]"
@@ -1,11 +1,13 @@
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from pydantic import BaseModel, Field
-from langchain.output_parsers import PydanticOutputParser
+from services.input_splitter import InputSplitter
 from services.llm_service import llm_service
 from services.task_validator import task_validator
+from utils.metrics import TASK_PARSE_CHUNKING
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,7 @@ class TaskInfo(BaseModel):
     classification: str = Field(description="Either 'work' or 'personal'")
     time: Optional[str] = Field(default=None, description="Time in HH:MM format or null")
     date: Optional[str] = Field(default=None, description="Date in YYYY-MM-DD format or null")
-    recurrence: Optional[str] = Field(default=None, description="Recurrence pattern: none, daily, weekly, monthly, yearly, or weekly_X_Y_Z for specific weekdays")
+    recurrence: Optional[str] = Field(default=None, description="Recurrence pattern: none, daily, weekly, monthly, yearly, weekly_X_Y_Z for specific weekdays, or an RRULE such as FREQ=WEEKLY;INTERVAL=2")
     needs_clarification: List[str] = Field(default_factory=list, description="List of clarification questions")
     confidence: str = Field(default="high", description="Confidence level: high, medium, low")
 
@@ -44,7 +46,77 @@ class ParsedTask:
 class TaskParser:
     def __init__(self):
         self.current_date = datetime.utcnow()
-        self.parser = PydanticOutputParser(pydantic_object=TaskParsingResult)
+        self._parser = None
+        self._splitter = None
+    
+    @property
+    def parser(self):
+        if self._parser is None:
+            from langchain.output_parsers import PydanticOutputParser
+            self._parser = PydanticOutputParser(pydantic_object=TaskParsingResult)
+        return self._parser
+    
+    @property
+    def splitter(self) -> InputSplitter:
+        if self._splitter is None:
+            self._splitter = InputSplitter.from_settings()
+        return self._splitter
+    
+    def _to_task_dicts(self, result) -> List[Dict[str, Any]]:
+        return [
+            {
+                "description": task_info.description,
+                "classification": task_info.classification,
+                "time": task_info.time,
+                "date": task_info.date,
+                "recurrence": task_info.recurrence,
+                "needs_clarification": task_info.needs_clarification,
+                "confidence": task_info.confidence
+            }
+            for task_info in result.tasks
+        ]
+    
+    def _is_valid_result(self, result) -> bool:
+        """Routing escalates to a stronger model when this is False"""
+        if result.error:
+            return True
+        return task_validator.validate_parsed_tasks(self._to_task_dicts(result))["valid"]
+    
+    @staticmethod
+    def _merge_results(results: list) -> TaskParsingResult:
+        """Concatenates chunk results in input order, so task ids (list positions) are renumbered; exact repeats are dropped"""
+        merged_tasks = []
+        seen = set()
+        for result in results:
+            for task_info in result.tasks:
+                key = (
+                    " ".join(task_info.description.casefold().split()),
+                    task_info.date, task_info.time, task_info.recurrence
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged_tasks.append(task_info)
+        return TaskParsingResult(
+            tasks=merged_tasks,
+            needs_clarification=any(result.needs_clarification for result in results)
+        )
+    
+    async def _parse_structured(self, sanitized_input: str) -> TaskParsingResult:
+        chunks = self.splitter.split(sanitized_input)
+        if chunks:
+            results = await asyncio.gather(*(
+                llm_service.process_tasks_structured(chunk, self.parser, validate=self._is_valid_result)
+                for chunk in chunks
+            ), return_exceptions=True)
+            if not any(isinstance(result, BaseException) or result.error for result in results):
+                TASK_PARSE_CHUNKING.get("chunked").inc()
+                return self._merge_results(results)
+            logger.warning(f"Chunked parsing failed for {len(chunks)} chunks, retrying as a single call")
+            TASK_PARSE_CHUNKING.get("fallback").inc()
+        else:
+            TASK_PARSE_CHUNKING.get("single").inc()
+        return await llm_service.process_tasks_structured(sanitized_input, self.parser, validate=self._is_valid_result)
     
     async def parse_tasks(self, user_input: str) -> Dict[str, Any]:
         sanitized_input = task_validator.sanitize_input(user_input)
@@ -58,7 +130,7 @@ class TaskParser:
             }
         
         try:
-            result = await llm_service.process_tasks_structured(sanitized_input, self.parser)
+            result = await self._parse_structured(sanitized_input)
             
             if result.error:
                 return {
@@ -67,18 +139,7 @@ class TaskParser:
                     "error": result.error
                 }
             
-            task_dicts = []
-            for task_info in result.tasks:
-                task_dict = {
-                    "description": task_info.description,
-                    "classification": task_info.classification,
-                    "time": task_info.time,
-                    "date": task_info.date,
-                    "recurrence": task_info.recurrence,
-                    "needs_clarification": task_info.needs_clarification,
-                    "confidence": task_info.confidence
-                }
-                task_dicts.append(task_dict)
+            task_dicts = self._to_task_dicts(result)
             
             validation_result = task_validator.validate_parsed_tasks(task_dicts)
             
@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, Any, Optional, List
 from services.datetime_processor import datetime_processor
+from services.recurrence import compile_recurrence
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,9 @@ class TaskValidator:
         
         return validation_result
     
+    def validate_task(self, task: Dict[str, Any], task_number: int) -> Dict[str, Any]:
+        return self._validate_single_task(task, task_number)
+    
     def _validate_single_task(self, task: Dict[str, Any], task_number: int) -> Dict[str, Any]:
         result = {
             "valid": True,
@@ -67,15 +71,12 @@ class TaskValidator:
             task["classification"] = "personal"
         
         recurrence = task.get("recurrence", "")
-        if recurrence:
-            recurrence_lower = recurrence.lower()
-            valid_basic_patterns = ["none", "daily", "weekly", "monthly", "yearly"]
-            is_weekly_pattern = recurrence_lower.startswith("weekly_")
-            
-            if recurrence_lower not in valid_basic_patterns and not is_weekly_pattern:
+        if recurrence and recurrence.lower() != "none":
+            try:
+                compile_recurrence(recurrence)
+            except ValueError as e:
+                logger.warning(f"Task {task_number}: dropping unsupported recurrence {recurrence!r}: {e}")
                 task["recurrence"] = "none"
-            else:
-                task["recurrence"] = recurrence
         
         if not task.get("description", "").strip():
             result["valid"] = False
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from utils.metrics import LLM_INPUT_TOKENS, LLM_OUTPUT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+SHARED_USER = "-"
+OVERFLOW_USER = "other"
+
+_current_user: ContextVar[str] = ContextVar("llm_usage_user", default=SHARED_USER)
+
+
+class UsageLedger:
+    """Per-window token rollups keyed by (model, call site, user hash), plus a reservoir sample of individual calls"""
+
+    def __init__(self, max_keys: int = 5000, max_calls: int = 2000, salt: str = ""):
+        self.max_keys = max_keys
+        self.max_calls = max_calls
+        self.salt = salt
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._reset(time.time())
+
+    def _reset(self, now: float):
+        self._window_started = now
+        self._rollups: Dict[Tuple[str, str, str], List[float]] = {}
+        self._sampled_calls: List[Dict[str, Any]] = []
+        self._calls_seen = 0
+
+    def hash_user(self, user_id: Any) -> str:
+        return hashlib.sha256(f"{self.salt}:{user_id}".encode()).hexdigest()[:12]
+
+    def record(self, call_site: str, model_name: str, user: str, prompt_key: str,
+               usage_metadata: Optional[Dict[str, Any]], latency_seconds: float, succeeded: bool):
+        input_tokens = int(usage_metadata.get("input_tokens", 0)) if usage_metadata else 0
+        output_tokens = int(usage_metadata.get("output_tokens", 0)) if usage_metadata else 0
+        now = time.time()
+        with self._lock:
+            key = (model_name, call_site, user)
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                # Past max_keys new users share one bucket per model and call site, so memory stays bounded
+                if len(self._rollups) >= self.max_keys:
+                    key = (model_name, call_site, OVERFLOW_USER)
+                rollup = self._rollups.setdefault(key, [0, 0, 0, 0, 0.0])
+            rollup[0] += 1
+            rollup[1] += not succeeded
+            rollup[2] += input_tokens
+            rollup[3] += output_tokens
+            rollup[4] += latency_seconds
+
+            call = {
+                "ts": round(now, 3), "model": model_name, "op": call_site, "user": user, "prompt": prompt_key,
+                "in": input_tokens, "out": output_tokens, "s": round(latency_seconds, 4), "ok": succeeded
+            }
+            self._calls_seen += 1
+            if len(self._sampled_calls) < self.max_calls:
+                self._sampled_calls.append(call)
+            else:
+                slot = self._rng.randrange(self._calls_seen)
+                if slot < self.max_calls:
+                    self._sampled_calls[slot] = call
+
+    def drain(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            window = {
+                "since": self._window_started, "until": now, "rollups": self._rollups,
+                "calls": self._sampled_calls, "seen": self._calls_seen
+            }
+            self._reset(now)
+        return window
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._rollups), "calls": self._calls_seen, "sampled": len(self._sampled_calls)}
+
+
+def _rollup_rows(window: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "ts": round(window["until"], 3), "window_s": round(window["until"] - window["since"], 3),
+            "model": model_name, "op": call_site, "user": user, "calls": rollup[0], "errors": rollup[1],
+            "in": rollup[2], "out": rollup[3], "s": round(rollup[4], 4)
+        }
+        for (model_name, call_site, user), rollup in window["rollups"].items()
+    ]
+
+
+def write_jsonl(path: str, window: Dict[str, Any]):
+    sample_weight = window["seen"] / max(1, len(window["calls"]))
+    with open(path, "a", encoding="utf-8") as usage_file:
+        for row in _rollup_rows(window):
+            usage_file.write(json.dumps({"kind": "rollup", **row}, separators=(",", ":")) + "\n")
+        for call in window["calls"]:
+            usage_file.write(json.dumps({"kind": "call", "weight": sample_weight, **call}, separators=(",", ":")) + "\n")
+
+
+def write_sqlite(path: str, window: Dict[str, Any]):
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rollups (ts REAL, window_s REAL, model TEXT, op TEXT, user TEXT, calls INTEGER, "
+            "errors INTEGER, input_tokens INTEGER, output_tokens INTEGER, seconds REAL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS calls (ts REAL, model TEXT, op TEXT, user TEXT, prompt TEXT, input_tokens INTEGER, "
+            "output_tokens INTEGER, seconds REAL, ok INTEGER, weight REAL)"
+        )
+        connection.executemany("INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (row["ts"], row["window_s"], row["model"], row["op"], row["user"], row["calls"], row["errors"],
+             row["in"], row["out"], row["s"])
+            for row in _rollup_rows(window)
+        ])
+        sample_weight = window["seen"] / max(1, len(window["calls"]))
+        connection.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (call["ts"], call["model"], call["op"], call["user"], call["prompt"], call["in"], call["out"], call["s"],
+             int(call["ok"]), sample_weight)
+            for call in window["calls"]
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class UsageFlusher:
+    """Writes one window of rollups every flush_seconds from a daemon thread; .db/.sqlite paths go to SQLite"""
+
+    def __init__(self, ledger: UsageLedger, path: str, flush_seconds: float):
+        self.ledger = ledger
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._write = write_sqlite if path.endswith((".db", ".sqlite")) else write_jsonl
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        window = self.ledger.drain()
+        if not window["rollups"]:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._write(self.path, window)
+        except Exception as e:
+            logger.error(f"Failed to flush LLM usage to {self.path}: {e}")
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_seconds):
+            self.flush()
+
+
+class UsageAccounting:
+    def __init__(self):
+        self.ledger: Optional[UsageLedger] = None
+        self._flusher: Optional[UsageFlusher] = None
+
+    def configure(self, path: str, flush_seconds: float, salt: str = "", max_keys: int = 5000, max_calls: int = 2000):
+        self.shutdown()
+        if not path:
+            return
+        self.ledger = UsageLedger(max_keys, max_calls, salt)
+        self._flusher = UsageFlusher(self.ledger, path, flush_seconds)
+
+    def shutdown(self):
+        if self._flusher:
+            self._flusher.close()
+            self._flusher = None
+        self.ledger = None
+
+    def set_user(self, user_id: Any):
+        """Attributes LLM calls made from the current task to this user; only a salted hash is kept"""
+        if self.ledger:
+            _current_user.set(self.ledger.hash_user(user_id))
+
+    def record(self, call_site: str, model_name: str, prompt_key: str, usage_metadata: Optional[Dict[str, Any]],
+               latency_seconds: float, succeeded: bool):
+        if usage_metadata:
+            LLM_INPUT_TOKENS.get(call_site).inc(int(usage_metadata.get("input_tokens", 0)))
+            LLM_OUTPUT_TOKENS.get(call_site).inc(int(usage_metadata.get("output_tokens", 0)))
+        if self.ledger:
+            self.ledger.record(
+                call_site, model_name, _current_user.get(), prompt_key, usage_metadata, latency_seconds, succeeded
+            )
+
+
+usage_accounting = UsageAccounting()
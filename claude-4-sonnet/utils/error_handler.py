@@ -3,6 +3,8 @@ from enum import Enum
 from typing import Optional
 from aiogram.types import Message
 
+from utils.metrics import metrics_registry
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,12 +17,19 @@ class ErrorType(Enum):
     EMPTY_MESSAGE = "empty_message"
     UNSUPPORTED_CONTENT = "unsupported_content"
     PROCESSING_ERROR = "processing_error"
+    BUSY = "busy"
+
+
+ERRORS_TOTAL = metrics_registry.counter(
+    "bot_errors_total", "User-facing errors by type", "error_type", [e.value for e in ErrorType]
+)
 
 
 async def handle_message_error(message: Message, error_type: ErrorType, context: Optional[str] = None):
     """Handle different types of message errors with appropriate responses"""
     user_id = message.from_user.id if message.from_user else "unknown"
     logger.warning(f"Error for user {user_id}: {error_type.value} - {context}")
+    ERRORS_TOTAL.get(error_type.value).inc()
     
     error_responses = {
         ErrorType.INVALID_DATE: _get_invalid_date_message(context),
@@ -30,7 +39,8 @@ async def handle_message_error(message: Message, error_type: ErrorType, context:
         ErrorType.MESSAGE_TOO_LONG: _get_message_too_long_message(),
         ErrorType.EMPTY_MESSAGE: _get_empty_message_message(),
         ErrorType.UNSUPPORTED_CONTENT: _get_unsupported_content_message(),
-        ErrorType.PROCESSING_ERROR: _get_processing_error_message()
+        ErrorType.PROCESSING_ERROR: _get_processing_error_message(),
+        ErrorType.BUSY: _get_busy_message()
     }
     
     response = error_responses.get(error_type, _get_generic_error_message())
@@ -97,6 +107,12 @@ An error occurred while processing your request. Please try again.
 If the problem persists, use /clear to reset and try with a different message format."""
 
 
+def _get_busy_message() -> str:
+    return """⏳ <b>I'm a bit busy right now</b>
+
+A lot of people are scheduling tasks at the moment. Please send your message again in a minute."""
+
+
 def _get_generic_error_message() -> str:
     return """❌ <b>Error</b>
 
@@ -1,32 +1,153 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records with the message rendered but not serialized; JSON encoding happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Per-logger probabilistic sampling and token-bucket rate limits for records below WARNING"""
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limits: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self.dropped_count = 0
+        self._random = random.Random()
+        self._per_logger: Dict[str, Tuple[float, Optional[List[float]]]] = {}
+
+    def _resolve(self, logger_name: str) -> Tuple[float, Optional[List[float]]]:
+        sample_rate = _match_longest_prefix(self.sample_rates, logger_name, 1.0)
+        rate_limit = _match_longest_prefix(self.rate_limits, logger_name, 0.0)
+        bucket = [rate_limit, rate_limit, time.monotonic()] if rate_limit > 0 else None
+        resolved = (sample_rate, bucket)
+        self._per_logger[logger_name] = resolved
+        return resolved
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        sample_rate, bucket = self._per_logger.get(record.name) or self._resolve(record.name)
+        if sample_rate < 1.0 and self._random.random() >= sample_rate:
+            self.dropped_count += 1
+            return False
+
+        if bucket is not None:
+            now = time.monotonic()
+            bucket[1] = min(bucket[0], bucket[1] + (now - bucket[2]) * bucket[0])
+            bucket[2] = now
+            if bucket[1] < 1:
+                self.dropped_count += 1
+                return False
+            bucket[1] -= 1
+
+        return True
+
+
+def _match_longest_prefix(table: Dict[str, float], logger_name: str, default: float) -> float:
+    best_match = None
+    for prefix in table:
+        if prefix == "" or logger_name == prefix or logger_name.startswith(prefix + "."):
+            if best_match is None or len(prefix) > len(best_match):
+                best_match = prefix
+    return table[best_match] if best_match is not None else default
+
+
+def parse_logger_table(spec: str) -> Dict[str, float]:
+    """Parses 'handlers=0.1,services.state_manager=0.5' into a logger-prefix table"""
+    table = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        table[name.strip()] = float(value)
+    return table
+
+
+def setup_logger(name: str, log_level: str = "INFO", log_file: Optional[str] = None,
+                 sample_rates: str = "", rate_limits: str = "",
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> logging.Logger:
+    global _queue_listener
 
-def setup_logger(name: str, log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     logger = logging.getLogger(name)
-    
-    if logger.handlers:
+    root_logger = logging.getLogger()
+
+    if _queue_listener is not None:
         return logger
-    
-    logger.setLevel(getattr(logging, log_level.upper()))
-    
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+
+    level = getattr(logging, log_level.upper())
+    formatter = JsonLineFormatter()
+
+    sinks: List[logging.Handler] = []
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
+    sinks.append(console_handler)
+
     if log_file:
         log_path = Path("logs") / log_file
         log_path.parent.mkdir(exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_path)
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
\ No newline at end of file
+        sinks.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_logger_table(sample_rates), parse_logger_table(rate_limits)))
+
+    _queue_listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=False)
+    _queue_listener.start()
+
+    root_logger.handlers.clear()
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(level)
+    logger.setLevel(level)
+
+    return logger
+
+
+def shutdown_logging():
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(shutdown_logging)
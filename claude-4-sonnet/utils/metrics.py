@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+GaugeValue = Union[float, Mapping[str, float]]
+
+
+class Counter:
+    """Monotonic counter; safe without locks because it is only touched from the event loop thread"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram with preallocated bucket counts"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    __slots__ = ("name", "help", "kind", "label", "children", "fallback")
+
+    def __init__(self, name: str, help_text: str, kind: str, label: Optional[str],
+                 values: Iterable[str], factory: Callable[[], Union[Counter, Histogram]]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label = label
+        self.children = {value: factory() for value in (values if label else ("",))}
+        self.fallback = self.children.setdefault("other", factory()) if label else self.children[""]
+
+    def get(self, value: str = ""):
+        return self.children.get(value, self.fallback)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: List[MetricFamily] = []
+        self._gauges: Dict[str, Tuple[str, Optional[str], Callable[[], GaugeValue]]] = {}
+
+    def counter(self, name: str, help_text: str, label: Optional[str] = None,
+                values: Iterable[str] = ()) -> MetricFamily:
+        family = MetricFamily(name, help_text, "counter", label, values, Counter)
+        self._families.append(family)
+        return family
+
+    def histogram(self, name: str, help_text: str, label: Optional[str] = None,
+                  values: Iterable[str] = (), bounds: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        family = MetricFamily(name, help_text, "histogram", label, values, lambda: Histogram(bounds))
+        self._families.append(family)
+        return family
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], GaugeValue], label: Optional[str] = None):
+        self._gauges[name] = (help_text, label, fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for value, child in family.children.items():
+                base = [(family.label, value)] if family.label else []
+                if isinstance(child, Counter):
+                    lines.append(f"{family.name}{_format_labels(base)} {child.value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(child.bounds + (float("inf"),), child.counts):
+                    cumulative += count
+                    lines.append(f"{family.name}_bucket{_format_labels(base + [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{family.name}_sum{_format_labels(base)} {_format_value(child.sum)}")
+                lines.append(f"{family.name}_count{_format_labels(base)} {child.count}")
+
+        for name, (help_text, label, fn) in self._gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if isinstance(value, Mapping):
+                for key, amount in value.items():
+                    lines.append(f"{name}{_format_labels([(label or 'key', str(key))])} {_format_value(amount)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+metrics_registry = MetricsRegistry()
+
+LLM_CALL_SECONDS = metrics_registry.histogram(
+    "llm_call_seconds", "Latency of LLM calls", "model_role", ("primary", "fallback", "clarification")
+)
+TELEGRAM_SEND_SECONDS = metrics_registry.histogram(
+    "telegram_send_seconds", "Latency of outgoing Telegram requests", "method",
+    ("sendMessage", "editMessageText", "answerCallbackQuery")
+)
+TELEGRAM_SEND_WAIT_SECONDS = metrics_registry.histogram(
+    "telegram_send_queue_wait_seconds", "Time outgoing requests spent queued before completion"
+)
+TELEGRAM_RETRY_AFTER = metrics_registry.counter(
+    "telegram_send_retry_after_total", "Outgoing requests rejected with retry_after"
+)
+LLM_HEDGED_REQUESTS = metrics_registry.counter(
+    "llm_hedged_requests_total", "Duplicate LLM requests sent after the hedge delay", "model_role",
+    ("primary", "fallback", "clarification")
+)
+LLM_HEDGE_WINS = metrics_registry.counter(
+    "llm_hedge_wins_total", "Hedged LLM requests that answered first", "model_role",
+    ("primary", "fallback", "clarification")
+)
+LLM_DEADLINE_EXCEEDED = metrics_registry.counter(
+    "llm_deadline_exceeded_total", "LLM calls abandoned at their deadline", "model_role",
+    ("primary", "fallback", "clarification")
+)
+LLM_CONCURRENCY_WAIT_SECONDS = metrics_registry.histogram(
+    "llm_concurrency_wait_seconds", "Time LLM calls waited for a free concurrency slot"
+)
+LLM_CIRCUIT_TRANSITIONS = metrics_registry.counter(
+    "llm_circuit_transitions_total", "Circuit breaker state changes across models", "transition",
+    ("closed->open", "open->half_open", "half_open->closed", "half_open->open")
+)
+LLM_CIRCUIT_SHORT_CIRCUITS = metrics_registry.counter(
+    "llm_circuit_short_circuits_total", "Requests sent straight to the fallback because the primary circuit was open"
+)
+CLARIFICATION_PATCH_OPERATIONS = metrics_registry.counter(
+    "clarification_patch_operations_total", "Clarification patch operations by what happened to them", "outcome",
+    ("applied", "rejected", "invalid_task")
+)
+LLM_ADMISSION_WAIT_SECONDS = metrics_registry.histogram(
+    "llm_admission_wait_seconds", "Time LLM jobs waited in the admission queue"
+)
+LLM_ADMISSION_SHED = metrics_registry.counter(
+    "llm_admission_shed_total", "LLM jobs turned away with a busy reply", "reason", ("queue_full", "slo", "timeout")
+)
+LLM_INPUT_TOKENS = metrics_registry.counter(
+    "llm_input_tokens_total", "Prompt tokens reported by the model", "model_role", ("primary", "fallback", "clarification")
+)
+LLM_OUTPUT_TOKENS = metrics_registry.counter(
+    "llm_output_tokens_total", "Completion tokens reported by the model", "model_role",
+    ("primary", "fallback", "clarification")
+)
+TASK_PARSE_CHUNKING = metrics_registry.counter(
+    "task_parse_chunking_total", "Task parsing requests by how the input was sent to the model", "mode",
+    ("single", "chunked", "fallback")
+)
+USER_STATES_REMOVED = metrics_registry.counter(
+    "bot_user_states_removed_total", "Conversation states dropped without a flush", "reason", ("expired", "evicted")
+)
+USER_STATE_LOADS = metrics_registry.counter(
+    "bot_user_state_loads_total", "Conversation states looked up in the persistent store", "result",
+    ("hit", "miss", "expired")
+)
+OCCURRENCE_CACHE_LOOKUPS = metrics_registry.counter(
+    "occurrence_cache_lookups_total", "Formatted occurrence list lookups in the per-minute memo", "result",
+    ("hit", "miss")
+)
+USER_STATE_WRITES = metrics_registry.counter(
+    "bot_user_state_writes_total", "Rows written to the persistent state store", "op", ("put", "delete")
+)
+CALLBACK_TOKENS = metrics_registry.counter(
+    "bot_callback_tokens_total", "Approve/Reject presses by token check result", "result",
+    ("ok", "malformed", "bad_signature", "expired", "missing", "replayed")
+)
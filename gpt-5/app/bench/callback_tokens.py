@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+BOT_TOKEN = "123456:CALLBACK-BENCH"
+TTL = 172800.0
+NAMES = ["Pay invoices", "Gym", "Call mom", "Send client report", "Water plants", "Review code", "Dentist", "Sprint planning", "Laundry", "Deploy release", "Renew the car insurance policy", "Standup"]
+KINDS = [("daily", 30), ("weekday", 20), ("weekly", 25), ("one_time", 15), ("every_n_days", 10)]
+DOWS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+# Fixed part of the tightest hand-packed task: kind/tag bits, dow mask, time, date, n_days, name length
+PACKED_TASK_BYTES = 8
+
+
+def _task(rng: random.Random, i: int) -> Dict[str, Any]:
+    kind = rng.choices([k for k, _ in KINDS], [w for _, w in KINDS])[0]
+    name = rng.choice(NAMES)
+    return {
+        "id": i, "raw": f"{name} at 09:00", "name": name, "tag": rng.choice(["work", "personal"]), "kind": kind,
+        "dow": sorted(rng.sample(DOWS, rng.randint(1, 3))) if kind == "weekly" else [],
+        "n_days": rng.randint(2, 10) if kind == "every_n_days" else None,
+        "date": "2026-11-02" if kind == "one_time" else None,
+        "time": rng.choice(["09:00", "08:30", "18:00", "12:15"]), "needs": [],
+    }
+
+
+def build_snapshots(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        tasks = [_task(rng, i) for i in range(1, rng.choice([1, 1, 2, 2, 3, 3, 4, 5, 8]) + 1)]
+        holidays = ["2026-12-25", "2027-01-01"] if rng.random() < 0.2 else []
+        out.append({"tasks": tasks, "holidays": holidays, "anchor": "2026-10-19"})
+    return out
+
+
+def _us(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - t0) / calls * 1e6, 2)
+
+
+def measure_tokens(calls: int) -> Dict[str, Any]:
+    from bot.telegram.callbacks import Signer, derive_key
+    signer = Signer(derive_key("", BOT_TOKEN), TTL)
+    digest = os.urandom(12)
+    chat = -1001234567890123
+    approve, reject = signer.pair(chat, digest)
+    now = time.time()
+    forged = approve[:-1] + ("A" if approve[-1] != "A" else "B")
+    return {
+        "token_chars": len(approve),
+        "token_bytes": len(approve.encode()),
+        "pair_us": _us(lambda: signer.pair(chat, digest), calls),
+        "verify_us": _us(lambda: signer.verify(chat, approve, now), calls),
+        "verify_forged_us": _us(lambda: signer.verify(chat, forged, now), calls),
+    }
+
+
+def measure_rejections(samples: int, seed: int) -> Dict[str, Any]:
+    """Every single-character change, a different chat, a different key and an expired token must all be refused"""
+    import base64
+    from bot.telegram.callbacks import PREFIX, Signer, derive_key
+    rng = random.Random(seed)
+    signer = Signer(derive_key("", BOT_TOKEN), TTL)
+    other = Signer(derive_key("another-secret", BOT_TOKEN), TTL)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    results: Counter = Counter()
+    tried = 0
+    now = time.time()
+    for _ in range(samples):
+        chat = rng.randint(1, 1 << 40)
+        token, _ = signer.pair(chat, os.urandom(12), now)
+        for pos in range(len(PREFIX), len(token)):
+            c = rng.choice(alphabet.replace(token[pos], ""))
+            tampered = token[:pos] + c + token[pos + 1:]
+            raw = base64.urlsafe_b64decode(tampered[2:] + "==")
+            if base64.urlsafe_b64encode(raw).rstrip(b"=").decode() != tampered[2:]:
+                # Only the padding bits of the last char changed; it decodes to the same bytes
+                continue
+            tried += 1
+            results[signer.verify(chat, tampered, now)[0]] += 1
+        results["chat:" + signer.verify(chat + 1, token, now)[0]] += 1
+        results["key:" + other.verify(chat, token, now)[0]] += 1
+        results["old:" + signer.verify(chat, token, now + TTL + 1)[0]] += 1
+    accepted = results["ok"] + results["chat:ok"] + results["key:ok"] + results["old:ok"]
+    return {"tampered": tried, "results": dict(results), "accepted": accepted}
+
+
+def measure_store(directory: str, snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from bot.telegram.callbacks import Claim, SnapshotStore, snapshot_body
+    store = SnapshotStore(os.path.join(directory, "store.db"), TTL)
+    t0 = time.perf_counter()
+    digests = [store.put(s) for s in snapshots]
+    put_us = (time.perf_counter() - t0) / len(snapshots) * 1e6
+    t0 = time.perf_counter()
+    for d in digests:
+        store.get(d)
+    get_us = (time.perf_counter() - t0) / len(digests) * 1e6
+    t0 = time.perf_counter()
+    for i in range(len(digests)):
+        store.consume(i, Claim(0, 1, i, digests[i]))
+    consume_us = (time.perf_counter() - t0) / len(digests) * 1e6
+    rows, used = store.count()
+    store.close()
+    sizes = [len(snapshot_body(s)[1]) for s in snapshots]
+    return {
+        "put_us": round(put_us, 1), "get_us": round(get_us, 1), "consume_us": round(consume_us, 1),
+        "rows": rows, "used": used, "body_bytes_mean": round(statistics.mean(sizes), 1),
+    }
+
+
+def measure_inline(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Would the batch fit in the token in place of the digest? 64 bytes less the prefix is 46 raw bytes after base64"""
+    import zlib
+    from bot.telegram.callbacks import DIGEST_BYTES, MAC_BYTES, _HEAD
+    budget = (64 - 2) * 3 // 4 - _HEAD.size - MAC_BYTES
+    packed = []
+    deflated = []
+    for s in snapshots:
+        # anchor as a day number, then each task's fixed fields and its name
+        packed.append(2 + sum(PACKED_TASK_BYTES + len(t["name"].encode()) for t in s["tasks"]) + 2 * len(s["holidays"]))
+        slim = [[t["kind"], t["tag"], t["dow"], t["n_days"], t["date"], t["time"], t["name"]] for t in s["tasks"]]
+        deflated.append(len(zlib.compress(json.dumps([slim, s["holidays"], s["anchor"]], separators=(",", ":")).encode(), 9)))
+    return {
+        "budget_bytes": budget,
+        "digest_bytes": DIGEST_BYTES,
+        "fit_packed": sum(n <= budget for n in packed) / len(packed),
+        "fit_deflated": sum(n <= budget for n in deflated) / len(deflated),
+        "packed_median": statistics.median(packed),
+        "deflated_median": statistics.median(deflated),
+    }
+
+
+def _worker(path: str, tokens: List[Tuple[int, int, str]], seed: int) -> Tuple[List[Tuple[int, str, int]], float]:
+    """A separate process with its own connection and signer, as another bot instance would have"""
+    from bot.llm.schemas import TaskBatch
+    from bot.telegram.callbacks import APPROVE, Signer, SnapshotStore, derive_key
+    from bot.telegram.templates import schedule_block
+    signer = Signer(derive_key("", BOT_TOKEN), TTL)
+    store = SnapshotStore(path, TTL)
+    rng = random.Random(seed)
+    order = tokens[:]
+    rng.shuffle(order)
+    now = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    out = []
+    for proposal, chat, data in order:
+        result, claim = signer.verify(chat, data, time.time())
+        rendered = 0
+        if claim is not None:
+            result, snap = store.redeem(chat, claim)
+            if result == "ok" and claim.action == APPROVE:
+                batch = TaskBatch.validate_python(snap["tasks"])
+                hset = {date.fromisoformat(d) for d in snap["holidays"]}
+                anchor = date.fromisoformat(snap["anchor"])
+                rendered = sum(bool(schedule_block(i + 1, t, now, hset, anchor)) for i, t in enumerate(batch))
+        out.append((proposal, result, rendered))
+    elapsed = time.perf_counter() - t0
+    store.close()
+    return out, elapsed
+
+
+def measure_workers(directory: str, snapshots: List[Dict[str, Any]], workers: int) -> Dict[str, Any]:
+    """Proposals issued by one instance, then every button pressed on every worker at once"""
+    from bot.telegram.callbacks import Signer, SnapshotStore, derive_key
+    path = os.path.join(directory, "shared.db")
+    issuer = SnapshotStore(path, TTL)
+    signer = Signer(derive_key("", BOT_TOKEN), TTL)
+    tokens = []
+    for i, s in enumerate(snapshots):
+        approve, reject = signer.pair(100000 + i, issuer.put(s))
+        tokens += [(i, 100000 + i, approve), (i, 100000 + i, reject)]
+    issuer.close()
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(_worker, [path] * workers, [tokens] * workers, range(workers)))
+    wins: Counter = Counter()
+    results: Counter = Counter()
+    rendered = 0
+    for part, _ in parts:
+        for proposal, result, n in part:
+            results[result] += 1
+            rendered += n
+            if result == "ok":
+                wins[proposal] += 1
+    return {
+        "workers": workers, "proposals": len(snapshots), "presses": len(tokens) * workers,
+        "results": dict(results), "answered_once": sum(1 for i in range(len(snapshots)) if wins[i] == 1),
+        "answered_twice": sum(1 for n in wins.values() if n > 1), "tasks_rendered": rendered,
+        "us_per_press": round(sum(s for _, s in parts) / (len(tokens) * workers) * 1e6, 1),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Signed approval callbacks: token size and cost, rejections, and approvals across worker processes")
+    p.add_argument("--snapshots", type=int, default=20000)
+    p.add_argument("--proposals", type=int, default=2000)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--calls", type=int, default=50000)
+    p.add_argument("--tamper-samples", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    snapshots = build_snapshots(args.snapshots, args.seed)
+    with tempfile.TemporaryDirectory() as d:
+        report = {
+            "tokens": measure_tokens(args.calls),
+            "rejections": measure_rejections(args.tamper_samples, args.seed),
+            "store": measure_store(d, snapshots),
+            "inline": measure_inline(snapshots),
+            "workers": measure_workers(d, snapshots[:args.proposals], args.workers),
+        }
+    t, r, s, i, w = report["tokens"], report["rejections"], report["store"], report["inline"], report["workers"]
+    print(f"token: {t['token_bytes']} bytes of callback_data, pair {t['pair_us']} us, verify {t['verify_us']} us (forged {t['verify_forged_us']} us)")
+    print(f"rejections: {r['tampered']} tampered tokens plus wrong chat/key/expired, {r['accepted']} accepted {r['results']}")
+    print(f"store: put {s['put_us']} us, get {s['get_us']} us, consume {s['consume_us']} us, {s['body_bytes_mean']} bytes per snapshot, {s['rows']} rows")
+    print(f"inline: {i['budget_bytes']} bytes free; {i['fit_packed']:.1%} of batches fit hand-packed, {i['fit_deflated']:.1%} deflated (medians {i['packed_median']} / {i['deflated_median']})")
+    print(f"workers: {w['workers']} processes, {w['presses']} presses on {w['proposals']} proposals -> {w['answered_once']} answered once, {w['answered_twice']} twice, {w['tasks_rendered']} tasks rendered, {w['us_per_press']} us/press {w['results']}")
+    print(json.dumps(report))
+    if r["accepted"] or w["answered_twice"] or w["answered_once"] != w["proposals"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+
+VERBS = ["Call", "Email", "Pay", "Review", "Book", "Buy", "Clean", "Fix", "Plan", "Visit"]
+NOUNS = ["plumber", "landlord", "insurance", "quarterly report", "dentist", "groceries", "garage", "bike", "trip", "grandma", "client deck", "tax forms"]
+DETAILS = [
+    "about the leaking pipe under the sink, ask for a quote for the replacement parts",
+    "to go over the open points from last week, bring the notes from the previous meeting",
+    "before the deadline, check the numbers twice so nothing bounces back",
+    "with the new schedule in mind, keep it short because the afternoon is packed",
+]
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+def message(n: int) -> str:
+    # a mix of list items and run-on sentences, like a pasted weekly plan
+    lines = []
+    for i in range(n):
+        task = f"{VERBS[i % len(VERBS)]} the {NOUNS[(i // len(VERBS)) % len(NOUNS)]} {DETAILS[i % len(DETAILS)]} tomorrow at {8 + i % 12:02d}:{(i * 7) % 60:02d}"
+        lines.append(f"- {task}" if i % 3 == 0 else f"{task}.")
+    out, para = [], []
+    for line in lines:
+        if line.startswith("- "):
+            if para:
+                out.append(" ".join(para))
+                para = []
+            out.append(line)
+        else:
+            para.append(line)
+    if para:
+        out.append(" ".join(para))
+    return "\n".join(out)
+
+
+async def _measure(text: str, n: int, args: argparse.Namespace) -> Dict[str, Any]:
+    from bot.llm.chain import extract_tasks
+    from bot.llm import chain
+    lat: List[float] = []
+    found = 0
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        res = await extract_tasks(text, [], None, datetime.now(timezone.utc), 24000)
+        lat.append(time.perf_counter() - t0)
+        found = len(res) if isinstance(res, list) else -1
+    chunks = chain.splitter().split(text)
+    return {"p50_ms": round(_percentile(lat, 0.5) * 1000), "p99_ms": round(_percentile(lat, 0.99) * 1000), "tasks": found, "chunks": len(chunks) if chunks else 1}
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from bot.llm import chain
+    from bot.llm.splitter import Splitter
+    rows = []
+    for n in [int(x) for x in args.tasks.split(",")]:
+        text = message(n)
+        chain._splitter = Splitter(0)
+        single = await _measure(text, n, args)
+        chain._splitter = Splitter(args.min_chars, args.target_chars, args.max_chunks)
+        chunked = await _measure(text, n, args)
+        rows.append({"tasks": n, "chars": len(text), "single": single, "chunked": chunked})
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="extract_tasks latency against task count, one call vs parallel chunks, on the synthetic model")
+    ap.add_argument("--tasks", default="1,5,10,20,30")
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--latency", default="lognormal:0.4,0.2", help="per-call overhead")
+    ap.add_argument("--token-seconds", type=float, default=0.005, help="decode time per output token")
+    ap.add_argument("--min-chars", type=int, default=800)
+    ap.add_argument("--target-chars", type=int, default=600)
+    ap.add_argument("--max-chunks", type=int, default=8)
+    a = ap.parse_args()
+    os.environ.update({
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": a.latency,
+        "LLM_SYNTHETIC_TOKEN_SECONDS": str(a.token_seconds),
+        "LLM_SYNTHETIC_ERROR_RATE": "0",
+        "LLM_HEDGE_QUANTILE": "0",
+        "LLM_ROUTES": "",
+        "LLM_DEADLINE_SECONDS": "300",
+    })
+    rows = asyncio.run(run(a))
+    print(f"{'tasks':>5} {'chars':>6} {'single p50':>11} {'chunked p50':>12} {'chunks':>7} {'speedup':>8} {'tasks s/c':>10}")
+    for r in rows:
+        s, c = r["single"], r["chunked"]
+        print(f"{r['tasks']:>5} {r['chars']:>6} {s['p50_ms']:>11} {c['p50_ms']:>12} {c['chunks']:>7} {s['p50_ms'] / max(1, c['p50_ms']):>8.2f} {str(s['tasks']) + '/' + str(c['tasks']):>10}")
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
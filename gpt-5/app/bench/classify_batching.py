@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+
+NAMES = ["Pay invoices", "Gym", "Call mom", "Send client report", "Water plants", "Review code", "Dentist", "Sprint planning", "Laundry", "Deploy release"]
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+def _batch(rng: random.Random, max_tasks: int) -> list:
+    from bot.llm.schemas import TaskExtract
+    out = []
+    for i in range(1, rng.randint(1, max_tasks) + 1):
+        name = rng.choice(NAMES)
+        out.append(TaskExtract(id=i, raw=f"{name} daily at 09:00", name=name, tag="unsure", kind="daily", dow=[], n_days=None, date=None, time="09:00", needs=[]))
+    return out
+
+
+async def _scenario(rate: float, window: float, args: argparse.Namespace) -> Dict[str, Any]:
+    from bot.llm.batching import ClassifyBatcher
+    from bot.llm.chain import aclassify_items, aclassify_tasks
+    from bot.llm.backend import usage
+
+    async def call(items: List[Dict[str, Any]]) -> Dict[int, str]:
+        await asyncio.sleep(args.per_item_ms / 1000 * len(items))
+        if rng.random() < args.batch_error_rate:
+            raise RuntimeError("batch failed")
+        return await aclassify_items(items)
+
+    async def single(batch: list) -> list:
+        await asyncio.sleep(args.per_item_ms / 1000 * len(batch))
+        return await aclassify_tasks(batch)
+
+    rng = random.Random(args.seed)
+    batcher = ClassifyBatcher(window, args.max_items, call, single)
+    latencies: List[float] = []
+    tagged = 0
+    total = 0
+
+    async def chat(batch: list) -> None:
+        nonlocal tagged, total
+        t0 = time.perf_counter()
+        out = await batcher.classify(batch)
+        latencies.append(time.perf_counter() - t0)
+        tagged += sum(1 for t in out if t.tag != "unsure")
+        total += len(out)
+
+    usage.reset()
+    tasks = []
+    t_end = time.perf_counter() + args.duration
+    while time.perf_counter() < t_end:
+        tasks.append(asyncio.create_task(chat(_batch(rng, args.max_tasks))))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    u = usage.snapshot()
+    return {
+        "rate_per_s": rate,
+        "window_ms": round(window * 1000),
+        "chats": len(tasks),
+        "llm_requests": u["calls"] + u["errors"],
+        "requests_per_chat": round((u["calls"] + u["errors"]) / len(tasks), 3),
+        "input_tokens": u["input_tokens"],
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "fallbacks": batcher.fallbacks,
+        "tagged_share": round(tagged / max(1, total), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    out = []
+    for rate in [float(x) for x in args.rates.split(",")]:
+        for window in [float(x) / 1000 for x in args.windows.split(",")]:
+            out.append(await _scenario(rate, window, args))
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="LLM request count and caller latency of classify_tasks with and without cross-chat batching")
+    p.add_argument("--rates", default="5,20,50,200", help="chat arrivals per second")
+    p.add_argument("--windows", default="0,25,50,100", help="batching windows in ms, 0 = one request per chat")
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--max-items", type=int, default=64)
+    p.add_argument("--max-tasks", type=int, default=5, help="tasks per chat, uniform 1..N")
+    p.add_argument("--latency", default="lognormal:0.4,0.3", help="synthetic per-request LLM latency")
+    p.add_argument("--per-item-ms", type=float, default=15.0, help="extra latency per classified item (output tokens)")
+    p.add_argument("--batch-error-rate", type=float, default=0.0, help="share of batched requests that fail and fall back")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    os.environ["LLM_BACKEND"] = "synthetic"
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_SEED"] = str(args.seed)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    rows = asyncio.run(run(args))
+    print(f"{'rate/s':>7} {'window':>7} {'chats':>6} {'llm_req':>8} {'req/chat':>9} {'p50ms':>8} {'p99ms':>8} {'fallback':>9}")
+    for r in rows:
+        print(f"{r['rate_per_s']:>7} {r['window_ms']:>7} {r['chats']:>6} {r['llm_requests']:>8} {r['requests_per_chat']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['fallbacks']:>9}")
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
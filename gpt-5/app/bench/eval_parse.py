@@ -0,0 +1,154 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+FIELDS = ("name", "tag", "kind", "dow", "n_days", "date", "time", "needs")
+CORPUS = Path(__file__).resolve().parent / "corpus" / "golden.jsonl"
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+def _same(field: str, want: Any, got: Any) -> bool:
+    if field == "name":
+        return str(want).strip().lower() == str(got or "").strip().lower()
+    if field in ("dow", "needs"):
+        return sorted(want or []) == sorted(got or [])
+    return want == got
+
+
+def _load(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def evaluate(corpus: List[Dict[str, Any]], max_tokens: int) -> Dict[str, Any]:
+    from bot.llm import backend
+    from bot.llm.chain import MODEL_NAME, aclassify_tasks, extract_tasks
+    from bot.llm.prompts import PROMPT_VERSION
+
+    hits = {f: 0 for f in FIELDS}
+    expected_tasks = 0
+    exact = 0
+    count_ok = 0
+    latencies: List[float] = []
+    per_case: List[Dict[str, Any]] = []
+    backend.usage.reset()
+    for case in corpus:
+        before = backend.usage.snapshot()
+        now = datetime.fromisoformat(case["now"])
+        t0 = time.perf_counter()
+        error = None
+        try:
+            res = await extract_tasks(case["input"], [], None, now, max_tokens)
+            got = [t.model_dump() for t in await aclassify_tasks(res)] if isinstance(res, list) else []
+            if not isinstance(res, list):
+                error = res
+        except Exception as e:
+            got, error = [], f"{type(e).__name__}: {e}"
+        latencies.append(time.perf_counter() - t0)
+        after = backend.usage.snapshot()
+        want = case["expected"]
+        expected_tasks += len(want)
+        ok = len(got) == len(want)
+        count_ok += ok
+        wrong = []
+        for i, w in enumerate(want):
+            g = got[i] if i < len(got) else {}
+            for f in FIELDS:
+                if f in w and _same(f, w[f], g.get(f)):
+                    hits[f] += 1
+                elif f in w:
+                    ok = False
+                    wrong.append({"task": i + 1, "field": f, "want": w[f], "got": g.get(f)})
+        exact += ok
+        per_case.append({
+            "id": case.get("id"),
+            "exact": ok,
+            "error": error,
+            "latency_ms": round(latencies[-1] * 1000, 1),
+            "input_tokens": after["input_tokens"] - before["input_tokens"],
+            "output_tokens": after["output_tokens"] - before["output_tokens"],
+            "mismatches": wrong[:5],
+        })
+    u = backend.usage.snapshot()
+    n = len(corpus)
+    return {
+        "prompt_version": PROMPT_VERSION,
+        "backend": os.getenv("LLM_BACKEND", "openai"),
+        "model": MODEL_NAME,
+        "routes": os.getenv("LLM_ROUTES", ""),
+        "inputs": n,
+        "exact_batch_rate": round(exact / n, 3),
+        "task_count_rate": round(count_ok / n, 3),
+        "field_accuracy": {f: round(hits[f] / expected_tasks, 3) for f in FIELDS},
+        "latency_ms": {
+            "mean": round(sum(latencies) / n * 1000, 1),
+            "p50": round(_percentile(latencies, 0.5) * 1000, 1),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+        },
+        "tokens": {
+            "input": u["input_tokens"],
+            "output": u["output_tokens"],
+            "per_input": round((u["input_tokens"] + u["output_tokens"]) / n, 1),
+        },
+        "llm_calls": u["calls"],
+        "llm_errors": u["errors"],
+        "cases": per_case,
+    }
+
+
+def _table(history: List[Dict[str, Any]]) -> str:
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for r in history:
+        latest[(r["prompt_version"], r["backend"], r["model"])] = r
+    rows = [f"{'version':<10} {'backend':<10} {'model':<14} {'exact':>6} {'count':>6} {'p50ms':>8} {'p95ms':>8} {'tok/in':>8}"]
+    for (v, b, m), r in sorted(latest.items()):
+        rows.append(f"{v:<10} {b:<10} {m:<14} {r['exact_batch_rate']:>6} {r['task_count_rate']:>6} {r['latency_ms']['p50']:>8} {r['latency_ms']['p95']:>8} {r['tokens']['per_input']:>8}")
+    return "\n".join(rows)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Offline accuracy/latency/token evaluation of the extraction pipeline")
+    p.add_argument("--corpus", default=str(CORPUS))
+    p.add_argument("--backend", choices=["synthetic", "replay", "record", "openai"], default=os.getenv("LLM_BACKEND", "synthetic"))
+    p.add_argument("--cassette", default=os.getenv("LLM_CASSETTE", "cassettes/llm.jsonl"))
+    p.add_argument("--latency", default=os.getenv("LLM_SYNTHETIC_LATENCY", "none"))
+    p.add_argument("--error-rate", default=os.getenv("LLM_SYNTHETIC_ERROR_RATE", "0"))
+    p.add_argument("--max-tokens", type=int, default=24000)
+    p.add_argument("--routes", default=os.getenv("LLM_ROUTES", ""), help="extraction routes, e.g. mini=gpt-4o-mini:1.5,full=gpt-4o:4")
+    p.add_argument("--route-log", default="", help="write routing decisions to this JSON-lines file for infra.route_report")
+    p.add_argument("--history", default="", help="append the summary to this JSONL file and print a per-version table")
+    p.add_argument("--cases", action="store_true", help="include per-case results")
+    args = p.parse_args()
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["LLM_CASSETTE"] = args.cassette
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_ERROR_RATE"] = args.error_rate
+    os.environ["LLM_ROUTES"] = args.routes
+    if args.route_log:
+        from bot.logging import configure_logging
+        configure_logging("INFO", "=0,app.llm.route=1", log_file=args.route_log, console=False)
+    report = asyncio.run(evaluate(_load(args.corpus), args.max_tokens))
+    cases = report.pop("cases")
+    if args.cases:
+        report["cases"] = cases
+    print(json.dumps(report, indent=2))
+    if args.history:
+        os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        print(_table(_load(args.history)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+
+TEXT = "Pay invoices tomorrow at 09:00, gym every Monday and Wednesday at 18:00"
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+async def _scenario(name: str, env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    from bot.llm import chain
+
+    os.environ.update(env)
+    chain._models.clear()
+    chain._hedgers.clear()
+    now = datetime.now(timezone.utc)
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failed = 0
+
+    async def one() -> None:
+        nonlocal failed
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                res = await chain.extract_tasks(TEXT, [], None, now, 24000)
+                failed += not isinstance(res, list)
+            except Exception:
+                failed += 1
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*[one() for _ in range(args.warmup)])
+    latencies.clear()
+    failed = 0
+    h = chain.hedger("extract_tasks")
+    h.hedges = h.hedge_wins = h.deadlines = 0
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(args.requests)])
+    wall = time.perf_counter() - t0
+    h = chain.hedger("extract_tasks").snapshot()
+    return {
+        "scenario": name,
+        "requests": args.requests,
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+        "p999_ms": round(_percentile(latencies, 0.999) * 1000),
+        "max_ms": round(max(latencies) * 1000),
+        "failed": failed,
+        "hedges": h["hedges"],
+        "hedge_wins": h["hedge_wins"],
+        "extra_load": round(h["hedges"] / args.requests, 3),
+        "deadlines": h["deadlines"],
+        "wall_s": round(wall, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    base = {"LLM_DEADLINE_SECONDS": str(args.deadline), "LLM_HEDGE_MIN_DELAY": str(args.min_delay), "LLM_HEDGE_MODEL": ""}
+    scenarios = [("no-hedge", {**base, "LLM_HEDGE_QUANTILE": "0"})]
+    for q in [float(x) for x in args.quantiles.split(",")]:
+        scenarios.append((f"hedge-p{round(q * 100)}", {**base, "LLM_HEDGE_QUANTILE": str(q)}))
+    if args.hedge_model:
+        q = args.quantiles.split(",")[0]
+        scenarios.append((f"hedge-p{round(float(q) * 100)}-{args.hedge_model}", {**base, "LLM_HEDGE_QUANTILE": q, "LLM_HEDGE_MODEL": args.hedge_model}))
+    return [await _scenario(name, env, args) for name, env in scenarios]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Tail latency of extract_tasks with and without hedged LLM requests under a heavy-tailed synthetic latency model")
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--warmup", type=int, default=100, help="unmeasured requests that fill the latency window first")
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--latency", default="tail:0.8,0.3,0.01,30", help="median,sigma,tail share,tail floor in seconds")
+    p.add_argument("--quantiles", default="0.9,0.95,0.99")
+    p.add_argument("--min-delay", type=float, default=0.5)
+    p.add_argument("--deadline", type=float, default=60.0)
+    p.add_argument("--hedge-model", default="gpt-4o", help="extra scenario hedging to this model, empty to skip")
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    os.environ["LLM_BACKEND"] = "synthetic"
+    os.environ["LLM_SYNTHETIC_LATENCY"] = args.latency
+    os.environ["LLM_SYNTHETIC_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LLM_SYNTHETIC_SEED"] = str(args.seed)
+    os.environ["LLM_ROUTES"] = ""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    rows = asyncio.run(run(args))
+    print(f"{'scenario':<20} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'p999ms':>7} {'maxms':>7} {'failed':>7} {'hedges':>7} {'wins':>6} {'extra':>6} {'deadl':>6}")
+    for r in rows:
+        print(f"{r['scenario']:<20} {r['p50_ms']:>7} {r['p95_ms']:>7} {r['p99_ms']:>7} {r['p999_ms']:>7} {r['max_ms']:>7} {r['failed']:>7} {r['hedges']:>7} {r['hedge_wins']:>6} {r['extra_load']:>6} {r['deadlines']:>6}")
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import resource
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from .fake_telegram import FakeTelegram
+
+
+PLAN = [
+    "Pay invoices every weekday at 09:00",
+    "Gym every Monday and Wednesday at 19:00, call mom daily at 20:30",
+    "Dentist tomorrow at 14:00 and send client report on 2030-03-02 at 10:00",
+    "Water plants every 3 days at 07:30 starting 2030-01-01",
+    "Standup every weekday at 09:30, review code every Friday at 16:00, run every Sunday at 08:00",
+]
+VAGUE = ["Call the dentist tomorrow", "Buy groceries every Saturday", "Sprint planning every Monday"]
+HOLIDAYS = json.dumps({"version": 1, "dates": [{"date": "2030-12-25", "name": "Christmas"}, {"date": "2031-01-01"}]}).encode()
+ERROR_RE = re.compile(r"^(❌|[A-Z_]{6,}$|I couldn't)")
+STAGES = ("document", "task_input", "clarification", "approve", "reject", "clear")
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+def _mix(spec: str) -> Dict[str, float]:
+    out = {}
+    for part in spec.split(","):
+        k, _, v = part.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def _button(msg: Dict[str, Any], label: str) -> Optional[str]:
+    for row in (msg.get("reply_markup") or {}).get("inline_keyboard", []):
+        for b in row:
+            if label in b.get("text", "") and b.get("callback_data"):
+                return b["callback_data"]
+    return None
+
+
+def _rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Driver:
+    def __init__(self, fake: FakeTelegram, timeout: float, rng: random.Random) -> None:
+        self.fake = fake
+        self.timeout = timeout
+        self.rng = rng
+        self.inbox: Dict[int, asyncio.Queue] = {}
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.updates = 0
+        self.replies = 0
+        fake.observer = self._observe
+
+    def _observe(self, method: str, chat_id: int, msg: Dict[str, Any]) -> None:
+        self.replies += 1
+        q = self.inbox.get(chat_id)
+        if q is not None:
+            q.put_nowait((time.perf_counter(), method, msg))
+
+    def _user(self, uid: int) -> Dict[str, Any]:
+        return {"id": uid, "is_bot": False, "first_name": f"user{uid}"}
+
+    def _message(self, uid: int, **kw: Any) -> Dict[str, Any]:
+        return {"message_id": self.fake.next_message_id(), "date": int(time.time()), "chat": {"id": uid, "type": "private"}, "from": self._user(uid), **kw}
+
+    def text(self, uid: int, text: str) -> Dict[str, Any]:
+        return {"message": self._message(uid, text=text)}
+
+    def document(self, uid: int) -> Dict[str, Any]:
+        fid = f"holidays-{uid}"
+        self.fake.add_file(fid, HOLIDAYS)
+        doc = {"file_id": fid, "file_unique_id": fid, "file_name": "holidays.json", "mime_type": "application/json", "file_size": len(HOLIDAYS)}
+        return {"message": self._message(uid, document=doc)}
+
+    def callback(self, uid: int, data: str, msg: Dict[str, Any]) -> Dict[str, Any]:
+        return {"callback_query": {"id": str(self.fake.next_message_id()), "from": self._user(uid), "chat_instance": str(uid), "data": data, "message": msg}}
+
+    async def step(self, uid: int, stage: str, update: Dict[str, Any], edit: bool = False, check: bool = True) -> Optional[Dict[str, Any]]:
+        q = self.inbox[uid]
+        while not q.empty():
+            q.get_nowait()
+        t0 = time.perf_counter()
+        self.fake.push_update(update)
+        self.updates += 1
+        deadline = t0 + self.timeout
+        while True:
+            left = deadline - time.perf_counter()
+            try:
+                ts, method, msg = await asyncio.wait_for(q.get(), max(left, 0.001))
+            except asyncio.TimeoutError:
+                self.timeouts[stage] += 1
+                return None
+            if method == "sendmessage" or edit:
+                self.latency[stage].append(ts - t0)
+                if check and ERROR_RE.match(msg.get("text", "")):
+                    self.errors[stage] += 1
+                    return None
+                return msg
+
+    async def conversation(self, uid: int, kind: str) -> str:
+        if kind == "holidays" and await self.step(uid, "document", self.document(uid)) is None:
+            return "failed"
+        text = self.rng.choice(VAGUE if kind == "clarify" else PLAN)
+        reply = await self.step(uid, "task_input", self.text(uid, text))
+        if reply is not None and kind == "clarify" and _button(reply, "Approve") is None:
+            reply = await self.step(uid, "clarification", self.text(uid, f"{text} at 18:30"))
+        if reply is None:
+            await self.step(uid, "clear", self.text(uid, "/clear"))
+            return "failed"
+        if _button(reply, "Approve") is None:
+            await self.step(uid, "clear", self.text(uid, "/clear"))
+            return "unresolved"
+        if kind == "reject":
+            done = await self.step(uid, "reject", self.callback(uid, _button(reply, "Reject"), reply), edit=True, check=False)
+        else:
+            done = await self.step(uid, "approve", self.callback(uid, _button(reply, "Approve"), reply))
+        return "completed" if done is not None else "failed"
+
+    async def user(self, uid: int, conversations: int, ramp: float, think: float, mix: Dict[str, float]) -> None:
+        self.inbox[uid] = asyncio.Queue()
+        await asyncio.sleep(self.rng.uniform(0, ramp))
+        kinds, weights = list(mix), list(mix.values())
+        for _ in range(conversations):
+            kind = self.rng.choices(kinds, weights)[0]
+            self.outcomes[await self.conversation(uid, kind)] += 1
+            if think > 0:
+                await asyncio.sleep(self.rng.expovariate(1.0 / think))
+
+    def stages(self) -> Dict[str, Any]:
+        out = {}
+        for s in STAGES:
+            xs = sorted(self.latency[s])
+            n = len(xs) + self.timeouts[s]
+            if not n:
+                continue
+            out[s] = {
+                "count": n,
+                "p50_ms": round(_percentile(xs, 0.5) * 1000, 1),
+                "p90_ms": round(_percentile(xs, 0.9) * 1000, 1),
+                "p99_ms": round(_percentile(xs, 0.99) * 1000, 1),
+                "max_ms": round(xs[-1] * 1000, 1) if xs else 0.0,
+                "errors": self.errors[s],
+                "timeouts": self.timeouts[s],
+                "error_rate": round((self.errors[s] + self.timeouts[s]) / n, 4),
+            }
+        return out
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fake = FakeTelegram(chat_limit=args.chat_limit, global_limit=args.global_limit, error_rate=args.error_rate, seed=args.seed)
+    base = await fake.start()
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "123456:LOADTEST",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-load-test"),
+        "TELEGRAM_API_BASE": base,
+        "LLM_BACKEND": "synthetic",
+        "LLM_SYNTHETIC_LATENCY": args.llm_latency,
+        "LLM_SYNTHETIC_ERROR_RATE": str(args.llm_error_rate),
+        "LLM_SYNTHETIC_SEED": str(args.seed),
+        "SEND_GLOBAL_RATE": str(args.send_global_rate),
+        "SEND_CHAT_RATE": str(args.send_chat_rate),
+        "SEND_CHAT_BURST": str(args.send_chat_burst),
+        "METRICS_PORT": "0",
+        "CALLBACK_DB": os.getenv("CALLBACK_DB", ":memory:"),
+    })
+    from bot.settings import load_settings
+    from bot.main import build_bot, build_dispatcher
+    from bot.llm.chain import warm_up
+    from bot.llm.backend import usage
+    settings = load_settings()
+    bot, scheduler = build_bot(settings)
+    dp = build_dispatcher(settings)
+    await warm_up()
+    usage.reset()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+    await fake.polling.wait()
+    rss_before = _rss_mb()
+    driver = Driver(fake, args.timeout, random.Random(args.seed))
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*[driver.user(100000 + u, args.conversations, args.ramp, args.think, _mix(args.mix)) for u in range(args.users)])
+    finally:
+        elapsed = time.perf_counter() - t0
+        await dp.stop_polling()
+        await polling
+        await fake.stop()
+    done = sum(driver.outcomes.values())
+    failures = sum(driver.errors.values()) + sum(driver.timeouts.values())
+    return {
+        "bot": "gpt-5",
+        "users": args.users,
+        "conversations": dict(driver.outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "conversations_per_s": round(done / elapsed, 2),
+            "updates_per_s": round(driver.updates / elapsed, 2),
+            "replies_per_s": round(driver.replies / elapsed, 2),
+        },
+        "stages": driver.stages(),
+        "error_rate": round(failures / driver.updates, 4) if driver.updates else 0.0,
+        "rss_mb": {"before": rss_before, "peak": _rss_mb()},
+        "llm": usage.snapshot(),
+        "scheduler": scheduler.snapshot(),
+        "server": fake.stats(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="End-to-end load test: scripted users against the real Dispatcher through a fake Telegram Bot API")
+    p.add_argument("--users", type=int, default=500)
+    p.add_argument("--conversations", type=int, default=2, help="conversations per user")
+    p.add_argument("--ramp", type=float, default=30.0, help="users start uniformly within this many seconds")
+    p.add_argument("--think", type=float, default=2.0, help="mean pause between a user's conversations")
+    p.add_argument("--mix", default="plan=0.5,clarify=0.2,holidays=0.15,reject=0.15")
+    p.add_argument("--timeout", type=float, default=60.0, help="per-step reply timeout")
+    p.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    p.add_argument("--llm-error-rate", type=float, default=0.0)
+    p.add_argument("--send-global-rate", type=float, default=30.0)
+    p.add_argument("--send-chat-rate", type=float, default=1.0)
+    p.add_argument("--send-chat-burst", type=int, default=3)
+    p.add_argument("--chat-limit", type=int, default=3, help="fake server per-chat sends per second before 429")
+    p.add_argument("--global-limit", type=int, default=30, help="fake server global sends per second before 429")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fake server random 429 rate")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default="", help="also write the JSON report to this file")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from bot.logging import Body, configure_logging, shutdown_logging
+
+
+TEXT = "Pay invoices every weekday at 09:00 and gym on Mon and Wed at 19:00 " * 4
+
+
+def _percentile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def _before(path: str, updates: int) -> list:
+    log = logging.getLogger("bench.before")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    handler = logging.StreamHandler(open(path, "w", encoding="utf-8"))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    log.addHandler(handler)
+    samples = []
+    for i in range(updates):
+        t0 = time.perf_counter()
+        log.info(f"Message from user {i} (user{i}): {TEXT}")
+        log.info(f"Updated state for user {i}: {{'state': 'processing', 'original_message': {TEXT!r}}}")
+        log.info(f"Update id={i} is handled. Duration 12 ms")
+        samples.append(time.perf_counter() - t0)
+    handler.close()
+    log.removeHandler(handler)
+    return samples
+
+
+def _after(path: str, updates: int, sampling: str, rate_limits: str) -> list:
+    configure_logging("INFO", sampling, rate_limits, path, console=False)
+    log = logging.getLogger("app.telegram")
+    state_log = logging.getLogger("app.state")
+    event_log = logging.getLogger("aiogram.event")
+    samples = []
+    for i in range(updates):
+        t0 = time.perf_counter()
+        log.info("message user=%s body=%s", i, Body(TEXT))
+        state_log.debug("state user=%s keys=%s", i, ("state", "original_message"))
+        event_log.info("Update id=%s is handled. Duration %d ms", i, 12)
+        samples.append(time.perf_counter() - t0)
+    shutdown_logging()
+    return samples
+
+
+def _summary(samples: list) -> dict:
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 2),
+        "p50_us": round(_percentile(samples, 0.5) * 1e6, 2),
+        "p99_us": round(_percentile(samples, 0.99) * 1e6, 2),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--updates", type=int, default=20000)
+    p.add_argument("--sampling", default="aiogram.event=0.1")
+    p.add_argument("--rate-limits", default="app=1000")
+    args = p.parse_args()
+    with tempfile.TemporaryDirectory() as d:
+        before = _before(os.path.join(d, "before.log"), args.updates)
+        after = _after(os.path.join(d, "after.log"), args.updates, args.sampling, args.rate_limits)
+        size_before = os.path.getsize(os.path.join(d, "before.log"))
+        size_after = os.path.getsize(os.path.join(d, "after.log"))
+    print(json.dumps({
+        "updates": args.updates,
+        "before": {**_summary(before), "bytes": size_before},
+        "after": {**_summary(after), "bytes": size_after, "sampling": args.sampling, "rate_limits": args.rate_limits},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
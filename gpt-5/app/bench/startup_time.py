@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _rows(stderr: str) -> list:
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        out.append((name.strip(), int(self_us), int(cum_us), depth))
+    return out
+
+
+def _run(entry: str) -> tuple:
+    env = {**os.environ, "TELEGRAM_BOT_TOKEN": "1:startup", "OPENAI_API_KEY": "sk-startup", "PYTHONWARNINGS": "ignore"}
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {entry}"], cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr[-2000:])
+    return wall, _rows(p.stderr)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--entry", default="bot.main")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--budget-ms", type=float, default=0.0)
+    p.add_argument("--top", type=int, default=10)
+    args = p.parse_args()
+    walls, totals, rows = [], [], []
+    for _ in range(args.runs):
+        wall, rows = _run(args.entry)
+        walls.append(wall)
+        totals.append(next(c for n, _, c, d in rows if n == args.entry and d == 0))
+    top = sorted((r for r in rows if r[3] <= 1), key=lambda r: r[2], reverse=True)[: args.top]
+    ms = statistics.median(totals) / 1000
+    print(json.dumps({
+        "entry": args.entry,
+        "runs": args.runs,
+        "import_ms_median": round(ms, 1),
+        "process_wall_ms_median": round(statistics.median(walls) * 1000, 1),
+        "langchain_imported": any(n.startswith(("langchain", "openai")) for n, _, _, _ in rows),
+        "slowest_imports": [{"module": n, "cumulative_ms": round(c / 1000, 1)} for n, _, c, _ in top],
+        "budget_ms": args.budget_ms or None,
+        "within_budget": ms <= args.budget_ms if args.budget_ms else None,
+    }, indent=2))
+    if args.budget_ms and ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import json
+import re
+import time
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+from bot.llm.chain import _extract_json_array, _validate_batch
+
+
+class LegacyTaskExtract(BaseModel):
+    id: int
+    raw: str
+    name: str = Field(min_length=1, max_length=80)
+    tag: Literal["work", "personal", "unsure"]
+    kind: Literal["one_time", "daily", "weekday", "weekly", "every_n_days"]
+    dow: List[str] = []
+    n_days: Optional[int] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    needs: List[str] = []
+
+    @field_validator("dow")
+    def validate_dow(cls, v):
+        for d in v:
+            if d not in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
+                raise ValueError("invalid day")
+        return v
+
+    @field_validator("n_days")
+    def validate_n_days(cls, v):
+        if v is not None and v < 2:
+            raise ValueError("n_days must be >= 2")
+        return v
+
+    @field_validator("date")
+    def validate_date(cls, v):
+        if v is not None and not re.fullmatch(r"\d{4}-\d{2}-\d{2}", v):
+            raise ValueError("invalid date")
+        return v
+
+    @field_validator("time")
+    def validate_time(cls, v):
+        if v is None:
+            return v
+        if not re.fullmatch(r"\d{2}:\d{2}", v):
+            raise ValueError("invalid time")
+        hh, mm = v.split(":")
+        if not (0 <= int(hh) <= 23 and 0 <= int(mm) <= 59):
+            raise ValueError("invalid time range")
+        return v
+
+    @field_validator("needs")
+    def validate_needs(cls, v):
+        for n in v:
+            if n not in ["time", "tag", "unsupported", "anchor"]:
+                raise ValueError("invalid need")
+        return v
+
+
+LegacyBatch = TypeAdapter(list[LegacyTaskExtract])
+
+
+def _task(i: int) -> dict:
+    kinds = ["one_time", "daily", "weekday", "weekly", "every_n_days"]
+    k = kinds[i % 5]
+    return {
+        "id": i + 1,
+        "raw": f"task {i} every so often at 09:{i % 60:02d}",
+        "name": f"Task {i}",
+        "tag": ["work", "personal", "unsure"][i % 3],
+        "kind": k,
+        "dow": ["Mon", "Wed", "Fri"] if k == "weekly" else [],
+        "n_days": 3 if k == "every_n_days" else None,
+        "date": "2025-09-01" if k in ("one_time", "every_n_days") else None,
+        "time": f"09:{i % 60:02d}",
+        "needs": ["tag"] if i % 3 == 2 else [],
+    }
+
+
+def _response(n: int, fenced: bool) -> str:
+    body = json.dumps([_task(i) for i in range(n)])
+    return "Here you go:\n```json\n" + body + "\n```" if fenced else body
+
+
+def _legacy(content: str):
+    batch = LegacyBatch.validate_python(json.loads(_extract_json_array(content)))
+    return [LegacyTaskExtract(**{**t.model_dump(), "tag": "work"}) for t in batch]
+
+
+def _current(content: str):
+    batch = _validate_batch(content)
+    return [t if t.tag == "work" else t.model_copy(update={"tag": "work"}) for t in batch]
+
+
+def _time(fn, content: str, iterations: int) -> float:
+    fn(content)
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(content)
+    return (time.perf_counter() - t0) / iterations
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", default="1,10,100")
+    p.add_argument("--budget", type=float, default=1.0, help="seconds per measurement")
+    args = p.parse_args()
+    out = []
+    for n, fenced in [(int(x), f) for x in args.sizes.split(",") for f in (False, True)]:
+        content = _response(n, fenced)
+        iterations = max(10, int(args.budget / max(_time(_legacy, content, 3), 1e-6)))
+        before = _time(_legacy, content, iterations)
+        after = _time(_current, content, iterations)
+        out.append({
+            "tasks": n,
+            "fenced": fenced,
+            "iterations": iterations,
+            "before_us": round(before * 1e6, 1),
+            "after_us": round(after * 1e6, 1),
+            "speedup": round(before / after, 2),
+        })
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from ..metrics import LLM_INPUT_TOKENS, LLM_OUTPUT_TOKENS
+
+SHARED = "-"
+OTHER = "other"
+
+log = logging.getLogger("app.llm.usage")
+
+_user: ContextVar[str] = ContextVar("llm_user", default=SHARED)
+_ledger: Optional["Ledger"] = None
+_flusher: Optional["Flusher"] = None
+
+
+def user_hash(user_id: Any) -> str:
+    return hashlib.sha256(f"{os.getenv('USAGE_SALT', '')}:{user_id}".encode()).hexdigest()[:12]
+
+
+def set_user(user_id: Any) -> None:
+    _user.set(user_hash(user_id))
+
+
+class Ledger:
+    def __init__(self, max_keys: int = 5000, max_calls: int = 2000) -> None:
+        self.max_keys = max_keys
+        self.max_calls = max_calls
+        self._lock = threading.Lock()
+        self._rnd = random.Random()
+        self._reset(time.time())
+
+    def _reset(self, now: float) -> None:
+        self._since = now
+        self._rollups: Dict[Tuple[str, str, str], List[float]] = {}
+        self._calls: List[Dict[str, Any]] = []
+        self._seen = 0
+
+    def record(self, op: str, model: str, user: str, prompt: str, usage: Optional[Dict[str, Any]], seconds: float, ok: bool) -> None:
+        tin = int(usage.get("input_tokens", 0)) if usage else 0
+        tout = int(usage.get("output_tokens", 0)) if usage else 0
+        now = time.time()
+        with self._lock:
+            key = (model, op, user)
+            r = self._rollups.get(key)
+            if r is None:
+                if len(self._rollups) >= self.max_keys:
+                    key = (model, op, OTHER)
+                r = self._rollups.setdefault(key, [0, 0, 0, 0, 0.0])
+            r[0] += 1
+            r[1] += not ok
+            r[2] += tin
+            r[3] += tout
+            r[4] += seconds
+            rec = {"ts": round(now, 3), "model": model, "op": op, "user": user, "prompt": prompt, "in": tin, "out": tout, "s": round(seconds, 4), "ok": ok}
+            self._seen += 1
+            if len(self._calls) < self.max_calls:
+                self._calls.append(rec)
+            else:
+                i = self._rnd.randrange(self._seen)
+                if i < self.max_calls:
+                    self._calls[i] = rec
+
+    def drain(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            out = {"since": self._since, "until": now, "rollups": self._rollups, "calls": self._calls, "seen": self._seen}
+            self._reset(now)
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._rollups), "calls": self._seen, "sampled": len(self._calls)}
+
+
+def _rollup_rows(d: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"ts": round(d["until"], 3), "window_s": round(d["until"] - d["since"], 3), "model": m, "op": op, "user": u,
+         "calls": r[0], "errors": r[1], "in": r[2], "out": r[3], "s": round(r[4], 4)}
+        for (m, op, u), r in d["rollups"].items()
+    ]
+
+
+def write_jsonl(path: str, d: Dict[str, Any]) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        for row in _rollup_rows(d):
+            f.write(json.dumps({"kind": "rollup", **row}, separators=(",", ":")) + "\n")
+        for rec in d["calls"]:
+            f.write(json.dumps({"kind": "call", "weight": d["seen"] / max(1, len(d["calls"])), **rec}, separators=(",", ":")) + "\n")
+
+
+def write_sqlite(path: str, d: Dict[str, Any]) -> None:
+    db = sqlite3.connect(path)
+    try:
+        db.execute("create table if not exists rollups (ts real, window_s real, model text, op text, user text, calls int, errors int, input_tokens int, output_tokens int, seconds real)")
+        db.execute("create table if not exists calls (ts real, model text, op text, user text, prompt text, input_tokens int, output_tokens int, seconds real, ok int, weight real)")
+        db.executemany("insert into rollups values (?,?,?,?,?,?,?,?,?,?)", [
+            (r["ts"], r["window_s"], r["model"], r["op"], r["user"], r["calls"], r["errors"], r["in"], r["out"], r["s"]) for r in _rollup_rows(d)
+        ])
+        w = d["seen"] / max(1, len(d["calls"]))
+        db.executemany("insert into calls values (?,?,?,?,?,?,?,?,?,?)", [
+            (c["ts"], c["model"], c["op"], c["user"], c["prompt"], c["in"], c["out"], c["s"], int(c["ok"]), w) for c in d["calls"]
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+class Flusher:
+    def __init__(self, ledger: Ledger, path: str, interval: float) -> None:
+        self.ledger = ledger
+        self.path = path
+        self.interval = interval
+        self._write = write_sqlite if path.endswith((".db", ".sqlite")) else write_jsonl
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._thread.start()
+
+    def flush(self) -> None:
+        d = self.ledger.drain()
+        if not d["rollups"]:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._write(self.path, d)
+        except Exception as e:
+            # the window is dropped, but the thread must live on to drain the next one
+            log.warning("usage window not written to %s: %s", self.path, e)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+def record(op: str, model: str, prompt: str, usage: Optional[Dict[str, Any]], seconds: float, ok: bool) -> None:
+    if usage:
+        LLM_INPUT_TOKENS.get(op).inc(int(usage.get("input_tokens", 0)))
+        LLM_OUTPUT_TOKENS.get(op).inc(int(usage.get("output_tokens", 0)))
+    if _ledger is not None:
+        _ledger.record(op, model, _user.get(), prompt, usage, seconds, ok)
+
+
+def configure_usage(path: str, interval: float, max_keys: int = 5000, max_calls: int = 2000) -> None:
+    global _ledger, _flusher
+    shutdown_usage()
+    if not path:
+        return
+    _ledger = Ledger(max_keys, max_calls)
+    _flusher = Flusher(_ledger, path, interval)
+
+
+def shutdown_usage() -> None:
+    global _ledger, _flusher
+    if _flusher is not None:
+        _flusher.close()
+        _flusher = None
+    _ledger = None
+
+
+atexit.register(shutdown_usage)
@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+Responder = Callable[[List[Any], Optional[type]], str]
+
+
+class SyntheticLLMError(RuntimeError):
+    pass
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+class Reply:
+    __slots__ = ("content", "usage_metadata")
+
+    def __init__(self, content: str, usage: Dict[str, int]) -> None:
+        self.content = content
+        self.usage_metadata = usage
+
+
+class Usage:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+
+    def record(self, usage: Optional[Dict[str, int]]) -> None:
+        with self._lock:
+            self.calls += 1
+            if usage:
+                self.input_tokens += int(usage.get("input_tokens", 0))
+                self.output_tokens += int(usage.get("output_tokens", 0))
+
+    def error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "input_tokens": self.input_tokens, "output_tokens": self.output_tokens}
+
+
+usage = Usage()
+
+
+def approx_tokens(s: str) -> int:
+    return max(1, len(s) // 4)
+
+
+def _role(m: Any) -> str:
+    return getattr(m, "type", type(m).__name__)
+
+
+def prompt_key(model: str, messages: List[Any], schema: Optional[type] = None) -> str:
+    h = hashlib.sha256()
+    h.update(model.encode())
+    h.update(b"\0")
+    h.update((schema.__name__ if schema is not None else "").encode())
+    for m in messages:
+        h.update(b"\0")
+        h.update(_role(m).encode())
+        h.update(b"\0")
+        h.update(str(m.content).encode())
+    return h.hexdigest()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    kind, _, args = spec.partition(":")
+    v = [float(x) for x in args.split(",") if x.strip()]
+    kind = kind.strip().lower()
+    if kind in ("", "none"):
+        return lambda r: 0.0
+    if kind == "fixed":
+        return lambda r: v[0]
+    if kind == "uniform":
+        return lambda r: r.uniform(v[0], v[1])
+    if kind == "exp":
+        return lambda r: r.expovariate(1.0 / v[0])
+    if kind == "lognormal":
+        return lambda r: v[0] * math.exp(r.gauss(0.0, v[1]))
+    if kind == "pareto":
+        return lambda r: v[0] * r.paretovariate(v[1])
+    if kind == "tail":
+        return lambda r: v[3] * r.paretovariate(2.0) if r.random() < v[2] else v[0] * math.exp(r.gauss(0.0, v[1]))
+    raise ValueError(f"unknown latency distribution {spec!r}")
+
+
+class Cassette:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        self._entries[e["key"]] = e
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _unpack(result: Any, schema: Optional[type]) -> tuple:
+    if schema is None:
+        return result, str(result.content), getattr(result, "usage_metadata", None)
+    if result.get("parsing_error") is not None:
+        raise result["parsing_error"]
+    parsed = result["parsed"]
+    return parsed, parsed.model_dump_json(), getattr(result["raw"], "usage_metadata", None)
+
+
+class RecordingModel:
+    def __init__(self, inner: Any, cassette: Cassette, model_name: str, prompt_version: str, schema: Optional[type] = None) -> None:
+        self.inner = inner
+        self.cassette = cassette
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.schema = schema
+
+    def with_structured_output(self, schema: type) -> "RecordingModel":
+        return RecordingModel(self.inner.with_structured_output(schema, include_raw=True), self.cassette, self.model_name, self.prompt_version, schema)
+
+    def _store(self, messages: List[Any], result: Any, latency: float) -> Any:
+        out, content, u = _unpack(result, self.schema)
+        u = dict(u) if u else {"input_tokens": approx_tokens("".join(str(m.content) for m in messages)), "output_tokens": approx_tokens(content)}
+        self.cassette.put({
+            "key": prompt_key(self.model_name, messages, self.schema),
+            "model": self.model_name,
+            "prompt_version": self.prompt_version,
+            "messages": [{"role": _role(m), "content": str(m.content)} for m in messages],
+            "content": content,
+            "usage": {"input_tokens": u.get("input_tokens", 0), "output_tokens": u.get("output_tokens", 0)},
+            "latency": round(latency, 4),
+        })
+        usage.record(u)
+        return out
+
+    def invoke(self, messages: List[Any]) -> Any:
+        t0 = time.perf_counter()
+        result = self.inner.invoke(messages)
+        return self._store(messages, result, time.perf_counter() - t0)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        t0 = time.perf_counter()
+        result = await self.inner.ainvoke(messages)
+        return self._store(messages, result, time.perf_counter() - t0)
+
+
+class ReplayModel:
+    def __init__(self, cassette: Cassette, model_name: str, replay_latency: bool = False, schema: Optional[type] = None) -> None:
+        self.cassette = cassette
+        self.model_name = model_name
+        self.replay_latency = replay_latency
+        self.schema = schema
+
+    def with_structured_output(self, schema: type) -> "ReplayModel":
+        return ReplayModel(self.cassette, self.model_name, self.replay_latency, schema)
+
+    def _lookup(self, messages: List[Any]) -> Dict[str, Any]:
+        key = prompt_key(self.model_name, messages, self.schema)
+        e = self.cassette.get(key)
+        if e is None:
+            usage.error()
+            raise ReplayMiss(f"no recording for prompt {key[:12]}")
+        return e
+
+    def _result(self, e: Dict[str, Any]) -> Any:
+        usage.record(e.get("usage"))
+        if self.schema is not None:
+            return self.schema.model_validate_json(e["content"])
+        return Reply(e["content"], e.get("usage") or {})
+
+    def invoke(self, messages: List[Any]) -> Any:
+        e = self._lookup(messages)
+        if self.replay_latency:
+            time.sleep(e.get("latency", 0.0))
+        return self._result(e)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        e = self._lookup(messages)
+        if self.replay_latency:
+            await asyncio.sleep(e.get("latency", 0.0))
+        return self._result(e)
+
+
+class SyntheticModel:
+    def __init__(self, responder: Responder, model_name: str, latency: Callable[[random.Random], float], error_rate: float = 0.0, seed: int = 0, schema: Optional[type] = None, rng: Optional[random.Random] = None, token_seconds: float = 0.0) -> None:
+        self.responder = responder
+        self.model_name = model_name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.token_seconds = token_seconds
+        self.schema = schema
+        self._rng = rng or random.Random(seed)
+
+    def with_structured_output(self, schema: type) -> "SyntheticModel":
+        return SyntheticModel(self.responder, self.model_name, self.latency, self.error_rate, self.seed, schema, self._rng, self.token_seconds)
+
+    def _draw(self, messages: List[Any]) -> tuple:
+        delay, fail = self.latency(self._rng), self._rng.random() < self.error_rate
+        if fail:
+            return delay, None
+        content = self.responder(messages, self.schema)
+        return delay + self.token_seconds * approx_tokens(content), content
+
+    def _result(self, messages: List[Any], content: Optional[str]) -> Any:
+        if content is None:
+            usage.error()
+            raise SyntheticLLMError("synthetic upstream error")
+        u = {"input_tokens": approx_tokens("".join(str(m.content) for m in messages)), "output_tokens": approx_tokens(content)}
+        usage.record(u)
+        if self.schema is not None:
+            return self.schema.model_validate_json(content)
+        return Reply(content, u)
+
+    def invoke(self, messages: List[Any]) -> Any:
+        delay, content = self._draw(messages)
+        if delay > 0:
+            time.sleep(delay)
+        return self._result(messages, content)
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        delay, content = self._draw(messages)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._result(messages, content)
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def cassette(path: str) -> Cassette:
+    c = _cassettes.get(path)
+    if c is None:
+        c = _cassettes[path] = Cassette(path)
+    return c
+
+
+def chat_model(model_name: str, real: Callable[[], Any], responder: Responder, prompt_version: str) -> Any:
+    mode = os.getenv("LLM_BACKEND", "openai").lower()
+    if mode == "openai":
+        return real()
+    path = os.getenv("LLM_CASSETTE", "cassettes/llm.jsonl")
+    if mode == "record":
+        return RecordingModel(real(), cassette(path), model_name, prompt_version)
+    if mode == "replay":
+        return ReplayModel(cassette(path), model_name, os.getenv("LLM_REPLAY_LATENCY", "0") == "1")
+    if mode == "synthetic":
+        return SyntheticModel(
+            responder,
+            model_name,
+            parse_latency(os.getenv("LLM_SYNTHETIC_LATENCY", "none")),
+            float(os.getenv("LLM_SYNTHETIC_ERROR_RATE", "0")),
+            int(os.getenv("LLM_SYNTHETIC_SEED", "0")),
+            token_seconds=float(os.getenv("LLM_SYNTHETIC_TOKEN_SECONDS", "0")),
+        )
+    raise ValueError(f"unknown LLM_BACKEND {mode!r}")
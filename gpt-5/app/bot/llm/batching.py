@@ -0,0 +1,111 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from .schemas import TaskExtract
+from .chain import aclassify_items, aclassify_tasks, apply_tags
+from .local_classifier import local_tags
+from ..metrics import CLASSIFY_BATCH_CHATS, CLASSIFY_BATCH_ITEMS, CLASSIFY_FALLBACKS
+from ..tracing import span
+
+
+Classify = Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, str]]]
+
+_ITEMS = CLASSIFY_BATCH_ITEMS.get()
+_CHATS = CLASSIFY_BATCH_CHATS.get()
+_FALLBACKS = CLASSIFY_FALLBACKS.get()
+
+
+class ClassifyBatcher:
+    def __init__(self, window: float, max_items: int, call: Classify = aclassify_items, single: Callable[[List[TaskExtract]], Awaitable[List[TaskExtract]]] = aclassify_tasks) -> None:
+        self.window = window
+        self.max_items = max(1, max_items)
+        self.call = call
+        self.single = single
+        self._pending: List[Tuple[List[TaskExtract], asyncio.Future]] = []
+        self._items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.fallbacks = 0
+
+    async def classify(self, batch: List[TaskExtract]) -> List[TaskExtract]:
+        if not batch:
+            return batch
+        self.requests += 1
+        with span("llm.classify_tasks", tasks=len(batch)) as sp:
+            batch, rest = local_tags(batch)
+            sp.set("local", len(batch) - len(rest))
+            if not rest:
+                return batch
+            if len(rest) == len(batch):
+                return await self._classify(batch, sp)
+            done = {t.id: t for t in await self._classify(rest, sp)}
+            return [done.get(t.id, t) for t in batch]
+
+    async def _classify(self, batch: List[TaskExtract], sp: Any) -> List[TaskExtract]:
+        if self.window <= 0:
+            sp.set("batch_chats", 1)
+            return await self.single(batch)
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((batch, fut))
+        self._items += len(batch)
+        if self._items >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        out, chats = await fut
+        sp.set("batch_chats", chats)
+        return out
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._items = self._pending, [], 0
+        if not pending:
+            return
+        task = asyncio.create_task(self._run(pending), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: List[Tuple[List[TaskExtract], asyncio.Future]]) -> None:
+        items: List[Dict[str, Any]] = []
+        owners: List[Tuple[int, int]] = []
+        for k, (batch, _) in enumerate(pending):
+            for t in batch:
+                items.append({"id": len(items) + 1, "name": t.name, "raw": t.raw})
+                owners.append((k, t.id))
+        self.batches += 1
+        _ITEMS.observe(len(items))
+        _CHATS.observe(len(pending))
+        try:
+            mapping = await self.call(items)
+        except Exception:
+            self.fallbacks += 1
+            _FALLBACKS.inc()
+            await asyncio.gather(*[self._fallback(batch, fut) for batch, fut in pending])
+            return
+        tags: List[Dict[int, str]] = [{} for _ in pending]
+        for gid, (k, tid) in enumerate(owners, 1):
+            if gid in mapping:
+                tags[k][tid] = mapping[gid]
+        for (batch, fut), m in zip(pending, tags):
+            if not fut.done():
+                fut.set_result((apply_tags(batch, m), len(pending)))
+
+    async def _fallback(self, batch: List[TaskExtract], fut: asyncio.Future) -> None:
+        if fut.done():
+            return
+        try:
+            out = await self.single(batch)
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        if not fut.done():
+            fut.set_result((out, 1))
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"requests": self.requests, "batches": self.batches, "fallbacks": self.fallbacks}
@@ -1,12 +1,20 @@
+import asyncio
 import json
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
-from langchain_openai import ChatOpenAI
 import os
-from langchain.schema import HumanMessage, SystemMessage
 from pydantic import ValidationError
 from .schemas import TaskExtract, TaskBatch
-from .prompts import EXTRACTION_SYSTEM, SELF_REPAIR_SYSTEM, CLASSIFY_SYSTEM
+from .prompts import EXTRACTION_SYSTEM, SELF_REPAIR_SYSTEM, CLASSIFY_SYSTEM, PROMPT_VERSION
+from .backend import chat_model, prompt_key
+from . import accounting, local_classifier
+from .hedging import Hedger, hedger_from_env
+from .routing import Router, router_from_env
+from .splitter import Splitter, splitter_from_env
+from .synthetic import respond
+from ..metrics import EXTRACT_CHUNKING, LLM_SECONDS
+from ..tracing import span
 
 
 def _approx_tokens(s: str) -> int:
@@ -21,59 +29,205 @@ def _extract_json_array(text: str) -> str:
     return text
 
 
+def _validate_batch(content: str) -> List[TaskExtract]:
+    try:
+        return TaskBatch.validate_json(content)
+    except ValidationError:
+        # A bare array parses as is; only prose or fences around it pay for the slice and a second parse
+        text = _extract_json_array(content)
+        if text == content:
+            raise
+        return TaskBatch.validate_json(text)
+
+
 MODEL_NAME = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+_EXTRACT_SECONDS = LLM_SECONDS.get("extract_tasks")
+_REPAIR_SECONDS = LLM_SECONDS.get("self_repair")
+_CLASSIFY_SECONDS = LLM_SECONDS.get("classify_tasks")
+_models: Dict[str, Any] = {}
+_hedgers: Dict[str, Hedger] = {}
+_routes = None
+_splitter = None
+
+
+def _openai(model: str):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=0, max_retries=0)
+
+
+def _chat(model: str = MODEL_NAME):
+    m = _models.get(model)
+    if m is None:
+        m = _models[model] = chat_model(model, lambda: _openai(model), respond, PROMPT_VERSION)
+    return m
+
+
+def router() -> Router:
+    global _routes
+    if _routes is None:
+        _routes = router_from_env(MODEL_NAME)
+    return _routes
+
+
+def splitter() -> Splitter:
+    global _splitter
+    if _splitter is None:
+        _splitter = splitter_from_env()
+    return _splitter
+
+
+def hedger(op: str) -> Hedger:
+    h = _hedgers.get(op)
+    if h is None:
+        h = _hedgers[op] = hedger_from_env(op)
+    return h
 
-def extract_tasks(initial_text: str, session_messages: List[str], holidays: Dict[str, Any] | None, now_utc: datetime, max_tokens: int):
-    context_parts = [initial_text] + session_messages
-    if holidays is not None:
+
+async def _ainvoke(op: str, model: str, messages: list, seconds, key: str = "") -> Any:
+    key = (key or prompt_key(model, messages))[:16]
+
+    async def call(m: str) -> Any:
+        t0 = time.perf_counter()
         try:
-            context_parts.append(json.dumps(holidays, indent=2))
+            out = await _chat(m).ainvoke(messages)
         except Exception:
-            pass
-    ctx = "\n\n".join(context_parts)
-    if _approx_tokens(ctx) > max_tokens:
-        return "CONTEXT_TOO_LARGE"
-
-    model = ChatOpenAI(model=MODEL_NAME, temperature=0)
-    messages = [
-        SystemMessage(content=EXTRACTION_SYSTEM),
-        HumanMessage(content=f"Now(UTC): {now_utc.isoformat()}\n\nInput:\n{ctx}\n\nReturn only JSON array."),
-    ]
-    result = model.invoke(messages)
-    text = _extract_json_array(result.content)
+            accounting.record(op, m, key, None, time.perf_counter() - t0, False)
+            raise
+        dt = time.perf_counter() - t0
+        seconds.observe(dt)
+        accounting.record(op, m, key, getattr(out, "usage_metadata", None), dt, True)
+        return out
+    return await hedger(op).call(call, model)
+
+
+def _warm() -> None:
+    _chat()
+    local_classifier.model()
+    for r in router().routes:
+        _chat(r.model)
+
+
+def _messages(system: str, human: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    return [SystemMessage(content=system), HumanMessage(content=human)]
+
+
+async def warm_up() -> None:
+    await asyncio.to_thread(_warm)
+
+
+async def probe_llm(timeout: float = 5.0) -> bool:
     try:
-        data = json.loads(text)
-        batch = TaskBatch.validate_python(data)
+        await warm_up()
+        client = getattr(_chat(), "root_async_client", None)
+        if client is None:
+            return True
+        await asyncio.wait_for(client.models.retrieve(MODEL_NAME), timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def extract_tasks(initial_text: str, session_messages: List[str], holidays: Dict[str, Any] | None, now_utc: datetime, max_tokens: int):
+    with span("llm.extract_tasks") as sp:
+        context_parts = [initial_text] + session_messages
+        if holidays is not None:
+            try:
+                context_parts.append(json.dumps(holidays, indent=2))
+            except Exception:
+                pass
+        ctx = "\n\n".join(context_parts)
+        sp.set("prompt_chars", len(ctx))
+        sp.set("prompt_tokens_approx", _approx_tokens(ctx))
+        sp.set("messages", len(context_parts))
+        if _approx_tokens(ctx) > max_tokens:
+            sp.set("result", "CONTEXT_TOO_LARGE")
+            return "CONTEXT_TOO_LARGE"
+
+        # follow-up messages refer back to the initial text, so only a fresh message is cut up
+        chunks = None if session_messages else splitter().split(initial_text)
+        if chunks:
+            sp.set("chunks", len(chunks))
+            tail = ctx[len(initial_text):]
+            res = await asyncio.gather(*(_extract_chunk(c + tail, now_utc, i) for i, c in enumerate(chunks)), return_exceptions=True)
+            if all(isinstance(r, list) for r in res):
+                EXTRACT_CHUNKING.get("chunked").inc()
+                batch = merge_batches(res)
+                sp.set("tasks", len(batch))
+                return batch
+            EXTRACT_CHUNKING.get("fallback").inc()
+            sp.set("chunk_fallback", True)
+        else:
+            EXTRACT_CHUNKING.get("single").inc()
+        return await _extract(sp, ctx, bool(session_messages), now_utc)
+
+
+def merge_batches(batches: List[List[TaskExtract]]) -> List[TaskExtract]:
+    # ids restart at 1 in every chunk; classify and the keyboards key on them, so renumber in input order
+    out: List[TaskExtract] = []
+    seen = set()
+    for batch in batches:
+        for t in batch:
+            k = (" ".join(t.name.casefold().split()), t.kind, tuple(t.dow), t.n_days, t.date, t.time)
+            if k in seen:
+                continue
+            seen.add(k)
+            out.append(t.model_copy(update={"id": len(out) + 1}))
+    return out
+
+
+async def _extract_chunk(ctx: str, now_utc: datetime, i: int):
+    with span("llm.extract_chunk", chunk=i) as sp:
+        return await _extract(sp, ctx, False, now_utc)
+
+
+async def _extract(sp, ctx: str, follow_up: bool, now_utc: datetime):
+    rt = router()
+    d = rt.choose(ctx, follow_up)
+    route = rt.route(d)
+    sp.set("route", route.name)
+    messages = _messages(EXTRACTION_SYSTEM, f"Now(UTC): {now_utc.isoformat()}\n\nInput:\n{ctx}\n\nReturn only JSON array.")
+    key = prompt_key(route.model, messages)
+    with span("llm.invoke", op="extract_tasks", model=route.model):
+        t0 = time.perf_counter()
+        result = await _ainvoke("extract_tasks", route.model, messages, _EXTRACT_SECONDS, key)
+        rt.observe(route, time.perf_counter() - t0)
+    try:
+        with span("llm.validate"):
+            batch = _validate_batch(result.content)
+        sp.set("repair", False)
+        sp.set("tasks", len(batch))
+        rt.finish(d, "ok", key, PROMPT_VERSION)
         return batch
     except Exception as e:
-        repair_model = ChatOpenAI(model=MODEL_NAME, temperature=0)
-        repair_messages = [
-            SystemMessage(content=SELF_REPAIR_SYSTEM),
-            HumanMessage(content=f"Error: {str(e)}\n\nJSON to fix:\n{text}"),
-        ]
-        repair = repair_model.invoke(repair_messages)
-        fixed = _extract_json_array(repair.content)
+        sp.set("repair", True)
+        text = _extract_json_array(result.content)
+        route = rt.escalate(d)
+        sp.set("repair_route", route.name)
+        repair_messages = _messages(SELF_REPAIR_SYSTEM, f"Error: {str(e)}\n\nJSON to fix:\n{text}")
+        with span("llm.invoke", op="self_repair", model=route.model, prompt_chars=len(text)):
+            t0 = time.perf_counter()
+            repair = await _ainvoke("self_repair", route.model, repair_messages, _REPAIR_SECONDS)
+            rt.observe(route, time.perf_counter() - t0)
         try:
-            data = json.loads(fixed)
-            batch = TaskBatch.validate_python(data)
+            with span("llm.validate"):
+                batch = _validate_batch(repair.content)
+            sp.set("tasks", len(batch))
+            rt.finish(d, "repaired", key, PROMPT_VERSION)
             return batch
         except Exception:
+            sp.set("result", "PARSE_FAILED")
+            rt.finish(d, "failed", key, PROMPT_VERSION)
             return "PARSE_FAILED"
 
 
-def classify_tasks(batch: List[TaskExtract]) -> List[TaskExtract]:
-    items = [{"id": t.id, "name": t.name, "raw": t.raw} for t in batch]
-    model = ChatOpenAI(model=MODEL_NAME, temperature=0)
-    messages = [
-        SystemMessage(content=CLASSIFY_SYSTEM),
-        HumanMessage(content=json.dumps(items)),
-    ]
-    result = model.invoke(messages)
-    try:
-        arr = json.loads(_extract_json_array(result.content))
-    except Exception:
-        return batch
+def _classify_items(batch: List[TaskExtract]) -> List[Dict[str, Any]]:
+    return [{"id": t.id, "name": t.name, "raw": t.raw} for t in batch]
+
+
+def _parse_tags(content: str) -> Dict[int, str]:
+    arr = json.loads(_extract_json_array(content))
     mapping = {}
     for e in arr:
         try:
@@ -83,8 +237,28 @@ def classify_tasks(batch: List[TaskExtract]) -> List[TaskExtract]:
                 mapping[i] = tag
         except Exception:
             pass
+    return mapping
+
+
+def apply_tags(batch: List[TaskExtract], mapping: Dict[int, str]) -> List[TaskExtract]:
     out = []
     for t in batch:
         tag = mapping.get(t.id, t.tag)
-        out.append(TaskExtract(**{**t.model_dump(), "tag": tag}))
+        out.append(t if tag == t.tag else t.model_copy(update={"tag": tag}))
     return out
+
+
+async def aclassify_items(items: List[Dict[str, Any]]) -> Dict[int, str]:
+    messages = _messages(CLASSIFY_SYSTEM, json.dumps(items))
+    result = await _ainvoke("classify_tasks", MODEL_NAME, messages, _CLASSIFY_SECONDS)
+    mapping = _parse_tags(result.content)
+    local_classifier.log_labels(items, mapping)
+    return mapping
+
+
+async def aclassify_tasks(batch: List[TaskExtract]) -> List[TaskExtract]:
+    try:
+        mapping = await aclassify_items(_classify_items(batch))
+    except ValueError:
+        return batch
+    return apply_tags(batch, mapping)
@@ -0,0 +1,133 @@
+import asyncio
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ..metrics import LLM_DEADLINE_EXCEEDED, LLM_HEDGE_WINS, LLM_HEDGES
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200) -> None:
+        self._xs: deque = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._xs)
+
+    def add(self, seconds: float) -> None:
+        self._xs.append(seconds)
+
+    def quantile(self, q: float, default: float = 0.0) -> float:
+        if not self._xs:
+            return default
+        xs = sorted(self._xs)
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+class Hedger:
+    def __init__(self, op: str, quantile: float = 0.95, min_delay: float = 1.0, deadline: float = 60.0, attempts: int = 2, backoff: float = 0.5, hedge_model: str = "", min_samples: int = 20, window: int = 200) -> None:
+        self.op = op
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.deadline = deadline
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.hedge_model = hedge_model
+        self.min_samples = min_samples
+        self.window = LatencyWindow(window)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadlines = 0
+        self._hedged = LLM_HEDGES.get(op)
+        self._wins = LLM_HEDGE_WINS.get(op)
+        self._expired = LLM_DEADLINE_EXCEEDED.get(op)
+
+    def delay(self) -> Optional[float]:
+        if self.quantile <= 0 or len(self.window) < self.min_samples:
+            return None
+        return max(self.min_delay, self.window.quantile(self.quantile))
+
+    async def call(self, invoke: Callable[[str], Awaitable[Any]], model: str) -> Any:
+        loop = asyncio.get_running_loop()
+        end = loop.time() + self.deadline
+        last: Optional[BaseException] = None
+        for attempt in range(self.attempts):
+            try:
+                return await self._race(invoke, model, self.hedge_model or model, end)
+            except ValueError:
+                raise
+            except DeadlineExceeded as e:
+                last = e
+                break
+            except Exception as e:
+                last = e
+            pause = self.backoff * 2 ** attempt
+            if attempt == self.attempts - 1 or end - loop.time() < pause + self.window.quantile(0.5):
+                break
+            await asyncio.sleep(pause)
+        if isinstance(last, DeadlineExceeded) or last is None:
+            self.deadlines += 1
+            self._expired.inc()
+        raise last or DeadlineExceeded(f"{self.op} exceeded {self.deadline}s")
+
+    async def _race(self, invoke: Callable[[str], Awaitable[Any]], model: str, hedge_model: str, end: float) -> Any:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        running: Dict[asyncio.Future, Tuple[float, bool]] = {asyncio.ensure_future(invoke(model)): (started, False)}
+        delay = self.delay()
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while running:
+                left = end - loop.time()
+                if left <= 0:
+                    raise DeadlineExceeded(f"{self.op} exceeded {self.deadline}s")
+                timeout = left if hedged or delay is None else min(left, max(0.0, started + delay - loop.time()))
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for f in done:
+                    t0, is_hedge = running.pop(f)
+                    error = f.exception()
+                    if error is None:
+                        self.window.add(loop.time() - t0)
+                        if is_hedge:
+                            self.hedge_wins += 1
+                            self._wins.inc()
+                        return f.result()
+                    if isinstance(error, ValueError):
+                        raise error
+                if done:
+                    if not running and error is not None:
+                        raise error
+                    continue
+                if not hedged and delay is not None and loop.time() < end:
+                    hedged = True
+                    self.hedges += 1
+                    self._hedged.inc()
+                    running[asyncio.ensure_future(invoke(hedge_model))] = (loop.time(), True)
+            raise error or DeadlineExceeded(f"{self.op} exceeded {self.deadline}s")
+        finally:
+            for f in running:
+                f.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadlines": self.deadlines,
+            "delay": self.delay(),
+            "samples": len(self.window),
+        }
+
+
+def hedger_from_env(op: str) -> Hedger:
+    return Hedger(
+        op,
+        float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+        float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0")),
+        float(os.getenv("LLM_DEADLINE_SECONDS", "60")),
+        int(os.getenv("LLM_ATTEMPTS", "2")),
+        float(os.getenv("LLM_RETRY_BACKOFF", "0.5")),
+        os.getenv("LLM_HEDGE_MODEL", ""),
+    )
@@ -0,0 +1,130 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from .schemas import TaskExtract
+from ..metrics import CLASSIFY_LOCAL
+
+
+log = logging.getLogger("app.llm.local")
+
+FORMAT = 1
+_WORD_RE = re.compile(r"[a-z]+")
+_LOCAL = CLASSIFY_LOCAL.get("local")
+_SENT = CLASSIFY_LOCAL.get("llm")
+_lock = threading.Lock()
+_model: Optional["LocalModel"] = None
+_loaded = False
+
+
+def features(name: str, raw: str, bits: int) -> List[int]:
+    # word unigrams and bigrams plus char trigrams of each word, hashed into 2**bits binary features
+    words = _WORD_RE.findall(f"{name} {raw}".lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        p = f"<{w}>"
+        grams.extend(p[i : i + 3] for i in range(len(p) - 2))
+    mask = (1 << bits) - 1
+    return sorted({zlib.crc32(g.encode()) & mask for g in grams})
+
+
+class LocalModel:
+    # logistic regression over hashed n-grams, p = P(work); weights[-1] is the bias
+    def __init__(self, weights: array, meta: Dict[str, Any]) -> None:
+        self.weights = weights
+        self.meta = meta
+        self.bits = int(meta["bits"])
+        self.threshold = float(meta.get("threshold", 1.0))
+
+    def prob(self, name: str, raw: str) -> float:
+        w = self.weights
+        z = w[-1] + sum(w[i] for i in features(name, raw, self.bits))
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    def predict(self, name: str, raw: str) -> Tuple[str, float]:
+        p = self.prob(name, raw)
+        return ("work", p) if p >= 0.5 else ("personal", 1.0 - p)
+
+    def tag(self, name: str, raw: str, threshold: Optional[float] = None) -> Optional[str]:
+        tag, conf = self.predict(name, raw)
+        return tag if conf >= (self.threshold if threshold is None else threshold) else None
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(json.dumps({**self.meta, "format": FORMAT}).encode() + b"\n")
+            self.weights.tofile(f)
+
+
+def load(path: str) -> LocalModel:
+    with open(path, "rb") as f:
+        meta = json.loads(f.readline())
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"classifier format {meta.get('format')} != {FORMAT}")
+        w = array("f")
+        w.frombytes(f.read())
+    if len(w) != (1 << int(meta["bits"])) + 1:
+        raise ValueError(f"classifier has {len(w)} weights for {meta['bits']} bits")
+    return LocalModel(w, meta)
+
+
+def model() -> Optional[LocalModel]:
+    global _model, _loaded
+    if _loaded:
+        return _model
+    with _lock:
+        if not _loaded:
+            path = os.getenv("LOCAL_CLASSIFIER_PATH", "")
+            if path:
+                try:
+                    _model = load(path)
+                    thr = os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "")
+                    if thr:
+                        _model.threshold = float(thr)
+                    log.info("local classifier %s loaded, threshold %.3f", _model.meta.get("version", "?"), _model.threshold)
+                except (OSError, ValueError, KeyError) as e:
+                    log.warning("local classifier disabled: %s", e)
+                    _model = None
+            _loaded = True
+    return _model
+
+
+def local_tags(batch: List[TaskExtract]) -> Tuple[List[TaskExtract], List[TaskExtract]]:
+    # tags what the local model is confident about; the rest still goes to the LLM
+    m = model()
+    if m is None:
+        return batch, batch
+    out: List[TaskExtract] = []
+    rest: List[TaskExtract] = []
+    for t in batch:
+        tag = m.tag(t.name, t.raw)
+        if tag is None:
+            rest.append(t)
+            out.append(t)
+        else:
+            out.append(t if tag == t.tag else t.model_copy(update={"tag": tag}))
+    _LOCAL.inc(len(batch) - len(rest))
+    _SENT.inc(len(rest))
+    return out, rest
+
+
+def log_labels(items: List[Dict[str, Any]], mapping: Dict[int, str]) -> None:
+    # training data for infra.train_classifier: one line per task the LLM tagged, grouped by call
+    path = os.getenv("CLASSIFY_LABEL_FILE", "")
+    if not path or not mapping:
+        return
+    call = f"{time.time():.6f}"
+    lines = [json.dumps({"call": call, "name": e["name"], "raw": e["raw"], "tag": mapping[e["id"]]}, ensure_ascii=False) for e in items if e["id"] in mapping]
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError as e:
+        # the tags are already in hand; losing training lines must not fail the classify call
+        log.warning("label file %s not written: %s", path, e)
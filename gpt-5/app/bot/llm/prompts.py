@@ -1,3 +1,5 @@
+PROMPT_VERSION = "v1"
+
 EXTRACTION_SYSTEM = (
     "You extract structured scheduling tasks from natural language. Output MUST be a strict JSON array only, no prose. "
     "Fields per item: id:int, raw:str, name:str(<=80), tag:'work'|'personal'|'unsure', "
@@ -0,0 +1,126 @@
+import logging
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+
+log = logging.getLogger("app.llm.route")
+
+_CLAUSE_RE = re.compile(r"\n+|;|,|\.\s|\band\b|\bthen\b", re.I)
+
+
+class Route:
+    __slots__ = ("name", "model", "latency")
+
+    def __init__(self, name: str, model: str, latency: float) -> None:
+        self.name = name
+        self.model = model
+        self.latency = latency
+
+
+class Decision:
+    __slots__ = ("index", "served", "features", "bucket", "repair_rate", "explore", "started")
+
+    def __init__(self, index: int, features: Dict[str, Any], bucket: str, repair_rate: float, explore: bool) -> None:
+        self.index = index
+        self.served = index
+        self.features = features
+        self.bucket = bucket
+        self.repair_rate = repair_rate
+        self.explore = explore
+        self.started = time.perf_counter()
+
+
+def parse_routes(spec: str, default_model: str) -> List[Route]:
+    out = []
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, rest = part.split("=", 1)
+        model, _, latency = rest.partition(":")
+        out.append(Route(name.strip(), model.strip(), float(latency or 0)))
+    return out or [Route("default", default_model, 0.0)]
+
+
+def features(text: str, clarification: bool) -> Dict[str, Any]:
+    return {"chars": len(text), "clauses": sum(1 for p in _CLAUSE_RE.split(text) if p.strip()), "clarification": clarification}
+
+
+def bucket_of(f: Dict[str, Any]) -> str:
+    return f"{min(int(math.log2(f['chars'] + 1)), 14)}:{min(f['clauses'], 8)}:{int(f['clarification'])}"
+
+
+class Router:
+    def __init__(self, routes: List[Route], slo: float = 0.0, max_chars: int = 600, max_clauses: int = 4, max_repair_rate: float = 0.2, explore: float = 0.0, alpha: float = 0.1, seed: Optional[int] = None) -> None:
+        self.routes = routes
+        self.slo = slo
+        self.max_chars = max_chars
+        self.max_clauses = max_clauses
+        self.max_repair_rate = max_repair_rate
+        self.explore = explore
+        self.alpha = alpha
+        self.repair: Dict[str, float] = {}
+        self._rnd = random.Random(seed)
+
+    def _eligible(self) -> List[int]:
+        ok = [i for i, r in enumerate(self.routes) if self.slo <= 0 or r.latency <= self.slo]
+        return ok or [0]
+
+    def choose(self, text: str, clarification: bool) -> Decision:
+        f = features(text, clarification)
+        b = bucket_of(f)
+        rate = self.repair.get(b, 0.0)
+        ok = self._eligible()
+        hard = f["chars"] > self.max_chars or f["clauses"] > self.max_clauses or rate > self.max_repair_rate
+        explore = hard and len(ok) > 1 and self.explore > 0 and self._rnd.random() < self.explore
+        return Decision(ok[-1] if hard and not explore else ok[0], f, b, rate, explore)
+
+    def route(self, d: Decision) -> Route:
+        return self.routes[d.served]
+
+    def escalate(self, d: Decision) -> Route:
+        if d.served < len(self.routes) - 1:
+            d.served += 1
+        return self.routes[d.served]
+
+    def observe(self, route: Route, seconds: float) -> None:
+        route.latency = seconds if route.latency <= 0 else route.latency + self.alpha * (seconds - route.latency)
+
+    def finish(self, d: Decision, outcome: str, key: str = "", prompt_version: str = "") -> None:
+        if d.index == 0 and len(self.routes) > 1:
+            prev = self.repair.get(d.bucket, 0.0)
+            self.repair[d.bucket] = prev + self.alpha * ((outcome != "ok") - prev)
+        log.info(
+            "route",
+            extra={
+                "route": self.routes[d.index].name,
+                "tier": d.index,
+                "model": self.routes[d.index].model,
+                "served_by": self.routes[d.served].name,
+                "escalated": d.served != d.index,
+                "outcome": outcome,
+                "latency_ms": round((time.perf_counter() - d.started) * 1000, 1),
+                "chars": d.features["chars"],
+                "clauses": d.features["clauses"],
+                "clarification": d.features["clarification"],
+                "bucket": d.bucket,
+                "repair_rate": round(d.repair_rate, 3),
+                "explore": d.explore,
+                "key": key,
+                "prompt_version": prompt_version,
+            },
+        )
+
+
+def router_from_env(default_model: str) -> Router:
+    return Router(
+        parse_routes(os.getenv("LLM_ROUTES", ""), default_model),
+        float(os.getenv("LLM_ROUTE_SLO_SECONDS", "0")),
+        int(os.getenv("LLM_ROUTE_MAX_CHARS", "600")),
+        int(os.getenv("LLM_ROUTE_MAX_CLAUSES", "4")),
+        float(os.getenv("LLM_ROUTE_MAX_REPAIR_RATE", "0.2")),
+        float(os.getenv("LLM_ROUTE_EXPLORE", "0.05")),
+    )
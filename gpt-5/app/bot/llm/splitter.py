@@ -0,0 +1,88 @@
+import os
+import re
+from typing import List, Optional
+
+
+_ITEM_RE = re.compile(r"^\s*(?:[-*•–]|\d{1,3}[.)])\s+")
+_SENT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+_LAST_RE = re.compile(r"(\S+)[.!?]$")
+_ABBR = {"dr", "mr", "mrs", "ms", "st", "jr", "sr", "prof", "vs", "etc", "e.g", "i.e", "a.m", "p.m", "no", "approx"}
+# leans on the previous unit, keep them together
+_CONT_RE = re.compile(r"^(?:it|its|that|this|these|those|them|they|then|also|and|but|or|same|again|both|instead|after that|before that)\b", re.I)
+# can point at any earlier unit, no safe cut
+_XREF_RE = re.compile(
+    r"\b(?:the (?:above|previous|former|latter|first|last|same) (?:one|ones|task|tasks|item|items)|"
+    r"(?:all|each|both|any|either) of (?:these|them|those|the above)|as above|same as (?:before|above))\b",
+    re.I,
+)
+
+
+def _sentences(line: str) -> List[str]:
+    out, start = [], 0
+    for m in _SENT_RE.finditer(line):
+        w = _LAST_RE.search(line[start:m.start()])
+        if w and (len(w.group(1)) == 1 or w.group(1).lower() in _ABBR):
+            continue
+        out.append(line[start:m.start()])
+        start = m.end()
+    out.append(line[start:])
+    return [s.strip() for s in out if s.strip()]
+
+
+def units(text: str) -> List[str]:
+    out: List[str] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = bool(_ITEM_RE.match(line))
+        for k, piece in enumerate([line.strip()] if item else _sentences(line)):
+            body = _ITEM_RE.sub("", piece)
+            wrapped = k == 0 and not item and body[:1].islower()
+            if out and (wrapped or _CONT_RE.match(body)):
+                out[-1] = f"{out[-1]} {piece}"
+            else:
+                out.append(piece)
+    return out
+
+
+def _pack(us: List[str], limit: int) -> List[str]:
+    chunks: List[str] = []
+    cur: List[str] = []
+    size = 0
+    for u in us:
+        if cur and size + len(u) > limit:
+            chunks.append("\n".join(cur))
+            cur, size = [], 0
+        cur.append(u)
+        size += len(u) + 1
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+
+class Splitter:
+    def __init__(self, min_chars: int = 800, target_chars: int = 600, max_chunks: int = 8) -> None:
+        self.min_chars = min_chars
+        self.target_chars = target_chars
+        self.max_chunks = max_chunks
+
+    def split(self, text: str) -> Optional[List[str]]:
+        if self.min_chars <= 0 or self.max_chunks < 2 or len(text) < self.min_chars or _XREF_RE.search(text):
+            return None
+        us = units(text)
+        if len(us) < 2:
+            return None
+        limit = max(self.target_chars, -(-len(text) // self.max_chunks))
+        chunks = _pack(us, limit)
+        while len(chunks) > self.max_chunks:
+            limit += limit // 4 + 1
+            chunks = _pack(us, limit)
+        return chunks if len(chunks) > 1 else None
+
+
+def splitter_from_env() -> Splitter:
+    return Splitter(
+        int(os.getenv("PARSE_CHUNK_MIN_CHARS", "800")),
+        int(os.getenv("PARSE_CHUNK_TARGET_CHARS", "600")),
+        int(os.getenv("PARSE_MAX_CHUNKS", "8")),
+    )
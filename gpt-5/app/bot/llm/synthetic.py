@@ -0,0 +1,138 @@
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from .prompts import CLASSIFY_SYSTEM, EXTRACTION_SYSTEM, SELF_REPAIR_SYSTEM
+
+
+_DAYS = {"mon": "Mon", "tue": "Tue", "wed": "Wed", "thu": "Thu", "fri": "Fri", "sat": "Sat", "sun": "Sun"}
+_DAY_RE = re.compile(r"\b(mon|tue|wed|thu|fri|sat|sun)[a-z]*\b", re.I)
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b", re.I)
+_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_EVERY_N_RE = re.compile(r"\bevery\s+(\d+)\s+days?\b", re.I)
+_TAG_RE = re.compile(r"\[(work|personal)\]", re.I)
+_SPLIT_RE = re.compile(r"(\n+|;\s*|\.\s+|,\s+|\s+and\s+)", re.I)
+_NOISE_RE = re.compile(
+    r"\[(work|personal)\]|\b(and|every|each|on|at|from|starting|daily|weekdays?|tomorrow|today|days?|monthly|month)\b|"
+    r"\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}(:\d{2})?\s*(am|pm)?\b|" + _DAY_RE.pattern,
+    re.I,
+)
+_WORK = ("invoice", "meeting", "standup", "stand-up", "report", "email", "client", "deploy", "review", "payroll", "office", "code", "sprint", "sync")
+_PERSONAL = ("gym", "dentist", "groceries", "mom", "dad", "birthday", "laundry", "doctor", "family", "run", "teeth", "yoga", "plants", "dog", "cat")
+
+
+def _time(text: str) -> Optional[str]:
+    m = _TIME_RE.search(text)
+    if not m:
+        return None
+    if m.group(3):
+        h, mm = int(m.group(1)) % 12, int(m.group(2) or 0)
+        if m.group(3).lower() == "pm":
+            h += 12
+    else:
+        h, mm = int(m.group(4)), int(m.group(5))
+    if h > 23 or mm > 59:
+        return None
+    return f"{h:02d}:{mm:02d}"
+
+
+def _tag(text: str) -> str:
+    m = _TAG_RE.search(text)
+    if m:
+        return m.group(1).lower()
+    low = text.lower()
+    if any(w in low for w in _WORK):
+        return "work"
+    if any(w in low for w in _PERSONAL):
+        return "personal"
+    return "unsure"
+
+
+def _clauses(text: str) -> List[str]:
+    out: List[str] = []
+    cur = ""
+    parts = _SPLIT_RE.split(text)
+    for k in range(0, len(parts), 2):
+        part = parts[k].strip()
+        if not part:
+            continue
+        cur = cur + parts[k - 1] + part if cur else part
+        if _has_time(part):
+            out.append(cur.strip())
+            cur = ""
+    if cur:
+        out.append(cur.strip())
+    return out
+
+
+def _has_time(s: str) -> bool:
+    return _TIME_RE.search(s) is not None
+
+
+def _name(raw: str) -> str:
+    words = [w.strip(",.;") for w in _NOISE_RE.sub(" ", raw).split()]
+    name = " ".join(w for w in words if w) or raw.strip()
+    return (name[:1].upper() + name[1:])[:80]
+
+
+def extract(text: str, today: date) -> List[Dict[str, Any]]:
+    out = []
+    for i, raw in enumerate(_clauses(text), 1):
+        low = raw.lower()
+        needs: List[str] = []
+        dow: List[str] = []
+        n_days = None
+        d = None
+        m_date = _DATE_RE.search(raw)
+        m_n = _EVERY_N_RE.search(raw)
+        if m_n:
+            kind, n_days = "every_n_days", max(2, int(m_n.group(1)))
+            if m_date:
+                d = m_date.group(1)
+            else:
+                needs.append("anchor")
+        elif "weekday" in low:
+            kind = "weekday"
+        elif "daily" in low or "every day" in low:
+            kind = "daily"
+        elif _DAY_RE.search(raw) and ("every" in low or "each" in low or "on " in low):
+            kind = "weekly"
+            for m in _DAY_RE.finditer(raw):
+                v = _DAYS[m.group(1).lower()]
+                if v not in dow:
+                    dow.append(v)
+        else:
+            kind = "one_time"
+            if m_date:
+                d = m_date.group(1)
+            elif "tomorrow" in low:
+                d = (today + timedelta(days=1)).isoformat()
+            else:
+                d = today.isoformat()
+            if "monthly" in low or "every month" in low:
+                needs.append("unsupported")
+        t = _time(raw)
+        if t is None:
+            needs.append("time")
+        out.append({"id": i, "raw": raw, "name": _name(raw), "tag": _tag(raw), "kind": kind, "dow": dow, "n_days": n_days, "date": d, "time": t, "needs": needs})
+    return out
+
+
+def respond(messages: List[Any], schema: Optional[type] = None) -> str:
+    system = str(messages[0].content)
+    human = str(messages[-1].content)
+    if system == EXTRACTION_SYSTEM:
+        now = human.split("\n", 1)[0].replace("Now(UTC):", "").strip()
+        body = human.split("Input:\n", 1)[-1].rsplit("\n\nReturn only JSON array.", 1)[0]
+        try:
+            today = datetime.fromisoformat(now).date()
+        except ValueError:
+            today = date.today()
+        body = body.split("\n\n{", 1)[0]
+        return json.dumps(extract(body, today))
+    if system == SELF_REPAIR_SYSTEM:
+        return human.split("JSON to fix:\n", 1)[-1]
+    if system == CLASSIFY_SYSTEM:
+        items = json.loads(human)
+        return json.dumps([{"id": e["id"], "tag": _tag(f"{e.get('name', '')} {e.get('raw', '')}")} for e in items])
+    return "[]"
@@ -1,23 +1,151 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
 
-def configure_logging(level: str) -> logging.Logger:
+_STD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _STD_ATTRS:
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # args may be live objects the loop keeps mutating; render them now and leave only the JSON to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: Dict[str, float], limits: Dict[str, float], seed: Optional[int] = None) -> None:
+        super().__init__()
+        self.rates = rates
+        self.limits = limits
+        self.dropped = 0
+        self._rnd = random.Random(seed)
+        self._resolved: Dict[str, Tuple[float, Optional[List[float]]]] = {}
+
+    def _resolve(self, name: str) -> Tuple[float, Optional[List[float]]]:
+        rate = _longest_prefix(self.rates, name, 1.0)
+        limit = _longest_prefix(self.limits, name, 0.0)
+        bucket = [limit, limit, time.monotonic()] if limit > 0 else None
+        r = (rate, bucket)
+        self._resolved[name] = r
+        return r
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate, bucket = self._resolved.get(record.name) or self._resolve(record.name)
+        if rate < 1.0 and self._rnd.random() >= rate:
+            self.dropped += 1
+            return False
+        if bucket is not None:
+            now = time.monotonic()
+            bucket[1] = min(bucket[0], bucket[1] + (now - bucket[2]) * bucket[0])
+            bucket[2] = now
+            if bucket[1] < 1:
+                self.dropped += 1
+                return False
+            bucket[1] -= 1
+        return True
+
+
+class Body:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __str__(self) -> str:
+        return redact_text(self.text)
+
+
+def _longest_prefix(table: Dict[str, float], name: str, default: float) -> float:
+    best = None
+    for prefix in table:
+        if name == prefix or name.startswith(prefix + ".") or prefix == "":
+            if best is None or len(prefix) > len(best):
+                best = prefix
+    return table[best] if best is not None else default
+
+
+def parse_table(spec: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        out[k.strip()] = float(v)
+    return out
+
+
+def configure_logging(level: str, sampling: str = "", rate_limits: str = "", log_file: str = "", max_bytes: int = 10 * 1024 * 1024, backups: int = 5, console: bool = True) -> logging.Logger:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    formatter = JsonFormatter()
+    sinks: List[logging.Handler] = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(formatter)
+        sinks.append(stream)
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        rotating.setFormatter(formatter)
+        sinks.append(rotating)
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = LazyQueueHandler(q)
+    handler.addFilter(SamplingFilter(parse_table(sampling), parse_table(rate_limits)))
+    _listener = logging.handlers.QueueListener(q, *sinks, respect_handler_level=False)
+    _listener.start()
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(level.upper())
     logger = logging.getLogger("app")
     logger.setLevel(level.upper())
-    handler = logging.StreamHandler(sys.stdout)
-    fmt = "%(asctime)s %(levelname)s %(name)s %(message)s"
-    handler.setFormatter(logging.Formatter(fmt))
     logger.handlers.clear()
-    logger.addHandler(handler)
     os.environ["LOGLEVEL"] = level.upper()
     return logger
 
 
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
 def redact_text(text: str) -> str:
     lvl = os.getenv("LOGLEVEL", "INFO").upper()
     if lvl in {"INFO", "WARN", "WARNING"}:
         return "[REDACTED]"
     return text
-
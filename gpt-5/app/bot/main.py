@@ -1,20 +1,61 @@
 import asyncio
+from typing import Tuple
 from aiogram import Bot, Dispatcher
-from .settings import load_settings
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from .settings import Settings, load_settings
 from .logging import configure_logging
-from .telegram.app import create_router
+from .tracing import configure_tracing, shutdown_tracing
+from .telegram.app import create_router, store
+from .telegram.sender import SendScheduler
+from .telegram.middleware import UpdateTraceMiddleware
+from .llm.chain import probe_llm, warm_up
+from .llm.accounting import configure_usage, shutdown_usage
+from . import metrics
+from infra.healthcheck import HealthServer
 
 
-async def main() -> None:
-    settings = load_settings()
-    logger = configure_logging(settings.LOG_LEVEL)
-    logger.info(f"APP_TZ={settings.APP_TZ}")
-    bot = Bot(settings.TELEGRAM_BOT_TOKEN)
+def build_bot(settings: Settings) -> Tuple[Bot, SendScheduler]:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_BASE)) if settings.TELEGRAM_API_BASE else None
+    bot = Bot(settings.TELEGRAM_BOT_TOKEN, session=session)
+    scheduler = SendScheduler(settings.SEND_GLOBAL_RATE, settings.SEND_CHAT_RATE, settings.SEND_CHAT_BURST)
+    bot.session.middleware(scheduler)
+    return bot, scheduler
+
+
+def build_dispatcher(settings: Settings) -> Dispatcher:
     dp = Dispatcher()
+    dp.update.outer_middleware(UpdateTraceMiddleware())
     dp.include_router(create_router(settings))
+    return dp
+
+
+async def main() -> None:
+    settings = load_settings()
+    logger = configure_logging(settings.LOG_LEVEL, settings.LOG_SAMPLING, settings.LOG_RATE_LIMITS, settings.LOG_FILE, settings.LOG_FILE_MAX_BYTES, settings.LOG_FILE_BACKUPS)
+    logger.info("APP_TZ=%s", settings.APP_TZ)
+    configure_tracing(settings.TRACE_SAMPLE_RATE, settings.TRACE_FILE)
+    configure_usage(settings.USAGE_FILE, settings.USAGE_FLUSH_SECONDS)
+    bot, scheduler = build_bot(settings)
+    dp = build_dispatcher(settings)
+    metrics.gauge("bot_sessions_live", "Open batch sessions", lambda: len(store))
+    metrics.gauge("telegram_send_queue_depth", "Outgoing requests waiting in the send queue", lambda: scheduler.depth)
+    health = None
+    if settings.METRICS_PORT:
+        health = HealthServer(probe_llm)
+        await health.start(settings.METRICS_HOST, settings.METRICS_PORT)
+        logger.info("metrics on %s:%s", settings.METRICS_HOST, settings.METRICS_PORT)
 
+    warm = asyncio.create_task(warm_up())
     logger.info("ready")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if health is not None:
+            await health.stop()
+        warm.cancel()
+        shutdown_tracing()
+        shutdown_usage()
 
 
 if __name__ == "__main__":
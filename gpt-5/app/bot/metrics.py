@@ -0,0 +1,146 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from . import errors
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+        self.count += 1
+
+
+class Family:
+    __slots__ = ("name", "help", "kind", "label", "children", "fallback")
+
+    def __init__(self, name: str, help: str, kind: str, label: Optional[str], values: Iterable[str], factory: Callable[[], Union[Counter, Histogram]]) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label = label
+        self.children = {v: factory() for v in (values if label else ("",))}
+        self.fallback = self.children.setdefault("other", factory()) if label else self.children[""]
+
+    def get(self, value: str = ""):
+        return self.children.get(value, self.fallback)
+
+
+class GaugeFunc:
+    __slots__ = ("name", "help", "label", "fn")
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Union[float, Mapping[str, float]]], label: Optional[str] = None) -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+
+
+_FAMILIES: List[Family] = []
+_GAUGES: Dict[str, GaugeFunc] = {}
+
+
+def counter(name: str, help: str, label: Optional[str] = None, values: Iterable[str] = ("",)) -> Family:
+    f = Family(name, help, "counter", label, values, Counter)
+    _FAMILIES.append(f)
+    return f
+
+
+def histogram(name: str, help: str, label: Optional[str] = None, values: Iterable[str] = ("",), bounds: Sequence[float] = LATENCY_BUCKETS) -> Family:
+    f = Family(name, help, "histogram", label, values, lambda: Histogram(bounds))
+    _FAMILIES.append(f)
+    return f
+
+
+def gauge(name: str, help: str, fn: Callable[[], Union[float, Mapping[str, float]]], label: Optional[str] = None) -> None:
+    _GAUGES[name] = GaugeFunc(name, help, fn, label)
+
+
+ERROR_CODES = tuple(v for k, v in vars(errors).items() if k.isupper() and isinstance(v, str))
+
+LLM_OPS = ("extract_tasks", "self_repair", "classify_tasks")
+LLM_SECONDS = histogram("llm_call_seconds", "Latency of LLM calls", "op", LLM_OPS)
+LLM_HEDGES = counter("llm_hedged_requests_total", "Duplicate LLM requests sent after the hedge delay", "op", LLM_OPS)
+LLM_HEDGE_WINS = counter("llm_hedge_wins_total", "Hedged LLM requests that answered first", "op", LLM_OPS)
+LLM_DEADLINE_EXCEEDED = counter("llm_deadline_exceeded_total", "LLM calls abandoned at their deadline", "op", LLM_OPS)
+LLM_INPUT_TOKENS = counter("llm_input_tokens_total", "Prompt tokens reported by the model", "op", LLM_OPS)
+LLM_OUTPUT_TOKENS = counter("llm_output_tokens_total", "Completion tokens reported by the model", "op", LLM_OPS)
+EXTRACT_CHUNKING = counter("llm_extract_chunking_total", "Extract requests by how the input was sent to the model", "mode", ("single", "chunked", "fallback"))
+CLASSIFY_BATCH_ITEMS = histogram("llm_classify_batch_items", "Tasks per coalesced classify request", bounds=(1, 2, 4, 8, 16, 32, 64, 128))
+CLASSIFY_BATCH_CHATS = histogram("llm_classify_batch_chats", "Chats per coalesced classify request", bounds=(1, 2, 4, 8, 16, 32, 64))
+CLASSIFY_LOCAL = counter("llm_classify_local_total", "Tasks tagged by the local classifier or sent on to the LLM", "by", ("local", "llm"))
+CLASSIFY_FALLBACKS = counter("llm_classify_batch_fallback_total", "Coalesced classify requests that failed and fell back to per-chat calls")
+SEND_SECONDS = histogram("telegram_send_seconds", "Latency of outgoing Telegram requests", "method", ("sendMessage", "editMessageText", "editMessageReplyMarkup"))
+SEND_WAIT_SECONDS = histogram("telegram_send_queue_wait_seconds", "Time outgoing requests spent queued before completion")
+SEND_RETRIES = counter("telegram_send_retry_after_total", "Outgoing requests rejected with retry_after")
+CALLBACK_TOKENS = counter("telegram_callback_tokens_total", "Approve/Reject presses by token check result", "result", ("ok", "malformed", "bad_signature", "expired", "missing", "replayed"))
+ERRORS = counter("bot_errors_total", "Error codes emitted", "code", ERROR_CODES)
+
+
+def record_error(code: str) -> None:
+    ERRORS.get(code).inc()
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, int) or float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    out: List[str] = []
+    for f in _FAMILIES:
+        out.append(f"# HELP {f.name} {f.help}")
+        out.append(f"# TYPE {f.name} {f.kind}")
+        for value, child in f.children.items():
+            base = [(f.label, value)] if f.label else []
+            if isinstance(child, Counter):
+                out.append(f"{f.name}{_labels(base)} {child.value}")
+                continue
+            acc = 0
+            for bound, n in zip(child.bounds + (float("inf"),), child.counts):
+                acc += n
+                out.append(f"{f.name}_bucket{_labels(base + [('le', _fmt(bound))])} {acc}")
+            out.append(f"{f.name}_sum{_labels(base)} {_fmt(child.sum)}")
+            out.append(f"{f.name}_count{_labels(base)} {child.count}")
+    for g in _GAUGES.values():
+        out.append(f"# HELP {g.name} {g.help}")
+        out.append(f"# TYPE {g.name} gauge")
+        try:
+            v = g.fn()
+        except Exception:
+            continue
+        if isinstance(v, Mapping):
+            for k, n in v.items():
+                out.append(f"{g.name}{_labels([(g.label or 'key', str(k))])} {_fmt(n)}")
+        else:
+            out.append(f"{g.name} {_fmt(v)}")
+    return "\n".join(out) + "\n"
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, date
 from typing import List, Set
 from ..llm.schemas import TaskExtract
 from . import rules
+from ..tracing import span
 
 
 def _shift_if_needed(dt: datetime, holidays: Set[date]) -> datetime:
@@ -12,6 +13,14 @@ def _shift_if_needed(dt: datetime, holidays: Set[date]) -> datetime:
 
 
 def next_occurrences(task: TaskExtract, now_utc: datetime, holidays: Set[date]) -> List[datetime]:
+    with span("scheduler.next_occurrences") as sp:
+        sp.set("kind", task.kind)
+        out = _next_occurrences(task, now_utc, holidays)
+        sp.set("found", len(out))
+        return out
+
+
+def _next_occurrences(task: TaskExtract, now_utc: datetime, holidays: Set[date]) -> List[datetime]:
     out: List[datetime] = []
     kind = task.kind
     t = task.time
@@ -5,18 +5,58 @@ from pydantic import BaseModel, ValidationError
 class Settings(BaseModel):
     TELEGRAM_BOT_TOKEN: str
     OPENAI_API_KEY: str
+    TELEGRAM_API_BASE: str = ""
     APP_TZ: str = "UTC"
     LOG_LEVEL: str = "INFO"
+    LOG_SAMPLING: str = ""
+    LOG_RATE_LIMITS: str = ""
+    LOG_FILE: str = ""
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUPS: int = 5
     MAX_PROMPT_TOKENS: int = 24000
+    CLASSIFY_BATCH_WINDOW_MS: float = 50.0
+    CLASSIFY_BATCH_MAX_ITEMS: int = 64
+    SEND_GLOBAL_RATE: float = 30.0
+    SEND_CHAT_RATE: float = 1.0
+    SEND_CHAT_BURST: int = 3
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 8080
+    TRACE_SAMPLE_RATE: float = 0.0
+    TRACE_FILE: str = "traces/traces.jsonl"
+    USAGE_FILE: str = ""
+    USAGE_FLUSH_SECONDS: float = 60.0
+    CALLBACK_SECRET: str = ""
+    CALLBACK_DB: str = "data/callbacks.db"
+    CALLBACK_TTL_SECONDS: float = 172800.0
 
 
 def load_settings() -> Settings:
     data = {
         "TELEGRAM_BOT_TOKEN": os.getenv("TELEGRAM_BOT_TOKEN"),
         "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+        "TELEGRAM_API_BASE": os.getenv("TELEGRAM_API_BASE", ""),
         "APP_TZ": os.getenv("APP_TZ", "UTC"),
         "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+        "LOG_SAMPLING": os.getenv("LOG_SAMPLING", ""),
+        "LOG_RATE_LIMITS": os.getenv("LOG_RATE_LIMITS", ""),
+        "LOG_FILE": os.getenv("LOG_FILE", ""),
+        "LOG_FILE_MAX_BYTES": int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024))),
+        "LOG_FILE_BACKUPS": int(os.getenv("LOG_FILE_BACKUPS", "5")),
         "MAX_PROMPT_TOKENS": int(os.getenv("MAX_PROMPT_TOKENS", "24000")),
+        "CLASSIFY_BATCH_WINDOW_MS": float(os.getenv("CLASSIFY_BATCH_WINDOW_MS", "50")),
+        "CLASSIFY_BATCH_MAX_ITEMS": int(os.getenv("CLASSIFY_BATCH_MAX_ITEMS", "64")),
+        "SEND_GLOBAL_RATE": float(os.getenv("SEND_GLOBAL_RATE", "30")),
+        "SEND_CHAT_RATE": float(os.getenv("SEND_CHAT_RATE", "1")),
+        "SEND_CHAT_BURST": int(os.getenv("SEND_CHAT_BURST", "3")),
+        "METRICS_HOST": os.getenv("METRICS_HOST", "0.0.0.0"),
+        "METRICS_PORT": int(os.getenv("METRICS_PORT", "8080")),
+        "TRACE_SAMPLE_RATE": float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+        "TRACE_FILE": os.getenv("TRACE_FILE", "traces/traces.jsonl"),
+        "USAGE_FILE": os.getenv("USAGE_FILE", ""),
+        "USAGE_FLUSH_SECONDS": float(os.getenv("USAGE_FLUSH_SECONDS", "60")),
+        "CALLBACK_SECRET": os.getenv("CALLBACK_SECRET", ""),
+        "CALLBACK_DB": os.getenv("CALLBACK_DB", "data/callbacks.db"),
+        "CALLBACK_TTL_SECONDS": float(os.getenv("CALLBACK_TTL_SECONDS", "172800")),
     }
     settings = Settings(**data)
     if settings.APP_TZ != "UTC":
@@ -1,5 +1,8 @@
+import asyncio
 import io
 import json
+import logging
+import time
 from datetime import datetime, timezone, date
 from typing import List
 from aiogram import Router, F
@@ -7,28 +10,82 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram import types
 from ..settings import Settings
-from ..logging import redact_text
+from ..logging import Body
+from ..metrics import CALLBACK_TOKENS, record_error
+from ..tracing import span, current
 from ..errors import (
     INPUT_TOO_LONG,
-    OUTPUT_TOO_LONG,
     CONTEXT_TOO_LARGE,
     ATTACHMENT_INVALID,
     ATTACHMENT_JSON_INVALID,
+    ATTACHMENT_MISSING,
+    ATTACHMENT_MULTIPLE,
     HOLIDAYS_JSON_INVALID,
+    NEED_ANCHOR,
+    NEED_TAG,
+    NEED_TIME,
+    NO_TASKS_FOUND,
+    PARSE_FAILED,
+    UNSUPPORTED_RECURRENCE,
 )
-from ..llm.chain import extract_tasks, classify_tasks
-from ..llm.schemas import TaskExtract, Holidays
+from ..llm.chain import extract_tasks
+from ..llm.accounting import set_user
+from ..llm.batching import ClassifyBatcher
+from ..llm.schemas import TaskBatch, TaskExtract, Holidays
 from ..holidays import parse_telegram_document
 from .session import SessionStore
-from .keyboards import approval_keyboard, disabled_keyboard
-from .templates import build_clarifications, build_proposed_list, build_final_schedule
+from .callbacks import PREFIX, REJECT, Signer, SnapshotStore, derive_key
+from .keyboards import approval_row, current_approval_row, disabled_keyboard, page_keyboard
+from .middleware import HandlerTraceMiddleware
+from .templates import (
+    CLARIFICATIONS_HEADER,
+    PROPOSAL_HEADER,
+    SCHEDULE_HEADER,
+    build_clarifications,
+    clarification_block,
+    pending_clarifications,
+    proposal_block,
+    schedule_block,
+)
+from .paging import Pager, PagerStore
 
 
 store = SessionStore()
+pagers = PagerStore()
+log = logging.getLogger("app.telegram")
+
+_NEED_CODES = {"time": NEED_TIME, "tag": NEED_TAG, "anchor": NEED_ANCHOR, "unsupported": UNSUPPORTED_RECURRENCE}
+_TOKEN_ANSWERS = {
+    "malformed": "This button is no longer valid.",
+    "bad_signature": "This button is no longer valid.",
+    "expired": "This proposal has expired. Please send your tasks again.",
+    "missing": "This proposal has expired. Please send your tasks again.",
+    "replayed": "This proposal was already answered.",
+}
+
+
+def proposal_snapshot(batch: List[TaskExtract], holidays: Holidays | None, anchor: date) -> dict:
+    return {
+        "tasks": [t.model_dump(mode="json") for t in batch],
+        "holidays": sorted(d.date for d in holidays.dates) if holidays else [],
+        "anchor": anchor.isoformat(),
+    }
+
+
+def end_session(chat_id: int, message_id: int) -> None:
+    # Tokens outlive sessions, so an old proposal's buttons must not end the conversation the chat has now
+    s = store.get(chat_id)
+    if s is not None and s.last_proposal_msg_id == message_id:
+        store.purge(chat_id)
 
 
 def create_router(settings: Settings) -> Router:
     r = Router()
+    classifier = ClassifyBatcher(settings.CLASSIFY_BATCH_WINDOW_MS / 1000, settings.CLASSIFY_BATCH_MAX_ITEMS)
+    r.message.middleware(HandlerTraceMiddleware())
+    r.callback_query.middleware(HandlerTraceMiddleware())
+    signer = Signer(derive_key(settings.CALLBACK_SECRET, settings.TELEGRAM_BOT_TOKEN), settings.CALLBACK_TTL_SECONDS)
+    snapshots = SnapshotStore(settings.CALLBACK_DB, settings.CALLBACK_TTL_SECONDS)
 
     @r.message(Command("help"))
     async def help_cmd(message: Message):
@@ -47,6 +104,7 @@ def create_router(settings: Settings) -> Router:
     async def clear_cmd(message: Message):
         if message.chat:
             store.purge(message.chat.id)
+            pagers.purge(message.chat.id)
         await message.answer("Session cleared.")
 
     @r.message(F.document)
@@ -54,18 +112,24 @@ def create_router(settings: Settings) -> Router:
         if not message.chat:
             return
         if message.media_group_id:
+            record_error(ATTACHMENT_MULTIPLE)
             await message.answer("ATTACHMENT_MULTIPLE")
             return
         doc = message.document
         if not doc:
+            record_error(ATTACHMENT_MISSING)
             await message.answer("ATTACHMENT_MISSING")
             return
         bot = message.bot
         bio = io.BytesIO()
-        await bot.download(doc, destination=bio)
-        data = bio.getvalue()
-        parsed = parse_telegram_document(doc.file_name or "", doc.mime_type or "", doc.file_size or 0, data)
+        with span("telegram.download") as sp:
+            await bot.download(doc, destination=bio)
+            data = bio.getvalue()
+            sp.set("bytes", len(data))
+        with span("holidays.parse"):
+            parsed = parse_telegram_document(doc.file_name or "", doc.mime_type or "", doc.file_size or 0, data)
         if isinstance(parsed, str):
+            record_error(parsed)
             if parsed == ATTACHMENT_JSON_INVALID:
                 await message.answer("ATTACHMENT_JSON_INVALID")
             elif parsed == HOLIDAYS_JSON_INVALID:
@@ -85,7 +149,10 @@ def create_router(settings: Settings) -> Router:
             return
         chat_id = message.chat.id
         txt = message.text or ""
+        log.debug("text chat=%s body=%s", chat_id, Body(txt))
+        current().set("input_chars", len(txt))
         if len(txt) > 4096:
+            record_error(INPUT_TOO_LONG)
             await message.answer(INPUT_TOO_LONG)
             return
         now = message.date or datetime.now(timezone.utc)
@@ -97,18 +164,23 @@ def create_router(settings: Settings) -> Router:
         else:
             store.append_message(chat_id, txt)
         holidays_obj = s.latest_holidays.model_dump() if s.latest_holidays else None
-        res = extract_tasks(s.initial_text, s.messages, holidays_obj, now, settings.MAX_PROMPT_TOKENS)
+        set_user(chat_id)
+        res = await extract_tasks(s.initial_text, s.messages, holidays_obj, now, settings.MAX_PROMPT_TOKENS)
         if res == CONTEXT_TOO_LARGE:
+            record_error(CONTEXT_TOO_LARGE)
             await message.answer(CONTEXT_TOO_LARGE)
             return
-        if res == "PARSE_FAILED":
+        if res == PARSE_FAILED:
+            record_error(PARSE_FAILED)
             await message.answer("I couldn't parse that. Please restate each task and include times like HH:MM.")
             return
         batch = res
         if not batch or len(batch) == 0:
+            record_error(NO_TASKS_FOUND)
             await message.answer("NO_TASKS_FOUND")
             return
-        batch2 = classify_tasks(batch)
+        batch2 = await classifier.classify(batch)
+        current().set("tasks", len(batch2))
         unresolved = []
         for t in batch2:
             needs = list(t.needs or [])
@@ -116,58 +188,98 @@ def create_router(settings: Settings) -> Router:
                 needs.append("tag")
             if needs:
                 unresolved.append(t)
+                for n in needs:
+                    if n in _NEED_CODES:
+                        record_error(_NEED_CODES[n])
         if unresolved:
-            msg = build_clarifications(batch2)
-            if len(msg) > 4096:
-                await message.answer(OUTPUT_TOO_LONG)
+            pending = pending_clarifications(batch2)
+            if not pending:
+                await message.answer(build_clarifications(batch2))
+                store.set_task_batch(chat_id, batch2)
                 return
-            await message.answer(msg)
-            store.append_message(chat_id, msg)
+            pager = Pager(CLARIFICATIONS_HEADER, lambda i: clarification_block(i + 1, pending[i]), len(pending), sep="\n")
+            with span("render.clarifications"):
+                _, msg, has_next = pager.page(0)
+            sent = await message.answer(msg, reply_markup=page_keyboard(0, has_next))
+            if has_next:
+                pagers.put(chat_id, sent.message_id, pager)
+            store.append_message(chat_id, build_clarifications(batch2))
             store.set_task_batch(chat_id, batch2)
             return
-        proposal = build_proposed_list(batch2)
-        if len(proposal) > 4096:
-            await message.answer(OUTPUT_TOO_LONG)
-            return
-        sent = await message.answer(proposal, reply_markup=approval_keyboard())
+        pager = Pager(PROPOSAL_HEADER, lambda i: proposal_block(i + 1, batch2[i]), len(batch2), approval=True)
+        with span("render.proposal"):
+            _, proposal, has_next = pager.page(0)
+        # The buttons carry everything Approve needs, so any worker can answer them after a restart
+        digest = await asyncio.to_thread(snapshots.put, proposal_snapshot(batch2, s.latest_holidays, s.created_at.date()))
+        sent = await message.answer(proposal, reply_markup=page_keyboard(0, has_next, approval_row(*signer.pair(chat_id, digest))))
+        if has_next:
+            pagers.put(chat_id, sent.message_id, pager)
         store.set_task_batch(chat_id, batch2)
         store.set_last_proposal(chat_id, sent.message_id)
 
-    @r.callback_query(F.data == "APR")
-    async def on_approve(cb: CallbackQuery):
-        await cb.answer()
+    @r.callback_query(F.data.startswith(PREFIX))
+    async def on_decision(cb: CallbackQuery):
         if not cb.message or not cb.message.chat:
+            await cb.answer()
             return
         chat_id = cb.message.chat.id
-        s = store.get(chat_id)
-        if not s or not s.task_batch:
+        result, claim = signer.verify(chat_id, cb.data, time.time())
+        snap = None
+        if claim is not None:
+            result, snap = await asyncio.to_thread(snapshots.redeem, chat_id, claim)
+        CALLBACK_TOKENS.get(result).inc()
+        if result != "ok":
+            await cb.answer(_TOKEN_ANSWERS[result])
+            return
+        await cb.answer()
+        if claim.action == REJECT:
+            try:
+                await cb.message.edit_text("Rejected ❌", reply_markup=disabled_keyboard())
+            except Exception:
+                pass
+            pagers.drop(chat_id, cb.message.message_id)
+            end_session(chat_id, cb.message.message_id)
             return
         try:
             await cb.message.edit_text("Approved ✅", reply_markup=disabled_keyboard())
         except Exception:
             pass
         now = datetime.now(timezone.utc)
-        holidays_list: List[date] = []
-        if s.latest_holidays:
-            for d in s.latest_holidays.dates:
-                y, m, d2 = [int(x) for x in d.date.split("-")]
-                holidays_list.append(date(y, m, d2))
-        final = build_final_schedule(s.task_batch, now, holidays_list, s.created_at.date())
-        if len(final) > 4096:
-            await cb.message.answer(OUTPUT_TOO_LONG)
-        else:
-            await cb.message.answer(final)
-        store.purge(chat_id)
+        batch = TaskBatch.validate_python(snap["tasks"])
+        hset = {date.fromisoformat(d) for d in snap["holidays"]}
+        anchor = date.fromisoformat(snap["anchor"])
+        pager = Pager(SCHEDULE_HEADER, lambda i: schedule_block(i + 1, batch[i], now, hset, anchor), len(batch))
+        with span("render.final_schedule") as sp:
+            sp.set("tasks", len(batch))
+            _, final, has_next = pager.page(0)
+        sent = await cb.message.answer(final, reply_markup=page_keyboard(0, has_next))
+        pagers.drop(chat_id, cb.message.message_id)
+        if has_next:
+            pagers.put(chat_id, sent.message_id, pager)
+        end_session(chat_id, cb.message.message_id)
 
-    @r.callback_query(F.data == "REJ")
-    async def on_reject(cb: CallbackQuery):
-        await cb.answer()
+    @r.callback_query(F.data.startswith("PG:"))
+    async def on_page(cb: CallbackQuery):
         if not cb.message or not cb.message.chat:
+            await cb.answer()
+            return
+        chat_id = cb.message.chat.id
+        pager = pagers.get(chat_id, cb.message.message_id)
+        if pager is None:
+            await cb.answer("This list has expired.")
+            return
+        await cb.answer()
+        try:
+            n = int(cb.data[3:])
+        except ValueError:
             return
+        with span("render.page") as sp:
+            n, text, has_next = pager.page(n)
+            sp.set("page", n)
+        approval = current_approval_row(cb.message.reply_markup) if pager.approval else None
         try:
-            await cb.message.edit_text("Rejected ❌", reply_markup=disabled_keyboard())
+            await cb.message.edit_text(text, reply_markup=page_keyboard(n, has_next, approval))
         except Exception:
             pass
-        store.purge(cb.message.chat.id)
 
     return r
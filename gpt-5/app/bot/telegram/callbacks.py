@@ -0,0 +1,154 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+PREFIX = "T:"
+VERSION = 1
+APPROVE = 0
+REJECT = 1
+# Reserved for batches carried in the token itself; none of ours fit (see bench/callback_tokens.py)
+INLINE = 0x8
+DIGEST_BYTES = 12
+MAC_BYTES = 10
+PURGE_EVERY = 3600.0
+# version << 4 | flags | action, issued at (epoch s), nonce shared by the Approve and Reject buttons
+_HEAD = struct.Struct(">BII")
+_CHAT = struct.Struct(">q")
+_RAW = _HEAD.size + DIGEST_BYTES + MAC_BYTES
+_SKEW = 300
+
+
+class Claim(NamedTuple):
+    action: int
+    issued: int
+    nonce: int
+    digest: bytes
+
+
+def derive_key(secret: str, bot_token: str) -> bytes:
+    if secret:
+        return secret.encode()
+    # Every worker running the same bot shares the token, so they agree on the key without extra config
+    return hashlib.sha256(b"callback-token:" + bot_token.encode()).digest()
+
+
+class Signer:
+    def __init__(self, key: bytes, ttl: float) -> None:
+        self.key = key
+        self.ttl = ttl
+
+    def _mac(self, chat_id: int, body: bytes) -> bytes:
+        return hmac.new(self.key, _CHAT.pack(chat_id) + body, hashlib.sha256).digest()[:MAC_BYTES]
+
+    def issue(self, chat_id: int, action: int, digest: bytes, issued: int, nonce: int) -> str:
+        body = _HEAD.pack(VERSION << 4 | action, issued, nonce) + digest
+        return PREFIX + base64.urlsafe_b64encode(body + self._mac(chat_id, body)).rstrip(b"=").decode()
+
+    def pair(self, chat_id: int, digest: bytes, now: Optional[float] = None) -> Tuple[str, str]:
+        issued = int(time.time() if now is None else now)
+        nonce = secrets.randbits(32)
+        return self.issue(chat_id, APPROVE, digest, issued, nonce), self.issue(chat_id, REJECT, digest, issued, nonce)
+
+    def verify(self, chat_id: int, data: str, now: float) -> Tuple[str, Optional[Claim]]:
+        if not data.startswith(PREFIX):
+            return "malformed", None
+        text = data[len(PREFIX):]
+        try:
+            raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except (ValueError, binascii.Error):
+            return "malformed", None
+        if len(raw) != _RAW:
+            return "malformed", None
+        body = raw[:-MAC_BYTES]
+        if not hmac.compare_digest(raw[-MAC_BYTES:], self._mac(chat_id, body)):
+            return "bad_signature", None
+        head, issued, nonce = _HEAD.unpack_from(body)
+        if head >> 4 != VERSION or head & 0x7 not in (APPROVE, REJECT) or head & INLINE:
+            return "malformed", None
+        if now - issued > self.ttl or issued - now > _SKEW:
+            return "expired", None
+        return "ok", Claim(head & 0x7, issued, nonce, body[_HEAD.size:])
+
+
+def snapshot_body(payload: Dict[str, Any]) -> Tuple[bytes, bytes]:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.sha256(raw).digest()[:DIGEST_BYTES], zlib.compress(raw, 6)
+
+
+class SnapshotStore:
+    """Proposal snapshots keyed by content digest, plus the ledger of used tokens; one SQLite file that every worker on the host opens.
+    Calls can wait on another worker's write lock, so handlers make them through asyncio.to_thread"""
+
+    def __init__(self, path: str, ttl: float) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS snapshots (digest BLOB PRIMARY KEY, created REAL NOT NULL, body BLOB NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS used (chat INTEGER NOT NULL, issued INTEGER NOT NULL, nonce INTEGER NOT NULL, PRIMARY KEY (chat, issued, nonce))")
+        self._purged = 0.0
+
+    def put(self, payload: Dict[str, Any], now: Optional[float] = None) -> bytes:
+        now = time.time() if now is None else now
+        digest, body = snapshot_body(payload)
+        with self._lock:
+            # Identical batches share a row; re-proposing one keeps it alive for another TTL
+            self._db.execute("INSERT INTO snapshots VALUES (?, ?, ?) ON CONFLICT(digest) DO UPDATE SET created = excluded.created", (digest, now, body))
+            if now - self._purged > PURGE_EVERY:
+                self._purge(now)
+        return digest
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT body FROM snapshots WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+    def consume(self, chat_id: int, claim: Claim) -> bool:
+        """True for the first use of a proposal's buttons on any worker, False for every later one"""
+        with self._lock:
+            cur = self._db.execute("INSERT OR IGNORE INTO used VALUES (?, ?, ?)", (chat_id, claim.issued, claim.nonce))
+        return cur.rowcount == 1
+
+    def redeem(self, chat_id: int, claim: Claim) -> Tuple[str, Optional[Dict[str, Any]]]:
+        snap = self.get(claim.digest)
+        if snap is None:
+            return "missing", None
+        if not self.consume(chat_id, claim):
+            return "replayed", None
+        return "ok", snap
+
+    def _purge(self, now: float) -> None:
+        # Tokens older than the TTL fail verification anyway, so their snapshots and used rows can go
+        self._db.execute("DELETE FROM snapshots WHERE created < ?", (now - self.ttl - _SKEW,))
+        self._db.execute("DELETE FROM used WHERE issued < ?", (int(now - self.ttl) - _SKEW,))
+        self._purged = now
+
+    def purge(self, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._purge(time.time() if now is None else now)
+
+    def count(self) -> Tuple[int, int]:
+        with self._lock:
+            return (self._db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0], self._db.execute("SELECT COUNT(*) FROM used").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
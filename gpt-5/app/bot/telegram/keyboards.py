@@ -1,10 +1,33 @@
+from typing import List, Optional
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from .callbacks import PREFIX
 
 
-def approval_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="✅ Approve", callback_data="APR"), InlineKeyboardButton(text="❌ Reject", callback_data="REJ")]])
+def approval_row(approve: str, reject: str) -> List[InlineKeyboardButton]:
+    return [InlineKeyboardButton(text="✅ Approve", callback_data=approve), InlineKeyboardButton(text="❌ Reject", callback_data=reject)]
+
+
+def current_approval_row(markup: Optional[InlineKeyboardMarkup]) -> Optional[List[InlineKeyboardButton]]:
+    if markup and markup.inline_keyboard and (markup.inline_keyboard[0][0].callback_data or "").startswith(PREFIX):
+        return markup.inline_keyboard[0]
+    return None
 
 
 def disabled_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Approved ✅", callback_data="APR_DISABLED"), InlineKeyboardButton(text="Rejected ❌", callback_data="REJ_DISABLED")]])
 
+
+def page_keyboard(page: int, has_next: bool, approval: Optional[List[InlineKeyboardButton]] = None) -> InlineKeyboardMarkup | None:
+    rows = []
+    if approval:
+        rows.append(approval)
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀ Prev", callback_data=f"PG:{page - 1}"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="Next ▶", callback_data=f"PG:{page + 1}"))
+    if nav:
+        rows.append(nav)
+    if not rows:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=rows)
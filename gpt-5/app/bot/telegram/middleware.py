@@ -0,0 +1,24 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from ..tracing import span
+
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+
+
+class UpdateTraceMiddleware(BaseMiddleware):
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        with span("update") as sp:
+            if isinstance(event, Update):
+                sp.set("update_id", event.update_id)
+                sp.set("update_type", event.event_type)
+            return await handler(event, data)
+
+
+class HandlerTraceMiddleware(BaseMiddleware):
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        h = data.get("handler")
+        name = getattr(getattr(h, "callback", None), "__name__", "handler")
+        with span("handler." + name):
+            return await handler(event, data)
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+
+MESSAGE_LIMIT = 4096
+_FOOTER_RESERVE = 32
+
+
+def render_chunk(header: str, block: Callable[[int], str], count: int, start: int, sep: str = "\n\n", limit: int = MESSAGE_LIMIT) -> Tuple[str, int]:
+    budget = limit - _FOOTER_RESERVE
+    parts = [header]
+    size = len(header)
+    i = start
+    while i < count:
+        b = block(i)
+        need = len(sep) + len(b)
+        if size + need > budget:
+            if i == start:
+                parts.append(b[: max(0, budget - size - len(sep) - 1)] + "…")
+                i += 1
+            break
+        parts.append(b)
+        size += need
+        i += 1
+    return sep.join(parts), i
+
+
+class Pager:
+    __slots__ = ("header", "block", "count", "sep", "approval", "starts")
+
+    def __init__(self, header: str, block: Callable[[int], str], count: int, sep: str = "\n\n", approval: bool = False) -> None:
+        self.header = header
+        self.block = block
+        self.count = count
+        self.sep = sep
+        self.approval = approval
+        self.starts: List[int] = [0]
+
+    def page(self, n: int) -> Tuple[int, str, bool]:
+        n = max(0, min(n, len(self.starts) - 1))
+        text, end = render_chunk(self.header, self.block, self.count, self.starts[n], self.sep)
+        has_next = end < self.count
+        if has_next and len(self.starts) == n + 1:
+            self.starts.append(end)
+        if has_next or n > 0:
+            text += f"\n\n— page {n + 1}"
+        return n, text, has_next
+
+
+class PagerStore:
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = capacity
+        self._pagers: "OrderedDict[Tuple[int, int], Pager]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pagers)
+
+    def put(self, chat_id: int, message_id: int, pager: Pager) -> None:
+        self._pagers[(chat_id, message_id)] = pager
+        self._pagers.move_to_end((chat_id, message_id))
+        while len(self._pagers) > self.capacity:
+            self._pagers.popitem(last=False)
+
+    def get(self, chat_id: int, message_id: int) -> Optional[Pager]:
+        p = self._pagers.get((chat_id, message_id))
+        if p is not None:
+            self._pagers.move_to_end((chat_id, message_id))
+        return p
+
+    def drop(self, chat_id: int, message_id: Optional[int]) -> None:
+        if message_id is not None:
+            self._pagers.pop((chat_id, message_id), None)
+
+    def purge(self, chat_id: int) -> None:
+        for k in [k for k in self._pagers if k[0] == chat_id]:
+            del self._pagers[k]
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Union
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, TelegramMethod
+from ..metrics import SEND_RETRIES, SEND_SECONDS, SEND_WAIT_SECONDS
+from ..tracing import span
+
+
+ChatId = Union[int, str]
+
+_WAIT_SECONDS = SEND_WAIT_SECONDS.get()
+_RETRIES = SEND_RETRIES.get()
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self, now: float) -> float:
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def until_full(self, now: float) -> float:
+        self.refill(now)
+        return (self.capacity - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+
+class _Pending:
+    __slots__ = ("make_request", "bot", "method", "future", "enqueued", "edit_key", "attempts")
+
+    def __init__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod, future: asyncio.Future, edit_key: Optional[int]) -> None:
+        self.make_request = make_request
+        self.bot = bot
+        self.method = method
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.edit_key = edit_key
+        self.attempts = 0
+
+
+class _Lane:
+    __slots__ = ("bucket", "queue", "edits", "blocked_until", "worker", "wake")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.queue: Deque[_Pending] = deque()
+        self.edits: Dict[int, _Pending] = {}
+        self.blocked_until = 0.0
+        self.worker: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3, group_rate: float = 20 / 60, max_retries: int = 5) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, max(1.0, global_rate))
+        self._lanes: Dict[ChatId, _Lane] = {}
+        self.depth = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        with span("telegram.send") as sp:
+            sp.set("method", method.__api_method__)
+            return await self._submit(make_request, bot, method)
+
+    async def _submit(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            t0 = time.monotonic()
+            try:
+                return await make_request(bot, method)
+            finally:
+                SEND_SECONDS.get(method.__api_method__).observe(time.monotonic() - t0)
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._new_lane(chat_id)
+        edit_key = method.message_id if isinstance(method, EditMessageText) else None
+        if edit_key is not None:
+            queued = lane.edits.get(edit_key)
+            if queued is not None:
+                queued.method = method
+                self.coalesced += 1
+                return await asyncio.shield(queued.future)
+        p = _Pending(make_request, bot, method, asyncio.get_running_loop().create_future(), edit_key)
+        lane.queue.append(p)
+        if edit_key is not None:
+            lane.edits[edit_key] = p
+        self.depth += 1
+        if lane.worker is None:
+            lane.worker = asyncio.create_task(self._drain(chat_id, lane))
+        else:
+            lane.wake.set()
+        return await asyncio.shield(p.future)
+
+    def snapshot(self) -> Dict[str, float]:
+        dispatched = self.sent + self.failed
+        return {
+            "queue_depth": self.depth,
+            "lanes": len(self._lanes),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "wait_avg_s": self.wait_total / dispatched if dispatched else 0.0,
+            "wait_max_s": self.wait_max,
+        }
+
+    def _new_lane(self, chat_id: ChatId) -> _Lane:
+        if isinstance(chat_id, int) and chat_id > 0:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        else:
+            bucket = TokenBucket(self.group_rate, 1)
+        lane = _Lane(bucket)
+        self._lanes[chat_id] = lane
+        return lane
+
+    async def _take_global(self) -> None:
+        while True:
+            d = self._global.delay(time.monotonic())
+            if d <= 0:
+                self._global.consume()
+                return
+            await asyncio.sleep(d)
+
+    async def _drain(self, chat_id: ChatId, lane: _Lane) -> None:
+        try:
+            while True:
+                if not lane.queue:
+                    now = time.monotonic()
+                    idle = max(lane.blocked_until - now, lane.bucket.until_full(now))
+                    if idle <= 0:
+                        return
+                    # Keep the lane (and its bucket) until it refills, but send new work as soon as it arrives
+                    lane.wake.clear()
+                    try:
+                        await asyncio.wait_for(lane.wake.wait(), idle)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                now = time.monotonic()
+                wait = max(lane.blocked_until - now, lane.bucket.delay(now))
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                await self._take_global()
+                lane.bucket.consume()
+                p = lane.queue.popleft()
+                if p.edit_key is not None and lane.edits.get(p.edit_key) is p:
+                    del lane.edits[p.edit_key]
+                t0 = time.monotonic()
+                exc: Optional[Exception] = None
+                try:
+                    result = await p.make_request(p.bot, p.method)
+                except Exception as e:
+                    result, exc = None, e
+                SEND_SECONDS.get(p.method.__api_method__).observe(time.monotonic() - t0)
+                if isinstance(exc, TelegramRetryAfter):
+                    lane.blocked_until = time.monotonic() + exc.retry_after
+                    self.retried += 1
+                    _RETRIES.inc()
+                    p.attempts += 1
+                    if p.attempts > self.max_retries:
+                        self._finish(p, exc=exc)
+                    else:
+                        self._requeue(lane, p)
+                else:
+                    self._finish(p, result=result, exc=exc)
+        except asyncio.CancelledError:
+            while lane.queue:
+                lane.queue.popleft().future.cancel()
+                self.depth -= 1
+            lane.edits.clear()
+            raise
+        finally:
+            lane.worker = None
+            if not lane.queue and self._lanes.get(chat_id) is lane:
+                del self._lanes[chat_id]
+
+    def _requeue(self, lane: _Lane, p: _Pending) -> None:
+        if p.edit_key is not None:
+            newer = lane.edits.get(p.edit_key)
+            if newer is not None:
+                self.depth -= 1
+                self.coalesced += 1
+                newer.future.add_done_callback(lambda f, p=p: _copy_outcome(f, p.future))
+                return
+            lane.edits[p.edit_key] = p
+        lane.queue.appendleft(p)
+
+    def _finish(self, p: _Pending, result: Any = None, exc: Optional[BaseException] = None) -> None:
+        self.depth -= 1
+        waited = time.monotonic() - p.enqueued
+        self.wait_total += waited
+        _WAIT_SECONDS.observe(waited)
+        if waited > self.wait_max:
+            self.wait_max = waited
+        if p.future.done():
+            return
+        if exc is not None:
+            self.failed += 1
+            p.future.set_exception(exc)
+        else:
+            self.sent += 1
+            p.future.set_result(result)
+
+
+def _copy_outcome(src: asyncio.Future, dst: asyncio.Future) -> None:
+    if dst.done():
+        return
+    if src.cancelled():
+        dst.cancel()
+    elif src.exception() is not None:
+        dst.set_exception(src.exception())
+    else:
+        dst.set_result(src.result())
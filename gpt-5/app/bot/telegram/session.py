@@ -17,6 +17,9 @@ class SessionStore:
     def __init__(self) -> None:
         self._sessions: Dict[int, Session] = {}
 
+    def __len__(self) -> int:
+        return len(self._sessions)
+
     def start(self, chat_id: int, initial_text: str, now: datetime) -> Session:
         s = Session(initial_text=initial_text, messages=[], created_at=now)
         self._sessions[chat_id] = s
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Set
 from ..llm.schemas import TaskExtract
 from ..scheduler.engine import next_occurrences
 from ..scheduler.format import format_dt
@@ -21,67 +21,70 @@ def _recurrence_label(t: TaskExtract) -> str:
     return "Unsupported"
 
 
+CLARIFICATIONS_HEADER = "I need a few clarifications before I can schedule:"
+PROPOSAL_HEADER = "📋 Parsed Tasks:"
+SCHEDULE_HEADER = "📅 Next Occurrences:"
+
+_QUESTIONS = {
+    "time": "What time of day (HH:MM UTC)?",
+    "tag": "Is this [work] or [personal]?",
+    "anchor": "If it repeats every N days, what start date? If none, say 'use today'.",
+    "unsupported": "The recurrence you described is unsupported. Please restate using only: one-time, daily, weekday, weekly, or every N days.",
+}
+
+
+def needs_of(t: TaskExtract) -> List[str]:
+    needs = list(t.needs or [])
+    if t.tag == "unsure" and "tag" not in needs:
+        needs.append("tag")
+    return needs
+
+
+def clarification_block(idx: int, t: TaskExtract) -> str:
+    needs = needs_of(t)
+    qs = [q for n, q in _QUESTIONS.items() if n in needs]
+    return f"{idx}) \"{t.name}\" — " + " ".join(qs)
+
+
+def proposal_block(idx: int, t: TaskExtract) -> str:
+    lines = [f"{idx}. [{t.tag}] {t.name}"]
+    if t.time:
+        lines.append(f"   - Time: {t.time} GMT")
+    else:
+        lines.append("   - Time: (missing)")
+    lines.append(f"   - Recurrence: {_recurrence_label(t)}")
+    return "\n".join(lines)
+
+
+def schedule_block(idx: int, t: TaskExtract, now_utc: datetime, hset: Set[date], anchor_date: date) -> str:
+    lines = [f"{idx}) [{t.tag}] \"{t.name}\""]
+    tt = t
+    if tt.kind == "every_n_days" and not tt.date:
+        tt = t.model_copy(update={"date": anchor_date.isoformat()})
+    occ = next_occurrences(tt, now_utc, hset)
+    if occ:
+        for dt in occ:
+            lines.append(f"   - Next: {format_dt(dt)}")
+    else:
+        lines.append("   - Next: (none)")
+    return "\n".join(lines)
+
+
+def pending_clarifications(batch: List[TaskExtract]) -> List[TaskExtract]:
+    return [t for t in batch if any(n in _QUESTIONS for n in needs_of(t))]
+
+
 def build_clarifications(batch: List[TaskExtract]) -> str:
-    lines = []
-    lines.append("I need a few clarifications before I can schedule:")
-    idx = 1
-    for t in batch:
-        needs = list(t.needs or [])
-        if t.tag == "unsure" and "tag" not in needs:
-            needs.append("tag")
-        if not needs:
-            continue
-        qs = []
-        if "time" in needs:
-            qs.append("What time of day (HH:MM UTC)?")
-        if "tag" in needs:
-            qs.append("Is this [work] or [personal]?")
-        if "anchor" in needs:
-            qs.append("If it repeats every N days, what start date? If none, say 'use today'.")
-        if "unsupported" in needs:
-            qs.append("The recurrence you described is unsupported. Please restate using only: one-time, daily, weekday, weekly, or every N days.")
-        if qs:
-            lines.append(f"{idx}) \"{t.name}\" — " + " ".join(qs))
-            idx += 1
-    if idx == 1:
+    pending = pending_clarifications(batch)
+    if not pending:
         return "Everything looks clear."
-    return "\n".join(lines)
+    return "\n".join([CLARIFICATIONS_HEADER] + [clarification_block(i, t) for i, t in enumerate(pending, 1)])
 
 
 def build_proposed_list(batch: List[TaskExtract]) -> str:
-    lines = []
-    lines.append("📋 Parsed Tasks:")
-    lines.append("")
-    i = 1
-    for t in batch:
-        lines.append(f"{i}. [{t.tag}] {t.name}")
-        if t.time:
-            lines.append(f"   - Time: {t.time} GMT")
-        else:
-            lines.append("   - Time: (missing)")
-        lines.append(f"   - Recurrence: {_recurrence_label(t)}")
-        lines.append("")
-        i += 1
-    return "\n".join(lines).rstrip()
+    return "\n\n".join([PROPOSAL_HEADER] + [proposal_block(i, t) for i, t in enumerate(batch, 1)])
 
 
 def build_final_schedule(batch: List[TaskExtract], now_utc: datetime, holidays: List[date], anchor_date: date) -> str:
-    lines = []
-    lines.append("📅 Next Occurrences:")
-    lines.append("")
-    i = 1
     hset = set(holidays)
-    for t in batch:
-        lines.append(f"{i}) [{t.tag}] \"{t.name}\"")
-        tt = t
-        if tt.kind == "every_n_days" and not tt.date:
-            tt = TaskExtract(**{**t.model_dump(), "date": anchor_date.isoformat()})
-        occ = next_occurrences(tt, now_utc, hset)
-        if occ:
-            for dt in occ:
-                lines.append(f"   - Next: {format_dt(dt)}")
-        else:
-            lines.append("   - Next: (none)")
-        lines.append("")
-        i += 1
-    return "\n".join(lines).rstrip()
+    return "\n\n".join([SCHEDULE_HEADER] + [schedule_block(i, t, now_utc, hset, anchor_date) for i, t in enumerate(batch, 1)])
@@ -0,0 +1,180 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+
+class _Noop:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_Noop":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+NOOP = _Noop()
+_current: ContextVar[Any] = ContextVar("bot_span", default=None)
+_rate = 0.0
+_exporter: Optional["FileExporter"] = None
+_rnd = random.Random()
+
+
+class _Unsampled:
+    __slots__ = ("token",)
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_Unsampled":
+        self.token = _current.set(NOOP)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _current.reset(self.token)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attrs", "error", "spans", "token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = _rnd.getrandbits(64)
+        if parent is None:
+            self.trace_id = _rnd.getrandbits(128)
+            self.parent_id = None
+            self.spans: List[Span] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.spans = parent.spans
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self.start = 0
+        self.end = 0
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.time_ns()
+        self.token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.end = time.time_ns()
+        _current.reset(self.token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.spans.append(self)
+        if self.parent_id is None and _exporter is not None:
+            _exporter.export(self.spans)
+
+
+def span(name: str, **attrs: Any):
+    if _rate <= 0.0:
+        return NOOP
+    parent = _current.get()
+    if parent is NOOP:
+        return NOOP
+    if parent is None and _rate < 1.0 and _rnd.random() >= _rate:
+        return _Unsampled()
+    return Span(name, parent, attrs)
+
+
+def current():
+    s = _current.get()
+    return NOOP if s is None else s
+
+
+def _attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+def to_otlp(spans: List[Span], service: str) -> Dict[str, Any]:
+    out = []
+    for s in spans:
+        d = {
+            "traceId": f"{s.trace_id:032x}",
+            "spanId": f"{s.span_id:016x}",
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start),
+            "endTimeUnixNano": str(s.end),
+            "attributes": [_attr(k, v) for k, v in s.attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id is not None:
+            d["parentSpanId"] = f"{s.parent_id:016x}"
+        out.append(d)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attr("service.name", service)]},
+            "scopeSpans": [{"scope": {"name": "bot.tracing"}, "spans": out}],
+        }]
+    }
+
+
+class FileExporter:
+    def __init__(self, path: str, service: str = "gpt5-bot") -> None:
+        self.path = path
+        self.service = service
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        self._q.put(spans)
+
+    def close(self) -> None:
+        self._q.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                spans = self._q.get()
+                if spans is None:
+                    return
+                f.write(json.dumps(to_otlp(spans, self.service), separators=(",", ":")) + "\n")
+                if self._q.empty():
+                    f.flush()
+
+
+def configure_tracing(sample_rate: float, path: str) -> None:
+    global _rate, _exporter
+    shutdown_tracing()
+    if sample_rate <= 0.0:
+        _rate = 0.0
+        return
+    _exporter = FileExporter(path)
+    _rate = min(1.0, sample_rate)
+
+
+def shutdown_tracing() -> None:
+    global _rate, _exporter
+    _rate = 0.0
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+
+
+atexit.register(shutdown_tracing)
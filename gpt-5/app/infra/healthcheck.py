@@ -1,3 +1,80 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Optional
+from aiohttp import web
+from bot import metrics
+
+
 def ok() -> str:
     return "OK"
 
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.lag = 0.0
+        self.beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def current_lag(self) -> float:
+        return max(self.lag, time.monotonic() - self.beat - self.interval)
+
+    async def _run(self) -> None:
+        while True:
+            t = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - t - self.interval)
+            self.beat = now
+
+
+class HealthServer:
+    def __init__(self, probe: Callable[[], Awaitable[bool]], max_lag: float = 1.0, probe_ttl: float = 30.0) -> None:
+        self.probe = probe
+        self.max_lag = max_lag
+        self.probe_ttl = probe_ttl
+        self.monitor = LoopMonitor()
+        self._llm_ok: Optional[bool] = None
+        self._llm_checked = 0.0
+        self._runner: Optional[web.AppRunner] = None
+        metrics.gauge("event_loop_lag_seconds", "Event loop scheduling lag", self.monitor.current_lag)
+        app = web.Application()
+        app.router.add_get("/healthz", self._healthz)
+        app.router.add_get("/metrics", self._metrics)
+        self.app = app
+
+    async def start(self, host: str, port: int) -> None:
+        self.monitor.start()
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self) -> None:
+        self.monitor.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _llm_reachable(self) -> bool:
+        now = time.monotonic()
+        if self._llm_ok is None or now - self._llm_checked > self.probe_ttl:
+            self._llm_ok = await self.probe()
+            self._llm_checked = time.monotonic()
+        return self._llm_ok
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        lag = self.monitor.current_lag()
+        llm = await self._llm_reachable()
+        healthy = lag <= self.max_lag and llm
+        body = {"status": "ok" if healthy else "unhealthy", "loop_lag_ms": round(lag * 1000, 2), "llm_reachable": llm}
+        return web.Response(status=200 if healthy else 503, text=json.dumps(body), content_type="application/json")
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
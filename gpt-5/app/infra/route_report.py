@@ -0,0 +1,98 @@
+import argparse
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+
+CHAR_STEPS = (200, 400, 600, 1000, 2000, 4000)
+CLAUSE_STEPS = (1, 2, 3, 4, 6, 8)
+
+
+def load_decisions(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if r.get("logger") == "app.llm.route":
+                    yield r
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+def by_route(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for r in rows:
+        groups[r["route"]].append(r)
+    out = {}
+    for name, rs in groups.items():
+        lat = [r["latency_ms"] for r in rs]
+        out[name] = {
+            "count": len(rs),
+            "share": round(len(rs) / len(rows), 3),
+            "ok": sum(1 for r in rs if r["outcome"] == "ok"),
+            "repaired": sum(1 for r in rs if r["outcome"] == "repaired"),
+            "failed": sum(1 for r in rs if r["outcome"] == "failed"),
+            "escalated": sum(1 for r in rs if r["escalated"]),
+            "explored": sum(1 for r in rs if r.get("explore")),
+            "p50_ms": _percentile(lat, 0.5),
+            "p95_ms": _percentile(lat, 0.95),
+        }
+    return out
+
+
+def sweep(rows: List[Dict[str, Any]], cheap: str) -> List[Dict[str, Any]]:
+    served = [r for r in rows if r["route"] == cheap]
+    out = []
+    for mc in CHAR_STEPS:
+        for mk in CLAUSE_STEPS:
+            def easy(r: Dict[str, Any]) -> bool:
+                return r["chars"] <= mc and r["clauses"] <= mk
+            kept = [r for r in served if easy(r)]
+            out.append({
+                "max_chars": mc,
+                "max_clauses": mk,
+                "cheap_share": round(sum(1 for r in rows if easy(r)) / len(rows), 3),
+                "cheap_samples": len(kept),
+                "cheap_repair_rate": round(sum(1 for r in kept if r["outcome"] != "ok") / len(kept), 3) if kept else None,
+            })
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Summarise logged routing decisions and sweep the extraction routing thresholds offline")
+    p.add_argument("paths", nargs="+", help="JSON-lines log files (LOG_FILE)")
+    p.add_argument("--cheap", default="", help="name of the cheapest route, defaults to the first configured one")
+    p.add_argument("--max-repair", type=float, default=0.2, help="acceptable repair rate on the cheap route")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args()
+    rows = list(load_decisions(args.paths))
+    if not rows:
+        raise SystemExit("no routing decisions found")
+    routes = by_route(rows)
+    cheap = args.cheap or next((r["route"] for r in rows if r.get("tier") == 0), rows[0]["route"])
+    grid = sweep(rows, cheap)
+    fit = [g for g in grid if g["cheap_repair_rate"] is not None and g["cheap_repair_rate"] <= args.max_repair]
+    best = max(fit, key=lambda g: (g["cheap_share"], -g["cheap_repair_rate"], g["max_chars"], g["max_clauses"]), default=None)
+    if args.json:
+        print(json.dumps({"decisions": len(rows), "routes": routes, "cheap": cheap, "sweep": grid, "suggested": best}, indent=2))
+        return
+    print(f"{len(rows)} decisions")
+    print(f"{'route':<12} {'count':>7} {'share':>6} {'ok':>6} {'repair':>7} {'failed':>7} {'escal':>6} {'p50ms':>8} {'p95ms':>8}")
+    for name, s in sorted(routes.items()):
+        print(f"{name:<12} {s['count']:>7} {s['share']:>6} {s['ok']:>6} {s['repaired']:>7} {s['failed']:>7} {s['escalated']:>6} {s['p50_ms']:>8} {s['p95_ms']:>8}")
+    print(f"\nthreshold sweep on '{cheap}' (samples served by it)")
+    print(f"{'max_chars':>9} {'max_clauses':>11} {'cheap_share':>11} {'samples':>8} {'repair_rate':>11}")
+    for g in grid:
+        print(f"{g['max_chars']:>9} {g['max_clauses']:>11} {g['cheap_share']:>11} {g['cheap_samples']:>8} {str(g['cheap_repair_rate']):>11}")
+    if best:
+        print(f"\nsuggested: LLM_ROUTE_MAX_CHARS={best['max_chars']} LLM_ROUTE_MAX_CLAUSES={best['max_clauses']} (cheap share {best['cheap_share']}, repair rate {best['cheap_repair_rate']})")
+
+
+if __name__ == "__main__":
+    main()
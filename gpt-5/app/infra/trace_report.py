@@ -0,0 +1,110 @@
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+
+def _value(v: Dict[str, Any]) -> Any:
+    for k in ("stringValue", "boolValue", "doubleValue"):
+        if k in v:
+            return v[k]
+    if "intValue" in v:
+        return int(v["intValue"])
+    return None
+
+
+def load_traces(path: str) -> Iterator[List[Dict[str, Any]]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = json.loads(line)
+            except ValueError:
+                continue
+            spans = []
+            for rs in doc.get("resourceSpans", []):
+                for ss in rs.get("scopeSpans", []):
+                    for s in ss.get("spans", []):
+                        spans.append({
+                            "id": s["spanId"],
+                            "parent": s.get("parentSpanId"),
+                            "trace": s["traceId"],
+                            "name": s["name"],
+                            "start": int(s["startTimeUnixNano"]),
+                            "end": int(s["endTimeUnixNano"]),
+                            "attrs": {a["key"]: _value(a["value"]) for a in s.get("attributes", [])},
+                            "error": s.get("status", {}).get("code") == 2,
+                        })
+            if spans:
+                yield spans
+
+
+def _root(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ids = {s["id"] for s in spans}
+    roots = [s for s in spans if s["parent"] not in ids]
+    return min(roots, key=lambda s: s["start"])
+
+
+def render(spans: List[Dict[str, Any]], width: int) -> List[str]:
+    root = _root(spans)
+    t0, total = root["start"], max(1, root["end"] - root["start"])
+    children = defaultdict(list)
+    for s in spans:
+        if s is not root:
+            children[s["parent"]].append(s)
+    lines = [f"trace {root['trace']}  {root['name']}  {total / 1e6:.1f} ms"]
+
+    def walk(s: Dict[str, Any], depth: int) -> None:
+        off = int((s["start"] - t0) / total * width)
+        n = max(1, int((s["end"] - s["start"]) / total * width))
+        bar = " " * off + "█" * min(n, width - off)
+        attrs = " ".join(f"{k}={v}" for k, v in s["attrs"].items())
+        label = ("  " * depth + s["name"])[:36]
+        mark = " !" if s["error"] else ""
+        lines.append(f"  {label:<36} {bar:<{width}} {(s['end'] - s['start']) / 1e6:9.1f} ms {attrs}{mark}")
+        for c in sorted(children[s["id"]], key=lambda c: c["start"]):
+            walk(c, depth + 1)
+
+    walk(root, 0)
+    return lines
+
+
+def self_time(traces: List[List[Dict[str, Any]]]) -> Dict[str, float]:
+    out: Dict[str, float] = defaultdict(float)
+    for spans in traces:
+        child_ns: Dict[str, int] = defaultdict(int)
+        for s in spans:
+            if s["parent"]:
+                child_ns[s["parent"]] += s["end"] - s["start"]
+        for s in spans:
+            out[s["name"]] += max(0, s["end"] - s["start"] - child_ns[s["id"]]) / 1e6
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Flame-style breakdown of the slowest traces")
+    p.add_argument("path", nargs="?", default="traces/traces.jsonl")
+    p.add_argument("--top", type=int, default=5)
+    p.add_argument("--width", type=int, default=40)
+    p.add_argument("--name", default="", help="only traces whose root span has this name")
+    args = p.parse_args()
+    traces = [t for t in load_traces(args.path) if not args.name or _root(t)["name"] == args.name]
+    if not traces:
+        print("no traces", file=sys.stderr)
+        sys.exit(1)
+    traces.sort(key=lambda t: _root(t)["end"] - _root(t)["start"], reverse=True)
+    for t in traces[: args.top]:
+        print("\n".join(render(t, args.width)))
+        print()
+    totals = self_time(traces)
+    grand = sum(totals.values()) or 1.0
+    print(f"self time across {len(traces)} traces:")
+    for name, ms in sorted(totals.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"  {name:<36} {ms:10.1f} ms {ms / grand * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+from bot.llm.local_classifier import LocalModel, features, load
+from bot.llm.prompts import CLASSIFY_SYSTEM
+
+
+THRESHOLDS = (0.55, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99)
+
+
+def _tags(content: str) -> Dict[int, str]:
+    s, e = content.find("["), content.rfind("]")
+    out = {}
+    for x in json.loads(content[s : e + 1] if s != -1 and e > s else content):
+        if isinstance(x, dict) and x.get("tag") in ("work", "personal", "unsure"):
+            try:
+                out[int(x.get("id"))] = x["tag"]
+            except (TypeError, ValueError):
+                pass
+    return out
+
+
+def load_labels(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    # CLASSIFY_LABEL_FILE lines, or classify calls out of a record-mode cassette
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if "tag" in r:
+                    yield {"call": r.get("call", f"{path}:{n}"), "name": r["name"], "raw": r["raw"], "tag": r["tag"]}
+                    continue
+                msgs = r.get("messages") or []
+                if len(msgs) < 2 or msgs[0].get("content") != CLASSIFY_SYSTEM:
+                    continue
+                try:
+                    items, tags = json.loads(msgs[-1]["content"]), _tags(r["content"])
+                except (ValueError, KeyError):
+                    continue
+                for e in items:
+                    if e.get("id") in tags:
+                        yield {"call": r.get("key", f"{path}:{n}"), "name": e.get("name", ""), "raw": e.get("raw", ""), "tag": tags[e["id"]]}
+
+
+def split(rows: List[Dict[str, Any]], holdout: float) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # whole calls go to one side, so eval can count calls avoided
+    train, test = [], []
+    for r in rows:
+        (test if zlib.crc32(r["call"].encode()) % 1000 < holdout * 1000 else train).append(r)
+    return train, test
+
+
+def fit(rows: List[Dict[str, Any]], bits: int, epochs: int, lr: float, l2: float, seed: int) -> array:
+    dim = 1 << bits
+    w = array("f", [0.0]) * (dim + 1)
+    g2 = [1e-6] * (dim + 1)
+    data = [(features(r["name"], r["raw"], bits) + [dim], 1.0 if r["tag"] == "work" else 0.0) for r in rows if r["tag"] != "unsure"]
+    rnd = random.Random(seed)
+    for _ in range(epochs):
+        rnd.shuffle(data)
+        for fs, y in data:
+            z = sum(w[i] for i in fs)
+            g = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z)))) - y
+            for i in fs:
+                gi = g + l2 * w[i]
+                g2[i] += gi * gi
+                w[i] -= lr * gi / math.sqrt(g2[i])
+    return w
+
+
+def evaluate(m: LocalModel, rows: List[Dict[str, Any]], threshold: float) -> Dict[str, Any]:
+    # agreement counts an LLM "unsure" as a miss whenever the local model answered
+    calls: Dict[str, bool] = defaultdict(lambda: True)
+    local = agree = 0
+    for r in rows:
+        tag, conf = m.predict(r["name"], r["raw"])
+        ok = conf >= threshold
+        calls[r["call"]] &= ok
+        if ok:
+            local += 1
+            agree += tag == r["tag"]
+    n = len(rows)
+    return {
+        "threshold": threshold,
+        "tasks": n,
+        "local_share": round(local / n, 3) if n else 0.0,
+        "agreement": round(agree / local, 4) if local else None,
+        "calls": len(calls),
+        "calls_avoided": round(sum(calls.values()) / len(calls), 3) if calls else 0.0,
+    }
+
+
+def pick_threshold(m: LocalModel, rows: List[Dict[str, Any]], target: float) -> float:
+    # lowest confidence whose confident slice still agrees with the LLM at least `target`
+    scored = sorted(((m.predict(r["name"], r["raw"]), r["tag"]) for r in rows), key=lambda x: -x[0][1])
+    best, agree = 1.0, 0
+    for k, ((tag, conf), label) in enumerate(scored, 1):
+        agree += tag == label
+        if agree / k >= target and (k == len(scored) or scored[k][0][1] < conf):
+            best = conf
+    return best
+
+
+def _micros(m: LocalModel, rows: List[Dict[str, Any]]) -> float:
+    rows = rows[:2000]
+    t0 = time.perf_counter()
+    for r in rows:
+        m.tag(r["name"], r["raw"])
+    return (time.perf_counter() - t0) / max(1, len(rows)) * 1e6
+
+
+def _print(rep: Dict[str, Any], sweep: List[Dict[str, Any]]) -> None:
+    print(f"{rep['tasks']} tasks in {rep['calls']} calls, threshold {rep['threshold']:.3f}: "
+          f"local {rep['local_share']:.1%}, agreement {rep['agreement']}, calls avoided {rep['calls_avoided']:.1%}")
+    print(f"  {'thr':>5} {'local':>7} {'agree':>7} {'calls avoided':>14}")
+    for r in sweep:
+        print(f"  {r['threshold']:>5} {r['local_share']:>7} {str(r['agreement']):>7} {r['calls_avoided']:>14}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Train or evaluate the local work/personal classifier on logged LLM classify labels")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train")
+    t.add_argument("paths", nargs="+", help="CLASSIFY_LABEL_FILE logs or record-mode cassettes")
+    t.add_argument("--out", default="models/classifier.bin")
+    t.add_argument("--bits", type=int, default=16)
+    t.add_argument("--epochs", type=int, default=6)
+    t.add_argument("--lr", type=float, default=0.5)
+    t.add_argument("--l2", type=float, default=1e-4)
+    t.add_argument("--holdout", type=float, default=0.2)
+    t.add_argument("--target", type=float, default=0.98, help="agreement with the LLM required on held-out calls")
+    t.add_argument("--seed", type=int, default=0)
+    e = sub.add_parser("eval")
+    e.add_argument("paths", nargs="+")
+    e.add_argument("--model", required=True)
+    e.add_argument("--threshold", type=float, default=None)
+    for p in (t, e):
+        p.add_argument("--json", action="store_true")
+    a = ap.parse_args()
+
+    latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for r in load_labels(a.paths):
+        latest[(r["name"], r["raw"])] = r
+    rows = list(latest.values())
+    if not rows:
+        raise SystemExit("no labelled classify calls found")
+
+    if a.cmd == "eval":
+        m = load(a.model)
+        thr = m.threshold if a.threshold is None else a.threshold
+        test = rows
+    else:
+        train, test = split(rows, a.holdout)
+        if not train or not test:
+            raise SystemExit(f"need labels on both sides of the split, got {len(train)}/{len(test)}")
+        w = fit(train, a.bits, a.epochs, a.lr, a.l2, a.seed)
+        meta = {"bits": a.bits, "labels": len(train), "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "target": a.target}
+        m = LocalModel(w, meta)
+        thr = pick_threshold(m, test, a.target)
+        m.threshold = thr
+        m.meta.update(threshold=thr, version=f"v{meta['trained_at'][:10].replace('-', '')}-{hashlib.sha256(w.tobytes()).hexdigest()[:8]}")
+        m.save(a.out)
+    rep = evaluate(m, test, thr)
+    rep["model"] = m.meta.get("version")
+    rep["us_per_task"] = round(_micros(m, test), 1)
+    sweep = [evaluate(m, test, x) for x in THRESHOLDS]
+    if a.json:
+        print(json.dumps({"report": rep, "sweep": sweep}, indent=2))
+        return
+    if a.cmd == "train":
+        print(f"trained {rep['model']} on {len(train)} tasks, wrote {a.out}")
+    _print(rep, sweep)
+    print(f"  {rep['us_per_task']} us per task")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import math
+import sqlite3
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+# USD per 1M input / output tokens; override with --prices
+PRICES = {"gpt-4o-mini": (0.15, 0.6), "gpt-4o": (2.5, 10.0), "gpt-5": (1.25, 10.0), "gpt-5-mini": (0.25, 2.0)}
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    out = dict(PRICES)
+    for part in spec.split(","):
+        if "=" in part:
+            name, _, v = part.partition("=")
+            pin, _, pout = v.partition("/")
+            out[name.strip()] = (float(pin), float(pout or pin))
+    return out
+
+
+def load(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        if path.endswith((".db", ".sqlite")):
+            db = sqlite3.connect(path)
+            db.row_factory = sqlite3.Row
+            for r in db.execute("select * from rollups"):
+                yield {"kind": "rollup", "model": r["model"], "op": r["op"], "user": r["user"], "calls": r["calls"], "errors": r["errors"], "in": r["input_tokens"], "out": r["output_tokens"], "s": r["seconds"]}
+            for r in db.execute("select * from calls"):
+                yield {"kind": "call", "model": r["model"], "op": r["op"], "user": r["user"], "prompt": r["prompt"], "in": r["input_tokens"], "out": r["output_tokens"], "s": r["seconds"], "ok": bool(r["ok"]), "weight": r["weight"]}
+            db.close()
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def cost(model: str, tin: float, tout: float, prices: Dict[str, Tuple[float, float]]) -> float:
+    pin, pout = prices.get(model, (0.0, 0.0))
+    return (tin * pin + tout * pout) / 1e6
+
+
+def rank(rollups: List[Dict[str, Any]], key, prices: Dict[str, Tuple[float, float]], top: int) -> List[Dict[str, Any]]:
+    acc: Dict[Any, List[float]] = defaultdict(lambda: [0, 0, 0, 0, 0.0, 0.0])
+    for r in rollups:
+        a = acc[key(r)]
+        a[0] += r["calls"]
+        a[1] += r["errors"]
+        a[2] += r["in"]
+        a[3] += r["out"]
+        a[4] += r["s"]
+        a[5] += cost(r["model"], r["in"], r["out"], prices)
+    rows = [
+        {"key": k, "calls": a[0], "errors": a[1], "in": a[2], "out": a[3], "usd": round(a[5], 6), "mean_s": round(a[4] / a[0], 3) if a[0] else 0.0}
+        for k, a in acc.items()
+    ]
+    return sorted(rows, key=lambda r: (r["usd"], r["in"] + r["out"]), reverse=True)[:top]
+
+
+def top_prompts(calls: List[Dict[str, Any]], prices: Dict[str, Tuple[float, float]], top: int) -> List[Dict[str, Any]]:
+    acc: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0, 0, 0.0])
+    for c in calls:
+        a = acc[(c["op"], c["model"], c["prompt"])]
+        a[0] += 1
+        a[1] += c["in"]
+        a[2] += c["out"]
+        a[3] += c["s"]
+    rows = [
+        {"op": op, "model": m, "prompt": p, "calls": a[0], "in": a[1] // a[0], "out": a[2] // a[0], "usd": round(cost(m, a[1], a[2], prices), 6), "mean_s": round(a[3] / a[0], 3)}
+        for (op, m, p), a in acc.items()
+    ]
+    return sorted(rows, key=lambda r: r["usd"], reverse=True)[:top]
+
+
+def _pearson(xs: List[float], ys: List[float]) -> float:
+    n = len(xs)
+    if n < 3:
+        return float("nan")
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    return sxy / math.sqrt(sxx * syy) if sxx > 0 and syy > 0 else float("nan")
+
+
+def correlation(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for c in calls:
+        if c.get("ok", True):
+            groups[(c["model"], c["op"])].append(c)
+    out = []
+    for (m, op), cs in sorted(groups.items()):
+        s = [c["s"] for c in cs]
+        tout = [c["out"] for c in cs]
+        n = len(cs)
+        mo, ms = sum(tout) / n, sum(s) / n
+        sxx = sum((x - mo) ** 2 for x in tout)
+        slope = sum((x - mo) * (y - ms) for x, y in zip(tout, s)) / sxx if sxx > 0 else float("nan")
+        out.append({
+            "model": m, "op": op, "calls": n,
+            "r_in": round(_pearson([c["in"] for c in cs], s), 3),
+            "r_out": round(_pearson(tout, s), 3),
+            "ms_per_out_token": round(slope * 1000, 2),
+        })
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Rank LLM spend by call site, user and prompt from usage rollups (JSONL or SQLite)")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--prices", default="", help="model=in/out USD per 1M tokens, comma separated")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--json", action="store_true")
+    a = ap.parse_args()
+    prices = parse_prices(a.prices)
+    rollups, calls = [], []
+    for r in load(a.paths):
+        (rollups if r.get("kind") == "rollup" else calls).append(r)
+    rep = {
+        "sites": rank(rollups, lambda r: f"{r['model']}/{r['op']}", prices, a.top),
+        "users": rank(rollups, lambda r: r["user"], prices, a.top),
+        "prompts": top_prompts(calls, prices, a.top),
+        "correlation": correlation(calls),
+    }
+    if a.json:
+        print(json.dumps(rep, indent=2))
+        return
+    for title in ("sites", "users"):
+        print(f"top {title}")
+        print(f"  {'key':<34} {'calls':>7} {'err':>5} {'in tok':>10} {'out tok':>9} {'usd':>10} {'mean s':>7}")
+        for r in rep[title]:
+            print(f"  {str(r['key']):<34} {r['calls']:>7} {r['errors']:>5} {r['in']:>10} {r['out']:>9} {r['usd']:>10.4f} {r['mean_s']:>7}")
+    print("top prompts (sampled calls)")
+    print(f"  {'op':<15} {'model':<14} {'prompt':<17} {'calls':>5} {'in':>6} {'out':>6} {'usd':>9} {'mean s':>7}")
+    for r in rep["prompts"]:
+        print(f"  {r['op']:<15} {r['model']:<14} {r['prompt']:<17} {r['calls']:>5} {r['in']:>6} {r['out']:>6} {r['usd']:>9.5f} {r['mean_s']:>7}")
+    print("tokens vs latency (sampled calls)")
+    print(f"  {'model':<14} {'op':<15} {'calls':>6} {'r(in,s)':>8} {'r(out,s)':>9} {'ms/out tok':>11}")
+    for r in rep["correlation"]:
+        print(f"  {r['model']:<14} {r['op']:<15} {r['calls']:>6} {r['r_in']:>8} {r['r_out']:>9} {r['ms_per_out_token']:>11}")
+
+
+if __name__ == "__main__":
+    main()